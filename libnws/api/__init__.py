@@ -1,3 +1,9 @@
+BUG_REPORT_MESSAGE = (
+    'This is an unexpected result and probably a bug. Please report it '
+    'on GitHub at https://github.com/1npo/nwsc/issues.'
+)
+
+
 # See:
 # - https://github.com/weather-gov/api/discussions/478
 # - https://weather-gov.github.io/api/general-faqs, especially these sections:
@@ -31,6 +37,15 @@ NWS_API_ZONE_FORECASTS = 'http://api.weather.gov/zones/forecast/'
 NWS_API_ZONES = 'http://api.weather.gov/zones/'
 
 
+# The NWS and USCB don't publish their rate limits, but both throttle clients that
+# make too many requests in a short time. These are the default (requests per second,
+# burst size) limits used by `libnws.api.rate_limit` for each host.
+API_RATE_LIMITS = {
+	'api.weather.gov':				(5, 10),
+	'geocoding.geo.census.gov':		(2, 5),
+}
+
+
 # See: https://codes.wmo.int/common/unit
 WMI_UNIT_MAP = {                            
 	'wmoUnit:Pa':               'pa',       # pressure in pascals
@@ -1,16 +1,107 @@
 import pytz
+from typing import Any, Callable
 from datetime import datetime
+from requests import Response
 from requests_cache import CachedSession
+from libnws.api.rate_limit import RETRY_STATUS_CODES
+from libnws.api.single_flight import SingleFlight
+from libnws.api.processed_cache import ProcessedCache, MISSING
+from libnws.api.tracing import set_request_url, span
 
 
-def api_request(
+# Concurrent requests for the same URL with the same session share one request and one
+# JSON decode. Callers get the same response dict, so it must be treated as read-only.
+_in_flight_requests = SingleFlight()
+
+# Processed results shared by every call to `api_request_processed`
+processed_cache = ProcessedCache()
+
+
+def _get_response(
+	session: CachedSession,
+	url: str
+) -> Response:
+	with span('http.request', url=url) as request_span:
+		response = session.get(url)
+		if request_span.recording:
+			from_cache = getattr(response, 'from_cache', False)
+			request_span.set('status_code', response.status_code)
+			request_span.set('from_cache', from_cache)
+			request_span.set('bytes', len(response.content))
+			# How long the server took to send the response headers. requests doesn't
+			# break it down any further (eg into DNS lookup and connecting).
+			if not from_cache:
+				request_span.set('server_s', response.elapsed.total_seconds())
+	# Any retries have already been made by the session's transport adapter (see
+	# `libnws.api.rate_limit`), so fail here instead of handing an error response
+	# to the parsers
+	if response.status_code in RETRY_STATUS_CODES:
+		response.raise_for_status()
+	return response
+
+
+def _api_request(
 	session: CachedSession,
 	url: str
 ) -> dict:
-	response = session.get(url)
-	data = response.json()
+	response = _get_response(session, url)
+	with span('json.decode', url=url, bytes=len(response.content)):
+		data = response.json()
 	created_at = response.created_at
-	return {'response': data, 'retrieved_at': created_at}
+	return {
+		'response':		data,
+		'retrieved_at':	created_at,
+		'status_code':	response.status_code,
+	}
+
+
+def api_request(
+	session: CachedSession,
+	url: str
+) -> dict:
+	set_request_url(url)
+	return _in_flight_requests.do((id(session), url), _api_request, session, url)
+
+
+def _api_request_processed(
+	session: CachedSession,
+	url: str,
+	process: Callable[[dict, datetime], Any]
+) -> Any:
+	response = _get_response(session, url)
+	# The ETag only changes when the content of the response changes. Without one, the
+	# time the response was cached tells us whether requests-cache got a new response.
+	validator = response.headers.get('ETag') or response.created_at
+	key = (url, process, validator)
+	processed = processed_cache.get(key)
+	if processed is MISSING:
+		with span('json.decode', url=url, bytes=len(response.content)):
+			data = response.json()
+		processed = process(data, response.created_at)
+		processed_cache.set(key, processed)
+	return processed
+
+
+def api_request_processed(
+	session: CachedSession,
+	url: str,
+	process: Callable[[dict, datetime], Any]
+) -> Any:
+	"""Get a response and process it, reusing the processed result if the response
+	hasn't changed since the last time it was processed
+
+	Use this instead of `api_request` for large responses that rarely change. Processed
+	results are shared between callers, so they must be treated as read-only. When the
+	API sends an ETag, a result is reused for as long as the content is unchanged, so
+	its `retrieved_at` is when that content was first retrieved.
+
+	:param process: A function that's called with the response and the time it was
+		retrieved, like the `process_*` functions in `libnws.api`. It's part of the
+		cache key, so it should be a module-level function rather than a lambda.
+	"""
+	set_request_url(url)
+	return _in_flight_requests.do((id(session), url, process),
+								  _api_request_processed, session, url, process)
 
 
 def parse_timestamp(timestamp: str) -> datetime | None:
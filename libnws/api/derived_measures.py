@@ -0,0 +1,266 @@
+"""Derive humidity, heat index, wind chill, apparent temperature, and wet-bulb
+temperature from the measures that are reported
+
+The API often leaves an observation's relative humidity, wind chill, and heat index
+null, and forecast periods don't have a wind chill or heat index at all. These are
+computed here the same way the NWS computes them, so derived values match the ones the
+API reports when it has them.
+
+The functions work on columns (sequences of values, with `None` for missing values) so
+that a whole batch is derived with a few passes over plain lists, instead of a function
+call per row and field. Missing inputs give `None`.
+
+`derive_measures` is the optional stage for one record, run on the dict of fields after
+`libnws.api.conversions.convert_measures`. It only fills in fields that the record has
+and that are null, so the values the API reported are kept. `derive_observations` does
+the same for a batch of observations, and `get_forecast_derived_columns` gets every
+derived measure for the periods of a forecast.
+
+For example:
+
+.. code-block:: python
+
+	observations = derive_observations(get_all_observations(session, 'KBOS'))
+	columns = get_forecast_derived_columns(forecast.periods)
+	for period, feels_like_f in zip(forecast.periods, columns['apparent_temperature_f']):
+		print(period.period_name, period.temperature_f, feels_like_f)
+
+See:
+	- https://www.wpc.ncep.noaa.gov/html/heatindex_equation.shtml
+	- https://www.weather.gov/media/epz/wxcalc/windChill.pdf
+	- Stull (2011), "Wet-Bulb Temperature from Relative Humidity and Air Temperature"
+"""
+
+import re
+import math
+import logging
+from typing import Dict, List, Sequence
+from libnws.model.weather import ForecastPeriod, Observation
+logger = logging.getLogger(__name__)
+
+
+# Magnus formula coefficients for saturation vapor pressure over water (Alduchov and
+# Eskridge, 1996)
+MAGNUS_A = 17.625
+MAGNUS_B = 243.04
+
+# Wind chill is only defined at or below 50 degrees F, with wind of at least 3 mph
+WIND_CHILL_MAX_TEMP_F = 50
+WIND_CHILL_MIN_SPEED_MPH = 3
+
+# The simple heat index formula is used when its result is below 80 degrees F, and the
+# full regression otherwise (as the API does)
+HEAT_INDEX_REGRESSION_MIN_F = 80
+
+# Forecast wind speeds are text (eg `5 mph` or `10 to 15 mph`)
+FORECAST_WIND_SPEED_PATTERN = re.compile(r'(\d+)\s*mph')
+
+DERIVED_FIELDS = (
+	'relative_humidity_pc',
+	'heat_index_c',
+	'wind_chill_c',
+	'apparent_temperature_c',
+	'wet_bulb_c',
+)
+
+
+def _c_to_f(values: Sequence[float]) -> List[float]:
+	return [None if value is None else round(value * 9/5 + 32, 2) for value in values]
+
+
+def get_relative_humidity(
+	temperatures_c: Sequence[float],
+	dew_points_c: Sequence[float]
+) -> List[float]:
+	"""Get the relative humidity (in percent) from the temperature and dew point"""
+	exp = math.exp
+	a, b = MAGNUS_A, MAGNUS_B
+	return [None if t is None or td is None
+			else round(min(100.0, 100 * exp(a * td / (b + td) - a * t / (b + t))), 2)
+			for t, td in zip(temperatures_c, dew_points_c)]
+
+
+def _get_heat_index_f(t: float, rh: float) -> float:
+	"""The NWS heat index algorithm, in degrees F"""
+	heat_index = 0.5 * (t + 61.0 + (t - 68.0) * 1.2 + rh * 0.094)
+	if heat_index < HEAT_INDEX_REGRESSION_MIN_F:
+		return heat_index
+	heat_index = (-42.379 + 2.04901523 * t + 10.14333127 * rh
+				  - 0.22475541 * t * rh - 0.00683783 * t * t
+				  - 0.05481717 * rh * rh + 0.00122874 * t * t * rh
+				  + 0.00085282 * t * rh * rh - 0.00000199 * t * t * rh * rh)
+	if rh < 13 and 80 <= t <= 112:
+		heat_index -= ((13 - rh) / 4) * math.sqrt((17 - abs(t - 95)) / 17)
+	elif rh > 85 and 80 <= t <= 87:
+		heat_index += ((rh - 85) / 10) * ((87 - t) / 5)
+	return heat_index
+
+
+def get_heat_index(
+	temperatures_c: Sequence[float],
+	relative_humidities_pc: Sequence[float]
+) -> List[float]:
+	"""Get the heat index (in degrees C) from the temperature and relative humidity"""
+	heat_index_f = _get_heat_index_f
+	return [None if t is None or rh is None
+			else round((heat_index_f(t * 9/5 + 32, rh) - 32) * 5/9, 2)
+			for t, rh in zip(temperatures_c, relative_humidities_pc)]
+
+
+def get_wind_chill(
+	temperatures_c: Sequence[float],
+	wind_speeds_kmh: Sequence[float]
+) -> List[float]:
+	"""Get the wind chill (in degrees C) from the temperature and wind speed. It's
+	`None` when it's too warm or the wind is too light for wind chill to apply.
+	"""
+	wind_chills = []
+	for t, speed in zip(temperatures_c, wind_speeds_kmh):
+		if t is None or speed is None:
+			wind_chills.append(None)
+			continue
+		t_f = t * 9/5 + 32
+		speed_mph = speed / 1.609344
+		if t_f > WIND_CHILL_MAX_TEMP_F or speed_mph < WIND_CHILL_MIN_SPEED_MPH:
+			wind_chills.append(None)
+			continue
+		speed_factor = speed_mph ** 0.16
+		wind_chill_f = (35.74 + 0.6215 * t_f - 35.75 * speed_factor
+						+ 0.4275 * t_f * speed_factor)
+		wind_chills.append(round((wind_chill_f - 32) * 5/9, 2))
+	return wind_chills
+
+
+def get_apparent_temperature(
+	temperatures_c: Sequence[float],
+	heat_indexes_c: Sequence[float],
+	wind_chills_c: Sequence[float]
+) -> List[float]:
+	"""Get the apparent ("feels like") temperature (in degrees C): the wind chill when
+	it applies, the heat index when it's at least 80 degrees F, and the temperature
+	otherwise
+	"""
+	heat_index_min_c = (HEAT_INDEX_REGRESSION_MIN_F - 32) * 5/9
+	return [None if t is None
+			else wind_chill if wind_chill is not None
+			else heat_index if heat_index is not None and t >= heat_index_min_c
+			else t
+			for t, heat_index, wind_chill in zip(temperatures_c, heat_indexes_c,
+												 wind_chills_c)]
+
+
+def get_wet_bulb(
+	temperatures_c: Sequence[float],
+	relative_humidities_pc: Sequence[float]
+) -> List[float]:
+	"""Get the wet-bulb temperature (in degrees C) from the temperature and relative
+	humidity, with Stull's formula for air near sea level pressure
+	"""
+	atan = math.atan
+	return [None if t is None or rh is None
+			else round(t * atan(0.151977 * math.sqrt(rh + 8.313659))
+					   + atan(t + rh) - atan(rh - 1.676331)
+					   + 0.00391838 * rh ** 1.5 * atan(0.023101 * rh)
+					   - 4.686035, 2)
+			for t, rh in zip(temperatures_c, relative_humidities_pc)]
+
+
+def _fill(reported: Sequence[float], derived: List[float]) -> List[float]:
+	return [derived_value if value is None else value
+			for value, derived_value in zip(reported, derived)]
+
+
+def get_derived_columns(columns: Dict[str, Sequence[float]]) -> Dict[str, List[float]]:
+	"""Derive every measure in `DERIVED_FIELDS` (in degrees C and F) for a batch of
+	records
+
+	:param columns: The records' `temperature_c`, `dew_point_c`, `wind_speed_kmh`, and
+		(optionally) the reported `relative_humidity_pc`, `heat_index_c`, and
+		`wind_chill_c`. Reported values are kept, and only missing ones are derived.
+	"""
+	temperatures = columns['temperature_c']
+	n_rows = len(temperatures)
+	missing = [None] * n_rows
+	relative_humidities = get_relative_humidity(temperatures,
+												columns.get('dew_point_c', missing))
+	relative_humidities = _fill(columns.get('relative_humidity_pc', missing),
+								relative_humidities)
+	heat_indexes = _fill(columns.get('heat_index_c', missing),
+						 get_heat_index(temperatures, relative_humidities))
+	wind_chills = _fill(columns.get('wind_chill_c', missing),
+						get_wind_chill(temperatures, columns.get('wind_speed_kmh', missing)))
+	derived = {
+		'relative_humidity_pc':		relative_humidities,
+		'heat_index_c':				heat_indexes,
+		'heat_index_f':				_c_to_f(heat_indexes),
+		'wind_chill_c':				wind_chills,
+		'wind_chill_f':				_c_to_f(wind_chills),
+	}
+	apparent_temperatures = get_apparent_temperature(temperatures, heat_indexes, wind_chills)
+	wet_bulbs = get_wet_bulb(temperatures, relative_humidities)
+	derived.update({
+		'apparent_temperature_c':	apparent_temperatures,
+		'apparent_temperature_f':	_c_to_f(apparent_temperatures),
+		'wet_bulb_c':				wet_bulbs,
+		'wet_bulb_f':				_c_to_f(wet_bulbs),
+	})
+	return derived
+
+
+def derive_measures(data: dict) -> dict:
+	"""Fill in the derived fields that a record has but that are null. Run after
+	`convert_measures`.
+	"""
+	if data.get('temperature_c') is None:
+		return data
+	columns = {field: [data.get(field)]
+			   for field in ('temperature_c', 'dew_point_c', 'wind_speed_kmh',
+							 'relative_humidity_pc', 'heat_index_c', 'wind_chill_c')}
+	for field, values in get_derived_columns(columns).items():
+		if field in data and data[field] is None:
+			data[field] = values[0]
+	return data
+
+
+def _get_columns(items: Sequence, fields: Sequence[str]) -> Dict[str, list]:
+	return {field: [getattr(item, field) for item in items] for field in fields}
+
+
+def derive_observations(observations: Sequence[Observation]) -> Sequence[Observation]:
+	"""Fill in the null relative humidity, heat index, and wind chill of a batch of
+	observations, in place
+
+	:returns: The same observations, so that this can wrap a function that gets them
+		(or be used as a `PollJob` or backfill sink before the repository)
+	"""
+	if not observations:
+		return observations
+	columns = _get_columns(observations, ('temperature_c', 'dew_point_c',
+										  'wind_speed_kmh', 'relative_humidity_pc',
+										  'heat_index_c', 'wind_chill_c'))
+	derived = get_derived_columns(columns)
+	for field in ('relative_humidity_pc', 'heat_index_c', 'heat_index_f',
+				  'wind_chill_c', 'wind_chill_f'):
+		for observation, value in zip(observations, derived[field]):
+			if getattr(observation, field) is None:
+				setattr(observation, field, value)
+	return observations
+
+
+def get_forecast_wind_speed_kmh(wind_speed: str) -> float:
+	"""Get the highest wind speed in a forecast period's wind speed text (eg `10 to 15
+	mph`)
+	"""
+	speeds = FORECAST_WIND_SPEED_PATTERN.findall(wind_speed or '')
+	return max(int(speed) for speed in speeds) * 1.609344 if speeds else None
+
+
+def get_forecast_derived_columns(periods: Sequence[ForecastPeriod]) -> Dict[str, list]:
+	"""Derive every measure in `DERIVED_FIELDS` for the periods of a forecast. The
+	highest wind speed in each period's forecast is used for its wind chill.
+	"""
+	columns = _get_columns(periods, ('temperature_c', 'dew_point_c',
+									 'relative_humidity_pc'))
+	columns['wind_speed_kmh'] = [get_forecast_wind_speed_kmh(period.wind_speed)
+								 for period in periods]
+	return get_derived_columns(columns)
@@ -1,23 +1,25 @@
-import json
 from typing import List
 from datetime import datetime
 from requests_cache import CachedSession
 from libnws.render.decorators import display_spinner
-from libnws.api.api_request import api_request
+from libnws.api.api_request import api_request, parse_timestamp
+from libnws.api.tracing import traced
 from libnws.api import (
     NWS_API_AVIATION_SIGMETS,
     NWS_API_AVIATION_CWSU,
 )
 from libnws.model.aviation import SIGMET, CenterWeatherAdvisory, CentralWeatherServiceUnit
+from libnws.model.geometry import PackedGeometry
 
 
 def process_sigmet_data(sigmet_data: dict, retrieved_at: datetime) -> SIGMET:
+    properties = sigmet_data.get('properties', {})
     sigmet_dict = {
         'retrieved_at': retrieved_at,
         'url':          sigmet_data.get('properties', {}).get('id'),
-        'issued_at':    sigmet_data.get('properties', {}).get('issueTime'),
-        'effective_at': sigmet_data.get('properties', {}).get('start'),
-        'expires_at':   sigmet_data.get('properties', {}).get('end'),
+        'issued_at':    parse_timestamp(properties.get('issueTime')),
+        'effective_at': parse_timestamp(properties.get('start')),
+        'expires_at':   parse_timestamp(properties.get('end')),
         'fir':          sigmet_data.get('properties', {}).get('fir'),
         'atsu':         sigmet_data.get('properties', {}).get('atsu'),
         'sequence':     sigmet_data.get('properties', {}).get('sequence'),
@@ -25,12 +27,13 @@ def process_sigmet_data(sigmet_data: dict, retrieved_at: datetime) -> SIGMET:
         'area_polygon': None,
     }
     geometry = sigmet_data.get('geometry')
-    if geometry:
-        geometry_json = json.dumps({'coordinates': geometry.get('coordinates')})
-        sigmet_dict.update({'area_polygon': geometry_json})
+    if geometry and geometry.get('coordinates'):
+        packed_geometry = PackedGeometry.from_coordinates(geometry.get('coordinates'))
+        sigmet_dict.update({'area_polygon': packed_geometry})
     return SIGMET(**sigmet_dict)
 
 
+@traced()
 def process_sigmets(sigmets_data: list, retrieved_at: datetime) -> List[SIGMET]:
     sigmets = []
     for feature in sigmets_data.get('features', {}):
@@ -39,6 +42,7 @@ def process_sigmets(sigmets_data: list, retrieved_at: datetime) -> List[SIGMET]:
 
 
 @display_spinner('Getting all SIGMETs...')
+@traced()
 def get_all_sigmets(session: CachedSession) -> List[SIGMET]:
     sigmets_data = api_request(session, NWS_API_AVIATION_SIGMETS)
     response = sigmets_data.get('response')
@@ -47,6 +51,7 @@ def get_all_sigmets(session: CachedSession) -> List[SIGMET]:
 
 
 @display_spinner('Getting all SIGMETs issued by ATSU...')
+@traced()
 def get_all_atsu_sigmets(
     session: CachedSession,
     atsu: str
@@ -58,6 +63,7 @@ def get_all_atsu_sigmets(
 
 
 @display_spinner('Getting all SIGMETs issued by ATSU on date...')
+@traced()
 def get_all_atsu_sigmets_by_date(
     session: CachedSession,
     atsu: str,
@@ -70,6 +76,7 @@ def get_all_atsu_sigmets_by_date(
 
 
 @display_spinner('Getting SIGMET...')
+@traced()
 def get_sigmet(
     session: CachedSession,
     atsu: str,
@@ -91,20 +98,33 @@ def process_cwa_data(cwa_data: dict, retrieved_at: datetime) -> CenterWeatherAdv
         'text':                     cwa_data.get('properties', {}).get('text'),
         'cwsu':                     cwa_data.get('properties', {}).get('cwsu'),
         'sequence':                 cwa_data.get('properties', {}).get('sequence'),
-        'issued_at':                cwa_data.get('properties', {}).get('issueTime'),
-        'effective_at':             cwa_data.get('properties', {}).get('start'),
-        'expires_at':               cwa_data.get('properties', {}).get('end'),
+        'issued_at':                parse_timestamp(cwa_data.get('properties', {})
+                                                        .get('issueTime')),
+        'effective_at':             parse_timestamp(cwa_data.get('properties', {})
+                                                        .get('start')),
+        'expires_at':               parse_timestamp(cwa_data.get('properties', {})
+                                                        .get('end')),
         'observed_property_url':    (cwa_data.get('properties', {})
                                              .get('observedProperty')),
         'area_polygon':             None,
     }
     geometry = cwa_data.get('geometry')
-    if geometry:
-        cwa_dict.update({'area_polygon': geometry.get('coordinates')})
+    if geometry and geometry.get('coordinates'):
+        packed_geometry = PackedGeometry.from_coordinates(geometry.get('coordinates'))
+        cwa_dict.update({'area_polygon': packed_geometry})
     return CenterWeatherAdvisory(**cwa_dict)
 
 
+@traced()
+def process_cwas(cwas_data: dict, retrieved_at: datetime) -> List[CenterWeatherAdvisory]:
+    cwas = []
+    for feature in cwas_data.get('features', {}):
+        cwas.append(process_cwa_data(feature, retrieved_at))
+    return cwas
+
+
 @display_spinner('Getting CWSU details...')
+@traced()
 def get_cwsu(
     session: CachedSession,
     cwsu_id: str
@@ -130,6 +150,7 @@ def get_cwsu(
 
 
 @display_spinner('Getting all CWAs issued by CWSU...')
+@traced()
 def get_cwas(
     session: CachedSession,
     cwsu_id: str
@@ -137,13 +158,11 @@ def get_cwas(
     cwas_data = api_request(session, NWS_API_AVIATION_CWSU + cwsu_id + '/cwas')
     response = cwas_data.get('response')
     retrieved_at = cwas_data.get('retrieved_at')
-    cwas = []
-    for feature in response.get('features', {}):
-        cwas.append(process_cwa_data(feature, retrieved_at))
-    return cwas
+    return process_cwas(response, retrieved_at)
 
 
 @display_spinner('Getting CWA...')
+@traced()
 def get_cwa(
     session: CachedSession,
     cwsu_id: str,
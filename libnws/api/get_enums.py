@@ -8,11 +8,11 @@ import logging
 from typing import Union
 from string import Template
 from requests_cache import CachedSession
-from libnws.main import BUG_REPORT_MESSAGE
 from libnws.api.api_request import api_request
 from libnws.api import (
     NWS_API_ZONES,
     NWS_API_OFFICES,
+    BUG_REPORT_MESSAGE,
 )
 logger = logging.getLogger(__name__)
 
@@ -1,18 +1,24 @@
+from datetime import datetime
 from requests_cache import CachedSession
 from libnws.render.decorators import display_spinner
-from libnws.api.api_request import api_request
+from libnws.api.api_request import api_request_processed
+from libnws.api.tracing import traced
 from libnws.api import NWS_API_GLOSSARY
 
 
-@display_spinner('Getting glossary...')
-def get_glossary(session: CachedSession) -> dict:
-	"""Get the glossary of weather terms"""
-	glossary_data = api_request(session, NWS_API_GLOSSARY)
-	response = glossary_data.get('response')
+@traced()
+def process_glossary_data(glossary_data: dict, retrieved_at: datetime = None) -> dict:
 	glossary = {}
-	for entry in response.get('glossary', {}):
+	for entry in glossary_data.get('glossary', {}):
 		term = entry.get('term')
 		definition = entry.get('definition')
 		if term and definition:
 			glossary.update({term: definition})
 	return glossary
+
+
+@display_spinner('Getting glossary...')
+@traced()
+def get_glossary(session: CachedSession) -> dict:
+	"""Get the glossary of weather terms"""
+	return api_request_processed(session, NWS_API_GLOSSARY, process_glossary_data)
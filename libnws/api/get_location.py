@@ -4,6 +4,7 @@ from typing import Tuple
 from requests_cache import CachedSession
 from libnws.render.decorators import display_spinner
 from libnws.api.api_request import api_request
+from libnws.api.tracing import traced
 from libnws.api import USCB_API_GEOCODE, NWS_API_POINTS
 from libnws.model.locations import Location
 logger = logging.getLogger(__name__)
@@ -30,6 +31,7 @@ def uscb_geocode(
 
 
 @display_spinner('Getting location data...')
+@traced()
 def get_location(
 	session: CachedSession,
 	address: str
@@ -3,6 +3,7 @@ from datetime import datetime
 from requests_cache import CachedSession
 from libnws.render.decorators import display_spinner
 from libnws.api.api_request import api_request
+from libnws.api.tracing import traced
 from libnws.api import (
     NWS_API_OFFICES,
     VALID_NWS_FORECAST_OFFICES,
@@ -37,7 +38,20 @@ def process_headline_data(
     return OfficeHeadline(**headline_dict)
 
 
+@traced()
+def process_headlines(
+    headlines_data: dict,
+    retrieved_at: datetime,
+    office_id: str
+) -> List[OfficeHeadline]:
+    headlines = []
+    for headline in headlines_data.get('@graph', {}):
+        headlines.append(process_headline_data(headline, retrieved_at, office_id))
+    return headlines
+
+
 @display_spinner('Getting office headlines...')
+@traced()
 def get_office_headlines(
     session: CachedSession,
     office_id: str
@@ -47,13 +61,11 @@ def get_office_headlines(
     headlines_data = api_request(session, NWS_API_OFFICES + office_id + '/headlines')
     response = headlines_data.get('response')
     retrieved_at = headlines_data.get('retrieved_at')
-    headlines = []
-    for headline in response.get('@graph', {}):
-        headlines.append(process_headline_data(headline, retrieved_at, office_id))
-    return headlines
+    return process_headlines(response, retrieved_at, office_id)
 
 
 @display_spinner('Getting headline from office...')
+@traced()
 def get_office_headline(
     session: CachedSession,
     office_id: str,
@@ -71,6 +83,7 @@ def get_office_headline(
 
 
 @display_spinner('Getting forecast office details...')
+@traced()
 def get_office(
     session: CachedSession,
     office_id: str
@@ -2,7 +2,8 @@ from typing import List
 from datetime import datetime
 from requests_cache import CachedSession
 from libnws.render.decorators import display_spinner
-from libnws.api.api_request import api_request
+from libnws.api.api_request import api_request, api_request_processed, parse_timestamp
+from libnws.api.tracing import traced
 from libnws.api import (
 	NWS_API_PRODUCT_TYPES,
 	NWS_API_PRODUCT_LOCATIONS,
@@ -11,6 +12,7 @@ from libnws.api import (
 from libnws.model.products import Product, ProductLocation, ProductType
 
 
+@traced()
 def process_product_data(products_data: dict, retrieved_at: datetime) -> List[Product]:
 	products = []
 	for product in products_data:
@@ -22,13 +24,26 @@ def process_product_data(products_data: dict, retrieved_at: datetime) -> List[Pr
 			'code':					product.get('productCode'),
 			'name':					product.get('productName'),
 			'issuing_office':		product.get('issuingOffice'),
-			'issued_at':			product.get('issuanceTime'),
+			'issued_at':			parse_timestamp(product.get('issuanceTime')),
 		}
 		products.append(Product(**product_dict))
 	return products
 
 
-def process_product_types_data(product_types_data: list) -> List[ProductType]:
+@traced()
+def process_product_text_data(product_data: dict, retrieved_at: datetime) -> Product:
+	product = process_product_data([product_data], retrieved_at)[0]
+	product.text = product_data.get('productText')
+	return product
+
+
+# `retrieved_at` isn't used, but is accepted so that reference data like product types
+# and locations can be processed with `api_request_processed`
+@traced()
+def process_product_types_data(
+	product_types_data: dict,
+	retrieved_at: datetime = None
+) -> List[ProductType]:
 	product_types = []
 	for product_type in product_types_data.get('@graph', {}):
 		type_dict = {
@@ -39,7 +54,11 @@ def process_product_types_data(product_types_data: list) -> List[ProductType]:
 	return product_types
 
 
-def process_product_locations_data(product_locations_data: dict) -> List[ProductLocation]:
+@traced()
+def process_product_locations_data(
+	product_locations_data: dict,
+	retrieved_at: datetime = None
+) -> List[ProductLocation]:
 	product_locations = []
 	product_locations_data = product_locations_data.get('locations', {})
 	if product_locations_data and isinstance(product_locations_data, dict):
@@ -55,41 +74,43 @@ def process_product_locations_data(product_locations_data: dict) -> List[Product
 
 # See: https://www.weather.gov/mlb/text
 @display_spinner('Getting all product types...')
+@traced()
 def get_product_types(session: CachedSession) -> List[ProductType]:
-	product_types_data = api_request(session, NWS_API_PRODUCT_TYPES).get('response')
-	return process_product_types_data(product_types_data)
+	return api_request_processed(session, NWS_API_PRODUCT_TYPES, process_product_types_data)
 
 
 @display_spinner('Getting product types available from the issuing location...')
+@traced()
 def get_product_types_by_location(
 	session: CachedSession,
 	location_id: str
 ) -> List[ProductType]:
-	product_types_data = api_request(session, (NWS_API_PRODUCT_LOCATIONS
-											   + f'/{location_id}/types').get('response'))
-	return process_product_types_data(product_types_data)
+	return api_request_processed(session,
+								 NWS_API_PRODUCT_LOCATIONS + f'/{location_id}/types',
+								 process_product_types_data)
 
 
 @display_spinner('Getting all product issuing locations...')
+@traced()
 def get_product_locations(session: CachedSession) -> List[ProductLocation]:
-	product_locations_data = api_request(session,
-									  	 NWS_API_PRODUCT_LOCATIONS).get('response')
-	return process_product_locations_data(product_locations_data)
+	return api_request_processed(session,
+								 NWS_API_PRODUCT_LOCATIONS,
+								 process_product_locations_data)
 
 
 @display_spinner('Getting product issuing locations by type...')
+@traced()
 def get_product_locations_by_type(
 	session: CachedSession,
 	type_id: str
 ) -> List[ProductLocation]:
-	product_locations_data = (
-		api_request(session, (NWS_API_PRODUCT_TYPES
-							  + f'/{type_id}/locations').get('response'))
-	)
-	return process_product_locations_data(product_locations_data)
+	return api_request_processed(session,
+								 NWS_API_PRODUCT_TYPES + f'/{type_id}/locations',
+								 process_product_locations_data)
 
 
 @display_spinner('Getting listing of all products...')
+@traced()
 def get_products(session: CachedSession) -> List[Product]:
 	products_data = api_request(session, NWS_API_PRODUCTS)
 	response = products_data.get('response')
@@ -98,6 +119,7 @@ def get_products(session: CachedSession) -> List[Product]:
 
 
 @display_spinner('Getting listing of all products by type...')
+@traced()
 def get_products_by_type(
 	session: CachedSession,
 	type_id: str
@@ -109,6 +131,7 @@ def get_products_by_type(
 
 
 @display_spinner('Getting listing of all products by type from the issuing location...')
+@traced()
 def get_products_by_type_and_location(
 	session: CachedSession, 
 	type_id: str,
@@ -122,6 +145,7 @@ def get_products_by_type_and_location(
 
 
 @display_spinner('Getting product content...')
+@traced()
 def get_product(
 	session: CachedSession,
 	product_id: str
@@ -130,7 +154,5 @@ def get_product(
 	product_data = api_request(session, NWS_API_PRODUCTS + product_id)
 	response = product_data.get('response')
 	retrieved_at = product_data.get('retrieved_at')
-	product = process_product_data([response], retrieved_at)[0]
-	product.text = response.get('productText')
-	return product
+	return process_product_text_data(response, retrieved_at)
 
@@ -1,15 +1,17 @@
-from typing import List
+from typing import Iterable, List, Sequence
 from datetime import datetime
 from requests_cache import CachedSession
 from libnws.render.decorators import display_spinner
 from libnws.api.get_weather import process_measurement_values
 from libnws.api.conversions import convert_measures
-from libnws.api.api_request import api_request, parse_timestamp
+from libnws.api.api_request import api_request, api_request_processed, parse_timestamp
+from libnws.api.tracing import traced
 from libnws.api import (
 	NWS_API_RADAR_SERVERS,
     NWS_API_RADAR_STATIONS,
 	NWS_API_RADAR_QUEUES,
 )
+from libnws.model.lazy import Deferred, DeferredGroup
 from libnws.model.radar import (
 	RadarStation,
 	RadarStationAlarm,
@@ -210,15 +212,30 @@ def process_radar_station_adaptation_data(radar_station_data: dict) -> RadarAdap
 
 def process_radar_station_data(
 	radar_station_data: dict,
-	retrieved_at: datetime
+	retrieved_at: datetime,
+	lazy: bool = False
 ) -> RadarStation:
+	"""
+	:param lazy: Only parse the station's RDA, performance, and adaptation data when
+		they're first accessed
+	"""
 	station_coords = radar_station_data.get('geometry', {}).get('coordinates')
+	station_lat = None
+	station_lon = None
 	if station_coords and isinstance(station_coords, list):
-		station_lat = station_coords[0]
-		station_lon = station_coords[1]
-	data_rda = process_radar_station_rda_data(radar_station_data)
-	data_performance = process_radar_station_performance_data(radar_station_data)
-	data_adaptation = process_radar_station_adaptation_data(radar_station_data)
+		# GeoJSON points are (lon, lat)
+		station_lon = station_coords[0]
+		station_lat = station_coords[1]
+	if lazy:
+		data_rda = Deferred(process_radar_station_rda_data, radar_station_data)
+		data_performance = Deferred(process_radar_station_performance_data,
+									radar_station_data)
+		data_adaptation = Deferred(process_radar_station_adaptation_data,
+								   radar_station_data)
+	else:
+		data_rda = process_radar_station_rda_data(radar_station_data)
+		data_performance = process_radar_station_performance_data(radar_station_data)
+		data_adaptation = process_radar_station_adaptation_data(radar_station_data)
 	station_dict = {
 		'retrieved_at':						retrieved_at,
 		'lat':								station_lat,
@@ -263,62 +280,122 @@ def process_radar_station_data(
 	return RadarStation(**station_dict)
 
 
-def process_radar_server_data(radar_server_data: dict, retrieved_at: datetime) -> dict:
+@traced()
+def process_radar_stations(
+	radar_stations_data: dict,
+	retrieved_at: datetime
+) -> List[RadarStation]:
+	stations = []
+	for feature in radar_stations_data.get('features', {}):
+		stations.append(process_radar_station_data(feature, retrieved_at))
+	return stations
+
+
+def process_radar_server_interfaces(network_data: dict) -> List[NetworkInterface]:
+	interfaces = []
+	for item in network_data or {}:
+		if item != 'timestamp':
+			interface_data = network_data.get(item, {})
+			interface_dict = {
+				'interface_name':       interface_data.get('interface'),
+				'is_interface_active':  interface_data.get('active'),
+				'packets_out_ok':       interface_data.get('transNoError'),
+				'packets_out_error':    interface_data.get('transError'),
+				'packets_out_dropped':  interface_data.get('transDropped'),
+				'packets_out_overrun':  interface_data.get('transOverrun'),
+				'packets_in_ok':        interface_data.get('recvNoError'),
+				'packets_in_error':     interface_data.get('recvError'),
+				'packets_in_dropped':   interface_data.get('recvDropped'),
+				'packets_in_overrun':   interface_data.get('recvOverrun'),
+			}
+			interfaces.append(NetworkInterface(**interface_dict))
+	return interfaces
+
+
+# The fields of a radar server that come from its sub-objects (hardware, command, LDM,
+# ping, and network), with the path to each field's value and the function that
+# parses it, if any
+RADAR_SERVER_SUB_OBJECT_FIELDS = {
+	'up_since':							(('hardware', 'uptime'), parse_timestamp),
+	'hardware_refreshed_at':			(('hardware', 'timestamp'), parse_timestamp),
+	'cpu':								(('hardware', 'cpuIdle'), None),
+	'memory':							(('hardware', 'memory'), None),
+	'io_utilization':					(('hardware', 'ioUtilization'), None),
+	'disk':								(('hardware', 'disk'), None),
+	'load_1':							(('hardware', 'load1'), None),
+	'load_5':							(('hardware', 'load5'), None),
+	'load_15':							(('hardware', 'load15'), None),
+	'command_last_executed':			(('command', 'lastExecuted'), None),
+	'command_last_executed_at':			(('command', 'lastExecutedTime'), parse_timestamp),
+	'command_last_nexrad_data_at':		(('command', 'lastNexradDataTime'), parse_timestamp),
+	'command_last_received':			(('command', 'lastReceived'), None),
+	'command_last_received_at':			(('command', 'lastReceivedTime'), parse_timestamp),
+	'command_last_refreshed_at':		(('command', 'timestamp'), parse_timestamp),
+	'ldm_refreshed_at':					(('ldm', 'timestamp'), parse_timestamp),
+	'ldm_latest_product_at':			(('ldm', 'latestProduct'), parse_timestamp),
+	'ldm_oldest_product_at':			(('ldm', 'oldestProduct'), parse_timestamp),
+	'ldm_storage_size':					(('ldm', 'storageSize'), None),
+	'ldm_count':						(('ldm', 'count'), None),
+	'is_ldm_active':					(('ldm', 'active'), None),
+	'last_ping_at':						(('ping', 'timestamp'), parse_timestamp),
+	'ping_responses_ldm':				(('ping', 'targets', 'ldm'), None),
+	'ping_responses_radar':				(('ping', 'targets', 'radar'), None),
+	'ping_responses_server':			(('ping', 'targets', 'server'), None),
+	'ping_responses_network':			(('ping', 'targets', 'misc'), None),
+	'network_interfaces_refreshed_at':	(('network', 'timestamp'), parse_timestamp),
+	'interfaces':						(('network',), process_radar_server_interfaces),
+}
+
+
+def get_radar_server_raw_value(radar_server_data: dict, field: str):
+	"""Get the unparsed value of one of the fields in `RADAR_SERVER_SUB_OBJECT_FIELDS`"""
+	path, _ = RADAR_SERVER_SUB_OBJECT_FIELDS[field]
+	value = radar_server_data
+	for key in path[:-1]:
+		value = value.get(key) or {}
+	return value.get(path[-1])
+
+
+def parse_radar_server_value(field: str, value):
+	_, parse = RADAR_SERVER_SUB_OBJECT_FIELDS[field]
+	return parse(value) if parse else value
+
+
+def get_radar_server_field(radar_server_data: dict, field: str):
+	"""Get and parse one of the fields in `RADAR_SERVER_SUB_OBJECT_FIELDS`"""
+	return parse_radar_server_value(field, get_radar_server_raw_value(radar_server_data,
+																	  field))
+
+
+def parse_radar_server_values(fields: Sequence[str], values: Sequence) -> dict:
+	"""Parse the unparsed values of several of the fields in
+	`RADAR_SERVER_SUB_OBJECT_FIELDS`
+	"""
+	return {field: parse_radar_server_value(field, value)
+			for field, value in zip(fields, values)}
+
+
+def process_radar_server_data(
+	radar_server_data: dict,
+	retrieved_at: datetime,
+	fields: Iterable[str] = ()
+) -> RadarServer:
+	"""
+	:param fields: The fields from the server's sub-objects (see
+		`RADAR_SERVER_SUB_OBJECT_FIELDS`) to parse right away. Every other field keeps
+		its unparsed value, and they're all parsed the first time one is accessed.
+		By default, none are parsed right away. Pass `RADAR_SERVER_SUB_OBJECT_FIELDS` to
+		parse all of them.
+	"""
+	fields = set(fields)
+	unknown_fields = fields - set(RADAR_SERVER_SUB_OBJECT_FIELDS) - set(
+		RadarServer.__dataclass_fields__)
+	if unknown_fields:
+		raise ValueError(f'Unknown radar server fields: {", ".join(unknown_fields)}')
 	server_dict = {
 		'retrieved_at':						retrieved_at,
 		'host':                  			radar_server_data.get('id'),
 		'server_type':                  	radar_server_data.get('type'),
-		'up_since':              			(parse_timestamp(radar_server_data
-																.get('hardware', {})
-																.get('uptime'))),
-		'hardware_refreshed_at':   			(parse_timestamp(radar_server_data
-																.get('hardware', {})
-																.get('timestamp'))),
-		'cpu':                   			(radar_server_data.get('hardware', {})
-															  .get('cpuIdle')),
-		'memory':                			(radar_server_data.get('hardware', {})
-															  .get('memory')),
-		'io_utilization':        			(radar_server_data.get('hardware', {})
-															  .get('ioUtilization')),
-		'disk':                  			(radar_server_data.get('hardware', {})
-															  .get('disk')),
-		'load_1':                			(radar_server_data.get('hardware', {})
-															  .get('load1')),
-		'load_5':                			(radar_server_data.get('hardware', {})
-															  .get('load5')),
-		'load_15':               			(radar_server_data.get('hardware', {})
-															  .get('load15')),
-		'command_last_executed':        	(radar_server_data.get('command', {})
-															  .get('lastExecuted')),
-		'command_last_executed_at': (
-			parse_timestamp(radar_server_data.get('command', {})
-											 .get('lastExecutedTime'))),
-		'command_last_nexrad_data_at': (
-			parse_timestamp(radar_server_data.get('command', {})
-											 .get('lastNexradDataTime'))),
-		'command_last_received': 			(radar_server_data.get('command', {})
-															  .get('lastReceived')),
-		'command_last_received_at': (
-			parse_timestamp(radar_server_data.get('command', {})
-											 .get('lastReceivedTime'))),
-		'command_last_refreshed_at': (
-			parse_timestamp(radar_server_data.get('command', {})
-											 .get('timestamp'))),
-		'ldm_refreshed_at': (
-			parse_timestamp(radar_server_data.get('ldm', {})
-											 .get('timestamp'))),
-		'ldm_latest_product_at': (
-			parse_timestamp(radar_server_data.get('ldm', {})
-											 .get('latestProduct'))),
-		'ldm_oldest_product_at': (
-			parse_timestamp(radar_server_data.get('ldm', {})
-											 .get('oldestProduct'))),
-		'ldm_storage_size':             	(radar_server_data.get('ldm', {})
-															  .get('storageSize')),
-		'ldm_count':                    	(radar_server_data.get('ldm', {})
-															  .get('count')),
-		'is_ldm_active':                	(radar_server_data.get('ldm', {})
-															  .get('active')),
 		'is_server_active':             	radar_server_data.get('active'),
 		'is_server_primary':            	radar_server_data.get('primary'),
 		'is_server_aggregate':          	radar_server_data.get('aggregate'),
@@ -327,66 +404,41 @@ def process_radar_server_data(radar_server_data: dict, retrieved_at: datetime) -
 		'collection_time':              	parse_timestamp(radar_server_data
 																.get('collectionTime')),
 		'reporting_host':               	radar_server_data.get('reportingHost'),
-		'last_ping_at':                 	(parse_timestamp(radar_server_data
-																.get('ping', {})
-																.get('timestamp'))),
-		'ping_responses_ldm':           	(radar_server_data.get('ping', {})
-															  .get('targets', {})
-															  .get('ldm')),
-		'ping_responses_radar':         	(radar_server_data.get('ping', {})
-															  .get('targets', {})
-															  .get('radar')),
-		'ping_responses_server':        	(radar_server_data.get('ping', {})
-															  .get('targets', {})
-															  .get('server')),
-		'ping_responses_network':          	(radar_server_data.get('ping', {})
-															  .get('targets', {})
-															  .get('misc')),
-		'network_interfaces_refreshed_at':	(parse_timestamp(radar_server_data
-																.get('network', {})
-																.get('timestamp'))),
-		'interfaces':                   	[],
 	}
-	server = RadarServer(**server_dict)
-	for item in radar_server_data.get('network', {}):
-		if item != 'timestamp':
-			interface_dict = {
-				'interface_name':       (radar_server_data.get('network', {})
-														  .get(item, {})
-														  .get('interface')),
-				'is_interface_active':  (radar_server_data.get('network', {})
-														  .get(item, {})
-														  .get('active')),
-				'packets_out_ok':       (radar_server_data.get('network', {})
-														  .get(item, {})
-														  .get('transNoError')),
-				'packets_out_error':    (radar_server_data.get('network', {})
-														  .get(item, {})
-														  .get('transError')),
-				'packets_out_dropped':  (radar_server_data.get('network', {})
-														  .get(item, {})
-														  .get('transDropped')),
-				'packets_out_overrun':  (radar_server_data.get('network', {})
-														  .get(item, {})
-														  .get('transOverrun')),
-				'packets_in_ok':        (radar_server_data.get('network', {})
-														  .get(item, {})
-														  .get('recvNoError')),
-				'packets_in_error':     (radar_server_data.get('network', {})
-														  .get(item, {})
-														  .get('recvError')),
-				'packets_in_dropped':   (radar_server_data.get('network', {})
-														  .get(item, {})
-														  .get('recvDropped')),
-				'packets_in_overrun':   (radar_server_data.get('network', {})
-														  .get(item, {})
-														  .get('recvOverrun')),
-			}
-			server.interfaces.append(NetworkInterface(**interface_dict))
-	return server
+	lazy_fields = []
+	for field in RADAR_SERVER_SUB_OBJECT_FIELDS:
+		if field in fields:
+			server_dict[field] = get_radar_server_field(radar_server_data, field)
+		else:
+			lazy_fields.append(field)
+	if lazy_fields:
+		# The lazy fields share one parse, which only holds on to their unparsed values
+		# (not the whole server), and releases them once it's run
+		raw_values = tuple(get_radar_server_raw_value(radar_server_data, field)
+						   for field in lazy_fields)
+		deferred_fields = DeferredGroup(parse_radar_server_values, lazy_fields, raw_values)
+		for field in lazy_fields:
+			server_dict[field] = deferred_fields
+	return RadarServer(**server_dict)
+
+
+@traced()
+def process_radar_servers(
+	radar_servers_data: dict,
+	retrieved_at: datetime,
+	fields: Iterable[str] = ()
+) -> List[RadarServer]:
+	"""
+	:param fields: See `process_radar_server_data`
+	"""
+	servers = []
+	for feature in radar_servers_data.get('@graph', {}):
+		servers.append(process_radar_server_data(feature, retrieved_at, fields))
+	return servers
 
 
 @display_spinner('Getting radar station alarms...')
+@traced()
 def get_radar_station_alarms(
 	session: CachedSession,
 	radar_station_id: str
@@ -411,18 +463,14 @@ def get_radar_station_alarms(
 
 
 @display_spinner('Getting radar stations...')
+@traced()
 def get_radar_stations(session: CachedSession) -> List[RadarStation]:
 	""" """
-	radar_stations_data = api_request(session, NWS_API_RADAR_STATIONS)
-	response = radar_stations_data.get('response')
-	retrieved_at = radar_stations_data.get('retrieved_at')
-	stations = []
-	for feature in response.get('features', {}):
-		stations.append(process_radar_station_data(feature, retrieved_at))
-	return stations
+	return api_request_processed(session, NWS_API_RADAR_STATIONS, process_radar_stations)
 
 
 @display_spinner('Getting radar station details...')
+@traced()
 def get_radar_station(
 	session: CachedSession,
 	station_id: str
@@ -444,18 +492,22 @@ def get_radar_station(
 # NOTE: The official API documentation doesn't include a schema for the radar
 # servers and stations endpoints, so some field meanings are inferred from the data.
 @display_spinner('Getting radar servers...')
-def get_radar_servers(session: CachedSession) -> List[RadarServer]:
-	""" """
+@traced()
+def get_radar_servers(
+	session: CachedSession,
+	fields: Iterable[str] = ()
+) -> List[RadarServer]:
+	"""
+	:param fields: The fields to parse right away (see `process_radar_server_data`)
+	"""
 	radar_servers_data = api_request(session, NWS_API_RADAR_SERVERS)
 	response = radar_servers_data.get('response')
 	retrieved_at = radar_servers_data.get('retrieved_at')
-	servers = []
-	for feature in response.get('@graph', {}):
-		servers.append(process_radar_server_data(feature, retrieved_at))
-	return servers
+	return process_radar_servers(response, retrieved_at, fields)
 
 
 @display_spinner('Getting radar server details...')
+@traced()
 def get_radar_server(
 	session: CachedSession,
 	server_id: str
@@ -468,6 +520,7 @@ def get_radar_server(
 
 
 @display_spinner('Getting radar queue for host and station...')
+@traced()
 def get_radar_queue(
 	session: CachedSession,
 	ldm_host: str,
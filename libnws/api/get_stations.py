@@ -5,6 +5,7 @@ from libnws.render.decorators import display_spinner
 from libnws.api.get_weather import process_measurement_values
 from libnws.api.conversions import convert_measures
 from libnws.api.api_request import api_request
+from libnws.api.tracing import traced
 from libnws.api import NWS_API_STATIONS, NWS_API_GRIDPOINTS
 from libnws.model.stations import Station
 
@@ -38,7 +39,16 @@ def process_station_data(feature: dict, retrieved_at: datetime) -> Station:
 	return Station(**station)
 
 
+@traced()
+def process_stations(stations_data: dict, retrieved_at: datetime) -> List[Station]:
+	stations = []
+	for feature in stations_data.get('features', {}):
+		stations.append(process_station_data(feature, retrieved_at))
+	return stations
+
+
 @display_spinner('Getting station...')
+@traced()
 def get_station(session: CachedSession, station_id: dict) -> Station:
 	station_data = api_request(session, NWS_API_STATIONS + station_id)
 	response = station_data.get('response')
@@ -50,13 +60,11 @@ def get_stations(session: CachedSession, url: str) -> List[Station]:
 	stations_data = api_request(session, url)
 	response = stations_data.get('response')
 	retrieved_at = stations_data.get('retrieved_at')
-	stations = []
-	for feature in response.get('features', {}):
-		stations.append(process_station_data(feature, retrieved_at))
-	return stations
+	return process_stations(response, retrieved_at)
 
 
 @display_spinner('Getting stations usable in grid area...')
+@traced()
 def get_stations_by_grid(
 	session: CachedSession,
 	forecast_office: str,
@@ -67,5 +75,6 @@ def get_stations_by_grid(
 
 
 @display_spinner('Getting local stations...')
+@traced()
 def get_stations_near_location(session: CachedSession, location: dict) -> List[Station]:
 	return get_stations(session, location.observation_stations_url)
@@ -6,13 +6,15 @@ from typing import List
 from datetime import datetime
 from requests_cache import CachedSession
 from libnws.render.decorators import display_spinner
-from libnws.main import BUG_REPORT_MESSAGE
 from libnws.api.api_request import api_request, parse_timestamp
 from libnws.api.conversions import convert_measures
+from libnws.api.derived_measures import derive_measures
+from libnws.api.tracing import traced
 from libnws.api import (
 	NWS_API_STATIONS,
 	METAR_CLOUD_COVER_MAP,
 	WMI_UNIT_MAP,
+	BUG_REPORT_MESSAGE,
 )
 from libnws.model.weather import Observation, Forecast, ForecastPeriod
 from libnws.model.locations import Location
@@ -91,8 +93,7 @@ def process_measurement_values(
 			if actual_unit not in WMI_UNIT_MAP:
 				logger.debug((
 					f'No standard field suffix for measurement unit ({actual_unit}). '
-					f'Using the expected unit field suffix instead. '
-					BUG_REPORT_MESSAGE))
+					f'Using the expected unit field suffix instead. {BUG_REPORT_MESSAGE}'))
 				unit_suffix = WMI_UNIT_MAP.get(expected_unit)
 			else:
 				unit_suffix = WMI_UNIT_MAP.get(actual_unit)
@@ -163,8 +164,14 @@ def process_cloud_layers(cloud_layers_data: list) -> dict:
 def process_observations_data(
 	observations_data: list,
 	retrieved_at: datetime,
-	station_or_zone_id: str
+	station_or_zone_id: str,
+	derive: bool = False
 ) -> Observation:
+	"""Process an observation from the API
+
+	:param derive: Whether to fill in the relative humidity, wind chill, and heat index
+		when the API left them null (see `libnws.api.derived_measures`)
+	"""
 	observations = {
 		'retrieved_at':	retrieved_at,
 		'station_or_zone_id':	station_or_zone_id,
@@ -222,14 +229,36 @@ def process_observations_data(
 	cloud_layers = process_cloud_layers(cloud_layer_data)
 	observations.update({'cloud_layers': cloud_layers})
 	observations = convert_measures(observations)
+	if derive:
+		observations = derive_measures(observations)
 	return Observation(**observations)
 
 
+@traced()
+def process_observations(
+	observations_data: dict,
+	retrieved_at: datetime,
+	station_or_zone_id: str
+) -> List[Observation]:
+	observations = []
+	for feature in observations_data.get('features', {}):
+		observations.append(process_observations_data(feature, retrieved_at,
+													  station_or_zone_id))
+	return observations
+
+
+@traced()
 def process_forecast_data(
 	forecast_data: list,
 	retrieved_at: datetime,
-	location: Location
+	location: Location,
+	derive: bool = False
 ) -> Forecast:
+	"""Process a forecast from the API
+
+	:param derive: Whether to fill in each period's relative humidity when the API left
+		it null (see `libnws.api.derived_measures`)
+	"""
 	len_periods = len(forecast_data.get('properties', {}).get('periods'))
 	forecast_dict = {
 		'retrieved_at':	retrieved_at,
@@ -282,12 +311,15 @@ def process_forecast_data(
 																   field_map,
 																   expected_types))
 			forecast_period_dict = convert_measures(forecast_period_dict)
+			if derive:
+				forecast_period_dict = derive_measures(forecast_period_dict)
 			forecast_period = ForecastPeriod(**forecast_period_dict)
 			forecast.periods.append(forecast_period)
 	return forecast
 
 
 @display_spinner('Getting all station observations...')
+@traced()
 def get_all_observations(
 	session: CachedSession,
 	station_id: str
@@ -297,13 +329,11 @@ def get_all_observations(
 											  + '/observations'))
 	response = observations_data.get('response')
 	retrieved_at = observations_data.get('retrieved_at')
-	observations = []
-	for feature in response.get('features', {}):
-		observations.append(process_observations_data(feature, retrieved_at, station_id))
-	return observations
+	return process_observations(response, retrieved_at, station_id)
 
 
 @display_spinner('Getting latest station observations...')
+@traced()
 def get_latest_observations(
 	session: CachedSession,
 	station_id: str
@@ -317,6 +347,7 @@ def get_latest_observations(
 
 
 @display_spinner('Getting station observations at the given time...')
+@traced()
 def get_observations_at_time(
 	session: CachedSession,
 	station_id: str,
@@ -332,6 +363,7 @@ def get_observations_at_time(
 
 
 @display_spinner('Getting extended forecast for location...')
+@traced()
 def get_extended_forecast(
 	session: CachedSession,
 	location: Location
@@ -343,6 +375,7 @@ def get_extended_forecast(
 
 
 @display_spinner('Getting hourly forecast for location...')
+@traced()
 def get_hourly_forecast(
 	session: CachedSession,
 	location: Location
@@ -1,26 +1,36 @@
-import json
 from typing import List
 from datetime import datetime
 from requests_cache import CachedSession
 from libnws.render.decorators import display_spinner
 from libnws.api.api_request import api_request, parse_timestamp
-from libnws.api.get_stations import process_station_data
-from libnws.api.get_weather import process_observations_data
+from libnws.api.get_stations import process_stations
+from libnws.api.get_weather import process_observations
+from libnws.api.tracing import traced
 from libnws.api import (
     NWS_API_ZONES,
     NWS_API_ZONE_FORECASTS,
     VALID_NWS_ZONES,
 )
 from libnws.model.zones import Zone, ZoneForecast, ZoneForecastPeriod
+from libnws.model.geometry import PackedGeometry
 from libnws.model.stations import Station
 from libnws.model.weather import Observation
 
 
-def process_zone_data(zone_data: list, retrieved_at: datetime) -> Zone:
+def process_zone_data(
+    zone_data: list,
+    retrieved_at: datetime,
+    simplify_tolerance: float = 0.0
+) -> Zone:
+    """
+    :param simplify_tolerance: Simplify the zone's boundaries so that no dropped point
+        is further than this from them, in degrees (default: don't simplify)
+    """
     geometry = zone_data.get('geometry', {})
-    geometry_json = None
-    if geometry:
-        geometry_json = json.dumps({'coordinates': geometry.get('coordinates')})
+    packed_geometry = None
+    if geometry and geometry.get('coordinates'):
+        packed_geometry = PackedGeometry.from_coordinates(geometry.get('coordinates'),
+                                                          simplify_tolerance)
     zone_dict = {
         'retrieved_at':         retrieved_at,
         'zone_id':              zone_data.get('properties', {}).get('id'),
@@ -40,16 +50,30 @@ def process_zone_data(zone_data: list, retrieved_at: datetime) -> Zone:
         'forecast_offices':     zone_data.get('properties', {}).get('forecastOffices'),
         'observation_stations': (zone_data.get('properties', {})
                                           .get('observationStations')),
-        'multi_polygon':        geometry_json,
+        'multi_polygon':        packed_geometry,
     }
     return Zone(**zone_dict)
 
 
+@traced()
+def process_zones(
+    zones_data: dict,
+    retrieved_at: datetime,
+    simplify_tolerance: float = 0.0
+) -> List[Zone]:
+    zones = []
+    for feature in zones_data.get('features', {}):
+        zones.append(process_zone_data(feature, retrieved_at, simplify_tolerance))
+    return zones
+
+
 @display_spinner('Getting zone...')
+@traced()
 def get_zone(
     session: CachedSession,
     zone_type: str,
-    zone_id: str
+    zone_id: str,
+    simplify_tolerance: float = 0.0
 ) -> Zone:
     if zone_type not in VALID_NWS_ZONES:
         raise ValueError((
@@ -58,27 +82,34 @@ def get_zone(
     zone_data = api_request(session, NWS_API_ZONES + f'/{zone_type}/{zone_id}')
     response = zone_data.get('response')
     retrieved_at = zone_data.get('retrieved_at')
-    return process_zone_data(response, retrieved_at)
+    return process_zone_data(response, retrieved_at, simplify_tolerance)
 
 
 @display_spinner('Getting all zones...')
+@traced()
 def get_zones(
     session: CachedSession,
-    zone_type: str = None
+    zone_type: str = None,
+    include_geometry: bool = False,
+    simplify_tolerance: float = 0.0
 ) -> List[Zone]:
-    if zone_type:
-        zones_data = api_request(session, NWS_API_ZONES + f'/{zone_type}')
-    else:
-        zones_data = api_request(session, NWS_API_ZONES)
+    """Get all zones, or all zones of the given type
+
+    :param include_geometry: Include each zone's boundaries. The API leaves them out of
+        zone listings unless they're asked for.
+    :param simplify_tolerance: See `process_zone_data`
+    """
+    url = NWS_API_ZONES + f'/{zone_type}' if zone_type else NWS_API_ZONES
+    if include_geometry:
+        url += '?include_geometry=true'
+    zones_data = api_request(session, url)
     response = zones_data.get('response')
     retrieved_at = zones_data.get('retrieved_at')
-    zones = []
-    for feature in response.get('features', {}):
-        zones.append(process_zone_data(feature, retrieved_at))
-    return zones
+    return process_zones(response, retrieved_at, simplify_tolerance)
 
 
 @display_spinner('Getting stations servicing zone...')
+@traced()
 def get_zone_stations(
     session: CachedSession,
     zone_id: str
@@ -87,13 +118,11 @@ def get_zone_stations(
                                                + f'{zone_id}/stations'))
     response = zone_stations_data.get('response')
     retrieved_at = zone_stations_data.get('retrieved_at')
-    zone_stations = []
-    for feature in response.get('features', {}):
-        zone_stations.append(process_station_data(feature, retrieved_at))
-    return zone_stations
+    return process_stations(response, retrieved_at)
 
 
 @display_spinner('Getting observations for zone...')
+@traced()
 def get_zone_observations(
     session: CachedSession,
     zone_id: str
@@ -102,15 +131,11 @@ def get_zone_observations(
                                                    + f'{zone_id}/observations'))
     response = zone_observations_data.get('response')
     retrieved_at = zone_observations_data.get('retrieved_at')
-    zone_observations = []
-    for feature in response.get('features', {}):
-        zone_observations.append(process_observations_data(feature,
-                                                           retrieved_at,
-                                                           zone_id))
-    return zone_observations
+    return process_observations(response, retrieved_at, zone_id)
 
 
 @display_spinner('Getting forecast for zone...')
+@traced()
 def get_zone_forecast(
     session: CachedSession,
     zone_id: str
@@ -0,0 +1,524 @@
+"""Decode raw METAR and SPECI reports into observations
+
+`Observation.raw_message` holds the report that the API's decoded fields come from,
+and bulk METAR archives contain nothing but reports, so decoding them locally fills
+fields that the API leaves null (eg wind gusts, which the API often drops) and lets
+archives be loaded without making any requests.
+
+Most reports have their groups in the standard order, and are decoded with one match
+of a precompiled pattern for the body of the report, and one scan of its remarks for
+the groups that have a field (sea level pressure, precipitation, and precise and 24
+hour temperatures). Reports that don't match are split into groups on whitespace, and
+each group is identified by its length and first and last characters.
+
+Values are decoded into the same fields, in the same units, as the API's decoded
+fields (see `libnws.api.get_weather.process_observations_data`).
+
+See: https://www.ofcm.gov/publications/fmh/FMH1/fmh1_2019.pdf (FMH-1, chapter 12)
+"""
+
+import re
+import logging
+from functools import lru_cache
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, List, Tuple
+from libnws.api.api_request import parse_timestamp
+from libnws.api.conversions import convert_measures
+from libnws.api.derived_measures import derive_measures
+from libnws.api.tracing import traced
+from libnws.api import METAR_CLOUD_COVER_MAP
+from libnws.model.weather import Observation
+logger = logging.getLogger(__name__)
+
+
+KNOTS_TO_KMH = 1.852
+MPS_TO_KMH = 3.6
+STATUTE_MILES_TO_M = 1609.344
+FEET_TO_M = 0.3048
+INHG_TO_PA = 3386.39
+INCHES_TO_MM = 25.4
+
+# The groups of a report before the remarks, in the order they usually appear
+METAR_BODY_PATTERN = re.compile(
+	r'(?:METAR |SPECI )?(?P<station>[A-Z0-9]{4}) (?P<day>\d\d)(?P<hour>\d\d)(?P<minute>\d\d)Z'
+	r'(?: AUTO| COR)*'
+	r'(?: (?P<wind_direction>\d{3}|VRB)(?P<wind_speed>\d{2,3})(?:G(?P<wind_gust>\d{2,3}))?'
+	r'(?P<wind_unit>KT|MPS))?'
+	r'(?: \d{3}V\d{3})?'
+	r'(?: (?P<visibility>(?:\d )?[MP]?\d+(?:/\d+)?SM|\d{4}|CAVOK))?'
+	r'(?: R\d\d[LCR]?/\S+)*'
+	r'(?P<weather>(?: (?:[-+]|VC)?(?:[A-Z]{2}){1,4})*)'
+	r'(?P<sky_cover>(?: (?:(?:FEW|SCT|BKN|OVC)\d{3}(?:CB|TCU)?|VV\d{3}|SKC|CLR|NSC|NCD))*)'
+	r'(?: (?P<temperature>M?\d\d)/(?P<dew_point>M?\d\d)?)?'
+	r'(?: (?P<altimeter>[AQ]\d{4}))?'
+	r'(?: NOSIG)?'
+)
+METAR_REMARKS_PATTERN = re.compile(
+	r'(?<!\S)(?:SLP(\d{3})|P(\d{4})|6(\d{4})|T([01]\d{3}[01]\d{3})|4([01]\d{3}[01]\d{3}))'
+	r'(?!\S)'
+)
+TEMPERATURE_PATTERN = re.compile(r'(M?\d\d)/(M?\d\d)?')
+REPORT_SEPARATOR_PATTERN = re.compile(r'=|\n(?![ \t])')
+
+METAR_SKY_COVER_CODES = ('FEW', 'SCT', 'BKN', 'OVC', 'SKC', 'CLR', 'NSC', 'NCD', 'VV')
+METAR_SKY_COVER_ORDER = ['SKC', 'CLR', 'FEW', 'SCT', 'BKN', 'OVC']
+
+METAR_WEATHER_INTENSITY_MAP = {
+	'-':	'Light',
+	'+':	'Heavy',
+	'VC':	'Nearby',
+}
+METAR_WEATHER_DESCRIPTOR_MAP = {
+	'MI':	'Shallow',
+	'PR':	'Partial',
+	'BC':	'Patches of',
+	'DR':	'Low Drifting',
+	'BL':	'Blowing',
+	'SH':	'Showers',
+	'TS':	'Thunderstorm',
+	'FZ':	'Freezing',
+}
+METAR_WEATHER_PHENOMENON_MAP = {
+	'DZ':	'Drizzle',
+	'RA':	'Rain',
+	'SN':	'Snow',
+	'SG':	'Snow Grains',
+	'IC':	'Ice Crystals',
+	'PL':	'Ice Pellets',
+	'GR':	'Hail',
+	'GS':	'Small Hail',
+	'UP':	'Unknown Precipitation',
+	'BR':	'Mist',
+	'FG':	'Fog',
+	'FU':	'Smoke',
+	'VA':	'Volcanic Ash',
+	'DU':	'Dust',
+	'SA':	'Sand',
+	'HZ':	'Haze',
+	'PY':	'Spray',
+	'PO':	'Dust Whirls',
+	'SQ':	'Squalls',
+	'FC':	'Funnel Cloud',
+	'SS':	'Sandstorm',
+	'DS':	'Duststorm',
+}
+
+
+def _parse_temperature(value: str) -> float:
+	"""Parse a whole-degree temperature (eg `M05` for -5)"""
+	if value[0] == 'M':
+		return -float(value[1:])
+	return float(value)
+
+
+def _parse_tenths(sign: str, value: str) -> float:
+	"""Parse a temperature in tenths of a degree from a remark (eg `1`, `050` for -5.0)"""
+	tenths = int(value) / 10
+	return -tenths if sign == '1' else tenths
+
+
+def _parse_visibility(value: str) -> float | None:
+	"""Parse a visibility in statute miles (eg `10`, `1/2`, `1 1/2`, or `M1/4`)"""
+	value = value.lstrip('MP')
+	miles = 0.0
+	for part in value.split():
+		if '/' in part:
+			numerator, _, denominator = part.partition('/')
+			if not numerator.isdigit() or not denominator.isdigit():
+				return None
+			miles += int(numerator) / int(denominator)
+		elif part.isdigit():
+			miles += int(part)
+		else:
+			return None
+	return miles
+
+
+def decode_weather(group: str) -> str | None:
+	"""Describe a present weather group (eg `-SHRA` is `Light Rain Showers`)
+
+	:returns: None if the group isn't a present weather group
+	"""
+	intensity = None
+	if group[0] in '-+':
+		intensity = group[0]
+		group = group[1:]
+	elif group.startswith('VC'):
+		intensity = 'VC'
+		group = group[2:]
+	if not group or len(group) % 2:
+		return None
+	descriptor = None
+	phenomena = []
+	for i in range(0, len(group), 2):
+		code = group[i:i + 2]
+		if i == 0 and code in METAR_WEATHER_DESCRIPTOR_MAP:
+			descriptor = code
+		elif code in METAR_WEATHER_PHENOMENON_MAP:
+			phenomena.append(METAR_WEATHER_PHENOMENON_MAP[code])
+		else:
+			return None
+	if group == 'TS' or (intensity == '+' and group == 'FC'):
+		return 'Thunderstorm' if group == 'TS' else 'Tornado'
+	words = []
+	if intensity and intensity != 'VC':
+		words.append(METAR_WEATHER_INTENSITY_MAP[intensity])
+	if descriptor == 'TS':
+		words.append('Thunderstorm')
+	elif descriptor and descriptor != 'SH':
+		words.append(METAR_WEATHER_DESCRIPTOR_MAP[descriptor])
+	words.append(' and '.join(phenomena) if phenomena else '')
+	if descriptor == 'SH':
+		words.append('Showers')
+	if intensity == 'VC':
+		words.append('Nearby')
+	return ' '.join(word for word in words if word)
+
+
+@lru_cache(maxsize=4096)
+def get_report_time(
+	day: int,
+	hour: int,
+	minute: int,
+	reference_hour: datetime
+) -> datetime | None:
+	"""Get the time of a report from its day of the month and time (in UTC), in the
+	same timezone as `libnws.api.api_request.parse_timestamp`
+
+	Reports don't include the month or year, so the report is assumed to have been made
+	in the month of `reference_hour`, or in the month before if that would be more than
+	an hour after `reference_hour`. Results are cached, since every report in an archive
+	is made at one of a few thousand times.
+
+	:param reference_hour: A timezone-aware UTC time, at the start of an hour
+	"""
+	year = reference_hour.year
+	month = reference_hour.month
+	for _ in range(2):
+		try:
+			report_time = datetime(year, month, day, hour, minute, tzinfo=timezone.utc)
+		except ValueError:
+			report_time = None
+		if report_time is not None and report_time <= reference_hour + timedelta(hours=2):
+			return parse_timestamp(report_time.isoformat())
+		month -= 1
+		if not month:
+			year -= 1
+			month = 12
+	return None
+
+
+def _new_report_data(report: str) -> dict:
+	return {
+		'station_or_zone_id':		None,
+		'observed_at':				None,
+		'text_description':			None,
+		'raw_message':				report,
+		'temperature_c':			None,
+		'dew_point_c':				None,
+		'wind_direction_deg_ang':	None,
+		'wind_speed_kmh':			None,
+		'wind_gust_kmh':			None,
+		'barometric_pressure_pa':	None,
+		'sea_level_pressure_pa':	None,
+		'visibility_m':				None,
+		'max_temp_last_24h_c':		None,
+		'min_temp_last_24h_c':		None,
+		'precip_last_1h_mm':		None,
+		'precip_last_3h_mm':		None,
+		'precip_last_6h_mm':		None,
+		'cloud_layers':				{},
+	}
+
+
+def _decode_wind(data: dict, direction: str, speed: str, gust: str, unit: str):
+	to_kmh = KNOTS_TO_KMH if unit == 'KT' else MPS_TO_KMH
+	if direction.isdigit():
+		data['wind_direction_deg_ang'] = int(direction)
+	if speed.isdigit():
+		data['wind_speed_kmh'] = int(speed) * to_kmh
+	if gust and gust.isdigit():
+		data['wind_gust_kmh'] = int(gust) * to_kmh
+
+
+def _decode_visibility(data: dict, visibility: str):
+	if visibility == 'CAVOK':
+		data['visibility_m'] = 10000
+	elif visibility.endswith('SM'):
+		miles = _parse_visibility(visibility[:-2])
+		if miles is not None:
+			data['visibility_m'] = int(round(miles * STATUTE_MILES_TO_M, -1))
+	elif visibility.isdigit():
+		# Visibility in meters, used outside the US
+		data['visibility_m'] = int(visibility)
+
+
+def _decode_altimeter(data: dict, altimeter: str):
+	if altimeter[0] == 'A':
+		# Altimeter setting in hundredths of an inch of mercury
+		data['barometric_pressure_pa'] = int(round(int(altimeter[1:]) / 100 * INHG_TO_PA,
+												   -1))
+	else:
+		# Altimeter setting in hectopascals
+		data['barometric_pressure_pa'] = int(altimeter[1:]) * 100
+
+
+def _decode_sky_cover(group: str) -> Tuple[str, int | None] | None:
+	"""Get the amount and height (in meters) of a sky cover group (eg FEW012, VV003)"""
+	code = group[:2] if group[:2] == 'VV' else group[:3]
+	height = group[len(code):len(code) + 3]
+	if height.isdigit():
+		# A vertical visibility means that the sky is obscured
+		return ('OVC' if code == 'VV' else code,
+				int(round(int(height) * 100 * FEET_TO_M, -1)))
+	if code in ('SKC', 'CLR', 'NSC', 'NCD'):
+		return ('SKC' if code == 'SKC' else 'CLR', None)
+	return None
+
+
+def _decode_body_groups(groups: List[str], data: dict, reference_hour: datetime) -> int:
+	"""Decode the body of a report group by group, for reports that don't match
+	`METAR_BODY_PATTERN`
+
+	:returns: The hour of the report (UTC)
+	"""
+	n_groups = len(groups)
+	i = 0
+	if i < n_groups and groups[i] in ('METAR', 'SPECI'):
+		i += 1
+	if i < n_groups:
+		data['station_or_zone_id'] = groups[i]
+		i += 1
+	report_hour = None
+	if i < n_groups and len(groups[i]) == 7 and groups[i][-1] == 'Z':
+		group = groups[i]
+		if group[:6].isdigit():
+			report_hour = int(group[2:4])
+			data['observed_at'] = get_report_time(int(group[0:2]), report_hour,
+												  int(group[4:6]), reference_hour)
+		i += 1
+
+	weather = []
+	sky_cover = []
+	while i < n_groups:
+		group = groups[i]
+		i += 1
+		first = group[0]
+		if group in ('AUTO', 'COR', 'NOSIG', 'CAVOK'):
+			if group == 'CAVOK':
+				_decode_visibility(data, group)
+		elif group.endswith('KT') or group.endswith('MPS'):
+			# Wind (eg 24015G25KT, VRB03KT, 00000KT)
+			unit = 'KT' if group[-1] == 'T' else 'MPS'
+			speed, _, gust = group[3:-len(unit)].partition('G')
+			_decode_wind(data, group[:3], speed, gust, unit)
+		elif group.endswith('SM'):
+			# Visibility, which may be split into a whole and a fraction (eg 1 1/2SM)
+			if '/' in group and i >= 2 and groups[i - 2].isdigit():
+				group = groups[i - 2] + ' ' + group
+			_decode_visibility(data, group)
+		elif len(group) == 4 and group.isdigit():
+			_decode_visibility(data, group)
+		elif first in 'FSBOCNV' and group.startswith(METAR_SKY_COVER_CODES):
+			layer = _decode_sky_cover(group)
+			if layer:
+				sky_cover.append(layer)
+		elif first in 'AQ' and len(group) == 5 and group[1:].isdigit():
+			_decode_altimeter(data, group)
+		elif '/' in group:
+			# Temperature and dew point, or runway visual range (eg R28L/2600FT)
+			match = TEMPERATURE_PATTERN.fullmatch(group)
+			if match:
+				data['temperature_c'] = _parse_temperature(match.group(1))
+				if match.group(2):
+					data['dew_point_c'] = _parse_temperature(match.group(2))
+		else:
+			description = decode_weather(group)
+			if description:
+				weather.append(description)
+	_set_sky_and_weather(data, sky_cover, weather)
+	return report_hour
+
+
+def _set_sky_and_weather(data: dict, sky_cover: List[tuple], weather: List[str]):
+	# The same keys as `libnws.api.get_weather.process_cloud_layers` makes from the
+	# API's decoded cloud layers. Clear sky (CLR/SKC) has no height, and the API reports
+	# it without a base or unit, which becomes the key 'None'.
+	data['cloud_layers'] = {(f'{height_m}m' if height_m is not None else 'None'):
+							METAR_CLOUD_COVER_MAP.get(amount)
+							for amount, height_m in sky_cover}
+	if weather:
+		data['text_description'] = ' and '.join(weather)
+	elif sky_cover:
+		# Describe the sky by its most covered layer
+		amount = max((amount for amount, _ in sky_cover), key=METAR_SKY_COVER_ORDER.index)
+		data['text_description'] = METAR_CLOUD_COVER_MAP.get(amount)
+
+
+def _decode_remarks(remarks: str, data: dict, report_hour: int | None):
+	for match in METAR_REMARKS_PATTERN.finditer(remarks):
+		slp, precip_1h, precip_3h_6h, temperature, extremes = match.groups()
+		if slp:
+			# Sea level pressure in tenths of a hectopascal, without the leading 9 or 10
+			tenths = int(slp)
+			data['sea_level_pressure_pa'] = round(((900 if tenths >= 500 else 1000)
+												   + tenths / 10) * 100)
+		elif precip_1h:
+			# Precipitation since the last routine report, in hundredths of an inch
+			data['precip_last_1h_mm'] = int(precip_1h) / 100 * INCHES_TO_MM
+		elif precip_3h_6h:
+			# Precipitation in the last 6 hours in the reports closest to 00, 06, 12,
+			# and 18 UTC, or in the last 3 hours in the reports between them
+			precip_mm = int(precip_3h_6h) / 100 * INCHES_TO_MM
+			if report_hour is not None and (report_hour + 1) % 6 == 0:
+				data['precip_last_6h_mm'] = precip_mm
+			else:
+				data['precip_last_3h_mm'] = precip_mm
+		elif temperature:
+			# Temperature and dew point in tenths of a degree
+			data['temperature_c'] = _parse_tenths(temperature[0], temperature[1:4])
+			data['dew_point_c'] = _parse_tenths(temperature[4], temperature[5:8])
+		elif extremes:
+			# Highest and lowest temperature in the last 24 hours
+			data['max_temp_last_24h_c'] = _parse_tenths(extremes[0], extremes[1:4])
+			data['min_temp_last_24h_c'] = _parse_tenths(extremes[4], extremes[5:8])
+
+
+def decode_metar(report: str, reference_time: datetime = None) -> dict:
+	"""Decode a METAR or SPECI report into the fields of an `Observation`
+
+	Fields that the report doesn't include are None. Measurements are in the same units
+	as the API's decoded fields, before `convert_measures` adds the other units.
+
+	Most reports are decoded with a single match of `METAR_BODY_PATTERN`. Reports with
+	groups out of order, or groups the pattern doesn't know, are decoded group by group.
+
+	:param report: The report, optionally starting with `METAR` or `SPECI`
+	:param reference_time: A timezone-aware time shortly after the report was made, used
+		to find its month and year (default: now)
+	"""
+	report = ' '.join(report.split())
+	data = _new_report_data(report)
+	reference_hour = (reference_time or datetime.now(timezone.utc)).astimezone(timezone.utc)
+	reference_hour = reference_hour.replace(minute=0, second=0, microsecond=0)
+	body, _, remarks = report.partition(' RMK ')
+
+	match = METAR_BODY_PATTERN.fullmatch(body)
+	if match is None:
+		report_hour = _decode_body_groups(body.split(), data, reference_hour)
+	else:
+		(station, day, hour, minute, wind_direction, wind_speed, wind_gust, wind_unit,
+		 visibility, weather_groups, sky_cover_groups, temperature, dew_point,
+		 altimeter) = match.groups()
+		data['station_or_zone_id'] = station
+		report_hour = int(hour)
+		data['observed_at'] = get_report_time(int(day), report_hour, int(minute),
+											  reference_hour)
+		if wind_unit:
+			_decode_wind(data, wind_direction, wind_speed, wind_gust, wind_unit)
+		if visibility:
+			_decode_visibility(data, visibility)
+		weather = []
+		if weather_groups:
+			for group in weather_groups.split():
+				description = decode_weather(group)
+				if description:
+					weather.append(description)
+		sky_cover = []
+		if sky_cover_groups:
+			for group in sky_cover_groups.split():
+				sky_cover.append(_decode_sky_cover(group))
+		_set_sky_and_weather(data, sky_cover, weather)
+		if temperature:
+			data['temperature_c'] = _parse_temperature(temperature)
+			if dew_point:
+				data['dew_point_c'] = _parse_temperature(dew_point)
+		if altimeter:
+			_decode_altimeter(data, altimeter)
+	if remarks:
+		_decode_remarks(remarks, data, report_hour)
+	return data
+
+
+def process_metar(
+	report: str,
+	retrieved_at: datetime = None,
+	reference_time: datetime = None,
+	derive: bool = False
+) -> Observation:
+	"""Decode a METAR or SPECI report into an `Observation`
+
+	Fields that can't be decoded from a report (eg the station's elevation) are None.
+
+	:param reference_time: See `decode_metar` (default: `retrieved_at`, or now)
+	:param derive: Whether to derive the relative humidity, wind chill, and heat index
+		(see `libnws.api.derived_measures`)
+	"""
+	observation = {
+		'retrieved_at':				retrieved_at,
+		'icon_url':					None,
+		'station_elevation_m':		None,
+		'relative_humidity_pc':		None,
+		'wind_chill_c':				None,
+		'heat_index_c':				None,
+	}
+	observation.update(decode_metar(report, reference_time or retrieved_at))
+	observation = convert_measures(observation)
+	if derive:
+		observation = derive_measures(observation)
+	return Observation(**observation)
+
+
+def fill_observation(observation: Observation) -> Observation:
+	"""Fill in the fields of an observation that the API left null from its raw
+	message, in place
+
+	:returns: The observation
+	"""
+	if not observation.raw_message:
+		return observation
+	reference_time = observation.retrieved_at
+	if reference_time is None or reference_time.tzinfo is None:
+		reference_time = None
+	decoded = process_metar(observation.raw_message, observation.retrieved_at,
+							reference_time)
+	for field, value in vars(decoded).items():
+		if value is not None and getattr(observation, field, None) in (None, {}):
+			setattr(observation, field, value)
+	return observation
+
+
+def iter_metar_reports(text: str) -> Iterator[str]:
+	"""Split the text of a bulk METAR file into reports
+
+	Reports end with `=` or at the end of a line, and a line that starts with whitespace
+	continues the report before it.
+	"""
+	for report in REPORT_SEPARATOR_PATTERN.split(text):
+		report = report.strip()
+		if report:
+			yield report
+
+
+@traced()
+def process_metar_file(
+	path: str,
+	reference_time: datetime = None,
+	retrieved_at: datetime = None
+) -> List[Observation]:
+	"""Decode every report in a bulk METAR file
+
+	Reports that can't be decoded are logged and skipped.
+
+	:param reference_time: See `decode_metar`. Archives of past months need a time
+		shortly after the last report in the archive.
+	"""
+	with open(path) as file:
+		text = file.read()
+	observations = []
+	for report in iter_metar_reports(text):
+		try:
+			observations.append(process_metar(report, retrieved_at, reference_time))
+		except (ValueError, IndexError) as exc:
+			logger.debug(f'Skipping report that couldn\'t be decoded ({exc}): {report}')
+	return observations
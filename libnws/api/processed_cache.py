@@ -0,0 +1,56 @@
+"""An in-process LRU cache of processed API responses
+
+`requests-cache` saves us from making network requests, but every call still decodes the
+cached JSON and processes it into dataclasses again. For large, rarely changing responses
+(eg radar stations, the glossary, and product types), that's most of the cost of a call.
+`ProcessedCache` keeps the processed result, keyed by the URL, the function that
+processed it, and a validator that changes whenever the cached response changes.
+"""
+
+import threading
+from typing import Any, Hashable
+from collections import OrderedDict
+
+
+# Returned by `ProcessedCache.get` on a miss, since None is a valid processed result
+MISSING = object()
+
+
+class ProcessedCache:
+	"""A thread-safe LRU cache
+
+	:param max_items: The most items to keep. The least recently used item is evicted
+		when a new item is added to a full cache.
+	"""
+
+	def __init__(self, max_items: int = 256):
+		self.max_items = max_items
+		self.hits = 0
+		self.misses = 0
+		self._items = OrderedDict()
+		self._lock = threading.Lock()
+
+	def __len__(self) -> int:
+		return len(self._items)
+
+	def get(self, key: Hashable) -> Any:
+		with self._lock:
+			if key not in self._items:
+				self.misses += 1
+				return MISSING
+			self._items.move_to_end(key)
+			self.hits += 1
+			return self._items[key]
+
+	def set(self, key: Hashable, value: Any):
+		with self._lock:
+			self._items[key] = value
+			self._items.move_to_end(key)
+			while len(self._items) > self.max_items:
+				self._items.popitem(last=False)
+
+	def clear(self):
+		with self._lock:
+			self._items.clear()
+			self.hits = 0
+			self.misses = 0
@@ -0,0 +1,202 @@
+"""Split the raw text of a product into its segments and sections
+
+Products such as zone forecasts and warnings are made of segments, each ending with a
+`$$` line and starting with a UGC (Universal Geographic Code) line listing the zones or
+counties it applies to, and an optional VTEC (Valid Time Event Code) line for each
+event it covers. Discussions such as AFDs are divided into sections by headers like
+`.SYNOPSIS...`, each ending at the next header or an `&&` line.
+
+`process_product_text` reads the text in a single pass. Each line is classified by its
+first character, and only lines that could be a heading, UGC, VTEC, or section header
+are matched against a (precompiled) pattern.
+
+See:
+- https://www.weather.gov/media/directives/010_pdfs/pd01017002curr.pdf (UGC)
+- https://www.weather.gov/media/directives/010_pdfs/pd01017003curr.pdf (VTEC)
+"""
+
+import re
+from typing import List, Tuple
+from libnws.api.api_request import parse_timestamp
+from libnws.model.products import ProductSection, ProductSegment, ProductText, VTECCode
+
+
+WMO_HEADING_PATTERN = re.compile(r'[A-Z]{4}\d{2} [A-Z]{4} \d{6}')
+AWIPS_ID_PATTERN = re.compile(r'[A-Z0-9]{4,6}')
+UGC_START_PATTERN = re.compile(r'[A-Z]{2}[CZ](?:\d{3}|ALL)[->]')
+UGC_EXPIRES_PATTERN = re.compile(r'(?:^|-)(\d{6})-?$')
+UGC_STATE_PATTERN = re.compile(r'([A-Z]{2}[CZ])(\d{3}|ALL)(?:>(\d{3}))?')
+UGC_NUMBER_PATTERN = re.compile(r'(\d{3})(?:>(\d{3}))?')
+VTEC_PATTERN = re.compile(
+	r'/([OTEX])\.([A-Z]{3})\.([A-Z]{4})\.([A-Z]{2})\.([A-Z])\.(\d{4})\.'
+	r'(\d{6}T\d{4}Z)-(\d{6}T\d{4}Z)/'
+)
+SECTION_HEADER_PATTERN = re.compile(r'\.([A-Z][^.]*?)\.\.\.(.*)')
+
+# Used in VTEC for event times that aren't known yet (eg the end of a warning until
+# further notice)
+VTEC_UNKNOWN_TIME = '000000T0000Z'
+
+
+def parse_vtec_time(vtec_time: str):
+	"""Parse a VTEC time (`yymmddThhmmZ`) like `parse_timestamp`"""
+	if vtec_time == VTEC_UNKNOWN_TIME:
+		return None
+	return parse_timestamp(f'20{vtec_time[0:2]}-{vtec_time[2:4]}-{vtec_time[4:6]}T'
+						   f'{vtec_time[7:9]}:{vtec_time[9:11]}:00+00:00')
+
+
+def parse_vtec(vtec: str) -> VTECCode | None:
+	"""Parse a P-VTEC string (eg `/O.NEW.KBOX.TO.W.0012.240815T1200Z-240815T1300Z/`)
+
+	:returns: None if the string isn't a P-VTEC string
+	"""
+	match = VTEC_PATTERN.search(vtec)
+	if not match:
+		return None
+	(product_class, action, office, phenomenon, significance, event_number, begins_at,
+	 ends_at) = match.groups()
+	vtec_dict = {
+		'vtec':				match.group(),
+		'product_class':	product_class,
+		'action':			action,
+		'office':			office,
+		'phenomenon':		phenomenon,
+		'significance':		significance,
+		'event_number':		int(event_number),
+		'begins_at':		parse_vtec_time(begins_at),
+		'ends_at':			parse_vtec_time(ends_at),
+	}
+	return VTECCode(**vtec_dict)
+
+
+def parse_ugc(ugc: str) -> Tuple[List[str], str]:
+	"""Expand a UGC string (eg `MAZ005>007-012-RIZ001-151200-`) into its codes
+
+	:returns: The codes (eg `MAZ005`, `MAZ006`, `MAZ007`, `MAZ012`, `RIZ001`), and the
+		expiration time (`ddhhmm`, UTC), if there is one
+	"""
+	codes = []
+	expires = None
+	prefix = None
+	for group in ugc.replace('\n', '').replace(' ', '').split('-'):
+		if not group:
+			continue
+		if len(group) == 6 and group.isdigit():
+			expires = group
+			break
+		match = UGC_STATE_PATTERN.fullmatch(group)
+		if match:
+			prefix, first, last = match.groups()
+		else:
+			match = UGC_NUMBER_PATTERN.fullmatch(group)
+			if not match or prefix is None:
+				continue
+			first, last = match.groups()
+		if last and first != 'ALL':
+			codes.extend(f'{prefix}{number:03d}'
+						 for number in range(int(first), int(last) + 1))
+		else:
+			codes.append(f'{prefix}{first}')
+	return codes, expires
+
+
+class _SegmentBuilder:
+	"""Collects the lines of one segment as they're read"""
+
+	def __init__(self):
+		self.lines = []
+		self.ugc_lines = []
+		self.reading_ugc = False
+		self.vtec = []
+		self.sections = []
+		self.section_title = None
+		self.section_lines = []
+
+	def end_section(self):
+		text = '\n'.join(self.section_lines).strip()
+		if self.section_title is not None or text:
+			self.sections.append(ProductSection(title=self.section_title, text=text))
+		self.section_title = None
+		self.section_lines = []
+
+	def build(self) -> ProductSegment | None:
+		self.end_section()
+		text = '\n'.join(self.lines).strip()
+		if not text:
+			return None
+		ugc_codes, ugc_expires = parse_ugc('-'.join(self.ugc_lines))
+		return ProductSegment(ugc_codes=ugc_codes,
+							  ugc_expires=ugc_expires,
+							  vtec=self.vtec,
+							  sections=self.sections,
+							  text=text)
+
+
+def process_product_text(text: str) -> ProductText:
+	"""Split a product's text into segments, and each segment into sections
+
+	Each segment's UGC codes and VTEC codes are parsed. Text that isn't under a
+	section header is put in a section with no title.
+	"""
+	wmo_heading = None
+	wmo_heading_line = None
+	awips_id = None
+	segments = []
+	segment = _SegmentBuilder()
+	for line_number, line in enumerate((text or '').splitlines()):
+		stripped = line.strip()
+		if not stripped:
+			segment.lines.append(line)
+			segment.section_lines.append(line)
+			continue
+		first = stripped[0]
+
+		if first == '$' and stripped.startswith('$$'):
+			built = segment.build()
+			if built:
+				segments.append(built)
+			segment = _SegmentBuilder()
+			continue
+		segment.lines.append(line)
+
+		if segment.reading_ugc:
+			segment.ugc_lines.append(stripped)
+			segment.reading_ugc = not UGC_EXPIRES_PATTERN.search(stripped)
+			continue
+		if 'A' <= first <= 'Z':
+			# The WMO heading is one of the first lines, and the AWIPS ID follows it
+			if (wmo_heading is None and line_number < 5
+				and WMO_HEADING_PATTERN.match(stripped)):
+				wmo_heading = stripped
+				wmo_heading_line = line_number
+				continue
+			if (line_number - 1 == wmo_heading_line
+				and AWIPS_ID_PATTERN.fullmatch(stripped)):
+				awips_id = stripped
+				continue
+			if not segment.ugc_lines and UGC_START_PATTERN.match(stripped):
+				segment.ugc_lines.append(stripped)
+				segment.reading_ugc = not UGC_EXPIRES_PATTERN.search(stripped)
+				continue
+		elif first == '/':
+			vtec = parse_vtec(stripped)
+			if vtec:
+				segment.vtec.append(vtec)
+				continue
+		elif first == '.':
+			match = SECTION_HEADER_PATTERN.match(stripped)
+			if match:
+				segment.end_section()
+				segment.section_title = match.group(1).strip()
+				if match.group(2):
+					segment.section_lines.append(match.group(2))
+				continue
+		elif first == '&' and stripped.startswith('&&'):
+			segment.end_section()
+			continue
+		segment.section_lines.append(line)
+	built = segment.build()
+	if built:
+		segments.append(built)
+	return ProductText(wmo_heading=wmo_heading, awips_id=awips_id, segments=segments)
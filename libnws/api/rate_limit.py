@@ -0,0 +1,226 @@
+"""Rate limiting and retries for requests to the NWS and USCB APIs
+
+The NWS API throttles clients that make too many requests in a short time, and
+occasionally responds with a 5xx error when it's overloaded. `install_rate_limiter`
+mounts a transport adapter on a session that:
+
+- Waits for a token from the token bucket of the request's host before every request
+  that isn't answered from the cache
+- Retries requests that fail with a connection error or a 429/5xx response, with
+  exponential backoff, honoring the `Retry-After` header when the API sends one
+
+The limiter is thread-safe and is applied at the transport, so every request made with
+the session shares the same per-host buckets, whether it's made directly, from worker
+threads, or by the asyncio scheduler in `libnws.service.scheduler`.
+"""
+
+import time
+import random
+import logging
+import threading
+from typing import Dict, Tuple
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+from requests import Response, PreparedRequest
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError, Timeout
+from requests_cache import CachedSession
+from libnws.api import API_RATE_LIMITS
+logger = logging.getLogger(__name__)
+
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+class TokenBucket:
+	"""A thread-safe token bucket
+
+	Callers that find the bucket empty reserve a future token and sleep until it's
+	available, so concurrent callers are served in order and the bucket never allows
+	more than `rate` requests per second after the initial burst.
+
+	:param rate: How many tokens are added to the bucket per second
+	:param capacity: The most tokens the bucket can hold (the largest allowed burst)
+	"""
+
+	def __init__(self, rate: float, capacity: float):
+		self.rate = rate
+		self.capacity = capacity
+		self._tokens = capacity
+		self._refreshed_at = time.monotonic()
+		self._paused_until = 0
+		self._lock = threading.Lock()
+
+	def _reserve(self, tokens: float) -> float:
+		with self._lock:
+			now = time.monotonic()
+			elapsed = now - self._refreshed_at
+			self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+			self._refreshed_at = now
+			self._tokens -= tokens
+			wait_s = max(0, -self._tokens / self.rate)
+			return max(wait_s, self._paused_until - now)
+
+	def acquire(self, tokens: float = 1) -> float:
+		"""Take tokens from the bucket, blocking until they're available
+
+		:returns: How long the caller waited, in seconds
+		"""
+		wait_s = self._reserve(tokens)
+		if wait_s > 0:
+			time.sleep(wait_s)
+		return wait_s
+
+	def pause(self, seconds: float):
+		"""Stop handing out tokens for the given number of seconds (eg after a 429)"""
+		with self._lock:
+			self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+class RateLimiter:
+	"""A collection of token buckets, one per host
+
+	:param host_limits: A mapping of host names to `(requests per second, burst size)`
+	:param default_limit: The limit for any host not in `host_limits`, or None to not
+		limit requests to other hosts
+	"""
+
+	def __init__(
+		self,
+		host_limits: Dict[str, Tuple[float, float]] = API_RATE_LIMITS,
+		default_limit: Tuple[float, float] = None
+	):
+		self.host_limits = dict(host_limits)
+		self.default_limit = default_limit
+		self._buckets: Dict[str, TokenBucket] = {}
+		self._lock = threading.Lock()
+
+	def get_bucket(self, url: str) -> TokenBucket | None:
+		host = urlsplit(url).hostname
+		with self._lock:
+			if host not in self._buckets:
+				limit = self.host_limits.get(host, self.default_limit)
+				self._buckets[host] = TokenBucket(*limit) if limit else None
+			return self._buckets[host]
+
+	def acquire(self, url: str) -> float:
+		bucket = self.get_bucket(url)
+		if bucket is None:
+			return 0
+		wait_s = bucket.acquire()
+		if wait_s > 0:
+			logger.debug(f'Waited {wait_s:.2f}s for a token to request {url}')
+		return wait_s
+
+	def pause(self, url: str, seconds: float):
+		bucket = self.get_bucket(url)
+		if bucket is not None:
+			bucket.pause(seconds)
+
+
+class RetryPolicy:
+	"""When and how long to wait before retrying a failed request
+
+	:param max_retries: The most times to retry a request
+	:param backoff_base_s: The delay before the first retry. The delay doubles with each
+		retry, and a random jitter of up to 50% is subtracted from it.
+	:param backoff_max_s: The longest delay before a retry, including any delay
+		requested with a `Retry-After` header
+	:param status_codes: Response status codes that should be retried
+	"""
+
+	def __init__(
+		self,
+		max_retries: int = 4,
+		backoff_base_s: float = 1,
+		backoff_max_s: float = 60,
+		status_codes: Tuple[int, ...] = RETRY_STATUS_CODES
+	):
+		self.max_retries = max_retries
+		self.backoff_base_s = backoff_base_s
+		self.backoff_max_s = backoff_max_s
+		self.status_codes = status_codes
+
+	def get_retry_after(self, response: Response) -> float | None:
+		"""Get the delay requested by a response's `Retry-After` header, if any"""
+		retry_after = response.headers.get('Retry-After')
+		if not retry_after:
+			return None
+		try:
+			return max(0, float(retry_after))
+		except ValueError:
+			pass
+		try:
+			retry_at = parsedate_to_datetime(retry_after)
+			return max(0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+		except (TypeError, ValueError):
+			return None
+
+	def get_delay(self, attempt: int, response: Response = None) -> float:
+		retry_after = self.get_retry_after(response) if response is not None else None
+		if retry_after is not None:
+			return min(self.backoff_max_s, retry_after)
+		delay = min(self.backoff_max_s, self.backoff_base_s * 2 ** attempt)
+		return delay * random.uniform(0.5, 1)
+
+
+class RateLimitedAdapter(HTTPAdapter):
+	"""A transport adapter that applies a `RateLimiter` and a `RetryPolicy`
+
+	Since `requests-cache` only calls the transport adapter when a response isn't in the
+	cache, cached responses don't use any tokens.
+	"""
+
+	def __init__(
+		self,
+		limiter: RateLimiter,
+		retry_policy: RetryPolicy,
+		**kwargs
+	):
+		super().__init__(**kwargs)
+		self.limiter = limiter
+		self.retry_policy = retry_policy
+
+	def send(self, request: PreparedRequest, **kwargs) -> Response:
+		for attempt in range(self.retry_policy.max_retries + 1):
+			is_last_attempt = (attempt == self.retry_policy.max_retries)
+			self.limiter.acquire(request.url)
+			try:
+				response = super().send(request, **kwargs)
+			except (ConnectionError, Timeout) as exc:
+				if is_last_attempt:
+					raise
+				delay = self.retry_policy.get_delay(attempt)
+				logger.warning(f'Request to {request.url} failed ({exc}), retrying in '
+							   f'{delay:.1f}s')
+				time.sleep(delay)
+				continue
+			if (response.status_code not in self.retry_policy.status_codes
+				or is_last_attempt):
+				return response
+			delay = self.retry_policy.get_delay(attempt, response)
+			if response.status_code == 429:
+				# Every request to this host should wait, not only this one
+				self.limiter.pause(request.url, delay)
+			logger.warning(f'Got status code {response.status_code} from {request.url}, '
+						   f'retrying in {delay:.1f}s')
+			response.close()
+			time.sleep(delay)
+
+
+# Shared by every session that doesn't get its own limiter, so that all requests made
+# by this process count against the same per-host limits
+DEFAULT_RATE_LIMITER = RateLimiter()
+
+
+def install_rate_limiter(
+	session: CachedSession,
+	limiter: RateLimiter = DEFAULT_RATE_LIMITER,
+	retry_policy: RetryPolicy = None
+) -> CachedSession:
+	"""Rate limit and retry all requests made with the given session"""
+	adapter = RateLimitedAdapter(limiter, retry_policy or RetryPolicy())
+	session.mount('http://', adapter)
+	session.mount('https://', adapter)
+	return session
@@ -0,0 +1,52 @@
+"""Deduplicate concurrent calls that would do the same work
+
+When many threads ask for the same thing at the same moment (eg the forecast for a
+popular gridpoint during severe weather), only the first caller does the work. Every
+other caller waits for it to finish and gets the same result, or the same exception.
+"""
+
+import threading
+from typing import Any, Callable, Dict, Hashable
+from concurrent.futures import Future
+
+
+class SingleFlight:
+	"""Run at most one call per key at a time, and share its result with every caller
+	that asks for the same key while it's in flight
+
+	Results aren't kept once the call finishes, so a call made after the previous one
+	returned does the work again. Caching is left to `requests-cache`.
+	"""
+
+	def __init__(self):
+		self._calls: Dict[Hashable, Future] = {}
+		self._lock = threading.Lock()
+
+	def in_flight(self) -> int:
+		"""The number of calls currently in flight"""
+		with self._lock:
+			return len(self._calls)
+
+	def do(self, key: Hashable, func: Callable, *args, **kwargs) -> Any:
+		"""Call `func(*args, **kwargs)`, unless a call with the same key is in flight,
+		in which case wait for it and return its result instead
+		"""
+		with self._lock:
+			call = self._calls.get(key)
+			is_leader = call is None
+			if is_leader:
+				call = Future()
+				self._calls[key] = call
+		if not is_leader:
+			return call.result()
+		try:
+			result = func(*args, **kwargs)
+		except BaseException as exc:
+			call.set_exception(exc)
+			raise
+		else:
+			call.set_result(result)
+			return result
+		finally:
+			with self._lock:
+				del self._calls[key]
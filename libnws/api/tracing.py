@@ -0,0 +1,335 @@
+"""Trace where the time goes in requests, decoding, processing, and repository writes
+
+Spans are recorded around:
+
+- The transport (`http.request`), with the URL, its template (eg
+  `/stations/{id}/observations/latest`), whether the response came from the cache, the
+  status code, the size of the response, and the time the server took to respond
+- JSON decoding (`json.decode`), with the size of the response
+- Each fetcher (eg `get_alerts`), with the URL of the first request it makes
+- Each `process_*` function that processes a whole response, with the URL of the
+  response when it's called inside a fetcher
+- Repository writes (`repository.create`, `repository.create_many`, ...), with the table
+  and the number of items
+
+Spans are nested: a span started while another is open in the same thread (or asyncio
+task) is its child. Finished spans are passed to exporters: `LoggingExporter` logs them,
+`StatsRegistry` keeps running totals by span name and URL template, and
+`OpenTelemetryExporter` forwards them to OpenTelemetry when it's installed. Exporters
+are pluggable, so anything with `on_start` and `on_end` methods can be added.
+
+Tracing is off until an exporter is added. While it's off, `span` returns a shared
+no-op span without recording anything, so instrumented code costs one check per span.
+
+For example, to see which endpoints take the longest:
+
+.. code-block:: python
+
+	stats = StatsRegistry()
+	enable_tracing(stats)
+	get_alerts(session)
+	get_all_sigmets(session)
+	for row in stats.get_stats():
+		print(row['name'], row['url_template'], row['count'], row['total_s'])
+	disable_tracing()
+"""
+
+import re
+import time
+import logging
+import threading
+from contextvars import ContextVar
+from functools import lru_cache, wraps
+from typing import Callable, Dict, List, Tuple
+from urllib.parse import urlsplit
+from libnws.api import VALID_NWS_ZONES
+logger = logging.getLogger(__name__)
+
+try:
+	from opentelemetry import trace as otel_trace
+except ImportError:
+	otel_trace = None
+
+
+# Path segments that are part of an API route. Every other segment is an identifier (eg
+# a station ID or a date) and is replaced with `{id}` in URL templates.
+ROUTE_SEGMENTS = {
+	'active', 'alarms', 'alerts', 'area', 'aviation', 'count', 'cwas', 'cwsus',
+	'forecast', 'glossary', 'gridpoints', 'headlines', 'hourly', 'latest', 'locations',
+	'observations', 'offices', 'points', 'products', 'queues', 'radar', 'region',
+	'servers', 'sigmets', 'stations', 'types', 'zone', 'zones',
+	*VALID_NWS_ZONES,
+}
+
+# An identifier that contains a number (eg `KBOS` doesn't, but `AKC013` does) is never
+# mistaken for a route segment
+ID_PATTERN = re.compile(r'\d')
+
+
+@lru_cache(maxsize=4096)
+def get_url_template(url: str) -> str:
+	"""Get the route of a URL, with identifiers replaced (eg `/stations/{id}/observations`
+	for `https://api.weather.gov/stations/KBOS/observations?limit=10`)
+	"""
+	path = urlsplit(url).path
+	segments = [segment if segment in ROUTE_SEGMENTS and not ID_PATTERN.search(segment)
+				else '{id}'
+				for segment in path.strip('/').split('/') if segment]
+	return '/' + '/'.join(segments)
+
+
+class Span:
+	"""A timed operation, with attributes that describe it
+
+	A `url` attribute also sets the `url_template` attribute.
+	"""
+
+	__slots__ = ('name', 'attributes', 'parent', 'started_at', 'duration_s',
+				 'started_at_ns', 'otel_span', '_token')
+
+	recording = True
+
+	def __init__(self, name: str, attributes: dict):
+		self.name = name
+		self.attributes = attributes
+		if 'url' in attributes:
+			attributes['url_template'] = get_url_template(attributes['url'])
+		self.parent: Span = None
+		self.started_at = None
+		self.started_at_ns = None
+		self.duration_s = None
+		self.otel_span = None
+		self._token = None
+
+	def set(self, key: str, value):
+		self.attributes[key] = value
+		if key == 'url':
+			self.attributes['url_template'] = get_url_template(value)
+
+	def __enter__(self) -> 'Span':
+		self.parent = _current_span.get()
+		self._token = _current_span.set(self)
+		self.started_at_ns = time.time_ns()
+		for exporter in _exporters:
+			exporter.on_start(self)
+		self.started_at = time.perf_counter()
+		return self
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		self.duration_s = time.perf_counter() - self.started_at
+		if exc_type is not None:
+			self.attributes['error'] = exc_type.__name__
+		_current_span.reset(self._token)
+		for exporter in _exporters:
+			try:
+				exporter.on_end(self)
+			except Exception:
+				logger.exception(f'Failed to export span {self.name}')
+		return False
+
+
+class NoopSpan:
+	"""Returned by `span` while tracing is off"""
+
+	__slots__ = ()
+
+	recording = False
+
+	def set(self, key: str, value):
+		pass
+
+	def __enter__(self) -> 'NoopSpan':
+		return self
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		return False
+
+
+_NOOP_SPAN = NoopSpan()
+
+_current_span: ContextVar[Span] = ContextVar('libnws_current_span', default=None)
+
+# Replaced, not modified, so that spans can loop over it without a lock
+_exporters: Tuple['SpanExporter', ...] = ()
+
+
+def span(name: str, **attributes) -> Span | NoopSpan:
+	"""Record a span around a block of code
+
+	.. code-block:: python
+
+		with span('backfill.batch', items=len(batch)) as batch_span:
+			...
+			batch_span.set('written', written)
+	"""
+	if not _exporters:
+		return _NOOP_SPAN
+	return Span(name, attributes)
+
+
+def traced(name: str = None) -> Callable:
+	"""A decorator that records a span around every call of a function
+
+	The span has the URL of the span it's started in, if that has one, so that a
+	`process_*` function called inside a fetcher is timed by the URL it processed.
+
+	:param name: The span's name (default: the function's name)
+	"""
+
+	def decorator(func: Callable):
+		span_name = name or func.__name__
+
+		@wraps(func)
+		def wrapper(*args, **kwargs):
+			if not _exporters:
+				return func(*args, **kwargs)
+			attributes = {}
+			parent = _current_span.get()
+			if parent is not None and 'url' in parent.attributes:
+				attributes['url'] = parent.attributes['url']
+			with Span(span_name, attributes):
+				return func(*args, **kwargs)
+		return wrapper
+	return decorator
+
+
+def set_request_url(url: str):
+	"""Give the open span the URL of a request made inside it, unless it already has
+	one. `api_request` calls this, so that a fetcher's span carries the URL it got.
+	"""
+	if not _exporters:
+		return
+	current_span = _current_span.get()
+	if current_span is not None and 'url' not in current_span.attributes:
+		current_span.set('url', url)
+
+
+def is_tracing_enabled() -> bool:
+	return bool(_exporters)
+
+
+def enable_tracing(*exporters: 'SpanExporter'):
+	"""Start passing spans to the given exporters, as well as any already added"""
+	global _exporters
+	_exporters = _exporters + tuple(exporter for exporter in exporters
+									if exporter not in _exporters)
+
+
+def disable_tracing(*exporters: 'SpanExporter'):
+	"""Stop passing spans to the given exporters (default: all of them). Tracing is off
+	once no exporters are left.
+	"""
+	global _exporters
+	if not exporters:
+		_exporters = ()
+	else:
+		_exporters = tuple(exporter for exporter in _exporters
+						   if exporter not in exporters)
+
+
+class SpanExporter:
+	"""The base class for exporters. Both methods are called on the thread that ran
+	the span.
+	"""
+
+	def on_start(self, span: Span):
+		pass
+
+	def on_end(self, span: Span):
+		pass
+
+
+class LoggingExporter(SpanExporter):
+	"""Log every finished span
+
+	:param level: The level to log spans at
+	"""
+
+	def __init__(self, level: int = logging.DEBUG, logger: logging.Logger = logger):
+		self.level = level
+		self.logger = logger
+
+	def on_end(self, span: Span):
+		if not self.logger.isEnabledFor(self.level):
+			return
+		attributes = ' '.join(f'{key}={value}' for key, value in span.attributes.items()
+							  if key != 'url')
+		self.logger.log(self.level,
+						f'{span.name} took {span.duration_s * 1000:.2f}ms {attributes}'.rstrip())
+
+
+class StatsRegistry(SpanExporter):
+	"""Running totals of finished spans, by span name and URL template"""
+
+	def __init__(self):
+		self._lock = threading.Lock()
+		self._stats: Dict[Tuple[str, str], dict] = {}
+
+	def on_end(self, span: Span):
+		key = (span.name, span.attributes.get('url_template'))
+		with self._lock:
+			stats = self._stats.get(key)
+			if stats is None:
+				stats = self._stats[key] = {
+					'name':			span.name,
+					'url_template':	key[1],
+					'count':		0,
+					'errors':		0,
+					'total_s':		0.0,
+					'max_s':		0.0,
+					'bytes':		0,
+					'cache_hits':	0,
+				}
+			stats['count'] += 1
+			stats['total_s'] += span.duration_s
+			stats['max_s'] = max(stats['max_s'], span.duration_s)
+			stats['bytes'] += span.attributes.get('bytes') or 0
+			if span.attributes.get('from_cache'):
+				stats['cache_hits'] += 1
+			if 'error' in span.attributes:
+				stats['errors'] += 1
+
+	def get_stats(self) -> List[dict]:
+		"""Get the totals of each span name and URL template, most total time first.
+		Each has the mean time (`mean_s`) as well.
+		"""
+		with self._lock:
+			rows = [dict(stats, mean_s=stats['total_s'] / stats['count'])
+					for stats in self._stats.values()]
+		return sorted(rows, key=lambda row: row['total_s'], reverse=True)
+
+	def reset(self):
+		with self._lock:
+			self._stats.clear()
+
+
+class OpenTelemetryExporter(SpanExporter):
+	"""Forward spans to OpenTelemetry, with the same nesting
+
+	Spans are sent to whichever tracer provider OpenTelemetry is configured with.
+
+	:raises ImportError: If the `opentelemetry-api` package isn't installed
+	"""
+
+	def __init__(self, tracer_name: str = 'libnws'):
+		if otel_trace is None:
+			raise ImportError('OpenTelemetryExporter needs the opentelemetry-api package')
+		self.tracer = otel_trace.get_tracer(tracer_name)
+
+	def on_start(self, span: Span):
+		context = None
+		if span.parent is not None and span.parent.otel_span is not None:
+			context = otel_trace.set_span_in_context(span.parent.otel_span)
+		span.otel_span = self.tracer.start_span(span.name,
+												context=context,
+												start_time=span.started_at_ns)
+
+	def on_end(self, span: Span):
+		if span.otel_span is None:
+			return
+		for key, value in span.attributes.items():
+			if isinstance(value, (str, bool, int, float)):
+				span.otel_span.set_attribute(f'libnws.{key}', value)
+		if 'error' in span.attributes:
+			span.otel_span.set_status(otel_trace.StatusCode.ERROR)
+		span.otel_span.end(end_time=span.started_at_ns + int(span.duration_s * 1e9))
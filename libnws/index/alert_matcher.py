@@ -0,0 +1,163 @@
+"""Find the monitored sites that are affected by an alert
+
+Alerts identify the areas they affect by UGC zone codes, SAME (FIPS county) codes, and
+for storm-based warnings, a polygon. `AlertMatcher` keeps an inverted index from each
+code to the sites in it, and a grid of site coordinates for alerts with a polygon, so
+each alert is resolved to its affected sites in a single pass over its codes or over
+the grid cells its polygon covers.
+
+For example, to watch two sites, using a zone index to find their zone codes:
+
+.. code-block:: python
+
+	matcher = AlertMatcher()
+	matcher.add_site('store-101', 42.36, -71.06, zone_index=zone_index)
+	matcher.add_site('store-102', 40.71, -74.01, zone_index=zone_index)
+	for alert in get_alerts(session):
+		affected_sites = matcher.match(alert)
+"""
+
+import math
+import logging
+from typing import Dict, Iterable, List, Sequence, Set, Tuple
+from libnws.index.geometry import get_bbox, point_in_polygon
+from libnws.index.zone_index import ZoneIndex
+from libnws.model.alerts import Alert
+from libnws.model.locations import Site
+logger = logging.getLogger(__name__)
+
+
+def normalize_same_code(same_code: str) -> str:
+	"""Drop the county subdivision digit from a 6-digit SAME code
+
+	Alerts for part of a county use a non-zero first digit, and should still match
+	sites that only know their county.
+	"""
+	return same_code[-5:]
+
+
+class AlertMatcher:
+	"""An index of monitored sites by zone code, county code, and location
+
+	:param cell_size: The width and height of the cells in the grid of site locations,
+		in degrees
+	"""
+
+	def __init__(self, cell_size: float = 0.25):
+		self.cell_size = cell_size
+		self.sites: Dict[str, Site] = {}
+		self._sites_by_ugc: Dict[str, Set[str]] = {}
+		self._sites_by_same: Dict[str, Set[str]] = {}
+		self._sites_by_cell: Dict[Tuple[int, int], Set[str]] = {}
+
+	def __len__(self) -> int:
+		return len(self.sites)
+
+	def _get_cell(self, lat: float, lon: float) -> Tuple[int, int]:
+		return (math.floor(lat / self.cell_size), math.floor(lon / self.cell_size))
+
+	def add_site(
+		self,
+		site_id: str,
+		lat: float,
+		lon: float,
+		zones_ugc: Iterable[str] = (),
+		areas_same: Iterable[str] = (),
+		zone_index: ZoneIndex = None
+	) -> Site:
+		"""Start monitoring a site
+
+		:param zones_ugc: The UGC codes of the zones the site is in (eg `MAZ015`,
+			`MAC025`)
+		:param areas_same: The SAME codes of the county the site is in (eg `025025`)
+		:param zone_index: If given, the site's zone codes are looked up in this index
+			and added to `zones_ugc`
+		"""
+		if site_id in self.sites:
+			self.remove_site(site_id)
+		zones_ugc = list(zones_ugc)
+		if zone_index is not None:
+			zones_ugc.extend(zone_id for zone_id in zone_index.lookup(lat, lon)
+							 if zone_id not in zones_ugc)
+		site = Site(site_id=site_id,
+					lat=lat,
+					lon=lon,
+					zones_ugc=zones_ugc,
+					areas_same=list(areas_same))
+		self.sites[site_id] = site
+		for ugc_code in site.zones_ugc:
+			self._sites_by_ugc.setdefault(ugc_code, set()).add(site_id)
+		for same_code in site.areas_same:
+			same_code = normalize_same_code(same_code)
+			self._sites_by_same.setdefault(same_code, set()).add(site_id)
+		self._sites_by_cell.setdefault(self._get_cell(lat, lon), set()).add(site_id)
+		return site
+
+	def remove_site(self, site_id: str) -> bool:
+		"""Stop monitoring a site"""
+		site = self.sites.pop(site_id, None)
+		if site is None:
+			return False
+		for ugc_code in site.zones_ugc:
+			self._sites_by_ugc.get(ugc_code, set()).discard(site_id)
+		for same_code in site.areas_same:
+			same_code = normalize_same_code(same_code)
+			self._sites_by_same.get(same_code, set()).discard(site_id)
+		self._sites_by_cell.get(self._get_cell(site.lat, site.lon), set()).discard(site_id)
+		return True
+
+	def match_codes(self, alert: Alert) -> Set[str]:
+		"""Get the sites in any of the alert's UGC zones or SAME counties"""
+		site_ids = set()
+		for ugc_code in alert.areas_ugc or ():
+			site_ids.update(self._sites_by_ugc.get(ugc_code, ()))
+		for same_code in alert.areas_same or ():
+			same_code = normalize_same_code(same_code)
+			site_ids.update(self._sites_by_same.get(same_code, ()))
+		return site_ids
+
+	def match_polygon(self, polygons: List[List[Sequence[float]]]) -> Set[str]:
+		"""Get the sites inside any of the given polygons
+
+		:param polygons: Polygons as returned by `PackedGeometry.get_rings`
+		"""
+		site_ids = set()
+		for rings in polygons:
+			if not rings:
+				continue
+			min_lon, min_lat, max_lon, max_lat = get_bbox(rings[0])
+			row_min, col_min = self._get_cell(min_lat, min_lon)
+			row_max, col_max = self._get_cell(max_lat, max_lon)
+			for row in range(row_min, row_max + 1):
+				for col in range(col_min, col_max + 1):
+					for site_id in self._sites_by_cell.get((row, col), ()):
+						if site_id in site_ids:
+							continue
+						site = self.sites[site_id]
+						if point_in_polygon(site.lon, site.lat, rings):
+							site_ids.add(site_id)
+		return site_ids
+
+	def match(self, alert: Alert) -> Set[str]:
+		"""Get the IDs of the sites affected by an alert
+
+		If the alert has its own polygon, it's used instead of the alert's zone and
+		county codes, since the codes cover every county the polygon touches.
+		"""
+		if alert.area_polygon:
+			polygons = alert.area_polygon.get_rings()
+			if polygons:
+				return self.match_polygon(polygons)
+		return self.match_codes(alert)
+
+	def match_many(self, alerts: Iterable[Alert]) -> Dict[str, Set[str]]:
+		"""Get the IDs of the sites affected by each alert, by alert ID
+
+		Alerts that don't affect any sites are left out.
+		"""
+		matches = {}
+		for alert in alerts:
+			site_ids = self.match(alert)
+			if site_ids:
+				matches[alert.alert_id] = site_ids
+		return matches
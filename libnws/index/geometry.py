@@ -0,0 +1,131 @@
+"""Geometry helpers for the local indexes
+
+Coordinates are handled the way the NWS API returns them in GeoJSON: longitude first,
+then latitude. Rings are stored as flat sequences of coordinates (`[lon0, lat0, lon1,
+lat1, ...]`) so that they can be kept in compact arrays and memory-mapped files.
+"""
+
+import math
+from typing import Sequence
+# Re-exported for the indexes. They live with `PackedGeometry` so that the models don't
+# depend on the index package.
+from libnws.model.geometry import BBox, get_polygons, flatten_ring, get_bbox, simplify_ring
+
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(lat_1: float, lon_1: float, lat_2: float, lon_2: float) -> float:
+	"""Get the great-circle distance between two points, in kilometers"""
+	lat_1 = math.radians(lat_1)
+	lat_2 = math.radians(lat_2)
+	d_lat = lat_2 - lat_1
+	d_lon = math.radians(lon_2 - lon_1)
+	a = (math.sin(d_lat / 2) ** 2
+		 + math.cos(lat_1) * math.cos(lat_2) * math.sin(d_lon / 2) ** 2)
+	return 2 * EARTH_RADIUS_KM * math.asin(min(1, math.sqrt(a)))
+
+
+def bbox_contains(bbox: Sequence[float], lon: float, lat: float) -> bool:
+	return bbox[0] <= lon <= bbox[2] and bbox[1] <= lat <= bbox[3]
+
+
+def bbox_intersects(bbox_a: Sequence[float], bbox_b: Sequence[float]) -> bool:
+	return (bbox_a[0] <= bbox_b[2] and bbox_b[0] <= bbox_a[2]
+			and bbox_a[1] <= bbox_b[3] and bbox_b[1] <= bbox_a[3])
+
+
+def point_in_ring(lon: float, lat: float, coords: Sequence[float]) -> bool:
+	"""Test whether a point is inside a ring, using the even-odd (ray casting) rule
+
+	:param coords: The ring as a flat sequence of coordinates. The ring doesn't need to
+		be explicitly closed.
+	"""
+	inside = False
+	lon_1 = coords[-2]
+	lat_1 = coords[-1]
+	for i in range(0, len(coords), 2):
+		lon_2 = coords[i]
+		lat_2 = coords[i + 1]
+		if ((lat_2 > lat) != (lat_1 > lat)
+			and lon < (lon_1 - lon_2) * (lat - lat_2) / (lat_1 - lat_2) + lon_2):
+			inside = not inside
+		lon_1 = lon_2
+		lat_1 = lat_2
+	return inside
+
+
+def point_in_polygon(lon: float, lat: float, rings: Sequence[Sequence[float]]) -> bool:
+	"""Test whether a point is inside a polygon's exterior ring and outside its holes"""
+	if not rings or not point_in_ring(lon, lat, rings[0]):
+		return False
+	for hole in rings[1:]:
+		if point_in_ring(lon, lat, hole):
+			return False
+	return True
+
+
+def segments_intersect(
+	lon_1: float, lat_1: float, lon_2: float, lat_2: float,
+	lon_3: float, lat_3: float, lon_4: float, lat_4: float
+) -> bool:
+	"""Test whether the segment from point 1 to 2 touches the segment from 3 to 4"""
+	def orientation(lon_a, lat_a, lon_b, lat_b, lon_c, lat_c) -> float:
+		return (lon_b - lon_a) * (lat_c - lat_a) - (lat_b - lat_a) * (lon_c - lon_a)
+
+	d_1 = orientation(lon_3, lat_3, lon_4, lat_4, lon_1, lat_1)
+	d_2 = orientation(lon_3, lat_3, lon_4, lat_4, lon_2, lat_2)
+	d_3 = orientation(lon_1, lat_1, lon_2, lat_2, lon_3, lat_3)
+	d_4 = orientation(lon_1, lat_1, lon_2, lat_2, lon_4, lat_4)
+	if ((d_1 > 0) != (d_2 > 0) and d_1 and d_2
+		and (d_3 > 0) != (d_4 > 0) and d_3 and d_4):
+		return True
+	# Collinear or touching segments
+	def on_segment(lon_a, lat_a, lon_b, lat_b, lon_c, lat_c) -> bool:
+		return (min(lon_a, lon_b) <= lon_c <= max(lon_a, lon_b)
+				and min(lat_a, lat_b) <= lat_c <= max(lat_a, lat_b))
+
+	return ((not d_1 and on_segment(lon_3, lat_3, lon_4, lat_4, lon_1, lat_1))
+			or (not d_2 and on_segment(lon_3, lat_3, lon_4, lat_4, lon_2, lat_2))
+			or (not d_3 and on_segment(lon_1, lat_1, lon_2, lat_2, lon_3, lat_3))
+			or (not d_4 and on_segment(lon_1, lat_1, lon_2, lat_2, lon_4, lat_4)))
+
+
+def polyline_intersects_polygon(
+	line: Sequence[float],
+	rings: Sequence[Sequence[float]],
+	bbox: Sequence[float] = None
+) -> bool:
+	"""Test whether a polyline crosses, touches, or lies inside a polygon
+
+	:param line: The polyline as a flat sequence of coordinates
+	:param rings: The polygon's exterior ring and any holes, as flat sequences
+	:param bbox: The bounding box of the polygon's exterior ring, if already known.
+		Segments of the line that don't overlap it are skipped.
+	"""
+	if not rings or len(line) < 2:
+		return False
+	if bbox is None:
+		bbox = get_bbox(rings[0])
+	for i in range(0, len(line), 2):
+		if (bbox_contains(bbox, line[i], line[i + 1])
+			and point_in_polygon(line[i], line[i + 1], rings)):
+			return True
+	for i in range(0, len(line) - 2, 2):
+		lon_1, lat_1, lon_2, lat_2 = line[i:i + 4]
+		segment_bbox = (min(lon_1, lon_2), min(lat_1, lat_2),
+						max(lon_1, lon_2), max(lat_1, lat_2))
+		if not bbox_intersects(bbox, segment_bbox):
+			continue
+		for ring in rings:
+			lon_3 = ring[-2]
+			lat_3 = ring[-1]
+			for j in range(0, len(ring), 2):
+				lon_4 = ring[j]
+				lat_4 = ring[j + 1]
+				if segments_intersect(lon_1, lat_1, lon_2, lat_2,
+									  lon_3, lat_3, lon_4, lat_4):
+					return True
+				lon_3 = lon_4
+				lat_3 = lat_4
+	return False
@@ -0,0 +1,199 @@
+"""Search the text of NWS products without fetching them again
+
+`ProductSearchIndex` is an inverted index over `Product.text`: for each term, the
+products it appears in and its positions in each one. Products are added as they're
+fetched, searches are ranked with BM25, and quoted phrases only match products where
+the words appear next to each other. Results can be filtered by product code, issuing
+office, and issuance time.
+
+For example, to find the area forecast discussions from Boston that mention a
+derecho:
+
+.. code-block:: python
+
+	product_index = ProductSearchIndex()
+	for product in products:
+		product_index.add(product)
+	product_index.search('derecho "damaging winds"', code='AFD', issuing_office='KBOX')
+	# [(Product(product_id='...', ...), 7.52), ...]
+"""
+
+import re
+import math
+import logging
+from array import array
+from datetime import datetime
+from dataclasses import replace
+from typing import Dict, Iterable, List, Set, Tuple
+from libnws.model.products import Product
+logger = logging.getLogger(__name__)
+
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+QUERY_PATTERN = re.compile(r'"([^"]*)"|(\S+)')
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+	return TOKEN_PATTERN.findall(text.lower())
+
+
+def parse_query(query: str) -> List[List[str]]:
+	"""Split a query into phrases, where each unquoted word is a phrase of one term"""
+	phrases = []
+	for match in QUERY_PATTERN.finditer(query):
+		terms = tokenize(match.group(1) if match.group(1) is not None else match.group(2))
+		if terms:
+			phrases.append(terms)
+	return phrases
+
+
+class ProductSearchIndex:
+	"""A positional inverted index of product text"""
+
+	def __init__(self):
+		self._products: List[Product | None] = []
+		self._doc_ids: Dict[str, int] = {}
+		self._doc_lengths = array('I')
+		self._doc_terms: Dict[int, Tuple[str, ...]] = {}
+		self._postings: Dict[str, Dict[int, array]] = {}
+		self._total_length = 0
+
+	def __len__(self) -> int:
+		return len(self._doc_ids)
+
+	def __contains__(self, product_id: str) -> bool:
+		return product_id in self._doc_ids
+
+	def add(self, product: Product) -> bool:
+		"""Index a product's text
+
+		:returns: False if the product has no text or was already indexed
+		"""
+		if not product.text or product.product_id in self._doc_ids:
+			return False
+		doc_id = len(self._products)
+		# The text is only needed to build the postings, so it isn't kept
+		self._products.append(replace(product, text=None))
+		self._doc_ids[product.product_id] = doc_id
+		positions: Dict[str, array] = {}
+		n_terms = 0
+		for position, match in enumerate(TOKEN_PATTERN.finditer(product.text.lower())):
+			term = match.group()
+			term_positions = positions.get(term)
+			if term_positions is None:
+				term_positions = positions[term] = array('I')
+			term_positions.append(position)
+			n_terms = position + 1
+		for term, term_positions in positions.items():
+			self._postings.setdefault(term, {})[doc_id] = term_positions
+		self._doc_lengths.append(n_terms)
+		self._doc_terms[doc_id] = tuple(positions)
+		self._total_length += n_terms
+		return True
+
+	def add_many(self, products: Iterable[Product]) -> int:
+		"""Index many products, and return the number that were added"""
+		return sum(self.add(product) for product in products)
+
+	def remove(self, product_id: str) -> bool:
+		doc_id = self._doc_ids.pop(product_id, None)
+		if doc_id is None:
+			return False
+		for term in self._doc_terms.pop(doc_id):
+			postings = self._postings[term]
+			del postings[doc_id]
+			if not postings:
+				del self._postings[term]
+		self._total_length -= self._doc_lengths[doc_id]
+		self._products[doc_id] = None
+		return True
+
+	def _matches_phrase(self, doc_id: int, phrase: List[str]) -> bool:
+		if len(phrase) == 1:
+			return True
+		following = [set(self._postings[term][doc_id]) for term in phrase[1:]]
+		for start in self._postings[phrase[0]][doc_id]:
+			if all(start + i + 1 in positions for i, positions in enumerate(following)):
+				return True
+		return False
+
+	def _matches_filters(
+		self,
+		product: Product,
+		code: str,
+		issuing_office: str,
+		issued_after: datetime,
+		issued_before: datetime
+	) -> bool:
+		if code is not None and product.code != code:
+			return False
+		if issuing_office is not None and product.issuing_office != issuing_office:
+			return False
+		if issued_after is not None or issued_before is not None:
+			issued_at = product.issued_at
+			if issued_at is None:
+				return False
+			if issued_after is not None and issued_at < issued_after:
+				return False
+			if issued_before is not None and issued_at >= issued_before:
+				return False
+		return True
+
+	def search(
+		self,
+		query: str,
+		code: str = None,
+		issuing_office: str = None,
+		issued_after: datetime = None,
+		issued_before: datetime = None,
+		limit: int = 20
+	) -> List[Tuple[Product, float]]:
+		"""Find the products that contain every word and phrase in the query
+
+		:param query: Words and "quoted phrases", matched case-insensitively
+		:param code: Only include products with this code (eg `AFD`)
+		:param issuing_office: Only include products from this office (eg `KBOX`)
+		:param issued_after: Only include products issued at or after this time
+		:param issued_before: Only include products issued before this time
+		:param limit: The most results to return (default: 20)
+		:returns: `(product, score)` pairs, best match first. The products don't include
+			their text.
+		"""
+		phrases = parse_query(query)
+		terms = {term for phrase in phrases for term in phrase}
+		if not terms or any(term not in self._postings for term in terms):
+			return []
+		candidates: Set[int] = None
+		for term in sorted(terms, key=lambda term: len(self._postings[term])):
+			doc_ids = self._postings[term].keys()
+			candidates = set(doc_ids) if candidates is None else candidates & doc_ids
+			if not candidates:
+				return []
+
+		n_docs = len(self._doc_ids)
+		average_length = self._total_length / n_docs
+		idfs = {}
+		for term in terms:
+			df = len(self._postings[term])
+			idfs[term] = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+		results = []
+		for doc_id in candidates:
+			product = self._products[doc_id]
+			if not self._matches_filters(product, code, issuing_office, issued_after,
+										 issued_before):
+				continue
+			if not all(self._matches_phrase(doc_id, phrase) for phrase in phrases):
+				continue
+			length_norm = BM25_K1 * (1 - BM25_B + BM25_B
+									 * self._doc_lengths[doc_id] / average_length)
+			score = 0.0
+			for term in terms:
+				tf = len(self._postings[term][doc_id])
+				score += idfs[term] * tf * (BM25_K1 + 1) / (tf + length_norm)
+			results.append((product, score))
+		results.sort(key=lambda result: result[1], reverse=True)
+		return results[:limit]
@@ -0,0 +1,329 @@
+"""Find the stations nearest to a point without calling the API
+
+`StationIndex` is a k-d tree of station locations, converted to points on the unit
+sphere so that straight-line distance between points ranks the same as great-circle
+distance. It works for observation stations (`Station`) and radar stations
+(`RadarStation`), and can be kept up to date from a full listing with
+`StationIndex.refresh`: stations added since the tree was built are kept in a small
+list that's searched exhaustively, removed stations are skipped, and the tree is only
+rebuilt once enough of it has changed.
+
+Queries can be limited to stations that have reported recently, using the observation
+times recorded with `StationIndex.update_observations`.
+
+For example, to find the 3 nearest stations that have reported in the last hour:
+
+.. code-block:: python
+
+	station_index = build_station_index(session)
+	station_index.update_observations(observations)
+	station_index.nearest(42.36, -71.06, k=3, max_age=timedelta(hours=1))
+	# [('KBOS', 4.6), ('KOWD', 21.3), ('KBED', 25.8)]
+"""
+
+import math
+import heapq
+import logging
+from array import array
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Tuple
+import pytz
+from requests_cache import CachedSession
+from libnws.api.api_request import api_request
+from libnws.api.get_stations import process_stations
+from libnws.api.get_radar import process_radar_stations
+from libnws.api import NWS_API_STATIONS, NWS_API_RADAR_STATIONS
+from libnws.index.geometry import haversine_km
+from libnws.model.weather import Observation
+logger = logging.getLogger(__name__)
+
+
+def to_unit_vector(lat: float, lon: float) -> Tuple[float, float, float]:
+	lat = math.radians(lat)
+	lon = math.radians(lon)
+	return (math.cos(lat) * math.cos(lon), math.cos(lat) * math.sin(lon), math.sin(lat))
+
+
+class StationIndex:
+	"""A k-nearest-neighbor index of station locations
+
+	:param id_field: The field of the items passed to `add` and `refresh` that
+		identifies them (eg `radar_station_id` for `RadarStation`)
+	:param rebuild_ratio: Rebuild the tree once the stations added, moved, or removed
+		since it was built are more than this fraction of all stations
+	"""
+
+	def __init__(self, id_field: str = 'station_id', rebuild_ratio: float = 0.1):
+		self.id_field = id_field
+		self.rebuild_ratio = rebuild_ratio
+		self.last_observed_at: Dict[str, datetime] = {}
+		self._station_ids: List[str] = []
+		self._slots: Dict[str, int] = {}
+		self._locations = array('d')
+		self._points = array('d')
+		self._tree = array('I')
+		self._pending: List[int] = []
+		self._removed = set()
+
+	def __len__(self) -> int:
+		return len(self._slots)
+
+	def __contains__(self, station_id: str) -> bool:
+		return station_id in self._slots
+
+	@classmethod
+	def from_stations(
+		cls,
+		stations: Iterable,
+		id_field: str = 'station_id'
+	) -> 'StationIndex':
+		"""Build an index from stations that have `lat` and `lon` fields"""
+		station_index = cls(id_field)
+		for station in stations:
+			station_index._insert_station(station)
+		station_index.rebuild()
+		return station_index
+
+	def _insert(self, station_id: str, lat: float, lon: float) -> bool:
+		slot = self._slots.get(station_id)
+		if slot is not None:
+			if (self._locations[slot * 2] == lat
+				and self._locations[slot * 2 + 1] == lon):
+				return False
+			self._removed.add(slot)
+		slot = len(self._station_ids)
+		self._station_ids.append(station_id)
+		self._slots[station_id] = slot
+		self._locations.extend((lat, lon))
+		self._points.extend(to_unit_vector(lat, lon))
+		self._pending.append(slot)
+		return True
+
+	def _insert_station(self, station) -> bool:
+		station_id = getattr(station, self.id_field)
+		if station.lat is None or station.lon is None:
+			logger.debug(f'{station_id} has no location, skipping it')
+			return False
+		return self._insert(station_id, station.lat, station.lon)
+
+	def _delete(self, station_id: str) -> bool:
+		slot = self._slots.pop(station_id, None)
+		if slot is None:
+			return False
+		self._removed.add(slot)
+		self.last_observed_at.pop(station_id, None)
+		return True
+
+	def add_point(self, station_id: str, lat: float, lon: float) -> bool:
+		"""Add a station, or move it if it's already in the index
+
+		:returns: True if the station was added or moved
+		"""
+		changed = self._insert(station_id, lat, lon)
+		self._rebuild_if_stale()
+		return changed
+
+	def add(self, station) -> bool:
+		"""Add a `Station` or `RadarStation`, or move it if it's already in the index"""
+		changed = self._insert_station(station)
+		self._rebuild_if_stale()
+		return changed
+
+	def remove(self, station_id: str) -> bool:
+		removed = self._delete(station_id)
+		self._rebuild_if_stale()
+		return removed
+
+	def refresh(self, stations: Iterable) -> Tuple[int, int]:
+		"""Bring the index up to date with a full listing of stations
+
+		Stations that are new or have moved are added, and stations missing from the
+		listing are removed.
+
+		:returns: The number of stations added or moved, and the number removed
+		"""
+		listed = set()
+		n_added = 0
+		for station in stations:
+			listed.add(getattr(station, self.id_field))
+			n_added += self._insert_station(station)
+		n_removed = 0
+		for station_id in [s for s in self._slots if s not in listed]:
+			n_removed += self._delete(station_id)
+		self._rebuild_if_stale()
+		return n_added, n_removed
+
+	def _rebuild_if_stale(self):
+		n_changes = len(self._pending) + len(self._removed)
+		if n_changes > max(self.rebuild_ratio * len(self._slots), 32):
+			self.rebuild()
+
+	def rebuild(self):
+		"""Rebuild the tree from the current stations, dropping removed ones"""
+		station_ids = list(self._slots)
+		locations = array('d')
+		points = array('d')
+		for station_id in station_ids:
+			slot = self._slots[station_id]
+			locations.extend(self._locations[slot * 2:slot * 2 + 2])
+			points.extend(self._points[slot * 3:slot * 3 + 3])
+		self._station_ids = station_ids
+		self._slots = {station_id: slot for slot, station_id in enumerate(station_ids)}
+		self._locations = locations
+		self._points = points
+		self._pending = []
+		self._removed = set()
+		tree = list(range(len(station_ids)))
+		self._build(tree, 0, len(tree), 0)
+		self._tree = array('I', tree)
+		logger.debug(f'Rebuilt station index with {len(station_ids)} stations')
+
+	def _build(self, tree: List[int], lo: int, hi: int, depth: int):
+		"""Arrange `tree[lo:hi]` so that the median along this depth's axis is in the
+		middle, with the nodes before and after it as its left and right subtrees
+		"""
+		if hi - lo <= 1:
+			return
+		axis = depth % 3
+		points = self._points
+		tree[lo:hi] = sorted(tree[lo:hi], key=lambda slot: points[slot * 3 + axis])
+		mid = (lo + hi) // 2
+		self._build(tree, lo, mid, depth + 1)
+		self._build(tree, mid + 1, hi, depth + 1)
+
+	def _consider(
+		self,
+		slot: int,
+		query: Tuple[float, float, float],
+		k: int,
+		heap: list,
+		accept: Callable[[int], bool]
+	):
+		if slot in self._removed or not accept(slot):
+			return
+		points = self._points
+		d_x = points[slot * 3] - query[0]
+		d_y = points[slot * 3 + 1] - query[1]
+		d_z = points[slot * 3 + 2] - query[2]
+		dist_sq = d_x * d_x + d_y * d_y + d_z * d_z
+		if len(heap) < k:
+			heapq.heappush(heap, (-dist_sq, slot))
+		elif dist_sq < -heap[0][0]:
+			heapq.heapreplace(heap, (-dist_sq, slot))
+
+	def _search(
+		self,
+		query: Tuple[float, float, float],
+		k: int,
+		heap: list,
+		accept: Callable[[int], bool],
+		lo: int,
+		hi: int,
+		depth: int
+	):
+		if lo >= hi:
+			return
+		mid = (lo + hi) // 2
+		slot = self._tree[mid]
+		self._consider(slot, query, k, heap, accept)
+		axis = depth % 3
+		diff = query[axis] - self._points[slot * 3 + axis]
+		if diff < 0:
+			near, far = (lo, mid), (mid + 1, hi)
+		else:
+			near, far = (mid + 1, hi), (lo, mid)
+		self._search(query, k, heap, accept, *near, depth + 1)
+		if len(heap) < k or diff * diff < -heap[0][0]:
+			self._search(query, k, heap, accept, *far, depth + 1)
+
+	def update_observations(self, observations: Iterable[Observation]):
+		"""Record the latest time each station reported an observation"""
+		for observation in observations:
+			station_id = observation.station_or_zone_id
+			observed_at = observation.observed_at
+			if observed_at is None:
+				continue
+			last_observed_at = self.last_observed_at.get(station_id)
+			if last_observed_at is None or observed_at > last_observed_at:
+				self.last_observed_at[station_id] = observed_at
+
+	def nearest(
+		self,
+		lat: float,
+		lon: float,
+		k: int = 1,
+		max_age: timedelta = None,
+		now: datetime = None
+	) -> List[Tuple[str, float]]:
+		"""Get the `k` stations nearest to a point
+
+		:param max_age: Only include stations that have reported an observation this
+			recently (see `update_observations`)
+		:param now: The time to measure `max_age` from (default: now, in the same
+			timezone as `libnws.api.api_request.parse_timestamp`)
+		:returns: `(station_id, distance_km)` pairs, nearest first
+		"""
+		if k < 1 or not self._slots:
+			return []
+		accept = lambda slot: True
+		if max_age is not None:
+			if now is None:
+				now = datetime.now(pytz.timezone('US/Eastern')).replace(tzinfo=None)
+			oldest = now - max_age
+			last_observed_at = self.last_observed_at
+			station_ids = self._station_ids
+			accept = lambda slot: last_observed_at.get(station_ids[slot], oldest) > oldest
+		query = to_unit_vector(lat, lon)
+		heap = []
+		self._search(query, k, heap, accept, 0, len(self._tree), 0)
+		for slot in self._pending:
+			self._consider(slot, query, k, heap, accept)
+		nearest = []
+		for _, slot in sorted(heap, reverse=True):
+			station_lat = self._locations[slot * 2]
+			station_lon = self._locations[slot * 2 + 1]
+			nearest.append((self._station_ids[slot],
+							haversine_km(lat, lon, station_lat, station_lon)))
+		return nearest
+
+	def nearest_many(
+		self,
+		points: Iterable[Tuple[float, float]],
+		k: int = 1,
+		max_age: timedelta = None,
+		now: datetime = None
+	) -> List[List[Tuple[str, float]]]:
+		"""Get the `k` stations nearest to each of the given `(lat, lon)` points"""
+		if max_age is not None and now is None:
+			now = datetime.now(pytz.timezone('US/Eastern')).replace(tzinfo=None)
+		return [self.nearest(lat, lon, k, max_age, now) for lat, lon in points]
+
+
+def get_all_stations(session: CachedSession, max_pages: int = None) -> list:
+	"""Get every observation station, following the listing's pages"""
+	url = NWS_API_STATIONS.rstrip('/')
+	stations = []
+	pages = 0
+	while url and (max_pages is None or pages < max_pages):
+		stations_data = api_request(session, url)
+		response = stations_data.get('response')
+		retrieved_at = stations_data.get('retrieved_at')
+		features = response.get('features', [])
+		stations.extend(process_stations(response, retrieved_at))
+		pages += 1
+		url = response.get('pagination', {}).get('next') if features else None
+	logger.info(f'Got {len(stations)} stations from {pages} pages')
+	return stations
+
+
+def build_station_index(session: CachedSession, max_pages: int = None) -> StationIndex:
+	"""Get every observation station and index them"""
+	return StationIndex.from_stations(get_all_stations(session, max_pages))
+
+
+def build_radar_index(session: CachedSession) -> StationIndex:
+	"""Get every radar station and index them"""
+	radar_stations_data = api_request(session, NWS_API_RADAR_STATIONS)
+	radar_stations = process_radar_stations(radar_stations_data.get('response'),
+											radar_stations_data.get('retrieved_at'))
+	return StationIndex.from_stations(radar_stations, id_field='radar_station_id')
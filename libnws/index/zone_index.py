@@ -0,0 +1,298 @@
+"""Resolve coordinates to NWS zones without calling the API
+
+`ZoneIndex` is built from the zones returned by `get_zones` (with geometry). Each
+polygon of each zone is registered in a uniform grid of cells by its bounding box, so a
+lookup only tests the polygons in the point's cell: first against their bounding boxes,
+then with an exact point-in-polygon test.
+
+The index can be saved to a single binary file and memory-mapped when it's loaded, so a
+process can start resolving coordinates without parsing any JSON or building anything.
+
+For example, to build an index of all forecast, county, and fire zones and find the
+zones containing a point:
+
+.. code-block:: python
+
+	zone_index = build_zone_index(session)
+	zone_index.save('zones.idx')
+
+	zone_index = ZoneIndex.load('zones.idx')
+	zone_index.lookup(42.36, -71.06)	# ['MAZ015', 'MAC025']
+"""
+
+import sys
+import math
+import mmap
+import struct
+import logging
+from array import array
+from typing import Iterable, List, Sequence, Tuple
+from requests_cache import CachedSession
+from libnws.api.get_zones import get_zones
+from libnws.index.geometry import get_bbox, bbox_contains, point_in_polygon
+from libnws.model.zones import Zone
+logger = logging.getLogger(__name__)
+
+
+ZONE_INDEX_MAGIC = b'NWSZIDX1'
+ZONE_INDEX_BYTEORDER = {'little': 1, 'big': 2}[sys.byteorder]
+
+# magic, byte order, zones, polygons, rings, coordinates, grid entries, grid columns,
+# grid rows, zone ID bytes, grid min lon, grid min lat, grid cell size
+ZONE_INDEX_HEADER = struct.Struct('=8sIIIIIIIIIddd')
+
+DEFAULT_ZONE_TYPES = ('forecast', 'county', 'fire')
+
+
+def _pad(size: int) -> int:
+	"""Round a section size up so the next section is aligned to 8 bytes"""
+	return (size + 7) // 8 * 8
+
+
+def get_zone_polygons(zone: Zone) -> List[List[Sequence[float]]]:
+	"""Get a zone's polygons as lists of rings, each a flat array of coordinates"""
+	if not zone.multi_polygon:
+		return []
+	return zone.multi_polygon.get_rings()
+
+
+class ZoneIndex:
+	"""A grid index of zone polygons
+
+	Use `ZoneIndex.from_zones` or `ZoneIndex.load` instead of creating one directly.
+	All sections are flat arrays (or memoryviews of a memory-mapped file):
+
+	- `polygon_zones`: the index of the zone each polygon belongs to
+	- `polygon_rings`: the index of each polygon's first ring, plus a final end index
+	- `polygon_bboxes`: four coordinates per polygon
+	- `ring_coords`: the index of each ring's first coordinate, plus a final end index
+	- `coords`: all ring coordinates, as `lon, lat` pairs
+	- `cell_offsets`, `cell_polygons`: the polygons in each grid cell, in compressed
+	  sparse row form
+	"""
+
+	def __init__(
+		self,
+		zone_ids: List[str],
+		polygon_zones: Sequence[int],
+		polygon_rings: Sequence[int],
+		polygon_bboxes: Sequence[float],
+		ring_coords: Sequence[int],
+		coords: Sequence[float],
+		grid: Tuple[float, float, float, int, int],
+		cell_offsets: Sequence[int],
+		cell_polygons: Sequence[int],
+		mapped_file: mmap.mmap = None
+	):
+		self.zone_ids = zone_ids
+		self.polygon_zones = polygon_zones
+		self.polygon_rings = polygon_rings
+		self.polygon_bboxes = polygon_bboxes
+		self.ring_coords = ring_coords
+		self.coords = coords
+		self.min_lon, self.min_lat, self.cell_size, self.n_cols, self.n_rows = grid
+		self.cell_offsets = cell_offsets
+		self.cell_polygons = cell_polygons
+		self._mapped_file = mapped_file
+		self._sections = []
+		if mapped_file is not None:
+			self._sections = [polygon_zones, polygon_rings, polygon_bboxes, ring_coords,
+							  coords, cell_offsets, cell_polygons]
+
+	def __len__(self) -> int:
+		return len(self.zone_ids)
+
+	@classmethod
+	def from_zones(cls, zones: Iterable[Zone], cell_size: float = 0.5) -> 'ZoneIndex':
+		"""Build an index from zones that include their geometry
+
+		:param zones: Zones of any type. Zones without geometry are skipped.
+		:param cell_size: The width and height of each grid cell, in degrees
+		"""
+		zone_ids = []
+		polygon_zones = array('I')
+		polygon_rings = array('I')
+		polygon_bboxes = array('d')
+		ring_coords = array('I')
+		coords = array('d')
+		for zone in zones:
+			polygons = get_zone_polygons(zone)
+			if not polygons:
+				logger.debug(f'Zone {zone.zone_id} has no geometry, skipping it')
+				continue
+			zone_ids.append(zone.zone_id)
+			for polygon in polygons:
+				polygon_zones.append(len(zone_ids) - 1)
+				polygon_rings.append(len(ring_coords))
+				for i, ring in enumerate(polygon):
+					ring_coords.append(len(coords))
+					if i == 0:
+						polygon_bboxes.extend(get_bbox(ring))
+					coords.extend(ring)
+		polygon_rings.append(len(ring_coords))
+		ring_coords.append(len(coords))
+
+		if polygon_zones:
+			min_lon = min(polygon_bboxes[0::4])
+			min_lat = min(polygon_bboxes[1::4])
+			max_lon = max(polygon_bboxes[2::4])
+			max_lat = max(polygon_bboxes[3::4])
+		else:
+			min_lon = min_lat = max_lon = max_lat = 0
+		n_cols = int((max_lon - min_lon) / cell_size) + 1
+		n_rows = int((max_lat - min_lat) / cell_size) + 1
+		cells = {}
+		for polygon in range(len(polygon_zones)):
+			bbox = polygon_bboxes[polygon * 4:polygon * 4 + 4]
+			col_min = int((bbox[0] - min_lon) / cell_size)
+			row_min = int((bbox[1] - min_lat) / cell_size)
+			col_max = int((bbox[2] - min_lon) / cell_size)
+			row_max = int((bbox[3] - min_lat) / cell_size)
+			for row in range(row_min, row_max + 1):
+				for col in range(col_min, col_max + 1):
+					cells.setdefault(row * n_cols + col, []).append(polygon)
+		cell_offsets = array('I', [0])
+		cell_polygons = array('I')
+		for cell in range(n_cols * n_rows):
+			cell_polygons.extend(cells.get(cell, ()))
+			cell_offsets.append(len(cell_polygons))
+		logger.info(f'Indexed {len(polygon_zones)} polygons from {len(zone_ids)} zones')
+		return cls(zone_ids, polygon_zones, polygon_rings, polygon_bboxes, ring_coords,
+				   coords, (min_lon, min_lat, cell_size, n_cols, n_rows),
+				   cell_offsets, cell_polygons)
+
+	def save(self, path: str):
+		"""Save the index to a file that can be memory-mapped by `ZoneIndex.load`"""
+		zone_id_offsets = array('I', [0])
+		zone_id_bytes = bytearray()
+		for zone_id in self.zone_ids:
+			zone_id_bytes.extend(zone_id.encode())
+			zone_id_offsets.append(len(zone_id_bytes))
+		header = ZONE_INDEX_HEADER.pack(ZONE_INDEX_MAGIC,
+										ZONE_INDEX_BYTEORDER,
+										len(self.zone_ids),
+										len(self.polygon_zones),
+										len(self.ring_coords) - 1,
+										len(self.coords),
+										len(self.cell_polygons),
+										self.n_cols,
+										self.n_rows,
+										len(zone_id_bytes),
+										self.min_lon,
+										self.min_lat,
+										self.cell_size)
+		sections = (
+			zone_id_offsets,
+			bytes(zone_id_bytes),
+			self.polygon_zones,
+			self.polygon_rings,
+			self.polygon_bboxes,
+			self.ring_coords,
+			self.coords,
+			self.cell_offsets,
+			self.cell_polygons,
+		)
+		with open(path, 'wb') as file:
+			file.write(header)
+			file.write(b'\0' * (_pad(len(header)) - len(header)))
+			for section in sections:
+				data = memoryview(section).cast('B')
+				file.write(data)
+				file.write(b'\0' * (_pad(len(data)) - len(data)))
+		logger.info(f'Saved zone index to {path}')
+
+	@classmethod
+	def load(cls, path: str) -> 'ZoneIndex':
+		"""Memory-map a zone index file saved by `ZoneIndex.save`"""
+		with open(path, 'rb') as file:
+			mapped_file = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+		(magic, byteorder, n_zones, n_polygons, n_rings, n_coords, n_grid_entries,
+		 n_cols, n_rows, n_zone_id_bytes, min_lon, min_lat,
+		 cell_size) = ZONE_INDEX_HEADER.unpack_from(mapped_file)
+		if magic != ZONE_INDEX_MAGIC or byteorder != ZONE_INDEX_BYTEORDER:
+			raise ValueError(f'{path} is not a zone index, or was saved on a platform '
+							 'with a different byte order')
+		offset = _pad(ZONE_INDEX_HEADER.size)
+
+		def section(length: int, item_format: str) -> memoryview:
+			nonlocal offset
+			size = length * struct.calcsize(item_format)
+			with memoryview(mapped_file) as view:
+				with view[offset:offset + size] as data:
+					section_view = data.cast(item_format)
+			offset += _pad(size)
+			return section_view
+
+		zone_id_offsets = section(n_zones + 1, 'I')
+		zone_id_bytes = bytes(section(n_zone_id_bytes, 'B'))
+		zone_ids = [zone_id_bytes[zone_id_offsets[i]:zone_id_offsets[i + 1]].decode()
+					for i in range(n_zones)]
+		return cls(zone_ids,
+				   section(n_polygons, 'I'),
+				   section(n_polygons + 1, 'I'),
+				   section(n_polygons * 4, 'd'),
+				   section(n_rings + 1, 'I'),
+				   section(n_coords, 'd'),
+				   (min_lon, min_lat, cell_size, n_cols, n_rows),
+				   section(n_cols * n_rows + 1, 'I'),
+				   section(n_grid_entries, 'I'),
+				   mapped_file=mapped_file)
+
+	def get_polygon_rings(self, polygon: int) -> List[Sequence[float]]:
+		rings = []
+		for ring in range(self.polygon_rings[polygon], self.polygon_rings[polygon + 1]):
+			rings.append(self.coords[self.ring_coords[ring]:self.ring_coords[ring + 1]])
+		return rings
+
+	def lookup(self, lat: float, lon: float) -> List[str]:
+		"""Get the IDs of all zones that contain the given point"""
+		col = math.floor((lon - self.min_lon) / self.cell_size)
+		row = math.floor((lat - self.min_lat) / self.cell_size)
+		if not (0 <= col < self.n_cols and 0 <= row < self.n_rows):
+			return []
+		cell = row * self.n_cols + col
+		zone_ids = []
+		for i in range(self.cell_offsets[cell], self.cell_offsets[cell + 1]):
+			polygon = self.cell_polygons[i]
+			bbox = self.polygon_bboxes[polygon * 4:polygon * 4 + 4]
+			if not bbox_contains(bbox, lon, lat):
+				continue
+			zone_id = self.zone_ids[self.polygon_zones[polygon]]
+			if zone_id in zone_ids:
+				continue
+			if point_in_polygon(lon, lat, self.get_polygon_rings(polygon)):
+				zone_ids.append(zone_id)
+		return zone_ids
+
+	def lookup_many(self, points: Iterable[Tuple[float, float]]) -> List[List[str]]:
+		"""Get the IDs of the zones containing each of the given `(lat, lon)` points"""
+		return [self.lookup(lat, lon) for lat, lon in points]
+
+	def close(self):
+		"""Release the memory-mapped file, if the index was loaded from one"""
+		if self._mapped_file is None:
+			return
+		self.polygon_zones = self.polygon_rings = self.polygon_bboxes = None
+		self.ring_coords = self.coords = self.cell_offsets = self.cell_polygons = None
+		for section in self._sections:
+			section.release()
+		self._sections = []
+		self._mapped_file.close()
+		self._mapped_file = None
+
+
+def build_zone_index(
+	session: CachedSession,
+	zone_types: Sequence[str] = DEFAULT_ZONE_TYPES,
+	cell_size: float = 0.5,
+	simplify_tolerance: float = 0.0
+) -> ZoneIndex:
+	"""Get all zones of the given types, with their geometry, and index them
+
+	:param simplify_tolerance: See `libnws.api.get_zones.process_zone_data`
+	"""
+	zones = []
+	for zone_type in zone_types:
+		zones.extend(get_zones(session, zone_type, include_geometry=True,
+							   simplify_tolerance=simplify_tolerance))
+	return ZoneIndex.from_zones(zones, cell_size)
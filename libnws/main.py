@@ -1,12 +1,6 @@
 __version__ = '0.0.0'
 
 
-BUG_REPORT_MESSAGE = (
-    'This is an unexpected result and probably a bug. Please report it '
-    'on GitHub at https://github.com/1npo/nwsc/issues.'
-)
-
-
 import os
 import sys
 import argparse
@@ -16,6 +10,8 @@ from pathlib import Path
 from datetime import datetime
 from requests_cache import CachedSession, SQLiteCache, FileCache, NEVER_EXPIRE
 from libnws.config import ConfigManager
+from libnws.api import BUG_REPORT_MESSAGE
+from libnws.api.rate_limit import install_rate_limiter
 from libnws.render.decorators import display_spinner
 from libnws.render.pprint_raw import (
     pprint_raw_nws_data,
@@ -106,6 +102,7 @@ def main():
 							cache_control=True,
 							expire_after=NEVER_EXPIRE,
 							)
+	install_rate_limiter(session)
 	with session:
 		if params.debug:
 			log_filter.level = 'DEBUG'
@@ -2,6 +2,7 @@ from typing import List, Dict
 from datetime import datetime
 from dataclasses import dataclass
 from libnws.model.nws_item import NWSItem
+from libnws.model.geometry import PackedGeometry
 
 # If a new alert is issued as an update to a prior alert, the prior alert
 # is referenced in the new alert response
@@ -46,6 +47,7 @@ class Alert(NWSItem):
     cap_blocked_channels: list
     cap_vtec: list
     prior_alerts: List[PriorAlert]
+    area_polygon: PackedGeometry
     
 
 @dataclass(kw_only=True)
@@ -57,4 +59,53 @@ class AlertCounts(NWSItem):
     regions: Dict[str, int]
     areas: Dict[str, int]
     zones: Dict[str, int]
-    
+
+
+# Emitted by `libnws.service.alert_sync.AlertSynchronizer` when an alert is added,
+# updated (including when it supersedes a prior alert), or expires between polls
+@dataclass(kw_only=True)
+class AlertChange(NWSItem):
+    retrieved_at: datetime
+    change_type: str
+    alert: Alert
+    previous_alert: Alert | None
+
+
+# One alert's VTEC action (eg NEW, CON, EXT, CAN) on a VTEC event
+@dataclass(kw_only=True)
+class VTECEventUpdate(NWSItem):
+    alert_id: str
+    sent_at: datetime
+    updated_at: datetime
+    action: str
+    begins_at: datetime
+    ends_at: datetime
+    areas_ugc: list
+
+
+# The state of a VTEC event in one of its zones or counties, from the latest alert
+# that covered it
+@dataclass(kw_only=True)
+class VTECEventZone(NWSItem):
+    ugc_code: str
+    action: str
+    ends_at: datetime
+    updated_at: datetime
+
+
+# A VTEC event (eg one tornado warning) across every alert that issued, continued,
+# extended, or cancelled it. Built by `libnws.service.vtec_events.VTECEventTracker`
+@dataclass(kw_only=True)
+class VTECEvent(NWSItem):
+    event_id: str
+    office: str
+    phenomenon: str
+    significance: str
+    event_number: int
+    year: int
+    action: str
+    begins_at: datetime
+    ends_at: datetime
+    updated_at: datetime
+    areas_ugc: Dict[str, VTECEventZone]
+    timeline: List[VTECEventUpdate]
@@ -2,6 +2,7 @@ from dataclasses import dataclass
 from datetime import datetime
 from typing import List
 from libnws.model.nws_item import NWSItem
+from libnws.model.geometry import PackedGeometry
 
 
 @dataclass(kw_only=True)
@@ -15,7 +16,7 @@ class SIGMET(NWSItem):
     atsu: str
     sequence: str
     phenomenon: str
-    area_polygon: str
+    area_polygon: PackedGeometry
 
 
 @dataclass(kw_only=True)
@@ -29,7 +30,7 @@ class CenterWeatherAdvisory(NWSItem):
     effective_at: datetime
     expires_at: datetime
     observed_property_url: str
-    area_polygon: str
+    area_polygon: PackedGeometry
 
 
 @dataclass(kw_only=True)
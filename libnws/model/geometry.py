@@ -0,0 +1,253 @@
+import sys
+import json
+import struct
+from array import array
+from typing import List, Sequence, Tuple
+
+
+BBox = Tuple[float, float, float, float]    # (min_lon, min_lat, max_lon, max_lat)
+
+PACKED_GEOMETRY_MAGIC = b'NWSG'
+
+# magic, coordinate type ('d' or 'f'), polygons, rings, coordinates
+PACKED_GEOMETRY_HEADER = struct.Struct('<4sc3xIII')
+
+
+def get_polygons(coordinates: list) -> List[list]:
+    """Get the polygons from the coordinates of a GeoJSON Polygon or MultiPolygon
+
+    :returns: A list of polygons, where each polygon is a list of rings and each ring is
+        a list of `[lon, lat]` points. The first ring of a polygon is its exterior, and
+        any other rings are holes. Other geometry (eg a Point or LineString) has no
+        polygons.
+    """
+    # Polygons nest coordinates 3 deep (rings, points, coordinates), and MultiPolygons 4
+    depth = 0
+    value = coordinates
+    while isinstance(value, list) and value:
+        value = value[0]
+        depth += 1
+    if not isinstance(value, (int, float)):
+        return []
+    if depth == 3:
+        return [coordinates]
+    if depth == 4:
+        return coordinates
+    return []
+
+
+def flatten_ring(ring: list) -> array:
+    """Flatten a list of `[lon, lat]` points into an array of coordinates"""
+    coords = array('d')
+    for point in ring:
+        coords.append(point[0])
+        coords.append(point[1])
+    return coords
+
+
+def get_bbox(coords: Sequence[float]) -> BBox:
+    """Get the bounding box of a flat sequence of coordinates"""
+    lons = coords[0::2]
+    lats = coords[1::2]
+    return (min(lons), min(lats), max(lons), max(lats))
+
+
+def simplify_ring(coords: Sequence[float], tolerance: float) -> Sequence[float]:
+    """Simplify a closed ring with the Douglas-Peucker algorithm
+
+    :param coords: The ring as a flat sequence of coordinates
+    :param tolerance: The furthest a dropped point may be from the simplified ring, in
+        degrees
+    :returns: The simplified ring, as an array of the same type as `coords`. The ring is
+        returned unchanged if simplifying it would leave fewer than 4 points.
+    """
+    n_points = len(coords) // 2
+    if tolerance <= 0 or n_points <= 4:
+        return coords
+    tolerance_sq = tolerance * tolerance
+    keep = bytearray(n_points)
+    keep[0] = keep[-1] = 1
+    stack = [(0, n_points - 1)]
+    while stack:
+        start, end = stack.pop()
+        lon_1 = coords[start * 2]
+        lat_1 = coords[start * 2 + 1]
+        d_lon = coords[end * 2] - lon_1
+        d_lat = coords[end * 2 + 1] - lat_1
+        segment_sq = d_lon * d_lon + d_lat * d_lat
+        max_dist_sq = 0
+        furthest = None
+        for i in range(start + 1, end):
+            p_lon = coords[i * 2] - lon_1
+            p_lat = coords[i * 2 + 1] - lat_1
+            if segment_sq:
+                t = min(max((p_lon * d_lon + p_lat * d_lat) / segment_sq, 0), 1)
+                p_lon -= t * d_lon
+                p_lat -= t * d_lat
+            dist_sq = p_lon * p_lon + p_lat * p_lat
+            if dist_sq > max_dist_sq:
+                max_dist_sq = dist_sq
+                furthest = i
+        if furthest is not None and max_dist_sq > tolerance_sq:
+            keep[furthest] = 1
+            stack.append((start, furthest))
+            stack.append((furthest, end))
+    if sum(keep) < 4:
+        return coords
+    simplified = array(getattr(coords, 'typecode', 'd'))
+    for i in range(n_points):
+        if keep[i]:
+            simplified.append(coords[i * 2])
+            simplified.append(coords[i * 2 + 1])
+    return simplified
+
+
+class PackedGeometry:
+    """The coordinates of a Polygon or MultiPolygon, packed into a compact binary form
+
+    The data is the header, followed by the index of each polygon's first ring (plus a
+    final end index), the index of each ring's first coordinate (plus a final end
+    index), and every ring's coordinates as `lon, lat` pairs. All values are
+    little-endian. The data is only decoded when the rings or coordinates are accessed,
+    so geometry that's stored and loaded without being looked at is never unpacked.
+
+    Use `PackedGeometry.from_coordinates` to pack GeoJSON coordinates, or
+    `PackedGeometry(data)` to wrap data that's already packed (eg read from a database).
+    """
+
+    __slots__ = ('data', '_rings')
+
+    def __init__(self, data: bytes):
+        if not PackedGeometry.is_packed(data):
+            raise ValueError('Data is not a packed geometry')
+        self.data = bytes(data)
+        self._rings = None
+
+    @staticmethod
+    def is_packed(data) -> bool:
+        return (isinstance(data, (bytes, bytearray, memoryview))
+                and bytes(data[:4]) == PACKED_GEOMETRY_MAGIC)
+
+    @classmethod
+    def from_coordinates(
+        cls,
+        coordinates: list,
+        tolerance: float = 0.0,
+        single_precision: bool = False
+    ) -> 'PackedGeometry':
+        """Pack the coordinates of a GeoJSON Polygon or MultiPolygon
+
+        :param tolerance: Simplify each ring so that no dropped point is further than
+            this from the simplified ring, in degrees (default: don't simplify)
+        :param single_precision: Store coordinates as 32-bit floats instead of 64-bit
+            floats, which halves the size and is accurate to about a meter
+        """
+        typecode = 'f' if single_precision else 'd'
+        polygon_rings = array('I')
+        ring_coords = array('I')
+        coords = array(typecode)
+        for polygon in get_polygons(coordinates):
+            polygon_rings.append(len(ring_coords))
+            for ring in polygon:
+                ring_coords.append(len(coords))
+                coords.fromlist(simplify_ring(flatten_ring(ring), tolerance).tolist())
+        polygon_rings.append(len(ring_coords))
+        ring_coords.append(len(coords))
+        header = PACKED_GEOMETRY_HEADER.pack(PACKED_GEOMETRY_MAGIC,
+                                             typecode.encode(),
+                                             len(polygon_rings) - 1,
+                                             len(ring_coords) - 1,
+                                             len(coords))
+        if sys.byteorder == 'big':
+            for section in (polygon_rings, ring_coords, coords):
+                section.byteswap()
+        return cls(header + polygon_rings.tobytes() + ring_coords.tobytes()
+                   + coords.tobytes())
+
+    def _unpack_header(self) -> tuple:
+        return PACKED_GEOMETRY_HEADER.unpack_from(self.data)
+
+    @property
+    def n_polygons(self) -> int:
+        return self._unpack_header()[2]
+
+    @property
+    def n_rings(self) -> int:
+        return self._unpack_header()[3]
+
+    @property
+    def n_coords(self) -> int:
+        return self._unpack_header()[4]
+
+    def get_rings(self) -> List[List[Sequence[float]]]:
+        """Get each polygon as a list of rings, where each ring is a flat array of
+        coordinates (`[lon0, lat0, lon1, lat1, ...]`)
+        """
+        if self._rings is not None:
+            return self._rings
+        _, typecode, n_polygons, n_rings, n_coords = self._unpack_header()
+        offset = PACKED_GEOMETRY_HEADER.size
+        sections = []
+        for length, section_typecode in ((n_polygons + 1, 'I'),
+                                         (n_rings + 1, 'I'),
+                                         (n_coords, typecode.decode())):
+            section = array(section_typecode)
+            size = length * section.itemsize
+            section.frombytes(self.data[offset:offset + size])
+            if sys.byteorder == 'big':
+                section.byteswap()
+            sections.append(section)
+            offset += size
+        polygon_rings, ring_coords, coords = sections
+        self._rings = [
+            [coords[ring_coords[ring]:ring_coords[ring + 1]]
+             for ring in range(polygon_rings[polygon], polygon_rings[polygon + 1])]
+            for polygon in range(n_polygons)
+        ]
+        return self._rings
+
+    @property
+    def coordinates(self) -> list:
+        """The coordinates as a GeoJSON MultiPolygon"""
+        return [[[[ring[i], ring[i + 1]] for i in range(0, len(ring), 2)]
+                 for ring in polygon]
+                for polygon in self.get_rings()]
+
+    @property
+    def bbox(self) -> BBox | None:
+        """The bounding box of the exterior rings of every polygon, or None if the
+        geometry is empty
+        """
+        bboxes = [get_bbox(polygon[0]) for polygon in self.get_rings()
+                  if polygon and polygon[0]]
+        if not bboxes:
+            return None
+        return (min(bbox[0] for bbox in bboxes), min(bbox[1] for bbox in bboxes),
+                max(bbox[2] for bbox in bboxes), max(bbox[3] for bbox in bboxes))
+
+    def to_json(self) -> str:
+        """The coordinates in the JSON form that geometry used to be stored in"""
+        return json.dumps({'coordinates': self.coordinates})
+
+    def __bytes__(self) -> bytes:
+        return self.data
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, PackedGeometry) and self.data == other.data
+
+    def __hash__(self) -> int:
+        return hash(self.data)
+
+    def __copy__(self) -> 'PackedGeometry':
+        return self
+
+    def __deepcopy__(self, memo: dict) -> 'PackedGeometry':
+        # Packed geometry is never modified, so `dataclasses.asdict` can share it
+        return self
+
+    def __repr__(self) -> str:
+        return (f'PackedGeometry(polygons={self.n_polygons}, rings={self.n_rings}, '
+                f'coordinates={self.n_coords // 2}, bytes={len(self.data)})')
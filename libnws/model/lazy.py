@@ -0,0 +1,69 @@
+from typing import Any, Callable
+
+
+class Deferred:
+    """A field value that's computed the first time the field is accessed"""
+
+    __slots__ = ('func', 'args')
+
+    def __init__(self, func: Callable, *args):
+        self.func = func
+        self.args = args
+
+    def resolve(self) -> Any:
+        return self.func(*self.args)
+
+
+class DeferredGroup:
+    """The values of several fields, computed together the first time any of them is
+    accessed
+
+    Give every field in the group the same `DeferredGroup`. `func` returns a dict of the
+    fields' values, and its arguments are released once it's been called.
+    """
+
+    __slots__ = ('func', 'args', 'values')
+
+    def __init__(self, func: Callable, *args):
+        self.func = func
+        self.args = args
+        self.values = None
+
+    def resolve_field(self, name: str) -> Any:
+        if self.values is None:
+            self.values = self.func(*self.args)
+            self.func = self.args = None
+        return self.values.get(name)
+
+
+class LazyField:
+    """A dataclass field that can be given a `Deferred` or `DeferredGroup` value
+
+    Use it as the field's default (eg `rda: RadarDataAcquisition = LazyField()`). Any
+    other value is stored and returned as-is, so the field behaves like a normal field
+    unless it's given a deferred value. Fields that are never given a value are None.
+    """
+
+    def __set_name__(self, owner: type, name: str):
+        self.name = name
+        self.attr = f'_lazy_{name}'
+
+    def __get__(self, item, owner: type = None) -> Any:
+        if item is None:
+            return None
+        value = item.__dict__.get(self.attr)
+        if isinstance(value, Deferred):
+            value = value.resolve()
+            item.__dict__[self.attr] = value
+        elif isinstance(value, DeferredGroup):
+            value = value.resolve_field(self.name)
+            item.__dict__[self.attr] = value
+        return value
+
+    def __set__(self, item, value: Any):
+        item.__dict__[self.attr] = value
+
+
+def is_resolved(item, name: str) -> bool:
+    """Check whether a lazy field has been computed, without computing it"""
+    return not isinstance(item.__dict__.get(f'_lazy_{name}'), (Deferred, DeferredGroup))
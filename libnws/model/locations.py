@@ -1,3 +1,4 @@
+from typing import List
 from dataclasses import dataclass
 from libnws.model.nws_item import NWSItem
 
@@ -16,3 +17,13 @@ class Location(NWSItem):
     forecast_hourly_url: str
     gridpoints_url: str
     observation_stations_url: str
+
+
+# A location monitored for alerts by `libnws.index.alert_matcher.AlertMatcher`
+@dataclass(kw_only=True)
+class Site(NWSItem):
+    site_id: str
+    lat: float
+    lon: float
+    zones_ugc: List[str]
+    areas_same: List[str]
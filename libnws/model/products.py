@@ -1,4 +1,5 @@
 
+from typing import List
 from datetime import datetime
 from dataclasses import dataclass
 from libnws.model.nws_item import NWSItem
@@ -26,3 +27,39 @@ class Product(NWSItem):
     text: str
     issuing_office: str
     issued_at: datetime
+
+
+# See: https://www.weather.gov/vtec/
+@dataclass(kw_only=True)
+class VTECCode(NWSItem):
+    vtec: str
+    product_class: str
+    action: str
+    office: str
+    phenomenon: str
+    significance: str
+    event_number: int
+    begins_at: datetime
+    ends_at: datetime
+
+
+@dataclass(kw_only=True)
+class ProductSection(NWSItem):
+    title: str
+    text: str
+
+
+@dataclass(kw_only=True)
+class ProductSegment(NWSItem):
+    ugc_codes: List[str]
+    ugc_expires: str
+    vtec: List[VTECCode]
+    sections: List[ProductSection]
+    text: str
+
+
+@dataclass(kw_only=True)
+class ProductText(NWSItem):
+    wmo_heading: str
+    awips_id: str
+    segments: List[ProductSegment]
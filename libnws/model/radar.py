@@ -2,6 +2,7 @@ from typing import List, Dict
 from datetime import datetime
 from dataclasses import dataclass
 from libnws.model.nws_item import NWSItem
+from libnws.model.lazy import LazyField
 
 
 # See: https://www.ncei.noaa.gov/products/radar/next-generation-weather-radar
@@ -134,9 +135,9 @@ class RadarStation(NWSItem):
     latency_max_s: float
     latency_nexrad_l2_last_received_at: datetime
     max_latency_at: datetime
-    radar_data_acquisition: RadarDataAcquisition
-    performance: RadarPerformance
-    adaptation: RadarAdaptation
+    radar_data_acquisition: RadarDataAcquisition = LazyField()
+    performance: RadarPerformance = LazyField()
+    adaptation: RadarAdaptation = LazyField()
 
 
 @dataclass(kw_only=True)
@@ -158,29 +159,29 @@ class RadarServer(NWSItem):
     retrieved_at: datetime
     host: str
     server_type: str
-    up_since: datetime
-    hardware_refreshed_at: datetime
-    network_interfaces_refreshed_at: datetime
-    cpu: float
-    memory: float
-    io_utilization: float
-    disk: int
-    load_1: float
-    load_5: float
-    load_15: float
-    interfaces: List[NetworkInterface]
-    command_last_executed: str
-    command_last_executed_at: datetime
-    command_last_nexrad_data_at: datetime
-    command_last_received: str
-    command_last_received_at: datetime
-    command_last_refreshed_at: datetime
-    ldm_refreshed_at: datetime
-    ldm_latest_product_at: datetime
-    ldm_oldest_product_at: datetime
-    ldm_storage_size: int
-    ldm_count: int
-    is_ldm_active: bool
+    up_since: datetime = LazyField()
+    hardware_refreshed_at: datetime = LazyField()
+    network_interfaces_refreshed_at: datetime = LazyField()
+    cpu: float = LazyField()
+    memory: float = LazyField()
+    io_utilization: float = LazyField()
+    disk: int = LazyField()
+    load_1: float = LazyField()
+    load_5: float = LazyField()
+    load_15: float = LazyField()
+    interfaces: List[NetworkInterface] = LazyField()
+    command_last_executed: str = LazyField()
+    command_last_executed_at: datetime = LazyField()
+    command_last_nexrad_data_at: datetime = LazyField()
+    command_last_received: str = LazyField()
+    command_last_received_at: datetime = LazyField()
+    command_last_refreshed_at: datetime = LazyField()
+    ldm_refreshed_at: datetime = LazyField()
+    ldm_latest_product_at: datetime = LazyField()
+    ldm_oldest_product_at: datetime = LazyField()
+    ldm_storage_size: int = LazyField()
+    ldm_count: int = LazyField()
+    is_ldm_active: bool = LazyField()
     is_server_active: bool
     is_server_primary: bool
     is_server_aggregate: bool
@@ -188,9 +189,22 @@ class RadarServer(NWSItem):
     is_radar_network_up: bool
     collection_time: datetime
     reporting_host: str
-    last_ping_at: datetime
-    ping_responses_ldm: Dict[str, bool]
-    ping_responses_radar: Dict[str, bool]
-    ping_responses_server: Dict[str, bool]
-    ping_responses_network: Dict[str, bool]
+    last_ping_at: datetime = LazyField()
+    ping_responses_ldm: Dict[str, bool] = LazyField()
+    ping_responses_radar: Dict[str, bool] = LazyField()
+    ping_responses_server: Dict[str, bool] = LazyField()
+    ping_responses_network: Dict[str, bool] = LazyField()
     
+
+
+# Emitted by `libnws.service.radar_latency.RadarLatencyTracker` when a radar station or
+# server crosses a latency threshold, or its mode or status changes
+@dataclass(kw_only=True)
+class RadarHealthEvent(NWSItem):
+    retrieved_at: datetime
+    source_id: str
+    source_type: str
+    event_type: str
+    field: str
+    previous_value: object
+    value: object
@@ -2,6 +2,7 @@ from typing import List
 from datetime import datetime
 from dataclasses import dataclass
 from libnws.model.nws_item import NWSItem
+from libnws.model.geometry import PackedGeometry
 
 
 # See: https://www.weather.gov/gis/CWABounds
@@ -21,7 +22,7 @@ class Zone(NWSItem):
     effective_at: datetime
     expires_at: datetime
     timezones: List[str]
-    multi_polygon: str
+    multi_polygon: PackedGeometry
 
 
 @dataclass(kw_only=True)
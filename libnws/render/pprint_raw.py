@@ -23,6 +23,7 @@ from libnws.api.get_stations import *
 from libnws.api.get_weather import *
 from libnws.api.get_zones import *
 from libnws.model import *
+from libnws.model.geometry import PackedGeometry
 logger = logging.getLogger(__name__)
 
 
@@ -140,6 +141,17 @@ def get_all_nws_data(session: CachedSession, address: str) -> dict:
 	return weather_data_sorted
 
 
+def json_default(value):
+	"""Serialize the values that `json` can't, including the dataclasses in lists of
+	results. Geometry is written as its GeoJSON MultiPolygon coordinates.
+	"""
+	if isinstance(value, PackedGeometry):
+		return value.coordinates
+	if is_dataclass(value):
+		return asdict(value)
+	return str(value)
+
+
 def nws_data_to_json(session: CachedSession, address: str):
 	nws_data = get_all_nws_data(session, address)
 	output_path = Path(os.path.expanduser('~')) / 'nws_data'
@@ -149,7 +161,7 @@ def nws_data_to_json(session: CachedSession, address: str):
 		if is_dataclass(data):
 			data = asdict(data)
 		with open(output_file, 'w') as f:
-			f.write(json.dumps(data, default=str, indent=4))
+			f.write(json.dumps(data, default=json_default, indent=4))
 		logger.success(f'Wrote {name} to {output_file}')
 
 
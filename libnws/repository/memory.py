@@ -3,6 +3,7 @@ from typing import List
 from copy import deepcopy
 from libnws.repository.base import BaseRepository
 from libnws.model.nws_item import NWSItem
+from libnws.api.tracing import span
 logger = logging.getLogger(__name__)
 
 
@@ -56,10 +57,16 @@ class InMemoryRepository(BaseRepository):
             return items
     
     def create(self, item: NWSItem) -> NWSItem:
-        new_item = deepcopy(item)
-        self._repository.append(new_item)
+        with span('repository.create', items=1):
+            new_item = deepcopy(item)
+            self._repository.append(new_item)
         return new_item
 
+    def create_many(self, items: List[NWSItem]) -> int:
+        with span('repository.create_many', items=len(items)):
+            self._repository.extend(deepcopy(items))
+        return len(items)
+
     def update(self, item: NWSItem, filter: dict) -> bool:
         index = self._get_index(filter)
         if index is not None:
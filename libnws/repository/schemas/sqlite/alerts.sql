@@ -27,6 +27,7 @@ CREATE TABLE IF NOT EXISTS alerts
     onset_at	        TEXT, -- ISO8601 timestamp
     expires_at	        TEXT, -- ISO8601 timestamp
     response_type	    TEXT,
+    area_polygon        BLOB, -- Packed polygon coordinates (PackedGeometry)
     PRIMARY KEY         (retrieved_at, alert_id)
 );
 
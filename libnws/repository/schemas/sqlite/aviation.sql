@@ -14,7 +14,7 @@ CREATE TABLE IF NOT EXISTS sigmets
     effective_at	TEXT, -- ISO8601 timestamp
     expires_at	    TEXT, -- ISO8601 timestamp
     phenomenon	    TEXT,
-    area_polygon    TEXT, -- GeoJSON polygon coordinate string
+    area_polygon    BLOB, -- Packed polygon coordinates (PackedGeometry)
     PRIMARY KEY     (retrieved_at, issued_at, fir, atsu, sequence)
 );
 
@@ -29,7 +29,7 @@ CREATE TABLE IF NOT EXISTS center_weather_advisories
     effective_at	        TEXT, -- ISO8601 timestamp
     expires_at	            TEXT, -- ISO8601 timestamp
     observed_property_url	TEXT,
-    area_polygon            TEXT, -- GeoJSON polygon coordinate string
+    area_polygon            BLOB, -- Packed polygon coordinates (PackedGeometry)
     PRIMARY KEY             (retrieved_at, issued_at, cwsu, sequence)
 );
 
@@ -13,7 +13,7 @@ CREATE TABLE IF NOT EXISTS zones
     url	            TEXT,
     effective_at	TEXT, -- ISO8601 timestamp
     expires_at	    TEXT, -- ISO8601 timestamp
-    multi_polygon   TEXT, -- GeoJSON multi-polygon coordinate string
+    multi_polygon   BLOB, -- Packed multi-polygon coordinates (PackedGeometry)
     PRIMARY KEY     (zone_id)
 );
 
@@ -4,13 +4,19 @@ import glob
 import logging
 from dataclasses import asdict
 from pathlib import Path
+from typing import List
 from libnws.repository.base import BaseRepository
 from libnws.model.nws_item import NWSItem
+from libnws.model.geometry import PackedGeometry
+from libnws.api.tracing import span
 logger = logging.getLogger(__name__)
 
 
 SQLITE_SCHEMA_PATH = os.path.join(os.path.dirname(__file__), 'schemas/sqlite/')
 
+# Geometry is stored as-is in BLOB columns, and wrapped again when it's loaded
+sqlite3.register_adapter(PackedGeometry, bytes)
+
 
 class SQLiteRepository(BaseRepository):
     """
@@ -52,6 +58,9 @@ class SQLiteRepository(BaseRepository):
         records = []
         for row in res:
             record = {k:v for k,v in zip(res_cols, row)}
+            for k, v in record.items():
+                if PackedGeometry.is_packed(v):
+                    record[k] = PackedGeometry(v)
             records.append(nws_item(**record))
         return records
 
@@ -92,17 +101,37 @@ class SQLiteRepository(BaseRepository):
         fields = ', '.join([k for k in record.keys()])
         named_params = ', '.join([f':{k}' for k in record.keys()])
         query = f'INSERT OR IGNORE INTO {table} ({fields}) VALUES ({named_params})'
-        self.curs.execute(query, record)
-        self.conn.commit()
+        with span('repository.create', table=table, items=1):
+            self.curs.execute(query, record)
+            self.conn.commit()
         return self.curs.lastrowid
 
+    def create_many(self, table: str, items: List[NWSItem]) -> int:
+        """Insert items of the same type in one transaction
+
+        :returns: The number of rows inserted. Items that are already in the table are
+            ignored.
+        """
+        if not items:
+            return 0
+        with span('repository.create_many', table=table, items=len(items)):
+            records = [self.serialize(item) for item in items]
+            fields = ', '.join([k for k in records[0].keys()])
+            named_params = ', '.join([f':{k}' for k in records[0].keys()])
+            query = f'INSERT OR IGNORE INTO {table} ({fields}) VALUES ({named_params})'
+            before = self.conn.total_changes
+            self.curs.executemany(query, records)
+            self.conn.commit()
+        return self.conn.total_changes - before
+
     def update(self, table: str, item: NWSItem, filter: dict) -> bool:
         record = self.serialize(item)
         update_str = ', '.join([f'{k} = :{k}' for k in record.keys() if k != 'id'])
         filter_str = self._get_filter_str(filter)
         query = f'UPDATE OR IGNORE {table} SET {update_str} {filter_str}'
-        self.curs.execute(query, record)
-        self.conn.commit()
+        with span('repository.update', table=table, items=1):
+            self.curs.execute(query, record)
+            self.conn.commit()
         if self.curs.rowcount >= 1:
             return True
         else:
@@ -111,8 +140,9 @@ class SQLiteRepository(BaseRepository):
     def delete(self, table: str, filter: dict) -> bool:
         filter_str = self._get_filter_str(filter)
         print(filter_str)
-        self.curs.execute(f'DELETE FROM {table} {filter_str}', )
-        self.conn.commit()
+        with span('repository.delete', table=table):
+            self.curs.execute(f'DELETE FROM {table} {filter_str}', )
+            self.conn.commit()
         if self.curs.rowcount >= 1:
             return True
         else:
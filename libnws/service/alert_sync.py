@@ -0,0 +1,115 @@
+"""Keep a local copy of the active alerts in sync with the API between polls
+
+Every poll of an /alerts endpoint returns the full set of active alerts, even though
+most of them haven't changed since the last poll. `AlertSynchronizer` remembers the
+last known revision of each alert (by `alert_id` and `updated_at`), only processes
+features that are new or changed, and returns the differences as `AlertChange` items.
+"""
+
+import logging
+from typing import Dict, List
+from datetime import datetime
+from requests_cache import CachedSession
+from libnws.api.api_request import api_request
+from libnws.api.get_alerts import process_alert_feature
+from libnws.model.alerts import Alert, AlertChange
+logger = logging.getLogger(__name__)
+
+
+ALERT_ADDED = 'added'
+ALERT_UPDATED = 'updated'
+ALERT_EXPIRED = 'expired'
+
+
+def get_alert_revision(feature: dict) -> str | None:
+	"""Get the raw timestamp that identifies the current revision of an alert feature
+
+	This is compared as a string so that unchanged features don't need to be processed
+	at all. Falls back on the sent time when the feature has no update time.
+	"""
+	return feature.get('updated') or feature.get('properties', {}).get('sent')
+
+
+class AlertSynchronizer:
+	"""Track the set of active alerts and report what changed between polls
+
+	An alert that references a known alert in its `prior_alerts` is reported as an
+	update of that alert rather than as a new alert, and the prior alert is dropped
+	without reporting it as expired.
+	"""
+
+	def __init__(self):
+		self._revisions: Dict[str, str] = {}
+		self._alerts: Dict[str, Alert] = {}
+
+	@property
+	def alerts(self) -> List[Alert]:
+		"""The last known revision of every active alert"""
+		return list(self._alerts.values())
+
+	def _get_previous_alert(self, alert: Alert) -> Alert | None:
+		if alert.alert_id in self._alerts:
+			return self._alerts[alert.alert_id]
+		for prior_alert in alert.prior_alerts:
+			if prior_alert.prior_alert_id in self._alerts:
+				return self._alerts[prior_alert.prior_alert_id]
+		return None
+
+	def sync(self, alert_data: dict, retrieved_at: datetime) -> List[AlertChange]:
+		"""Compare an /alerts response to the known alerts and record the differences
+
+		:param alert_data: A response from any of the /alerts endpoints
+		:param retrieved_at: When the response was retrieved
+		:returns: One `AlertChange` for every alert that was added, updated, or expired
+			since the previous sync
+		"""
+		changes = []
+		seen_ids = set()
+		superseded_ids = set()
+		for feature in alert_data.get('features', {}):
+			alert_id = feature.get('properties', {}).get('id')
+			if not alert_id:
+				continue
+			seen_ids.add(alert_id)
+			revision = get_alert_revision(feature)
+			if alert_id in self._revisions and self._revisions[alert_id] == revision:
+				continue
+			alert = process_alert_feature(feature, retrieved_at)
+			previous_alert = self._get_previous_alert(alert)
+			if previous_alert is not None:
+				change_type = ALERT_UPDATED
+				if previous_alert.alert_id != alert_id:
+					superseded_ids.add(previous_alert.alert_id)
+			else:
+				change_type = ALERT_ADDED
+			self._revisions[alert_id] = revision
+			self._alerts[alert_id] = alert
+			changes.append(AlertChange(retrieved_at=retrieved_at,
+									   change_type=change_type,
+									   alert=alert,
+									   previous_alert=previous_alert))
+		for alert_id in [i for i in self._alerts if i not in seen_ids]:
+			alert = self._alerts.pop(alert_id)
+			self._revisions.pop(alert_id, None)
+			if alert_id not in superseded_ids:
+				changes.append(AlertChange(retrieved_at=retrieved_at,
+										   change_type=ALERT_EXPIRED,
+										   alert=alert,
+										   previous_alert=None))
+		logger.debug(f'Synced {len(seen_ids)} alerts with {len(changes)} changes')
+		return changes
+
+	def poll(self, session: CachedSession, url: str) -> List[AlertChange]:
+		"""Get the alerts at the given /alerts endpoint URL and sync them
+
+		For example, to poll for changes to the active alerts in Florida:
+
+		.. code-block:: python
+
+			synchronizer = AlertSynchronizer()
+			changes = synchronizer.poll(session, NWS_API_ALERTS_AREA + 'FL')
+		"""
+		alerts = api_request(session, url)
+		response = alerts.get('response')
+		retrieved_at = alerts.get('retrieved_at')
+		return self.sync(response, retrieved_at)
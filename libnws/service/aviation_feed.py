@@ -0,0 +1,247 @@
+"""Keep the active SIGMETs and CWAs current between polls, and match them to routes
+
+The /aviation/sigmets and /aviation/cwsus/{id}/cwas endpoints return every recent
+advisory on each poll, including ones that have already been processed or have expired.
+`AviationAdvisoryFeed` remembers the advisories it has seen from each ATSU (Air Traffic
+Service Unit) and CWSU (Center Weather Service Unit), and only processes new ones. The
+active advisories are kept in a heap ordered by expiration time, so expired advisories
+are dropped in O(log n) each without scanning the rest.
+
+Each advisory's area is decoded once when it's added, along with its bounding box, so
+that a route only needs to be compared in detail to the advisories whose bounding box
+it overlaps.
+
+For example, to check a flight plan against the current SIGMETs and the CWAs from
+Cleveland Center:
+
+.. code-block:: python
+
+	feed = AviationAdvisoryFeed()
+	feed.poll_sigmets(session)
+	feed.poll_cwas(session, 'ZOB')
+	route = [(41.41, -81.85), (40.49, -80.23), (39.87, -75.24)]	# (lat, lon)
+	for advisory in feed.get_intersecting(route):
+		print(advisory.sequence, advisory.expires_at)
+"""
+
+import re
+import heapq
+import logging
+from datetime import datetime
+from typing import Dict, List, Sequence, Set, Tuple
+import pytz
+from requests_cache import CachedSession
+from libnws.api.api_request import api_request
+from libnws.api.get_aviation import process_sigmet_data, process_cwa_data
+from libnws.api import NWS_API_AVIATION_SIGMETS, NWS_API_AVIATION_CWSU
+from libnws.index.geometry import (
+	BBox,
+	bbox_intersects,
+	get_bbox,
+	polyline_intersects_polygon,
+)
+from libnws.model.aviation import SIGMET, CenterWeatherAdvisory
+logger = logging.getLogger(__name__)
+
+
+# A CWA that cancels an earlier one says so in its text (eg `CANCEL ZOB CWA 101.`)
+CWA_CANCEL_PATTERN = re.compile(r'^CANCEL\s+([A-Z]{3})\s+CWA\s+(\d+)')
+
+AviationAdvisory = SIGMET | CenterWeatherAdvisory
+
+
+def get_advisory_key(unit: str, issued_at: str, sequence) -> str:
+	"""Get the key of an advisory from its issuing unit, raw issue time, and sequence
+
+	SIGMET URLs aren't unique (every SIGMET issued by an ATSU at the same time shares
+	one), and sequence numbers are reused, so all three are needed.
+	"""
+	return f'{unit}/{issued_at}/{sequence}'
+
+
+class AviationAdvisoryFeed:
+	"""The active SIGMETs and CWAs, ordered by expiration time"""
+
+	def __init__(self):
+		self.advisories: Dict[str, AviationAdvisory] = {}
+		self._expirations: List[Tuple[datetime, int, str]] = []
+		self._n_pushed = 0
+		self._areas: Dict[str, List[Tuple[BBox, list]]] = {}
+		# The keys of the advisories in the latest response from each unit, whether or
+		# not they're active, so that they aren't processed again
+		self._seen_keys: Dict[str, Set[str]] = {}
+
+	def __len__(self) -> int:
+		return len(self.advisories)
+
+	def _now(self, now: datetime = None) -> datetime:
+		if now is None:
+			return datetime.now(pytz.timezone('US/Eastern')).replace(tzinfo=None)
+		return now
+
+	def add(self, key: str, advisory: AviationAdvisory, now: datetime = None) -> bool:
+		"""Add an advisory, unless it has already expired
+
+		:returns: Whether the advisory was added
+		"""
+		if advisory.expires_at is not None and advisory.expires_at <= self._now(now):
+			return False
+		self.advisories[key] = advisory
+		areas = []
+		if advisory.area_polygon:
+			for rings in advisory.area_polygon.get_rings():
+				if rings:
+					areas.append((get_bbox(rings[0]), rings))
+		self._areas[key] = areas
+		if advisory.expires_at is not None:
+			heapq.heappush(self._expirations, (advisory.expires_at, self._n_pushed, key))
+			self._n_pushed += 1
+		return True
+
+	def remove(self, key: str) -> bool:
+		"""Remove an advisory. Its entry in the expiration heap is skipped when it's
+		popped.
+		"""
+		if key not in self.advisories:
+			return False
+		del self.advisories[key]
+		del self._areas[key]
+		return True
+
+	def expire(self, now: datetime = None) -> List[AviationAdvisory]:
+		"""Remove the advisories that have expired
+
+		:param now: The time to check against (default: now, in the same timezone as
+			`libnws.api.api_request.parse_timestamp`)
+		:returns: The advisories that were removed
+		"""
+		now = self._now(now)
+		expired = []
+		while self._expirations and self._expirations[0][0] <= now:
+			expires_at, _, key = heapq.heappop(self._expirations)
+			advisory = self.advisories.get(key)
+			# Skip entries for advisories that were removed or re-added since
+			if advisory is not None and advisory.expires_at == expires_at:
+				self.remove(key)
+				expired.append(advisory)
+		if expired:
+			logger.debug(f'Expired {len(expired)} aviation advisories')
+		return expired
+
+	def _get_new_features(self, features: list, unit_field: str) -> List[tuple]:
+		"""Find the features that haven't been seen in a previous response from the same
+		unit
+
+		:returns: `(key, feature)` pairs
+		"""
+		keys_by_unit: Dict[str, Set[str]] = {}
+		new_features = []
+		for feature in features:
+			properties = feature.get('properties', {})
+			unit = properties.get(unit_field)
+			key = get_advisory_key(unit, properties.get('issueTime'),
+								   properties.get('sequence'))
+			keys_by_unit.setdefault(unit, set()).add(key)
+			if key not in self._seen_keys.get(unit, ()):
+				new_features.append((key, feature))
+		self._seen_keys.update(keys_by_unit)
+		return new_features
+
+	def add_sigmets(
+		self,
+		sigmets_data: dict,
+		retrieved_at: datetime,
+		now: datetime = None
+	) -> List[SIGMET]:
+		"""Add the new SIGMETs from an /aviation/sigmets response, and drop the expired
+		ones
+
+		:returns: The SIGMETs that were added
+		"""
+		now = self._now(now)
+		self.expire(now)
+		added = []
+		for key, feature in self._get_new_features(sigmets_data.get('features', []),
+												   'atsu'):
+			sigmet = process_sigmet_data(feature, retrieved_at)
+			if self.add(key, sigmet, now):
+				added.append(sigmet)
+		logger.info(f'Added {len(added)} SIGMETs ({len(self)} active advisories)')
+		return added
+
+	def add_cwas(
+		self,
+		cwas_data: dict,
+		retrieved_at: datetime,
+		now: datetime = None
+	) -> List[CenterWeatherAdvisory]:
+		"""Add the new CWAs from a /cwas response, and drop the expired ones and the ones
+		that a new CWA cancels
+
+		:returns: The CWAs that were added
+		"""
+		now = self._now(now)
+		self.expire(now)
+		added = []
+		for key, feature in self._get_new_features(cwas_data.get('features', []), 'cwsu'):
+			cwa = process_cwa_data(feature, retrieved_at)
+			match = CWA_CANCEL_PATTERN.match((cwa.text or '').strip())
+			if match:
+				cwsu, sequence = match.groups()
+				for cancelled_key, advisory in list(self.advisories.items()):
+					if (isinstance(advisory, CenterWeatherAdvisory)
+						and advisory.cwsu == cwsu
+						and str(advisory.sequence) == sequence):
+						self.remove(cancelled_key)
+				continue
+			if self.add(key, cwa, now):
+				added.append(cwa)
+		logger.info(f'Added {len(added)} CWAs ({len(self)} active advisories)')
+		return added
+
+	def poll_sigmets(self, session: CachedSession, atsu: str = None) -> List[SIGMET]:
+		"""Get the SIGMETs from every ATSU (or one), and add the new ones"""
+		url = NWS_API_AVIATION_SIGMETS + (atsu or '')
+		sigmets_data = api_request(session, url)
+		return self.add_sigmets(sigmets_data.get('response'),
+								sigmets_data.get('retrieved_at'))
+
+	def poll_cwas(
+		self,
+		session: CachedSession,
+		cwsu_id: str
+	) -> List[CenterWeatherAdvisory]:
+		"""Get the CWAs from a CWSU, and add the new ones"""
+		cwas_data = api_request(session, NWS_API_AVIATION_CWSU + cwsu_id + '/cwas')
+		return self.add_cwas(cwas_data.get('response'), cwas_data.get('retrieved_at'))
+
+	def get_intersecting(
+		self,
+		route: Sequence[Tuple[float, float]],
+		now: datetime = None
+	) -> List[AviationAdvisory]:
+		"""Get the active advisories whose area a route passes through
+
+		Expired advisories are dropped first. Routes are compared as straight lines
+		between waypoints in latitude and longitude, not great circles.
+
+		:param route: The route's waypoints, as `(lat, lon)` pairs
+		:returns: The advisories, soonest to expire first
+		"""
+		self.expire(now)
+		if not route:
+			return []
+		line = []
+		for lat, lon in route:
+			line.append(lon)
+			line.append(lat)
+		route_bbox = get_bbox(line)
+		intersecting = []
+		for key, areas in self._areas.items():
+			for bbox, rings in areas:
+				if (bbox_intersects(bbox, route_bbox)
+					and polyline_intersects_polygon(line, rings, bbox)):
+					intersecting.append(self.advisories[key])
+					break
+		intersecting.sort(key=lambda advisory: advisory.expires_at or datetime.max)
+		return intersecting
@@ -0,0 +1,346 @@
+"""Backfill history from the API into a repository
+
+A backfill is split into tasks that can each be fetched with one request (eg the
+SIGMETs issued by one ATSU on one day, or a day of observations from one station).
+Tasks are fetched concurrently from worker threads, and their results are collected on
+the calling thread and passed to a sink in batches, so a repository never needs to be
+shared between threads. The session's rate
+limiter (see `libnws.api.rate_limit`) keeps the workers under the API's limits.
+
+A task is recorded in the `BackfillCheckpoint` only once every item it returned has been
+written, so a backfill that's interrupted can be run again with the same checkpoint to
+fetch only the tasks that weren't finished.
+
+For example, to backfill a year of SIGMETs from three ATSUs into SQLite:
+
+.. code-block:: python
+
+	repository = SQLiteRepository('history.db')
+	checkpoint = BackfillCheckpoint('sigmets.checkpoint.json')
+	backfill_sigmets(session,
+					 ['KKCI', 'PAWU', 'PHFO'],
+					 date(2023, 1, 1),
+					 date(2023, 12, 31),
+					 sink=partial(repository.create_many, 'sigmets'),
+					 checkpoint=checkpoint)
+
+or three months of observations from a few hundred stations:
+
+.. code-block:: python
+
+	backfill_observations(session,
+						  station_ids,
+						  datetime(2024, 3, 1),
+						  datetime(2024, 6, 1),
+						  sink=observation_repository.create_many,
+						  checkpoint=BackfillCheckpoint('observations.checkpoint.json'))
+"""
+
+import os
+import json
+import logging
+import threading
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Hashable, Iterable, List, Set
+from urllib.parse import urlencode
+import pytz
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from requests_cache import CachedSession
+from libnws.api.api_request import api_request
+from libnws.api.get_aviation import process_sigmets
+from libnws.api.get_weather import process_observations_data
+from libnws.api import NWS_API_AVIATION_SIGMETS, NWS_API_STATIONS
+from libnws.model.aviation import SIGMET
+from libnws.model.weather import Observation
+logger = logging.getLogger(__name__)
+
+
+# Most stations report hourly, but some report every 5 to 20 minutes (up to 288 a day),
+# so a day of observations fits in one page of the largest size the API allows. Windows
+# with more observations than that follow the pagination links.
+OBSERVATIONS_WINDOW = timedelta(days=1)
+OBSERVATIONS_PAGE_LIMIT = 500
+
+
+class BackfillCheckpoint:
+	"""The keys of the backfill tasks that have been finished
+
+	:param path: A JSON file to load the finished tasks from and save them to after
+		every batch (default: don't save them)
+	"""
+
+	def __init__(self, path: str = None):
+		self.path = path
+		self._lock = threading.Lock()
+		self._done: Set[str] = set()
+		if path and os.path.exists(path):
+			with open(path) as file:
+				self._done = set(json.load(file).get('done', []))
+			logger.info(f'Loaded {len(self._done)} finished backfill tasks from {path}')
+
+	def __len__(self) -> int:
+		return len(self._done)
+
+	def __contains__(self, key: str) -> bool:
+		return key in self._done
+
+	def mark_done(self, keys: Iterable[str]):
+		with self._lock:
+			self._done.update(keys)
+			if self.path:
+				# Write to a temporary file first, so that an interruption can't leave
+				# a partly written checkpoint behind
+				temp_path = self.path + '.tmp'
+				with open(temp_path, 'w') as file:
+					json.dump({'done': sorted(self._done)}, file)
+				os.replace(temp_path, self.path)
+
+
+def get_dates(start_date: date, end_date: date) -> List[date]:
+	"""Get every date from `start_date` to `end_date`, inclusive"""
+	return [start_date + timedelta(days=days)
+			for days in range((end_date - start_date).days + 1)]
+
+
+def run_backfill(
+	tasks: Iterable[tuple],
+	fetch: Callable[..., List[Any]],
+	sink: Callable[[List[Any]], Any],
+	checkpoint: BackfillCheckpoint = None,
+	batch_size: int = 500,
+	max_workers: int = 8,
+	dedupe_key: Callable[[Any], Hashable] = None
+) -> dict:
+	"""Fetch tasks concurrently and pass their results to a sink in batches
+
+	:param tasks: `(key, *args)` tuples, where the key identifies the task in the
+		checkpoint and `fetch(*args)` returns the task's items
+	:param sink: Called on this thread with each batch of items (eg a repository's
+		`create_many`)
+	:param batch_size: The most items to pass to the sink at once. A task's items may
+		be split across batches.
+	:param max_workers: The most tasks to fetch at once
+	:param dedupe_key: Identifies items that are the same, so that only the first is
+		written when a task returns an item more than once (eg on two pages). Items
+		are only compared within a task, so memory use doesn't grow with the length of
+		the backfill and a resumed backfill dedupes the same way. Tasks must not
+		overlap.
+	:returns: The number of tasks fetched, skipped (already in the checkpoint), and
+		failed, and the number of items written and dropped as duplicates
+	"""
+	checkpoint = checkpoint if checkpoint is not None else BackfillCheckpoint()
+	stats = {'fetched': 0, 'skipped': 0, 'failed': 0, 'items': 0, 'duplicates': 0}
+	batch = []
+	# Tasks whose items are all in the batch, or already written
+	batch_keys = []
+
+	def flush():
+		if batch:
+			sink(list(batch))
+			stats['items'] += len(batch)
+			batch.clear()
+		if batch_keys:
+			checkpoint.mark_done(batch_keys)
+			batch_keys.clear()
+
+	def collect(future, key):
+		try:
+			items = future.result()
+		except Exception as exc:
+			stats['failed'] += 1
+			logger.warning(f'Backfill task {key} failed, it will be retried on the next '
+						   f'run: {exc}')
+			return
+		stats['fetched'] += 1
+		seen_keys = set()
+		for item in items:
+			if dedupe_key is not None:
+				item_key = dedupe_key(item)
+				if item_key in seen_keys:
+					stats['duplicates'] += 1
+					continue
+				seen_keys.add(item_key)
+			batch.append(item)
+			if len(batch) >= batch_size:
+				flush()
+		batch_keys.append(key)
+		if len(batch_keys) >= batch_size:
+			flush()
+
+	with ThreadPoolExecutor(max_workers=max_workers) as executor:
+		# Only a few tasks are queued ahead of the workers, so results are written as
+		# they arrive instead of piling up in memory
+		in_flight = {}
+		for key, *args in tasks:
+			if key in checkpoint:
+				stats['skipped'] += 1
+				continue
+			in_flight[executor.submit(fetch, *args)] = key
+			if len(in_flight) >= max_workers * 2:
+				done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+				for future in done:
+					collect(future, in_flight.pop(future))
+		for future in list(in_flight):
+			collect(future, in_flight.pop(future))
+	flush()
+	logger.info(f'Backfill finished: {stats["fetched"]} tasks fetched, '
+				f'{stats["skipped"]} skipped, {stats["failed"]} failed, '
+				f'{stats["items"]} items written')
+	return stats
+
+
+def get_atsu_sigmets_by_date(
+	session: CachedSession,
+	atsu: str,
+	date_str: str
+) -> List[SIGMET]:
+	sigmets_data = api_request(session, NWS_API_AVIATION_SIGMETS + atsu + f'/{date_str}')
+	return process_sigmets(sigmets_data.get('response'), sigmets_data.get('retrieved_at'))
+
+
+def backfill_sigmets(
+	session: CachedSession,
+	atsus: List[str],
+	start_date: date,
+	end_date: date,
+	sink: Callable[[List[SIGMET]], Any],
+	checkpoint: BackfillCheckpoint = None,
+	batch_size: int = 500,
+	max_workers: int = 8
+) -> dict:
+	"""Get the SIGMETs issued by each ATSU on each day from `start_date` to `end_date`
+	(inclusive), and pass them to a sink in batches
+
+	Each ATSU and day is fetched with one request, most recent day first.
+
+	:returns: See `run_backfill`
+	"""
+	dates = get_dates(start_date, end_date)
+	tasks = []
+	for day in reversed(dates):
+		date_str = day.isoformat()
+		for atsu in atsus:
+			tasks.append((f'sigmets/{atsu}/{date_str}', session, atsu, date_str))
+	logger.info(f'Backfilling SIGMETs from {len(atsus)} ATSUs over {len(dates)} days')
+	return run_backfill(tasks, get_atsu_sigmets_by_date, sink, checkpoint, batch_size,
+						max_workers)
+
+
+def _to_utc(timestamp: datetime) -> datetime:
+	"""Convert a time to UTC. Naive times are taken to be in the same timezone as
+	`libnws.api.api_request.parse_timestamp` returns.
+	"""
+	if timestamp.tzinfo is None:
+		timestamp = pytz.timezone('US/Eastern').localize(timestamp)
+	return timestamp.astimezone(pytz.utc)
+
+
+def _to_utc_iso(timestamp: datetime) -> str:
+	"""Format a time for the API (see `_to_utc`)"""
+	return _to_utc(timestamp).isoformat()
+
+
+def get_windows(
+	start: datetime,
+	end: datetime,
+	window: timedelta
+) -> List[tuple]:
+	"""Split the time from `start` to `end` into `(start, end)` windows of at most the
+	given length
+	"""
+	windows = []
+	window_start = start
+	while window_start < end:
+		window_end = min(window_start + window, end)
+		windows.append((window_start, window_end))
+		window_start = window_end
+	return windows
+
+
+def get_observations_in_window(
+	session: CachedSession,
+	station_id: str,
+	start: datetime,
+	end: datetime,
+	limit: int = OBSERVATIONS_PAGE_LIMIT
+) -> List[Observation]:
+	"""Get a station's observations from `start` up to (but not including) `end`
+
+	The API includes observations made at exactly `end`, so they're dropped here to
+	keep neighboring windows from overlapping. Pages are followed if the window has more
+	observations than fit in one, and an observation that's on more than one page is
+	only returned once.
+
+	Observations are compared by their time in UTC, since the naive local
+	`observed_at` times repeat for an hour when clocks fall back.
+	"""
+	utc_start = _to_utc(start)
+	utc_end = _to_utc(end)
+	query = urlencode({
+		'start':	utc_start.isoformat(),
+		'end':		utc_end.isoformat(),
+		'limit':	limit,
+	})
+	url = NWS_API_STATIONS + station_id + '/observations?' + query
+	observations = []
+	observed_ats = set()
+	while url:
+		observations_data = api_request(session, url)
+		response = observations_data.get('response')
+		retrieved_at = observations_data.get('retrieved_at')
+		features = response.get('features', [])
+		for feature in features:
+			observed_at = get_observation_time(feature)
+			if (observed_at is None or not utc_start <= observed_at < utc_end
+				or observed_at in observed_ats):
+				continue
+			observed_ats.add(observed_at)
+			observations.append(process_observations_data(feature, retrieved_at,
+														   station_id))
+		url = response.get('pagination', {}).get('next') if len(features) >= limit else None
+	return observations
+
+
+def get_observation_time(observation_data: dict) -> datetime | None:
+	"""Get the time of an observation from the API, in UTC"""
+	timestamp = observation_data.get('properties', {}).get('timestamp')
+	if not timestamp:
+		return None
+	return _to_utc(datetime.fromisoformat(timestamp))
+
+
+def backfill_observations(
+	session: CachedSession,
+	station_ids: List[str],
+	start: datetime,
+	end: datetime,
+	sink: Callable[[List[Observation]], Any],
+	checkpoint: BackfillCheckpoint = None,
+	window: timedelta = OBSERVATIONS_WINDOW,
+	batch_size: int = 500,
+	max_workers: int = 8
+) -> dict:
+	"""Get the observations from each station from `start` up to `end`, and pass them
+	to a sink in batches
+
+	The time range is split into windows, and each station and window is fetched with
+	one request, most recent window first. Each window's observations are deduplicated
+	by their time in UTC (see `get_observations_in_window`).
+
+	:param start: Naive times are in the same timezone as
+		`libnws.api.api_request.parse_timestamp` returns
+	:param window: The longest time to get in one request. A window that has more than
+		`OBSERVATIONS_PAGE_LIMIT` observations takes more than one request.
+	:returns: See `run_backfill`
+	"""
+	windows = get_windows(start, end, window)
+	tasks = []
+	for window_start, window_end in reversed(windows):
+		key_suffix = f'{_to_utc_iso(window_start)}/{_to_utc_iso(window_end)}'
+		for station_id in station_ids:
+			tasks.append((f'observations/{station_id}/{key_suffix}',
+						  session, station_id, window_start, window_end))
+	logger.info(f'Backfilling observations from {len(station_ids)} stations in '
+				f'{len(windows)} windows')
+	return run_backfill(tasks, get_observations_in_window, sink, checkpoint, batch_size,
+						max_workers)
@@ -0,0 +1,463 @@
+"""Time series of station observations, with aggregates that are updated as they arrive
+
+Stations report routine observations about once an hour, plus special reports (SPECI)
+whenever the weather changes, so observations are irregular. `ObservationSeries` keeps a
+station's observations as columns (one array of times and one array per field, with
+NaN for missing values), and updates running aggregates for each field as each
+observation is added, so new observations never require history to be read again:
+
+- Hourly and daily buckets, with the count, mean, minimum, maximum, and last value of
+  each field in each bucket. Resampling a field to hourly or daily values reads these.
+- A rolling window (24 hours by default), with the mean, minimum, and maximum of each
+  field over the window.
+- Precipitation totals. Each report's precipitation (`precip_last_1h_mm`) is the amount
+  since the last routine report, so the largest amount reported in an hour is that
+  hour's total, and hourly totals are added up into daily totals.
+
+Times are kept as seconds since 1970 in UTC, so the hour that repeats when clocks fall
+back is kept in order. They're converted to the same (naive, US/Eastern) clock as
+`observed_at` only to find each observation's day, and for the times that are returned.
+Days start at midnight on that clock unless `day_offset_s` is given.
+
+For example, to keep the daily highs, lows, and precipitation of a set of stations
+current with a `PollScheduler`:
+
+.. code-block:: python
+
+	station_series = StationSeries()
+	for station_id in station_ids:
+		scheduler.add_job(latest_observations_job(station_id, interval_s=600,
+												  sinks=[station_series.add_observations]))
+	...
+	for day in station_series['KBOS'].get_daily_summary():
+		print(day['date'], day['high_c'], day['low_c'], day['precip_mm'])
+"""
+
+import re
+import math
+import bisect
+import logging
+from array import array
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Set, Tuple
+import pytz
+from libnws.model.weather import Observation
+logger = logging.getLogger(__name__)
+
+
+OBSERVATION_SERIES_FIELDS = (
+	'temperature_c',
+	'dew_point_c',
+	'relative_humidity_pc',
+	'wind_speed_kmh',
+	'wind_gust_kmh',
+	'barometric_pressure_pa',
+	'visibility_m',
+	'precip_last_1h_mm',
+)
+PRECIP_FIELD = 'precip_last_1h_mm'
+
+HOURLY = 3600
+DAILY = 86400
+
+# Degree days are counted from 65 degrees F
+DEGREE_DAY_BASE_C = 18.333
+
+_EPOCH = datetime(1970, 1, 1)
+_EASTERN = pytz.timezone('US/Eastern')
+
+# The day and time (UTC) that a METAR or SPECI was made, eg `031554Z`
+METAR_TIME_PATTERN = re.compile(r'\b\d{2}(\d{2})(\d{2})Z\b')
+
+
+def to_seconds(timestamp: datetime, is_dst: bool = False) -> float:
+	"""Convert a time to seconds since 1970-01-01 UTC. Naive times are taken to be in
+	the same timezone as `libnws.api.api_request.parse_timestamp` returns.
+
+	:param is_dst: Which of the two naive times to use when clocks fall back
+	"""
+	if timestamp.tzinfo is None:
+		timestamp = _EASTERN.localize(timestamp, is_dst=is_dst)
+	return (timestamp.astimezone(pytz.utc).replace(tzinfo=None) - _EPOCH).total_seconds()
+
+
+def from_seconds(seconds: float) -> datetime:
+	"""Convert seconds since 1970-01-01 UTC to a naive US/Eastern time"""
+	utc_time = pytz.utc.localize(_EPOCH + timedelta(seconds=seconds))
+	return utc_time.astimezone(_EASTERN).replace(tzinfo=None)
+
+
+def to_local_seconds(seconds: float) -> float:
+	"""Convert seconds since 1970-01-01 UTC to seconds on the naive US/Eastern clock"""
+	return (from_seconds(seconds) - _EPOCH).total_seconds()
+
+
+def get_observation_seconds(observation: Observation, times_seen: Set[float]) -> float:
+	"""Get the time of an observation in seconds since 1970-01-01 UTC
+
+	`observed_at` is the same for two observations an hour apart when clocks fall back.
+	The observation's METAR has its time in UTC, so that decides which one it is. An
+	observation without a METAR is taken to be the second one if the first was already
+	added.
+	"""
+	first = to_seconds(observation.observed_at, is_dst=True)
+	second = to_seconds(observation.observed_at, is_dst=False)
+	if first == second:
+		return first
+	match = METAR_TIME_PATTERN.search(observation.raw_message or '')
+	if match:
+		hour, minute = int(match.group(1)), int(match.group(2))
+		for seconds in (first, second):
+			utc_time = _EPOCH + timedelta(seconds=seconds)
+			if (utc_time.hour, utc_time.minute) == (hour, minute):
+				return seconds
+	return second if first in times_seen else first
+
+
+class Buckets:
+	"""Running aggregates of one field in fixed-length time buckets
+
+	Each bucket is `[count, sum, min, max, time of last value, last value]`, updated in
+	O(1) per value, whatever order values are added in.
+
+	:param is_local: Whether the buckets are on the naive US/Eastern clock (eg days),
+		rather than in UTC
+	"""
+
+	def __init__(self, interval_s: float, offset_s: float = 0, is_local: bool = False):
+		self.interval_s = interval_s
+		self.offset_s = offset_s
+		self.is_local = is_local
+		self.buckets: Dict[int, list] = {}
+
+	def get_bucket(self, t: float) -> int:
+		"""Get the bucket of a time in seconds on the buckets' clock"""
+		return int((t - self.offset_s) // self.interval_s)
+
+	def get_bucket_start(self, bucket: int) -> datetime:
+		"""Get the naive US/Eastern time that a bucket starts at"""
+		start = bucket * self.interval_s + self.offset_s
+		return _EPOCH + timedelta(seconds=start) if self.is_local else from_seconds(start)
+
+	def to_clock(self, timestamp: datetime) -> float:
+		"""Convert a time to seconds on the buckets' clock"""
+		t = to_seconds(timestamp)
+		return to_local_seconds(t) if self.is_local else t
+
+	def add(self, t: float, value: float, utc_t: float = None):
+		"""Add a value at a time in seconds on the buckets' clock
+
+		:param utc_t: The time in UTC, to find the last value by (default: `t`)
+		"""
+		bucket = self.get_bucket(t)
+		t = t if utc_t is None else utc_t
+		aggregates = self.buckets.get(bucket)
+		if aggregates is None:
+			self.buckets[bucket] = [1, value, value, value, t, value]
+			return
+		aggregates[0] += 1
+		aggregates[1] += value
+		if value < aggregates[2]:
+			aggregates[2] = value
+		if value > aggregates[3]:
+			aggregates[3] = value
+		if t >= aggregates[4]:
+			aggregates[4] = t
+			aggregates[5] = value
+
+	def get(self, bucket: int) -> dict | None:
+		aggregates = self.buckets.get(bucket)
+		if aggregates is None:
+			return None
+		count, total, minimum, maximum, _, last = aggregates
+		return {
+			'count':	count,
+			'mean':		total / count,
+			'min':		minimum,
+			'max':		maximum,
+			'last':		last,
+			'sum':		total,
+		}
+
+	def items(
+		self,
+		start: datetime = None,
+		end: datetime = None
+	) -> List[Tuple[int, dict]]:
+		"""Get the aggregates of every bucket from `start` up to `end`, in time order"""
+		first = self.get_bucket(self.to_clock(start)) if start is not None else None
+		last = self.get_bucket(self.to_clock(end) - 1e-6) if end is not None else None
+		return [(bucket, self.get(bucket)) for bucket in sorted(self.buckets)
+				if (first is None or bucket >= first) and (last is None or bucket <= last)]
+
+
+class RollingWindow:
+	"""The mean, minimum, and maximum of the values in a sliding window of time
+
+	The sum is updated as values enter and leave the window, and the minimum and maximum
+	are kept with monotonic queues, so each value is added in amortized O(1). Values
+	must be added in time order.
+	"""
+
+	def __init__(self, window_s: float):
+		self.window_s = window_s
+		self.values = deque()	# (time, value)
+		self._sum = 0.0
+		self._min = deque()		# (time, value), increasing by value
+		self._max = deque()		# (time, value), decreasing by value
+
+	def __len__(self) -> int:
+		return len(self.values)
+
+	def add(self, t: float, value: float):
+		self.values.append((t, value))
+		self._sum += value
+		while self._min and self._min[-1][1] >= value:
+			self._min.pop()
+		self._min.append((t, value))
+		while self._max and self._max[-1][1] <= value:
+			self._max.pop()
+		self._max.append((t, value))
+		self.evict(t)
+
+	def evict(self, now: float):
+		"""Drop the values that are older than the window, as of `now`"""
+		cutoff = now - self.window_s
+		while self.values and self.values[0][0] <= cutoff:
+			_, value = self.values.popleft()
+			self._sum -= value
+		while self._min and self._min[0][0] <= cutoff:
+			self._min.popleft()
+		while self._max and self._max[0][0] <= cutoff:
+			self._max.popleft()
+
+	def stats(self) -> dict:
+		if not self.values:
+			return {'count': 0, 'mean': None, 'min': None, 'max': None}
+		return {
+			'count':	len(self.values),
+			'mean':		self._sum / len(self.values),
+			'min':		self._min[0][1],
+			'max':		self._max[0][1],
+		}
+
+
+class ObservationSeries:
+	"""The observations of one station, as columns, with running aggregates
+
+	:param station_id: The station the observations are from
+	:param fields: The `Observation` fields to keep
+	:param rolling_window_s: The length of the rolling window (default: 24 hours)
+	:param day_offset_s: When each day starts, in seconds after midnight (eg to use
+		local standard time for a station outside the Eastern time zone)
+	"""
+
+	def __init__(
+		self,
+		station_id: str,
+		fields: Tuple[str, ...] = OBSERVATION_SERIES_FIELDS,
+		rolling_window_s: float = DAILY,
+		day_offset_s: float = 0
+	):
+		self.station_id = station_id
+		self.fields = fields
+		self.times = array('d')
+		self.columns: Dict[str, array] = {field: array('d') for field in fields}
+		self.hourly = {field: Buckets(HOURLY) for field in fields}
+		self.daily = {field: Buckets(DAILY, day_offset_s, is_local=True) for field in fields}
+		self.rolling = {field: RollingWindow(rolling_window_s) for field in fields}
+		self._times_seen: Set[float] = set()
+		self._latest = -math.inf
+
+	def __len__(self) -> int:
+		return len(self.times)
+
+	def add(self, observation: Observation) -> bool:
+		"""Add an observation, and update the aggregates of each of its fields
+
+		Observations can be added in any order, but ones that are older than the latest
+		observation don't update the rolling window.
+
+		:returns: False if the observation has no time or was already added
+		"""
+		if observation.observed_at is None:
+			return False
+		return self._add(observation, get_observation_seconds(observation,
+															   self._times_seen))
+
+	def _add(self, observation: Observation, t: float) -> bool:
+		if t in self._times_seen:
+			return False
+		local_t = to_local_seconds(t)
+		self._times_seen.add(t)
+		if t >= self._latest:
+			i = len(self.times)
+			self.times.append(t)
+		else:
+			i = bisect.bisect_right(self.times, t)
+			self.times.insert(i, t)
+		is_latest = t >= self._latest
+		self._latest = max(self._latest, t)
+		for field in self.fields:
+			value = getattr(observation, field)
+			if value is None:
+				self.columns[field].insert(i, math.nan)
+				continue
+			value = float(value)
+			self.columns[field].insert(i, value)
+			self.hourly[field].add(t, value)
+			self.daily[field].add(local_t, value, t)
+			if is_latest:
+				self.rolling[field].add(t, value)
+		return True
+
+	def add_many(self, observations: Iterable[Observation]) -> int:
+		"""Add observations, oldest first, and return the number that were added"""
+		# Observations in the hour that repeats when clocks fall back are resolved in
+		# the order they were given in (sorting is stable), then added in UTC order
+		observations = sorted((observation for observation in observations
+							   if observation.observed_at is not None),
+							  key=lambda observation: to_seconds(observation.observed_at,
+																 is_dst=True))
+		times_seen = set(self._times_seen)
+		timed_observations = []
+		for observation in observations:
+			t = get_observation_seconds(observation, times_seen)
+			times_seen.add(t)
+			timed_observations.append((t, observation))
+		timed_observations.sort(key=lambda timed_observation: timed_observation[0])
+		return sum(self._add(observation, t) for t, observation in timed_observations)
+
+	def column(self, field: str, start: datetime = None, end: datetime = None) -> array:
+		"""Get a field's values from `start` up to `end` (NaN where they're missing)"""
+		first = bisect.bisect_left(self.times, to_seconds(start)) if start else 0
+		last = bisect.bisect_left(self.times, to_seconds(end)) if end else len(self.times)
+		return self.columns[field][first:last]
+
+	def resample(
+		self,
+		field: str,
+		interval_s: int = HOURLY,
+		how: str = 'mean',
+		start: datetime = None,
+		end: datetime = None
+	) -> List[Tuple[datetime, float]]:
+		"""Get a field's values at a fixed interval
+
+		:param interval_s: `HOURLY` or `DAILY`
+		:param how: How to combine the values in each interval: `mean`, `min`, `max`,
+			`last`, `sum`, or `count`
+		:returns: `(interval start, value)` pairs, in time order. Intervals with no
+			values are left out.
+		"""
+		if interval_s == HOURLY:
+			buckets = self.hourly[field]
+		elif interval_s == DAILY:
+			buckets = self.daily[field]
+		else:
+			raise ValueError(f'Unsupported interval: {interval_s}s (expected HOURLY or '
+							 f'DAILY)')
+		return [(buckets.get_bucket_start(bucket), aggregates[how])
+				for bucket, aggregates in buckets.items(start, end)]
+
+	def get_rolling(self, field: str, now: datetime = None) -> dict:
+		"""Get the mean, minimum, and maximum of a field over the rolling window
+
+		:param now: Drop values that are older than the window as of this time (default:
+			as of the latest observation)
+		"""
+		window = self.rolling[field]
+		if now is not None:
+			window.evict(to_seconds(now))
+		return window.stats()
+
+	def get_precipitation(
+		self,
+		interval_s: int = DAILY,
+		start: datetime = None,
+		end: datetime = None
+	) -> List[Tuple[datetime, float]]:
+		"""Get the total precipitation in each hour or day, in millimeters"""
+		if interval_s == HOURLY:
+			return self.resample(PRECIP_FIELD, HOURLY, 'max', start, end)
+		hourly_buckets = self.hourly[PRECIP_FIELD]
+		daily_buckets = self.daily[PRECIP_FIELD]
+		totals: Dict[int, float] = {}
+		for hour, aggregates in hourly_buckets.items(start, end):
+			day = daily_buckets.get_bucket(to_local_seconds(hour * HOURLY))
+			totals[day] = totals.get(day, 0.0) + aggregates['max']
+		return [(daily_buckets.get_bucket_start(day), total)
+				for day, total in sorted(totals.items())]
+
+	def get_daily_summary(
+		self,
+		start: datetime = None,
+		end: datetime = None,
+		temperature_field: str = 'temperature_c',
+		degree_day_base_c: float = DEGREE_DAY_BASE_C
+	) -> List[dict]:
+		"""Get the high, low, mean temperature, precipitation, and heating and cooling
+		degree days of each day
+
+		Degree days are calculated from the average of the high and low.
+		"""
+		precipitation = {}
+		if PRECIP_FIELD in self.fields:
+			precipitation = dict(self.get_precipitation(DAILY, start, end))
+		buckets = self.daily[temperature_field]
+		summary = []
+		for bucket, aggregates in buckets.items(start, end):
+			day_start = buckets.get_bucket_start(bucket)
+			average = (aggregates['max'] + aggregates['min']) / 2
+			summary.append({
+				'date':			day_start.date(),
+				'high_c':		aggregates['max'],
+				'low_c':		aggregates['min'],
+				'mean_c':		aggregates['mean'],
+				'precip_mm':	precipitation.get(day_start, 0.0),
+				'hdd_c':		max(degree_day_base_c - average, 0.0),
+				'cdd_c':		max(average - degree_day_base_c, 0.0),
+				'samples':		aggregates['count'],
+			})
+		return summary
+
+
+class StationSeries:
+	"""An `ObservationSeries` for every station that observations are added for
+
+	:param kwargs: Passed to each `ObservationSeries`
+	"""
+
+	def __init__(self, **kwargs):
+		self.kwargs = kwargs
+		self.series: Dict[str, ObservationSeries] = {}
+
+	def __len__(self) -> int:
+		return len(self.series)
+
+	def __contains__(self, station_id: str) -> bool:
+		return station_id in self.series
+
+	def __getitem__(self, station_id: str) -> ObservationSeries:
+		return self.series[station_id]
+
+	def add_observations(self, observations: Iterable[Observation]) -> int:
+		"""Add observations from any number of stations. Can be used as a `PollJob`
+		sink, or as the sink of `backfill_observations`.
+
+		:returns: The number of observations that were added
+		"""
+		by_station: Dict[str, List[Observation]] = {}
+		if isinstance(observations, Observation):
+			observations = [observations]
+		for observation in observations:
+			by_station.setdefault(observation.station_or_zone_id, []).append(observation)
+		added = 0
+		for station_id, station_observations in by_station.items():
+			series = self.series.get(station_id)
+			if series is None:
+				series = self.series[station_id] = ObservationSeries(station_id,
+																	 **self.kwargs)
+			added += series.add_many(station_observations)
+		return added
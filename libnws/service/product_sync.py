@@ -0,0 +1,216 @@
+"""Keep a local mirror of product listings current
+
+Product listings (eg every AFD, or every AFD from one office) are returned newest first,
+and almost all of each listing is unchanged since the last poll. `ProductSync`
+remembers the newest issuance time it has seen for each product type and office, and
+stops reading a listing once it's a few minutes past the oldest of those, so only new
+products are processed. Products can show up in a listing after newer ones (eg when
+they're ingested late), so the last few minutes before each watermark are read again,
+and the products in them that were already seen are skipped by ID.
+
+The text of the new products is then fetched concurrently. Products whose text can't be
+fetched are retried on the next few syncs, unless the API says they don't exist.
+
+For example, to keep a search index of every AFD current:
+
+.. code-block:: python
+
+	product_sync = ProductSync()
+	product_index = ProductSearchIndex()
+	while True:
+		product_index.add_many(product_sync.sync(session, 'AFD'))
+		time.sleep(300)
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Set, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from requests_cache import CachedSession
+from libnws.api.api_request import api_request
+from libnws.api.get_products import process_product_data, process_product_text_data
+from libnws.api import NWS_API_PRODUCT_TYPES, NWS_API_PRODUCTS
+from libnws.model.products import Product
+logger = logging.getLogger(__name__)
+
+
+class ProductSync:
+	"""Track the products already seen of each type from each office
+
+	:param max_workers: The most product texts to fetch at once. Requests are still
+		subject to the session's rate limiter.
+	:param overlap: How far before each watermark to read again, to catch products
+		that are added to a listing late
+	:param max_text_attempts: The most syncs to try to fetch a product's text in.
+		Products that the API doesn't have text for (404) aren't tried again.
+	"""
+
+	def __init__(
+		self,
+		max_workers: int = 8,
+		overlap: timedelta = timedelta(minutes=15),
+		max_text_attempts: int = 3
+	):
+		self.max_workers = max_workers
+		self.overlap = overlap
+		self.max_text_attempts = max_text_attempts
+		# The newest issuance time seen of each product type from each office, and the
+		# IDs of the products issued within `overlap` of it
+		self._watermarks: Dict[Tuple[str, str], datetime] = {}
+		self._seen_ids: Dict[Tuple[str, str], Dict[str, datetime]] = {}
+		# The product types and offices that each listing has had products from
+		self._listing_offices: Dict[Tuple[str, str], Set[Tuple[str, str]]] = {}
+		# Products in each listing whose text couldn't be fetched yet, with the number
+		# of syncs that have tried to fetch it
+		self._missing_text: Dict[Tuple[str, str], List[Tuple[Product, int]]] = {}
+
+	@staticmethod
+	def get_office_key(item: dict) -> Tuple[str, str]:
+		return item.get('productCode'), item.get('issuingOffice')
+
+	def is_new(self, item: dict, issued_at: datetime | None) -> bool:
+		"""Check whether a product hasn't been seen before"""
+		office_key = self.get_office_key(item)
+		watermark = self._watermarks.get(office_key)
+		if watermark is None or issued_at is None:
+			return True
+		if issued_at < watermark - self.overlap:
+			return False
+		return item.get('id') not in self._seen_ids.get(office_key, {})
+
+	def mark_seen(self, item: dict, issued_at: datetime):
+		"""Move the watermark of a product's type and office up to it, and forget the
+		products that are now too old to be read again
+		"""
+		office_key = self.get_office_key(item)
+		watermark = self._watermarks.get(office_key)
+		seen_ids = self._seen_ids.setdefault(office_key, {})
+		seen_ids[item.get('id')] = issued_at
+		if watermark is None or issued_at > watermark:
+			self._watermarks[office_key] = issued_at
+			oldest = issued_at - self.overlap
+			for product_id, seen_at in list(seen_ids.items()):
+				if seen_at < oldest:
+					del seen_ids[product_id]
+
+	def get_new_products(
+		self,
+		listing_data: dict,
+		retrieved_at: datetime,
+		listing_key: Tuple[str, str]
+	) -> List[Product]:
+		"""Process the products in a listing that haven't been seen before, and
+		remember them
+
+		:param listing_key: Identifies the listing, eg `(type_id, location_id)`
+		"""
+		# The listing is newest first, so it can be read up to the oldest watermark of
+		# the types and offices it has had products from
+		office_keys = self._listing_offices.setdefault(listing_key, set())
+		watermarks = [self._watermarks.get(office_key) for office_key in office_keys]
+		oldest = None
+		if watermarks and None not in watermarks:
+			oldest = min(watermarks) - self.overlap
+		new_items = []
+		for item in listing_data.get('@graph', []):
+			issued_at = item.get('issuanceTime')
+			issued_at = datetime.fromisoformat(issued_at) if issued_at else None
+			if oldest is not None and issued_at is not None and issued_at < oldest:
+				break
+			office_keys.add(self.get_office_key(item))
+			if self.is_new(item, issued_at):
+				new_items.append((item, issued_at))
+		for item, issued_at in new_items:
+			if issued_at is not None:
+				self.mark_seen(item, issued_at)
+		return process_product_data([item for item, _ in new_items], retrieved_at)
+
+	def get_texts(
+		self,
+		session: CachedSession,
+		products: List[Product]
+	) -> Tuple[List[Product], Set[str]]:
+		"""Fetch the text of each product concurrently
+
+		:return: The products whose text was fetched, and the IDs of the products the
+			API doesn't have (404). Other products whose text can't be fetched are left
+			out of both.
+		"""
+		def get_text(product: Product) -> Product | None:
+			product_data = api_request(session, NWS_API_PRODUCTS + product.product_id)
+			if product_data.get('status_code') == 404:
+				return None
+			if product_data.get('status_code') != 200:
+				raise ValueError(f'Got status code {product_data.get("status_code")}')
+			return process_product_text_data(product_data.get('response'),
+											 product_data.get('retrieved_at'))
+
+		products_with_text = []
+		not_found_ids = set()
+		with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+			futures = [(product, executor.submit(get_text, product))
+					   for product in products]
+			for product, future in futures:
+				try:
+					product_with_text = future.result()
+				except Exception as exc:
+					logger.warning(f'Failed to get text of product {product.product_id}: '
+								   f'{exc}')
+					continue
+				if product_with_text is None:
+					logger.warning(f'Product {product.product_id} not found')
+					not_found_ids.add(product.product_id)
+				else:
+					products_with_text.append(product_with_text)
+		return products_with_text, not_found_ids
+
+	def sync(
+		self,
+		session: CachedSession,
+		type_id: str,
+		location_id: str = None,
+		include_text: bool = True
+	) -> List[Product]:
+		"""Get the products of a type (and optionally from one location) that have been
+		issued since the last sync, newest first
+
+		:param include_text: Fetch the text of every new product. Products whose text
+			can't be fetched are left out, and returned by a later sync once it can be
+			(see `max_text_attempts`).
+		"""
+		url = NWS_API_PRODUCT_TYPES + f'/{type_id}'
+		if location_id:
+			url += f'/locations/{location_id}'
+		listing_key = (type_id, location_id)
+		listing_data = api_request(session, url)
+		new_products = self.get_new_products(listing_data.get('response'),
+											 listing_data.get('retrieved_at'),
+											 listing_key)
+		logger.info(f'Found {len(new_products)} new {type_id} products')
+		if not include_text:
+			return new_products
+		attempts = {product.product_id: 0 for product in new_products}
+		for product, product_attempts in self._missing_text.pop(listing_key, []):
+			new_products.append(product)
+			attempts[product.product_id] = product_attempts
+		if not new_products:
+			return []
+		products_with_text, not_found_ids = self.get_texts(session, new_products)
+		fetched_ids = {product.product_id for product in products_with_text}
+		missing_text = []
+		for product in new_products:
+			product_attempts = attempts[product.product_id] + 1
+			if product.product_id in fetched_ids or product.product_id in not_found_ids:
+				continue
+			if product_attempts >= self.max_text_attempts:
+				logger.warning(f'Giving up on the text of product {product.product_id} '
+							   f'after {product_attempts} attempts')
+				continue
+			missing_text.append((product, product_attempts))
+		if missing_text:
+			logger.info(f'Retrying the text of {len(missing_text)} {type_id} products '
+						f'on the next sync')
+			self._missing_text[listing_key] = missing_text
+		return sorted(products_with_text,
+					  key=lambda product: product.issued_at or datetime.min,
+					  reverse=True)
@@ -0,0 +1,157 @@
+"""Get the status of every radar station at once
+
+`get_radar_fleet_snapshot` gets the radar station listing, then fetches the details of
+every station concurrently in a thread pool (through the same rate-limited, cached
+`api_request` as everything else). Each station is processed lazily, so only the RDA
+data needed for the health table is parsed; a station's performance and adaptation
+data are only parsed if they're accessed.
+
+The result is a `RadarFleetSnapshot`: a table of key health fields with one column per
+field, plus the processed stations.
+
+For example, to list every radar with a latency over 5 minutes:
+
+.. code-block:: python
+
+	snapshot = get_radar_fleet_snapshot(session)
+	for row in snapshot.rows():
+		if row['latency_current_s'] > 300:
+			print(row['radar_station_id'], row['mode'], row['status'])
+"""
+
+import math
+import logging
+from array import array
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from requests_cache import CachedSession
+from libnws.api.api_request import api_request
+from libnws.api.get_radar import process_radar_station_data
+from libnws.api import NWS_API_RADAR_STATIONS
+from libnws.model.radar import RadarStation
+logger = logging.getLogger(__name__)
+
+
+# Columns stored as arrays of floats, with NaN for missing values
+RADAR_LATENCY_COLUMNS = (
+	'latency_current_s',
+	'latency_average_s',
+	'latency_max_s',
+)
+
+# Columns taken from each station's RDA data
+RADAR_RDA_COLUMNS = (
+	'mode',
+	'status',
+	'operability_status',
+	'control_status',
+	'generator_state',
+	'alarm_summary',
+)
+
+RADAR_HEALTH_COLUMNS = (
+	('radar_station_id', 'name', 'server_host', 'latency_nexrad_l2_last_received_at')
+	+ RADAR_LATENCY_COLUMNS
+	+ RADAR_RDA_COLUMNS
+)
+
+
+class RadarFleetSnapshot:
+	"""A table of health fields for every radar station, stored by column
+
+	:param retrieved_at: When the snapshot was taken (the time of its earliest response)
+	:param stations: The processed stations, by radar station ID
+	:param errors: The error for each station whose details couldn't be fetched
+	"""
+
+	def __init__(
+		self,
+		retrieved_at: datetime,
+		stations: Dict[str, RadarStation],
+		errors: Dict[str, str] = None
+	):
+		self.retrieved_at = retrieved_at
+		self.stations = stations
+		self.errors = errors or {}
+		self.columns: Dict[str, Sequence] = {}
+		for column in RADAR_HEALTH_COLUMNS:
+			self.columns[column] = (array('d') if column in RADAR_LATENCY_COLUMNS
+									else [])
+		for station in stations.values():
+			self._append(station)
+
+	def _append(self, station: RadarStation):
+		rda = station.radar_data_acquisition
+		for column in RADAR_HEALTH_COLUMNS:
+			if column in RADAR_LATENCY_COLUMNS:
+				value = getattr(station, column, None)
+				self.columns[column].append(math.nan if value is None else value)
+			elif column in RADAR_RDA_COLUMNS:
+				self.columns[column].append(getattr(rda, column) if rda else None)
+			else:
+				self.columns[column].append(getattr(station, column))
+
+	def __len__(self) -> int:
+		return len(self.columns['radar_station_id'])
+
+	def column(self, name: str) -> Sequence:
+		return self.columns[name]
+
+	def rows(self, columns: Iterable[str] = RADAR_HEALTH_COLUMNS) -> Iterator[dict]:
+		"""Iterate over the table as one dict per station"""
+		columns = list(columns)
+		for i in range(len(self)):
+			yield {column: self.columns[column][i] for column in columns}
+
+
+def _get_radar_station_details(
+	session: CachedSession,
+	radar_station_id: str
+) -> RadarStation:
+	radar_station_data = api_request(session, NWS_API_RADAR_STATIONS + radar_station_id)
+	return process_radar_station_data(radar_station_data.get('response'),
+									  radar_station_data.get('retrieved_at'),
+									  lazy=True)
+
+
+def get_radar_fleet_snapshot(
+	session: CachedSession,
+	radar_station_ids: List[str] = None,
+	max_workers: int = 16
+) -> RadarFleetSnapshot:
+	"""Fetch the details of every radar station concurrently
+
+	:param radar_station_ids: The stations to include (default: every station in the
+		radar station listing)
+	:param max_workers: The most station details to fetch at once. Requests are still
+		subject to the session's rate limiter.
+	"""
+	retrieved_ats = []
+	if radar_station_ids is None:
+		radar_stations_data = api_request(session, NWS_API_RADAR_STATIONS)
+		retrieved_ats.append(radar_stations_data.get('retrieved_at'))
+		features = radar_stations_data.get('response').get('features', [])
+		radar_station_ids = [feature.get('properties', {}).get('id')
+							 for feature in features]
+	stations = {}
+	errors = {}
+	with ThreadPoolExecutor(max_workers=max_workers) as executor:
+		futures = {
+			radar_station_id: executor.submit(_get_radar_station_details,
+											  session,
+											  radar_station_id)
+			for radar_station_id in radar_station_ids
+		}
+		for radar_station_id, future in futures.items():
+			try:
+				stations[radar_station_id] = future.result()
+			except Exception as exc:
+				logger.warning(f'Failed to get radar station {radar_station_id}: {exc}')
+				errors[radar_station_id] = str(exc)
+	logger.info(f'Got {len(stations)} of {len(radar_station_ids)} radar stations')
+	# Use the time of the responses, like every other `retrieved_at`, rather than the
+	# local clock
+	retrieved_ats.extend(station.retrieved_at for station in stations.values())
+	retrieved_at = min((t for t in retrieved_ats if t is not None), default=None)
+	return RadarFleetSnapshot(retrieved_at, stations, errors)
@@ -0,0 +1,275 @@
+"""Track radar latency over time and report changes in radar health
+
+Each poll of /radar/stations or /radar/servers is a standalone snapshot.
+`RadarLatencyTracker` keeps the latest latency samples of every radar station and
+server in a fixed-size ring buffer, with rolling statistics that are updated as each
+sample is added (O(1) per sample), so history never needs to be re-read from a
+repository. It returns `RadarHealthEvent`s only when something changes: a latency
+crosses its threshold (in either direction), or a station's mode or operability status
+changes, or a server goes up or down.
+
+For a server, the latency is how long before the poll its LDM (Local Data Manager)
+received its latest product.
+
+For example, to watch for radar problems every minute with a `PollScheduler`:
+
+.. code-block:: python
+
+	tracker = RadarLatencyTracker(latency_threshold_s=300, on_event=print)
+	scheduler.add_job(radar_stations_job(interval_s=60, sinks=[tracker.update_stations]))
+
+or to poll directly:
+
+.. code-block:: python
+
+	for event in tracker.poll(session):
+		print(event)
+"""
+
+import math
+import logging
+from array import array
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List
+import pytz
+from requests_cache import CachedSession
+from libnws.api.api_request import api_request
+from libnws.api.get_radar import process_radar_stations, process_radar_servers
+from libnws.api import NWS_API_RADAR_STATIONS, NWS_API_RADAR_SERVERS
+from libnws.model.radar import RadarHealthEvent, RadarServer, RadarStation
+logger = logging.getLogger(__name__)
+
+
+RADAR_SOURCE_STATION = 'station'
+RADAR_SOURCE_SERVER = 'server'
+
+RADAR_LATENCY_HIGH = 'latency_high'
+RADAR_LATENCY_RECOVERED = 'latency_recovered'
+RADAR_STATUS_CHANGED = 'status_changed'
+
+# The RDA fields of a station, and the fields of a server, that are reported when
+# they change
+RADAR_STATION_STATUS_FIELDS = ('mode', 'operability_status')
+RADAR_SERVER_STATUS_FIELDS = ('is_server_active', 'is_radar_network_up')
+
+
+def _to_local_time(timestamp: datetime) -> datetime:
+	"""Convert a timezone-aware time (eg a response's `retrieved_at`) to the naive
+	US/Eastern time that `parse_timestamp` returns, so they can be compared
+	"""
+	if timestamp.tzinfo is None:
+		return timestamp
+	return timestamp.astimezone(pytz.timezone('US/Eastern')).replace(tzinfo=None)
+
+
+class LatencySeries:
+	"""The latest latency samples of one station or server, in a ring buffer
+
+	The count, sum, and sum of squares of the samples in the buffer are updated as
+	samples are added and evicted, and the maximum is kept with a monotonic queue, so
+	every statistic is available in O(1).
+
+	:param capacity: The most samples to keep
+	"""
+
+	def __init__(self, capacity: int = 60):
+		self.capacity = capacity
+		self.sampled_at = array('d', bytes(8 * capacity))
+		self.latencies_s = array('d', bytes(8 * capacity))
+		self.n_samples = 0
+		self._sum = 0.0
+		self._sum_sq = 0.0
+		self._max = deque()	# (sample number, latency), decreasing by latency
+
+	def __len__(self) -> int:
+		return min(self.n_samples, self.capacity)
+
+	def append(self, latency_s: float, sampled_at: datetime):
+		i = self.n_samples % self.capacity
+		if self.n_samples >= self.capacity:
+			evicted = self.latencies_s[i]
+			self._sum -= evicted
+			self._sum_sq -= evicted * evicted
+		self.sampled_at[i] = sampled_at.timestamp()
+		self.latencies_s[i] = latency_s
+		self._sum += latency_s
+		self._sum_sq += latency_s * latency_s
+		while self._max and self._max[-1][1] <= latency_s:
+			self._max.pop()
+		self._max.append((self.n_samples, latency_s))
+		self.n_samples += 1
+		while self._max[0][0] <= self.n_samples - 1 - self.capacity:
+			self._max.popleft()
+
+	@property
+	def latest(self) -> float | None:
+		if not self.n_samples:
+			return None
+		return self.latencies_s[(self.n_samples - 1) % self.capacity]
+
+	@property
+	def mean(self) -> float | None:
+		return self._sum / len(self) if self.n_samples else None
+
+	@property
+	def std(self) -> float | None:
+		if not self.n_samples:
+			return None
+		mean = self._sum / len(self)
+		return math.sqrt(max(self._sum_sq / len(self) - mean * mean, 0))
+
+	@property
+	def max(self) -> float | None:
+		return self._max[0][1] if self._max else None
+
+	def values(self) -> List[float]:
+		"""The samples in the buffer, oldest first"""
+		if self.n_samples <= self.capacity:
+			return self.latencies_s[:self.n_samples].tolist()
+		i = self.n_samples % self.capacity
+		return (self.latencies_s[i:] + self.latencies_s[:i]).tolist()
+
+	def stats(self) -> dict:
+		return {
+			'samples':		len(self),
+			'latest_s':		self.latest,
+			'mean_s':		self.mean,
+			'std_s':		self.std,
+			'max_s':		self.max,
+		}
+
+
+class RadarLatencyTracker:
+	"""Track the latency and status of radar stations and servers between polls
+
+	:param latency_threshold_s: Report when a station's current latency goes above or
+		comes back below this
+	:param server_latency_threshold_s: Report when a server's LDM goes this long
+		without a new product, or recovers
+	:param window: The number of samples kept for each station and server
+	:param on_event: Called with each event as it happens, in addition to the events
+		being returned
+	"""
+
+	def __init__(
+		self,
+		latency_threshold_s: float = 300,
+		server_latency_threshold_s: float = 300,
+		window: int = 60,
+		on_event: Callable[[RadarHealthEvent], Any] = None
+	):
+		self.latency_threshold_s = latency_threshold_s
+		self.server_latency_threshold_s = server_latency_threshold_s
+		self.window = window
+		self.on_event = on_event
+		self.series: Dict[tuple, LatencySeries] = {}
+		self._statuses: Dict[tuple, dict] = {}
+
+	def get_series(self, source_id: str, source_type: str = RADAR_SOURCE_STATION):
+		return self.series.get((source_type, source_id))
+
+	def stats(self, source_type: str = RADAR_SOURCE_STATION) -> Dict[str, dict]:
+		"""The rolling latency statistics of every station (or server), by ID"""
+		return {source_id: series.stats()
+				for (series_type, source_id), series in self.series.items()
+				if series_type == source_type}
+
+	def _add_sample(
+		self,
+		source_id: str,
+		source_type: str,
+		latency_s: float | None,
+		threshold_s: float,
+		statuses: dict,
+		retrieved_at: datetime
+	) -> List[RadarHealthEvent]:
+		key = (source_type, source_id)
+		events = []
+
+		def event(event_type: str, field: str, previous_value, value):
+			logger.info(f'Radar {source_type} {source_id}: {event_type} '
+						f'({field}: {previous_value} -> {value})')
+			health_event = RadarHealthEvent(retrieved_at=retrieved_at,
+											source_id=source_id,
+											source_type=source_type,
+											event_type=event_type,
+											field=field,
+											previous_value=previous_value,
+											value=value)
+			events.append(health_event)
+			if self.on_event is not None:
+				self.on_event(health_event)
+
+		if latency_s is not None and not math.isnan(latency_s):
+			series = self.series.get(key)
+			if series is None:
+				series = self.series[key] = LatencySeries(self.window)
+			previous_latency_s = series.latest
+			series.append(latency_s, retrieved_at)
+			if previous_latency_s is not None:
+				if previous_latency_s <= threshold_s < latency_s:
+					event(RADAR_LATENCY_HIGH, 'latency_s', previous_latency_s, latency_s)
+				elif latency_s <= threshold_s < previous_latency_s:
+					event(RADAR_LATENCY_RECOVERED, 'latency_s', previous_latency_s,
+						  latency_s)
+			elif latency_s > threshold_s:
+				event(RADAR_LATENCY_HIGH, 'latency_s', None, latency_s)
+
+		previous_statuses = self._statuses.get(key)
+		self._statuses[key] = statuses
+		if previous_statuses is not None:
+			for field, value in statuses.items():
+				if value != previous_statuses.get(field):
+					event(RADAR_STATUS_CHANGED, field, previous_statuses.get(field), value)
+		return events
+
+	def add_station(self, station: RadarStation) -> List[RadarHealthEvent]:
+		rda = station.radar_data_acquisition
+		statuses = {field: getattr(rda, field) if rda else None
+					for field in RADAR_STATION_STATUS_FIELDS}
+		return self._add_sample(station.radar_station_id,
+								RADAR_SOURCE_STATION,
+								station.latency_current_s,
+								self.latency_threshold_s,
+								statuses,
+								station.retrieved_at)
+
+	def add_server(self, server: RadarServer) -> List[RadarHealthEvent]:
+		latency_s = None
+		if server.retrieved_at and server.ldm_latest_product_at:
+			retrieved_at = _to_local_time(server.retrieved_at)
+			latency_s = (retrieved_at - server.ldm_latest_product_at).total_seconds()
+		statuses = {field: getattr(server, field) for field in RADAR_SERVER_STATUS_FIELDS}
+		return self._add_sample(server.host,
+								RADAR_SOURCE_SERVER,
+								latency_s,
+								self.server_latency_threshold_s,
+								statuses,
+								server.retrieved_at)
+
+	def update_stations(self, stations: Iterable[RadarStation]) -> List[RadarHealthEvent]:
+		"""Add a sample for every station. Can be used as a `PollJob` sink."""
+		events = []
+		for station in stations:
+			events.extend(self.add_station(station))
+		return events
+
+	def update_servers(self, servers: Iterable[RadarServer]) -> List[RadarHealthEvent]:
+		"""Add a sample for every server. Can be used as a `PollJob` sink."""
+		events = []
+		for server in servers:
+			events.extend(self.add_server(server))
+		return events
+
+	def poll(self, session: CachedSession) -> List[RadarHealthEvent]:
+		"""Get the radar stations and servers, and add a sample for each"""
+		radar_stations_data = api_request(session, NWS_API_RADAR_STATIONS)
+		stations = process_radar_stations(radar_stations_data.get('response'),
+										  radar_stations_data.get('retrieved_at'))
+		radar_servers_data = api_request(session, NWS_API_RADAR_SERVERS)
+		servers = process_radar_servers(radar_servers_data.get('response'),
+										radar_servers_data.get('retrieved_at'),
+										RADAR_SERVER_STATUS_FIELDS
+										+ ('ldm_latest_product_at',))
+		return self.update_stations(stations) + self.update_servers(servers)
@@ -0,0 +1,217 @@
+"""Continuously poll NWS API endpoints on a schedule
+
+`PollScheduler` runs any number of recurring `PollJob`s on a single asyncio event loop.
+Jobs that poll the same URL are coalesced so that the URL is only requested once per
+interval, and every job polling it gets the response. Requests are made through the
+regular (blocking) `api_request`, and responses are processed, in worker threads, so a
+single process can watch thousands of feeds without dedicating a thread to each one. A
+feed that fails (including after a 429/5xx response) backs off exponentially before it's
+polled again.
+
+For example, to print the latest observations from two stations every 5 minutes and
+record every change to the active alerts in Florida:
+
+.. code-block:: python
+
+	save_alerts = repository_sink(repository)
+	scheduler = PollScheduler(session)
+	scheduler.add_job(latest_observations_job('KBOS', sinks=[print]))
+	scheduler.add_job(latest_observations_job('KJFK', sinks=[print]))
+	scheduler.add_job(active_alerts_job(
+		'FL',
+		synchronizer=AlertSynchronizer(),
+		sinks=[lambda changes: save_alerts([change.alert for change in changes])]))
+	asyncio.run(scheduler.run())
+"""
+
+import asyncio
+import inspect
+import logging
+import random
+from functools import partial
+from typing import Any, Callable, Dict, List
+from dataclasses import dataclass, field
+from datetime import datetime
+from requests_cache import CachedSession
+from libnws.api.api_request import api_request
+from libnws.api.get_alerts import process_alert_data
+from libnws.api.get_aviation import process_sigmets
+from libnws.api.get_radar import process_radar_stations
+from libnws.api.get_weather import process_observations_data
+from libnws.api import (
+	NWS_API_ALERTS_AREA,
+	NWS_API_AVIATION_SIGMETS,
+	NWS_API_RADAR_STATIONS,
+	NWS_API_STATIONS,
+)
+from libnws.repository.base import BaseRepository
+from libnws.service.alert_sync import AlertSynchronizer
+logger = logging.getLogger(__name__)
+
+
+@dataclass(kw_only=True)
+class PollJob:
+	"""A recurring request to an API endpoint
+
+	:param name: A name for the job, used in log messages
+	:param url: The URL to poll
+	:param process: A function that transforms the response into dataclasses. It's
+		called with the response and the time it was retrieved, like the `process_*`
+		functions in `libnws.api`.
+	:param interval_s: How often to poll the URL, in seconds
+	:param jitter_s: Up to this many seconds are randomly added to or subtracted from
+		each interval, so that jobs with the same interval don't all poll at once
+	:param sinks: Functions (or coroutine functions) that are called with the processed
+		response every time the URL is polled
+	"""
+	name: str
+	url: str
+	process: Callable[[dict, datetime], Any]
+	interval_s: float = 300
+	jitter_s: float = 15
+	sinks: List[Callable[[Any], Any]] = field(default_factory=list)
+
+
+def repository_sink(repository: BaseRepository, *create_args) -> Callable[[Any], None]:
+	"""Create a sink that saves every processed item to a repository
+
+	:param repository: The repository to save items to
+	:param create_args: Any arguments that the repository's `create` method expects
+		before the item (eg the table name for a `SQLiteRepository`)
+	"""
+	def sink(result: Any):
+		items = result if isinstance(result, list) else [result]
+		for item in items:
+			repository.create(*create_args, item)
+	return sink
+
+
+def latest_observations_job(station_id: str, **kwargs) -> PollJob:
+	"""Poll the latest observations from a station"""
+	def process(response: dict, retrieved_at: datetime):
+		return process_observations_data(response, retrieved_at, station_id)
+	return PollJob(name=f'latest observations ({station_id})',
+				   url=NWS_API_STATIONS + station_id + '/observations/latest',
+				   process=process,
+				   **kwargs)
+
+
+def active_alerts_job(
+	area: str,
+	synchronizer: AlertSynchronizer = None,
+	**kwargs
+) -> PollJob:
+	"""Poll the active alerts for an area
+
+	If a synchronizer is given, sinks receive the `AlertChange`s since the previous poll
+	instead of every active alert.
+	"""
+	return PollJob(name=f'active alerts ({area})',
+				   url=NWS_API_ALERTS_AREA + area,
+				   process=synchronizer.sync if synchronizer else process_alert_data,
+				   **kwargs)
+
+
+def sigmets_job(atsu: str = None, **kwargs) -> PollJob:
+	"""Poll all SIGMETs, or only the SIGMETs issued by an ATSU"""
+	return PollJob(name=f'SIGMETs ({atsu or "all"})',
+				   url=NWS_API_AVIATION_SIGMETS + (atsu or ''),
+				   process=process_sigmets,
+				   **kwargs)
+
+
+def radar_stations_job(**kwargs) -> PollJob:
+	"""Poll the status of all radar stations"""
+	return PollJob(name='radar stations',
+				   url=NWS_API_RADAR_STATIONS,
+				   process=process_radar_stations,
+				   **kwargs)
+
+
+class PollScheduler:
+	"""Run recurring `PollJob`s on an asyncio event loop
+
+	:param session: The session to make requests with
+	:param max_concurrent_requests: The most requests that can be in flight at once
+	:param backoff_base_s: The delay before polling a feed again after it fails once.
+		The delay doubles with each consecutive failure.
+	:param backoff_max_s: The longest delay before polling a failing feed again
+	"""
+
+	def __init__(
+		self,
+		session: CachedSession,
+		max_concurrent_requests: int = 8,
+		backoff_base_s: float = 30,
+		backoff_max_s: float = 900
+	):
+		self.session = session
+		self.max_concurrent_requests = max_concurrent_requests
+		self.backoff_base_s = backoff_base_s
+		self.backoff_max_s = backoff_max_s
+		self._feeds: Dict[str, List[PollJob]] = {}
+		self._stopping = None
+
+	@property
+	def jobs(self) -> List[PollJob]:
+		return [job for jobs in self._feeds.values() for job in jobs]
+
+	def add_job(self, job: PollJob):
+		"""Add a job to the schedule. Jobs can't be added once the scheduler is running."""
+		self._feeds.setdefault(job.url, []).append(job)
+
+	def stop(self):
+		"""Stop polling. Requests already in flight are allowed to finish."""
+		if self._stopping is not None:
+			self._stopping.set()
+
+	def _get_delay(self, jobs: List[PollJob], failures: int) -> float:
+		if failures:
+			delay = min(self.backoff_max_s, self.backoff_base_s * 2 ** (failures - 1))
+			return delay * random.uniform(0.5, 1)
+		interval_s = min(job.interval_s for job in jobs)
+		jitter_s = min(job.jitter_s for job in jobs)
+		return max(0, interval_s + random.uniform(-jitter_s, jitter_s))
+
+	async def _deliver(self, job: PollJob, response: dict, retrieved_at: datetime):
+		# Parsing a large response (eg every active alert) takes long enough to hold up
+		# every other feed, so it runs in a worker thread like the request does
+		result = await asyncio.to_thread(job.process, response, retrieved_at)
+		for sink in job.sinks:
+			sink_return_value = sink(result)
+			if inspect.isawaitable(sink_return_value):
+				await sink_return_value
+
+	async def _poll(self, url: str, jobs: List[PollJob], semaphore: asyncio.Semaphore):
+		failures = 0
+		delay = random.uniform(0, min(job.jitter_s for job in jobs))
+		while True:
+			try:
+				await asyncio.wait_for(self._stopping.wait(), timeout=delay)
+				return
+			except asyncio.TimeoutError:
+				pass
+			try:
+				async with semaphore:
+					data = await asyncio.to_thread(partial(api_request, self.session, url))
+				failures = 0
+			except Exception as exc:
+				failures += 1
+				delay = self._get_delay(jobs, failures)
+				logger.warning(f'Failed to poll {url} ({failures} in a row), retrying '
+							   f'in {delay:.0f}s: {exc}')
+				continue
+			for job in jobs:
+				try:
+					await self._deliver(job, data.get('response'), data.get('retrieved_at'))
+				except Exception:
+					logger.exception(f'Job "{job.name}" failed to process {url}')
+			delay = self._get_delay(jobs, failures)
+
+	async def run(self):
+		"""Poll every job until `stop` is called"""
+		self._stopping = asyncio.Event()
+		semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+		logger.info(f'Polling {len(self._feeds)} URLs for {len(self.jobs)} jobs')
+		await asyncio.gather(*(self._poll(url, jobs, semaphore)
+							   for url, jobs in self._feeds.items()))
@@ -0,0 +1,259 @@
+"""Group alerts into VTEC events, and track each event's state as alerts arrive
+
+Every alert for a warning, watch, or advisory carries one or more VTEC (Valid Time
+Event Code) strings that identify an event by its office, phenomenon, significance,
+and event tracking number (ETN), and what the alert does to it (eg NEW, CON, EXT, CAN).
+`VTECEventTracker` parses each alert's VTEC once, files the alert under its events, and
+keeps each event's current state and timeline up to date, so questions like "which
+tornado warnings are active, and what's their history" are answered from the index.
+
+An event can be cancelled or expire in some of its zones and counties while it goes on
+in the others, so its state is also kept for each UGC code, and the event is active as
+long as it's active in any of them.
+
+For example, to track events as they're synced:
+
+.. code-block:: python
+
+	synchronizer = AlertSynchronizer()
+	event_tracker = VTECEventTracker()
+	event_tracker.add_changes(synchronizer.poll(session, NWS_API_ALERTS_AREA + 'KS'))
+	for event in event_tracker.get_active_events(phenomenon='TO', significance='W'):
+		print(event.event_id, [update.action for update in event.timeline])
+
+See: https://www.weather.gov/vtec/
+"""
+
+import bisect
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, Set, Tuple
+import pytz
+from libnws.api.product_text import parse_vtec
+from libnws.model.alerts import (
+	Alert,
+	AlertChange,
+	VTECEvent,
+	VTECEventUpdate,
+	VTECEventZone,
+)
+from libnws.model.products import VTECCode
+from libnws.service.alert_sync import ALERT_EXPIRED
+logger = logging.getLogger(__name__)
+
+
+# Only operational VTEC is tracked, not test, experimental, or exercise codes
+VTEC_OPERATIONAL = 'O'
+
+# Actions that end an event
+VTEC_ENDING_ACTIONS = ('CAN', 'EXP', 'UPG')
+
+
+def get_vtec_event_id(vtec: VTECCode, year: int) -> str:
+	"""Get the ID of a VTEC event (eg `KBOX.TO.W.0012.2024`)
+
+	Event tracking numbers restart every year, so the year is part of the ID.
+	"""
+	return (f'{vtec.office}.{vtec.phenomenon}.{vtec.significance}.'
+			f'{vtec.event_number:04d}.{year}')
+
+
+def is_vtec_active(action: str, ends_at: datetime | None, now: datetime) -> bool:
+	return action not in VTEC_ENDING_ACTIONS and (ends_at is None or ends_at > now)
+
+
+class VTECEventTracker:
+	"""An index of VTEC events, by event ID and by phenomenon and significance"""
+
+	def __init__(self):
+		self.events: Dict[str, VTECEvent] = {}
+		self._events_by_type: Dict[Tuple[str, str], Set[str]] = {}
+		# The ID and revision (time sent and updated) of every alert added
+		self._alert_keys: Set[Tuple[str, datetime, datetime]] = set()
+
+	def __len__(self) -> int:
+		return len(self.events)
+
+	def _get_event_year(self, vtec: VTECCode, alert: Alert) -> int:
+		event_time = vtec.begins_at or alert.sent_at or alert.updated_at
+		year = event_time.year if event_time else datetime.now().year
+		# An event that started late in one year may be continued early in the next
+		if vtec.action != 'NEW' and get_vtec_event_id(vtec, year) not in self.events:
+			if get_vtec_event_id(vtec, year - 1) in self.events:
+				return year - 1
+		return year
+
+	def add_alert(self, alert: Alert) -> List[VTECEvent]:
+		"""File an alert under each of its VTEC events
+
+		:returns: The events that the alert changed. Alerts that were already added are
+			ignored, but a new revision of an alert (with the same ID) is added.
+		"""
+		sent_at = alert.sent_at or alert.updated_at
+		alert_key = (alert.alert_id, sent_at, alert.updated_at)
+		if alert_key in self._alert_keys:
+			return []
+		self._alert_keys.add(alert_key)
+		changed_events = []
+		for vtec_string in alert.cap_vtec or ():
+			vtec = parse_vtec(vtec_string)
+			if vtec is None or vtec.product_class != VTEC_OPERATIONAL:
+				continue
+			year = self._get_event_year(vtec, alert)
+			event_id = get_vtec_event_id(vtec, year)
+			update = VTECEventUpdate(alert_id=alert.alert_id,
+									 sent_at=sent_at,
+									 updated_at=alert.updated_at,
+									 action=vtec.action,
+									 begins_at=vtec.begins_at,
+									 ends_at=vtec.ends_at,
+									 areas_ugc=alert.areas_ugc)
+			event = self.events.get(event_id)
+			if event is None:
+				event = VTECEvent(event_id=event_id,
+								  office=vtec.office,
+								  phenomenon=vtec.phenomenon,
+								  significance=vtec.significance,
+								  event_number=vtec.event_number,
+								  year=year,
+								  action=None,
+								  begins_at=None,
+								  ends_at=None,
+								  updated_at=None,
+								  areas_ugc={},
+								  timeline=[])
+				self.events[event_id] = event
+				event_type = (vtec.phenomenon, vtec.significance)
+				self._events_by_type.setdefault(event_type, set()).add(event_id)
+			self._add_update(event, update)
+			changed_events.append(event)
+		return changed_events
+
+	def _add_update(self, event: VTECEvent, update: VTECEventUpdate):
+		"""Insert an update into the event's timeline by time sent, and update the
+		event's state, and its state in each of the update's zones, if the update is the
+		latest one
+		"""
+		if update.sent_at is None:
+			position = len(event.timeline)
+		else:
+			sent_times = [existing.sent_at or datetime.min for existing in event.timeline]
+			position = bisect.bisect_right(sent_times, update.sent_at)
+		event.timeline.insert(position, update)
+		if update.begins_at and (event.begins_at is None
+								 or update.action == 'NEW'
+								 or update.begins_at < event.begins_at):
+			event.begins_at = update.begins_at
+		if position == len(event.timeline) - 1:
+			event.action = update.action
+			event.updated_at = update.sent_at
+			if update.ends_at is not None:
+				event.ends_at = update.ends_at
+		for ugc_code in update.areas_ugc or ():
+			zone = event.areas_ugc.get(ugc_code)
+			if zone is None:
+				zone = VTECEventZone(ugc_code=ugc_code,
+									 action=update.action,
+									 ends_at=update.ends_at,
+									 updated_at=update.sent_at)
+				event.areas_ugc[ugc_code] = zone
+			elif (zone.updated_at is None or update.sent_at is None
+				  or update.sent_at >= zone.updated_at):
+				zone.action = update.action
+				zone.updated_at = update.sent_at
+				if update.ends_at is not None:
+					zone.ends_at = update.ends_at
+		# The event lasts until it ends in every zone
+		zone_ends_at = [zone.ends_at for zone in event.areas_ugc.values()
+						if zone.ends_at is not None]
+		if zone_ends_at:
+			event.ends_at = max(zone_ends_at)
+
+	def add_alerts(self, alerts: Iterable[Alert]) -> List[VTECEvent]:
+		changed_events = {}
+		for alert in alerts:
+			for event in self.add_alert(alert):
+				changed_events[event.event_id] = event
+		return list(changed_events.values())
+
+	def add_changes(self, changes: Iterable[AlertChange]) -> List[VTECEvent]:
+		"""Add the new and updated alerts from `AlertSynchronizer.sync`. Can be used as
+		a `PollJob` sink.
+		"""
+		return self.add_alerts(change.alert for change in changes
+							   if change.change_type != ALERT_EXPIRED)
+
+	def is_active(self, event: VTECEvent, now: datetime = None) -> bool:
+		"""Check whether an event hasn't been cancelled or expired in all of its zones
+
+		:param now: The time to check against (default: now, in the same timezone as
+			`libnws.api.api_request.parse_timestamp`)
+		"""
+		if now is None:
+			now = datetime.now(pytz.timezone('US/Eastern')).replace(tzinfo=None)
+		if event.areas_ugc:
+			return any(is_vtec_active(zone.action, zone.ends_at, now)
+					   for zone in event.areas_ugc.values())
+		return is_vtec_active(event.action, event.ends_at, now)
+
+	def get_active_zones(self, event: VTECEvent, now: datetime = None) -> List[str]:
+		"""Get the UGC codes of the zones and counties that an event is active in"""
+		if now is None:
+			now = datetime.now(pytz.timezone('US/Eastern')).replace(tzinfo=None)
+		return [ugc_code for ugc_code, zone in event.areas_ugc.items()
+				if is_vtec_active(zone.action, zone.ends_at, now)]
+
+	def get_events(
+		self,
+		phenomenon: str = None,
+		significance: str = None,
+		office: str = None
+	) -> List[VTECEvent]:
+		"""Get every known event with the given phenomenon, significance, and office
+
+		:param phenomenon: A VTEC phenomenon code (eg `TO` for tornado)
+		:param significance: A VTEC significance code (eg `W` for warning)
+		"""
+		if phenomenon is not None and significance is not None:
+			event_ids = self._events_by_type.get((phenomenon, significance), ())
+		else:
+			event_ids = [event_id
+						 for (event_phenomenon, event_significance), type_event_ids
+						 in self._events_by_type.items()
+						 if phenomenon in (None, event_phenomenon)
+						 and significance in (None, event_significance)
+						 for event_id in type_event_ids]
+		events = [self.events[event_id] for event_id in event_ids]
+		if office is not None:
+			events = [event for event in events if event.office == office]
+		return events
+
+	def get_active_events(
+		self,
+		phenomenon: str = None,
+		significance: str = None,
+		office: str = None,
+		now: datetime = None
+	) -> List[VTECEvent]:
+		"""Get every active event with the given phenomenon, significance, and office"""
+		if now is None:
+			now = datetime.now(pytz.timezone('US/Eastern')).replace(tzinfo=None)
+		return [event for event in self.get_events(phenomenon, significance, office)
+				if self.is_active(event, now)]
+
+	def prune(self, before: datetime) -> int:
+		"""Forget events that ended before the given time
+
+		:returns: The number of events removed
+		"""
+		pruned = 0
+		for event_id, event in list(self.events.items()):
+			if event.ends_at is not None and event.ends_at < before:
+				del self.events[event_id]
+				event_type = (event.phenomenon, event.significance)
+				self._events_by_type[event_type].discard(event_id)
+				for update in event.timeline:
+					self._alert_keys.discard((update.alert_id, update.sent_at,
+											  update.updated_at))
+				pruned += 1
+		return pruned
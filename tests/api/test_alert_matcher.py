@@ -0,0 +1,119 @@
+import json
+import random
+from pathlib import Path
+from types import SimpleNamespace
+import pytest
+from libnws.index.alert_matcher import AlertMatcher, normalize_same_code
+from libnws.index.geometry import point_in_polygon
+from libnws.index.zone_index import ZoneIndex
+from libnws.model.geometry import PackedGeometry
+
+
+TEST_DATA = Path(__file__).parent.parent / 'test_data' / 'api_responses'
+
+
+def make_alert(alert_id: str, areas_ugc=(), areas_same=(), coordinates=None):
+	return SimpleNamespace(alert_id=alert_id,
+						   areas_ugc=areas_ugc,
+						   areas_same=areas_same,
+						   area_polygon=(PackedGeometry.from_coordinates(coordinates)
+										 if coordinates else None))
+
+
+def load_polygon_alerts() -> list:
+	with open(TEST_DATA / 'nws_raw_sigmets.json') as file:
+		sigmets = json.load(file)
+	alerts = []
+	for i, sigmet in enumerate(sigmets[:200]):
+		if sigmet.get('area_polygon'):
+			# The fixtures store the areas as latitude, longitude pairs
+			rings = [[[lon, lat] for lat, lon in ring] for ring in sigmet['area_polygon']]
+			alerts.append(make_alert(f'alert-{i}', ['MAZ005'], coordinates=rings))
+	return alerts
+
+
+def get_sites(count: int = 2000) -> list:
+	sites_random = random.Random(20240815)
+	return [(f'site-{i}', sites_random.uniform(20, 55), sites_random.uniform(-130, -60))
+			for i in range(count)]
+
+
+def test_normalize_same_code():
+	assert normalize_same_code('025025') == '25025'
+	assert normalize_same_code('325025') == '25025'
+
+
+def test_match_codes():
+	matcher = AlertMatcher()
+	matcher.add_site('boston', 42.36, -71.06, zones_ugc=['MAZ015', 'MAC025'],
+					 areas_same=['025025'])
+	matcher.add_site('providence', 41.82, -71.41, zones_ugc=['RIZ002'],
+					 areas_same=['044007'])
+	assert matcher.match(make_alert('a1', areas_ugc=['MAZ015', 'MAZ016'])) == {'boston'}
+	assert matcher.match(make_alert('a2', areas_ugc=['MAC025'])) == {'boston'}
+	# An alert for part of a county still matches sites in the county
+	assert matcher.match(make_alert('a3', areas_same=['844007'])) == {'providence'}
+	assert matcher.match(make_alert('a4', areas_ugc=['RIZ002'],
+									areas_same=['025025'])) == {'boston', 'providence'}
+	assert matcher.match(make_alert('a5', areas_ugc=['NYZ072'])) == set()
+	assert matcher.match(make_alert('a6', areas_ugc=None, areas_same=None)) == set()
+
+
+def test_polygon_replaces_codes():
+	matcher = AlertMatcher()
+	matcher.add_site('inside', 42.5, -71.5, zones_ugc=['MAZ005'])
+	matcher.add_site('outside', 44.5, -71.5, zones_ugc=['MAZ005'])
+	alert = make_alert('a1', areas_ugc=['MAZ005'],
+					   coordinates=[[[-72, 42], [-71, 42], [-71, 43], [-72, 43], [-72, 42]]])
+	assert matcher.match(alert) == {'inside'}
+
+
+@pytest.mark.parametrize('cell_size', [0.1, 0.25, 2])
+def test_match_polygon_matches_brute_force(cell_size):
+	sites = get_sites()
+	matcher = AlertMatcher(cell_size)
+	for site_id, lat, lon in sites:
+		matcher.add_site(site_id, lat, lon)
+	alerts = load_polygon_alerts()
+	matched = 0
+	for alert in alerts:
+		polygons = alert.area_polygon.get_rings()
+		expected = {site_id for site_id, lat, lon in sites
+					if any(point_in_polygon(lon, lat, rings) for rings in polygons)}
+		assert matcher.match(alert) == expected, alert.alert_id
+		matched += len(expected)
+	assert matched > 100
+
+
+def test_remove_and_move_site():
+	matcher = AlertMatcher()
+	matcher.add_site('site', 42.5, -71.5, zones_ugc=['MAZ005'], areas_same=['025017'])
+	polygon = [[[-72, 42], [-71, 42], [-71, 43], [-72, 43], [-72, 42]]]
+	# Adding a site again replaces it
+	matcher.add_site('site', 40.7, -74.0, zones_ugc=['NYZ072'])
+	assert len(matcher) == 1
+	assert matcher.match(make_alert('a1', areas_ugc=['MAZ005'])) == set()
+	assert matcher.match(make_alert('a2', areas_same=['025017'])) == set()
+	assert matcher.match(make_alert('a3', coordinates=polygon)) == set()
+	assert matcher.match(make_alert('a4', areas_ugc=['NYZ072'])) == {'site'}
+	assert matcher.remove_site('site')
+	assert not matcher.remove_site('site')
+	assert matcher.match(make_alert('a4', areas_ugc=['NYZ072'])) == set()
+
+
+def test_add_site_with_zone_index():
+	zone = SimpleNamespace(zone_id='MAZ005',
+						   multi_polygon=PackedGeometry.from_coordinates(
+							   [[[-72, 42], [-71, 42], [-71, 43], [-72, 43], [-72, 42]]]))
+	zone_index = ZoneIndex.from_zones([zone])
+	matcher = AlertMatcher()
+	site = matcher.add_site('site', 42.5, -71.5, zones_ugc=['MAC017'], zone_index=zone_index)
+	assert site.zones_ugc == ['MAC017', 'MAZ005']
+	assert matcher.match(make_alert('a1', areas_ugc=['MAZ005'])) == {'site'}
+
+
+def test_match_many():
+	matcher = AlertMatcher()
+	matcher.add_site('boston', 42.36, -71.06, zones_ugc=['MAZ015'])
+	alerts = [make_alert('a1', areas_ugc=['MAZ015']), make_alert('a2', areas_ugc=['RIZ002'])]
+	assert matcher.match_many(alerts) == {'a1': {'boston'}}
@@ -0,0 +1,102 @@
+from datetime import datetime
+from libnws.service.alert_sync import (
+	ALERT_ADDED,
+	ALERT_EXPIRED,
+	ALERT_UPDATED,
+	AlertSynchronizer,
+)
+
+
+RETRIEVED_AT = datetime(2024, 8, 15, 12, 0)
+
+
+def make_feature(alert_id: str, sent: str, references: list = (), **properties) -> dict:
+	return {
+		'id':		f'https://api.weather.gov/alerts/{alert_id}',
+		'updated':	properties.pop('updated', None),
+		'properties': {
+			'id':			alert_id,
+			'sent':			sent,
+			'event':		'Heat Advisory',
+			'geocode':		{'UGC': ['MAZ005'], 'SAME': ['025005']},
+			'parameters':	{},
+			'references':	[{'identifier': reference,
+							  '@id': f'https://api.weather.gov/alerts/{reference}',
+							  'sent': '2024-08-15T08:00:00-04:00'}
+							 for reference in references],
+			**properties,
+		},
+	}
+
+
+def make_alerts(*features: dict) -> dict:
+	return {'features': list(features)}
+
+
+def get_changes(changes: list) -> list:
+	return [(change.change_type, change.alert.alert_id,
+			 change.previous_alert.alert_id if change.previous_alert else None)
+			for change in changes]
+
+
+def test_added_and_unchanged():
+	synchronizer = AlertSynchronizer()
+	alerts = make_alerts(make_feature('a1', '2024-08-15T08:00:00-04:00'),
+						 make_feature('a2', '2024-08-15T08:05:00-04:00'))
+	changes = synchronizer.sync(alerts, RETRIEVED_AT)
+	assert get_changes(changes) == [(ALERT_ADDED, 'a1', None), (ALERT_ADDED, 'a2', None)]
+	assert changes[0].alert.areas_ugc == ['MAZ005']
+	assert synchronizer.sync(alerts, RETRIEVED_AT) == []
+	assert sorted(alert.alert_id for alert in synchronizer.alerts) == ['a1', 'a2']
+
+
+def test_new_revision_is_an_update():
+	synchronizer = AlertSynchronizer()
+	synchronizer.sync(make_alerts(make_feature('a1', '2024-08-15T08:00:00-04:00')),
+					  RETRIEVED_AT)
+	# The sent time identifies the revision when there's no update time
+	updated = make_feature('a1', '2024-08-15T08:00:00-04:00',
+						   updated='2024-08-15T09:00:00-04:00',
+						   headline='Heat Advisory extended')
+	changes = synchronizer.sync(make_alerts(updated), RETRIEVED_AT)
+	assert get_changes(changes) == [(ALERT_UPDATED, 'a1', 'a1')]
+	assert changes[0].alert.headline == 'Heat Advisory extended'
+	assert changes[0].previous_alert.headline is None
+	assert synchronizer.sync(make_alerts(updated), RETRIEVED_AT) == []
+
+
+def test_supersession_by_prior_alerts():
+	synchronizer = AlertSynchronizer()
+	synchronizer.sync(make_alerts(make_feature('a1', '2024-08-15T08:00:00-04:00'),
+								  make_feature('a2', '2024-08-15T08:00:00-04:00')),
+					  RETRIEVED_AT)
+	# a3 replaces a1, which is no longer listed but isn't reported as expired
+	alerts = make_alerts(make_feature('a3', '2024-08-15T09:00:00-04:00', ['a1']),
+						 make_feature('a2', '2024-08-15T08:00:00-04:00'))
+	changes = synchronizer.sync(alerts, RETRIEVED_AT)
+	assert get_changes(changes) == [(ALERT_UPDATED, 'a3', 'a1')]
+	assert sorted(alert.alert_id for alert in synchronizer.alerts) == ['a2', 'a3']
+
+
+def test_reference_to_unknown_alert_is_added():
+	synchronizer = AlertSynchronizer()
+	alerts = make_alerts(make_feature('a3', '2024-08-15T09:00:00-04:00', ['a1']))
+	assert get_changes(synchronizer.sync(alerts, RETRIEVED_AT)) == [
+		(ALERT_ADDED, 'a3', None)]
+
+
+def test_expired():
+	synchronizer = AlertSynchronizer()
+	synchronizer.sync(make_alerts(make_feature('a1', '2024-08-15T08:00:00-04:00'),
+								  make_feature('a2', '2024-08-15T08:00:00-04:00')),
+					  RETRIEVED_AT)
+	changes = synchronizer.sync(
+		make_alerts(make_feature('a2', '2024-08-15T08:00:00-04:00')), RETRIEVED_AT)
+	assert get_changes(changes) == [(ALERT_EXPIRED, 'a1', None)]
+	# An expired alert that comes back is new again
+	changes = synchronizer.sync(
+		make_alerts(make_feature('a1', '2024-08-15T08:00:00-04:00'),
+					make_feature('a2', '2024-08-15T08:00:00-04:00')), RETRIEVED_AT)
+	assert get_changes(changes) == [(ALERT_ADDED, 'a1', None)]
+	assert sorted(get_changes(synchronizer.sync(make_alerts(), RETRIEVED_AT))) == [
+		(ALERT_EXPIRED, 'a1', None), (ALERT_EXPIRED, 'a2', None)]
@@ -0,0 +1,129 @@
+from datetime import datetime, timedelta
+from libnws.service.aviation_feed import AviationAdvisoryFeed
+
+
+RETRIEVED_AT = datetime(2024, 8, 15, 12, 0)
+NOW = datetime(2024, 8, 15, 12, 0)
+
+# A square from 40 to 42 N, and 80 to 78 W
+SQUARE = [[[-80, 40], [-78, 40], [-78, 42], [-80, 42], [-80, 40]]]
+# A triangle that only covers the south-east half of its bounding box
+TRIANGLE = [[[-76, 40], [-74, 40], [-74, 42], [-76, 40]]]
+
+
+def to_api_time(local_time: datetime) -> str:
+	# Eastern daylight time
+	return (local_time + timedelta(hours=4)).strftime('%Y-%m-%dT%H:%M:%S+00:00')
+
+
+def make_feature(
+	unit: str,
+	sequence: str,
+	expires_at: datetime,
+	coordinates: list = SQUARE,
+	issued_at: datetime = NOW,
+	**properties
+) -> dict:
+	unit_field = 'cwsu' if properties.get('text') is not None else 'atsu'
+	return {
+		'properties': {
+			unit_field:		unit,
+			'sequence':		sequence,
+			'issueTime':	to_api_time(issued_at),
+			'start':		to_api_time(issued_at),
+			'end':			to_api_time(expires_at),
+			**properties,
+		},
+		'geometry': {'type': 'Polygon', 'coordinates': coordinates},
+	}
+
+
+def make_features(*features: dict) -> dict:
+	return {'features': list(features)}
+
+
+def get_sequences(advisories: list) -> list:
+	return [advisory.sequence for advisory in advisories]
+
+
+def test_expire_in_order():
+	feed = AviationAdvisoryFeed()
+	expirations = [3, 1, 4, 2]
+	added = feed.add_sigmets(make_features(*[
+		make_feature('KKCI', f'{hours}C', NOW + timedelta(hours=hours))
+		for hours in expirations]), RETRIEVED_AT, NOW)
+	assert get_sequences(added) == ['3C', '1C', '4C', '2C']
+	assert get_sequences(feed.expire(NOW + timedelta(minutes=30))) == []
+	assert get_sequences(feed.expire(NOW + timedelta(hours=2))) == ['1C', '2C']
+	assert len(feed) == 2
+	assert get_sequences(feed.expire(NOW + timedelta(hours=5))) == ['3C', '4C']
+	assert len(feed) == 0
+
+
+def test_expire_skips_removed_and_re_added_advisories():
+	feed = AviationAdvisoryFeed()
+	first = make_feature('KKCI', '1C', NOW + timedelta(hours=1))
+	second = make_feature('KKCI', '2C', NOW + timedelta(hours=1))
+	feed.add_sigmets(make_features(first, second), RETRIEVED_AT, NOW)
+	(key, _), = [(key, advisory) for key, advisory in feed.advisories.items()
+				 if advisory.sequence == '1C']
+	assert feed.remove(key)
+	assert not feed.remove(key)
+	# An advisory added again with a later expiration outlives its first heap entry
+	(key, advisory), = feed.advisories.items()
+	advisory.expires_at = NOW + timedelta(hours=3)
+	feed.add(key, advisory, NOW)
+	assert feed.expire(NOW + timedelta(hours=2)) == []
+	assert get_sequences(feed.expire(NOW + timedelta(hours=3))) == ['2C']
+
+
+def test_add_sigmets_skips_seen_and_expired():
+	feed = AviationAdvisoryFeed()
+	current = make_feature('KKCI', '1C', NOW + timedelta(hours=1))
+	expired = make_feature('KKCI', '2C', NOW - timedelta(minutes=5),
+						   issued_at=NOW - timedelta(hours=2))
+	assert get_sequences(feed.add_sigmets(make_features(current, expired), RETRIEVED_AT,
+										  NOW)) == ['1C']
+	# The same sequence issued at a new time is a new SIGMET
+	reissued = make_feature('KKCI', '1C', NOW + timedelta(hours=2),
+							issued_at=NOW + timedelta(minutes=10))
+	assert get_sequences(feed.add_sigmets(make_features(reissued, current, expired),
+										  RETRIEVED_AT, NOW)) == ['1C']
+	assert len(feed) == 2
+	assert feed.add_sigmets(make_features(reissued, current), RETRIEVED_AT, NOW) == []
+
+
+def test_cancelled_cwa_is_removed():
+	feed = AviationAdvisoryFeed()
+	cwa = make_feature('ZOB', 101, NOW + timedelta(hours=2), text='ZOB CWA 101 ...')
+	assert get_sequences(feed.add_cwas(make_features(cwa), RETRIEVED_AT, NOW)) == [101]
+	cancel = make_feature('ZOB', 102, NOW + timedelta(hours=2),
+						  issued_at=NOW + timedelta(minutes=20), text='CANCEL ZOB CWA 101.')
+	assert feed.add_cwas(make_features(cancel, cwa), RETRIEVED_AT, NOW) == []
+	assert len(feed) == 0
+
+
+def test_get_intersecting():
+	feed = AviationAdvisoryFeed()
+	feed.add_sigmets(make_features(
+		make_feature('KKCI', 'square', NOW + timedelta(hours=3)),
+		make_feature('KKCI', 'triangle', NOW + timedelta(hours=1), TRIANGLE),
+	), RETRIEVED_AT, NOW)
+	# Routes are (lat, lon) waypoints
+	assert get_sequences(feed.get_intersecting([(41, -79)], NOW)) == ['square']
+	# Crossing the square without a waypoint in it
+	assert get_sequences(feed.get_intersecting([(41, -81), (41, -77)], NOW)) == [
+		'square']
+	# Through the triangle's bounding box, but not the triangle
+	assert feed.get_intersecting([(41.5, -77), (41.9, -75.2)], NOW) == []
+	# Through both, soonest to expire first
+	assert get_sequences(feed.get_intersecting([(41, -81), (41, -73)], NOW)) == [
+		'triangle', 'square']
+	# Touching a corner
+	assert get_sequences(feed.get_intersecting([(43, -81), (42, -80)], NOW)) == [
+		'square']
+	assert feed.get_intersecting([(43, -81), (43, -70)], NOW) == []
+	assert feed.get_intersecting([], NOW) == []
+	# Expired advisories are dropped first
+	assert get_sequences(feed.get_intersecting([(41, -81), (41, -73)],
+											   NOW + timedelta(hours=2))) == ['square']
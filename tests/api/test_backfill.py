@@ -0,0 +1,143 @@
+from datetime import date, datetime
+from urllib.parse import urlencode
+import pytest
+import pytz
+from requests_cache import CachedSession, DO_NOT_CACHE
+from libnws.api import NWS_API_AVIATION_SIGMETS, NWS_API_STATIONS
+from libnws.service.backfill import (
+	BackfillCheckpoint,
+	backfill_observations,
+	backfill_sigmets,
+	run_backfill,
+)
+from replay import install_replay
+
+
+@pytest.fixture
+def session() -> CachedSession:
+	return CachedSession(backend='memory', expire_after=DO_NOT_CACHE)
+
+
+@pytest.fixture
+def adapter(session):
+	return install_replay(session)
+
+
+def fetch_items(task_id: int, n_items: int) -> list:
+	if n_items is None:
+		raise ValueError(f'Task {task_id} failed')
+	return [(task_id, i) for i in range(n_items)]
+
+
+def test_run_backfill_batches_and_dedupes():
+	tasks = [(f'task/{task_id}', task_id, 3) for task_id in range(10)]
+	batches = []
+	stats = run_backfill(tasks, fetch_items, batches.append, batch_size=4, max_workers=3,
+						 dedupe_key=lambda item: item[1])
+	# Items are only deduped within a task
+	assert stats == {'fetched': 10, 'skipped': 0, 'failed': 0, 'items': 30,
+					 'duplicates': 0}
+	assert all(len(batch) <= 4 for batch in batches)
+	assert sorted(item for batch in batches for item in batch) == [
+		(task_id, i) for task_id in range(10) for i in range(3)]
+	batches = []
+	stats = run_backfill([('task', 0, 3)], fetch_items, batches.append,
+						 dedupe_key=lambda item: item[0])
+	assert (stats['items'], stats['duplicates']) == (1, 2)
+	assert batches == [[(0, 0)]]
+
+
+def test_resume_from_checkpoint(tmp_path):
+	path = str(tmp_path / 'checkpoint.json')
+	tasks = [(f'task/{task_id}', task_id, 2) for task_id in range(6)]
+	# Task 3 fails, so it isn't recorded as finished
+	failing_tasks = [(key, task_id, None if task_id == 3 else n_items)
+					 for key, task_id, n_items in tasks]
+	items = []
+	stats = run_backfill(failing_tasks, fetch_items, items.extend, BackfillCheckpoint(path),
+						 max_workers=2)
+	assert (stats['fetched'], stats['failed'], stats['items']) == (5, 1, 10)
+	checkpoint = BackfillCheckpoint(path)
+	assert len(checkpoint) == 5
+	assert 'task/3' not in checkpoint
+	# Running again with the saved checkpoint only fetches the task that failed
+	items = []
+	stats = run_backfill(tasks, fetch_items, items.extend, checkpoint)
+	assert (stats['fetched'], stats['skipped'], stats['items']) == (1, 5, 2)
+	assert items == [(3, 0), (3, 1)]
+	assert len(BackfillCheckpoint(path)) == 6
+
+
+def test_interrupted_sink_leaves_tasks_unfinished(tmp_path):
+	path = str(tmp_path / 'checkpoint.json')
+	tasks = [(f'task/{task_id}', task_id, 3) for task_id in range(4)]
+	written = []
+
+	def sink(batch: list):
+		if written:
+			raise KeyboardInterrupt
+		written.extend(batch)
+
+	with pytest.raises(KeyboardInterrupt):
+		run_backfill(tasks, fetch_items, sink, BackfillCheckpoint(path), batch_size=4,
+					 max_workers=1)
+	# Only one task had all of its items in the first batch
+	checkpoint = BackfillCheckpoint(path)
+	finished_task_id, = [task_id for key, task_id, _ in tasks if key in checkpoint]
+	items = []
+	stats = run_backfill(tasks, fetch_items, items.extend, checkpoint)
+	assert (stats['fetched'], stats['skipped']) == (3, 1)
+	assert not any(task_id == finished_task_id for task_id, _ in items)
+	# The written items of the task that wasn't finished are written again
+	assert len(written + items) == 13
+	assert set(written + items) == {(task_id, i) for task_id in range(4) for i in range(3)}
+
+
+def test_backfill_sigmets(adapter, session, tmp_path):
+	for atsu in ('KKCI', 'PAWU'):
+		for day in ('2024-08-18', '2024-08-19'):
+			adapter.add(NWS_API_AVIATION_SIGMETS + f'{atsu}/{day}', {'features': [
+				{'properties': {'id': f'{atsu}/{day}/{i}', 'atsu': atsu}, 'geometry': None}
+				for i in range(2)]})
+	checkpoint = BackfillCheckpoint(str(tmp_path / 'checkpoint.json'))
+	sigmets = []
+	stats = backfill_sigmets(session, ['KKCI', 'PAWU'], date(2024, 8, 18),
+							 date(2024, 8, 19), sigmets.extend, checkpoint)
+	assert (stats['fetched'], stats['items']) == (4, 8)
+	assert 'sigmets/PAWU/2024-08-19' in checkpoint
+	n_requests = adapter.n_requests
+	stats = backfill_sigmets(session, ['KKCI', 'PAWU'], date(2024, 8, 18),
+							 date(2024, 8, 19), sigmets.extend, checkpoint)
+	assert (stats['fetched'], stats['skipped']) == (0, 4)
+	assert adapter.n_requests == n_requests
+
+
+def make_observation(timestamp: str) -> dict:
+	return {'properties': {'timestamp': timestamp, 'cloudLayers': []}}
+
+
+def add_observations(adapter, station_id: str, start: str, end: str, timestamps: list):
+	query = urlencode({'start': start, 'end': end, 'limit': 500})
+	adapter.add(NWS_API_STATIONS + station_id + '/observations?' + query,
+				{'features': [make_observation(timestamp) for timestamp in timestamps]})
+
+
+def test_backfill_observations_when_clocks_fall_back(adapter, session):
+	# 01:30 Eastern happens twice on 2024-11-03, at 05:30 and 06:30 UTC
+	start = pytz.utc.localize(datetime(2024, 11, 3, 4, 0))
+	end = pytz.utc.localize(datetime(2024, 11, 3, 8, 0))
+	add_observations(adapter, 'KBOS', start.isoformat(), end.isoformat(), [
+		'2024-11-03T07:30:00+00:00',
+		'2024-11-03T06:30:00+00:00',
+		'2024-11-03T06:30:00+00:00',
+		'2024-11-03T05:30:00+00:00',
+		# Outside of the window
+		'2024-11-03T08:00:00+00:00',
+		'2024-11-03T03:30:00+00:00',
+	])
+	observations = []
+	stats = backfill_observations(session, ['KBOS'], start, end, observations.extend)
+	assert stats['items'] == 3
+	assert [observation.observed_at for observation in observations] == [
+		datetime(2024, 11, 3, 2, 30), datetime(2024, 11, 3, 1, 30),
+		datetime(2024, 11, 3, 1, 30)]
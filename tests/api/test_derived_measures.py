@@ -0,0 +1,168 @@
+import json
+from pathlib import Path
+from types import SimpleNamespace
+import pytest
+from libnws.api.derived_measures import (
+	derive_measures,
+	derive_observations,
+	get_apparent_temperature,
+	get_forecast_derived_columns,
+	get_forecast_wind_speed_kmh,
+	get_heat_index,
+	get_relative_humidity,
+	get_wet_bulb,
+	get_wind_chill,
+)
+
+
+TEST_DATA = Path(__file__).parent.parent / 'test_data' / 'api_responses'
+
+OBSERVATION_FIXTURES = (
+	'nws_raw_observations_all.json',
+	'nws_raw_observations_latest.json',
+	'nws_raw_observations_at_time.json',
+	'nws_raw_zone_observations.json',
+)
+
+
+def load_observations(fixture: str) -> list:
+	with open(TEST_DATA / fixture) as file:
+		observations = json.load(file)
+	return observations if isinstance(observations, list) else [observations]
+
+
+def f_to_c(value: float) -> float:
+	return (value - 32) * 5/9
+
+
+@pytest.mark.parametrize('fixture', OBSERVATION_FIXTURES)
+def test_relative_humidity_matches_api(fixture):
+	observations = [observation for observation in load_observations(fixture)
+					if observation['relative_humidity_pc'] is not None]
+	assert observations
+	relative_humidities = get_relative_humidity(
+		[observation['temperature_c'] for observation in observations],
+		[observation['dew_point_c'] for observation in observations])
+	assert relative_humidities == [observation['relative_humidity_pc']
+								   for observation in observations]
+
+
+@pytest.mark.parametrize('fixture', OBSERVATION_FIXTURES)
+def test_heat_index_matches_api(fixture):
+	observations = [observation for observation in load_observations(fixture)
+					if observation['heat_index_c'] is not None]
+	assert observations
+	heat_indexes = get_heat_index(
+		[observation['temperature_c'] for observation in observations],
+		[observation['relative_humidity_pc'] for observation in observations])
+	for heat_index, observation in zip(heat_indexes, observations):
+		# The API rounds its intermediate values
+		assert heat_index == pytest.approx(observation['heat_index_c'], abs=0.011)
+
+
+def test_derive_measures_fills_null_fields():
+	for observation in load_observations('nws_raw_observations_all.json'):
+		if observation['heat_index_c'] is None:
+			continue
+		data = {
+			'temperature_c':		observation['temperature_c'],
+			'dew_point_c':			observation['dew_point_c'],
+			'wind_speed_kmh':		observation['wind_speed_kmph'],
+			'relative_humidity_pc':	None,
+			'heat_index_c':			None,
+			'wind_chill_c':			None,
+		}
+		derive_measures(data)
+		assert data['relative_humidity_pc'] == observation['relative_humidity_pc']
+		assert data['heat_index_c'] == pytest.approx(observation['heat_index_c'], abs=0.011)
+		assert data['wind_chill_c'] is None
+		# Fields that the record doesn't have aren't added
+		assert 'wet_bulb_c' not in data
+
+
+def test_derive_measures_keeps_reported_values():
+	data = {'temperature_c': 30.0, 'dew_point_c': 20.0, 'relative_humidity_pc': 55.0,
+			'heat_index_c': None}
+	derive_measures(data)
+	assert data['relative_humidity_pc'] == 55.0
+	assert data['heat_index_c'] == get_heat_index([30.0], [55.0])[0]
+	assert derive_measures({'temperature_c': None, 'heat_index_c': None}) == {
+		'temperature_c': None, 'heat_index_c': None}
+
+
+@pytest.mark.parametrize('temperature_f, humidity_pc, heat_index_f', [
+	# From the NWS heat index chart
+	(90, 50, 95),
+	(100, 40, 109),
+	(86, 90, 105),
+	(80, 40, 80),
+])
+def test_heat_index_chart(temperature_f, humidity_pc, heat_index_f):
+	heat_index_c, = get_heat_index([f_to_c(temperature_f)], [humidity_pc])
+	assert heat_index_c * 9/5 + 32 == pytest.approx(heat_index_f, abs=1)
+
+
+@pytest.mark.parametrize('temperature_f, wind_speed_mph, wind_chill_f', [
+	# From the NWS wind chill chart
+	(30, 10, 21),
+	(0, 15, -19),
+	(-10, 20, -35),
+	(40, 5, 36),
+])
+def test_wind_chill_chart(temperature_f, wind_speed_mph, wind_chill_f):
+	wind_chill_c, = get_wind_chill([f_to_c(temperature_f)], [wind_speed_mph * 1.609344])
+	assert wind_chill_c * 9/5 + 32 == pytest.approx(wind_chill_f, abs=0.5)
+
+
+def test_wind_chill_limits():
+	assert get_wind_chill([f_to_c(55), f_to_c(30), None], [30, 1.6, 30]) == [
+		None, None, None]
+
+
+def test_apparent_temperature():
+	apparent_temperatures = get_apparent_temperature([35.0, 20.0, -5.0, None],
+													 [40.0, 20.5, None, None],
+													 [None, None, -10.0, None])
+	assert apparent_temperatures == [40.0, 20.0, -10.0, None]
+
+
+def test_wet_bulb():
+	# Stull's example: 20 degrees C and 50% relative humidity
+	assert get_wet_bulb([20.0, None], [50.0, 50.0]) == [pytest.approx(13.7, abs=0.05),
+														 None]
+
+
+def test_derive_observations():
+	observations = [
+		SimpleNamespace(temperature_c=-5.0, dew_point_c=-10.0, wind_speed_kmh=30.0,
+						relative_humidity_pc=None, heat_index_c=None, heat_index_f=None,
+						wind_chill_c=None, wind_chill_f=None),
+		SimpleNamespace(temperature_c=35.0, dew_point_c=20.0, wind_speed_kmh=None,
+						relative_humidity_pc=40.0, heat_index_c=None, heat_index_f=None,
+						wind_chill_c=None, wind_chill_f=None),
+	]
+	assert derive_observations(observations) is observations
+	cold, hot = observations
+	assert cold.relative_humidity_pc == get_relative_humidity([-5.0], [-10.0])[0]
+	assert cold.wind_chill_c == get_wind_chill([-5.0], [30.0])[0]
+	assert cold.wind_chill_f == round(cold.wind_chill_c * 9/5 + 32, 2)
+	assert hot.relative_humidity_pc == 40.0
+	assert hot.heat_index_c == get_heat_index([35.0], [40.0])[0]
+	assert hot.wind_chill_c is None
+	assert derive_observations([]) == []
+
+
+def test_forecast_derived_columns():
+	assert get_forecast_wind_speed_kmh('10 to 15 mph') == pytest.approx(15 * 1.609344)
+	assert get_forecast_wind_speed_kmh('calm') is None
+	assert get_forecast_wind_speed_kmh(None) is None
+	periods = [
+		SimpleNamespace(temperature_c=-5.0, dew_point_c=-10.0, relative_humidity_pc=None,
+						wind_speed='10 to 20 mph'),
+		SimpleNamespace(temperature_c=None, dew_point_c=None, relative_humidity_pc=None,
+						wind_speed=''),
+	]
+	columns = get_forecast_derived_columns(periods)
+	assert columns['wind_chill_c'] == [get_wind_chill([-5.0], [20 * 1.609344])[0], None]
+	assert columns['apparent_temperature_c'] == [columns['wind_chill_c'][0], None]
+	assert columns['wet_bulb_c'][1] is None
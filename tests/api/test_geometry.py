@@ -0,0 +1,46 @@
+from libnws.model.geometry import PackedGeometry, get_polygons
+
+
+POLYGON = [[[-72, 41], [-70, 41], [-70, 43], [-72, 41]]]
+MULTI_POLYGON = [POLYGON, [[[-80, 30], [-79, 30], [-79, 31], [-80, 30]]]]
+
+
+def test_round_trip():
+	geometry = PackedGeometry.from_coordinates(MULTI_POLYGON)
+	assert geometry.n_polygons == 2
+	assert geometry.coordinates == MULTI_POLYGON
+	assert PackedGeometry.is_packed(bytes(geometry))
+	assert PackedGeometry(bytes(geometry)) == geometry
+
+
+def test_polygon_is_packed_as_multi_polygon():
+	geometry = PackedGeometry.from_coordinates(POLYGON)
+	assert geometry.coordinates == [POLYGON]
+
+
+def test_bbox():
+	assert PackedGeometry.from_coordinates(POLYGON).bbox == (-72, 41, -70, 43)
+	assert PackedGeometry.from_coordinates(MULTI_POLYGON).bbox == (-80, 30, -70, 43)
+
+
+def test_empty_bbox():
+	geometry = PackedGeometry.from_coordinates([])
+	assert geometry.n_polygons == 0
+	assert geometry.bbox is None
+
+
+def test_simplify():
+	ring = [[-72, 41], [-71, 41.0001], [-70, 41], [-70, 43], [-72, 41]]
+	geometry = PackedGeometry.from_coordinates([ring], tolerance=0.01)
+	assert geometry.coordinates == [POLYGON]
+
+
+def test_get_polygons():
+	assert get_polygons(POLYGON) == [POLYGON]
+	assert get_polygons(MULTI_POLYGON) == MULTI_POLYGON
+	# Geometry that isn't a polygon has no polygons
+	assert get_polygons([-71, 42]) == []
+	assert get_polygons([[-71, 42], [-70, 42]]) == []
+	assert get_polygons(None) == []
+	assert get_polygons([[[]]]) == []
+	assert PackedGeometry.from_coordinates([-71, 42]).bbox is None
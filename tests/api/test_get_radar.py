@@ -0,0 +1,59 @@
+from dataclasses import fields
+from datetime import datetime
+import pytest
+from libnws.api.get_radar import RADAR_SERVER_SUB_OBJECT_FIELDS, process_radar_server_data
+from libnws.model.lazy import is_resolved
+
+
+RETRIEVED_AT = datetime(2024, 8, 15, 12, 0)
+
+RADAR_SERVER = {
+	'id':				'ldm1',
+	'type':				'ldm',
+	'active':			True,
+	'collectionTime':	'2024-08-15T16:00:00+00:00',
+	'hardware':			{'timestamp': '2024-08-15T15:59:00+00:00',
+						 'uptime': '2024-08-01T00:00:00+00:00',
+						 'cpuIdle': 97.5,
+						 'disk': 12},
+	'command':			{'lastExecuted': 'Primary',
+						 'lastExecutedTime': '2024-08-15T15:00:00+00:00'},
+	'ldm':				{'count': 12345, 'active': True},
+	'ping':				{'timestamp': '2024-08-15T15:58:00+00:00',
+						 'targets': {'radar': {'KBOX': True, 'KOKX': False}}},
+	'network':			{'timestamp': '2024-08-15T15:57:00+00:00',
+						 'eth0': {'interface': 'eth0', 'active': True, 'recvError': 0}},
+}
+
+
+def get_values(server) -> dict:
+	return {field.name: getattr(server, field.name) for field in fields(server)}
+
+
+def test_lazy_fields_match_eager_fields():
+	eager = process_radar_server_data(RADAR_SERVER, RETRIEVED_AT,
+									  RADAR_SERVER_SUB_OBJECT_FIELDS)
+	lazy = process_radar_server_data(RADAR_SERVER, RETRIEVED_AT)
+	assert get_values(lazy) == get_values(eager)
+	assert eager.cpu == 97.5
+	assert eager.ping_responses_radar == {'KBOX': True, 'KOKX': False}
+	assert [interface.interface_name for interface in eager.interfaces] == ['eth0']
+
+
+def test_lazy_fields_share_one_parse():
+	server = process_radar_server_data(RADAR_SERVER, RETRIEVED_AT, ['cpu'])
+	assert is_resolved(server, 'cpu')
+	assert not is_resolved(server, 'disk')
+	deferred = server.__dict__['_lazy_disk']
+	assert server.__dict__['_lazy_interfaces'] is deferred
+	assert server.disk == 12
+	assert is_resolved(server, 'disk')
+	# The unparsed values are released once they've all been parsed
+	assert deferred.args is None
+	assert server.up_since == datetime(2024, 7, 31, 20, 0)
+	assert server.ldm_storage_size is None
+
+
+def test_unknown_field():
+	with pytest.raises(ValueError):
+		process_radar_server_data(RADAR_SERVER, RETRIEVED_AT, ['uptime'])
@@ -0,0 +1,145 @@
+import json
+from pathlib import Path
+from datetime import datetime, timezone
+import pytest
+from libnws.api.metar import (
+	decode_metar,
+	decode_weather,
+	iter_metar_reports,
+	process_metar,
+	process_metar_file,
+)
+
+
+TEST_DATA = Path(__file__).parent.parent / 'test_data' / 'api_responses'
+
+# Shortly after the newest report in the observation fixtures
+FIXTURE_REFERENCE_TIME = datetime(2024, 8, 20, tzinfo=timezone.utc)
+REFERENCE_TIME = datetime(2024, 1, 20, tzinfo=timezone.utc)
+
+# Fields that the API decodes from the raw message without rounding them
+EXACT_FIELDS = (
+	'temperature_c',
+	'dew_point_c',
+	'wind_direction_deg_ang',
+	'sea_level_pressure_pa',
+)
+
+
+def load_observations() -> list:
+	with open(TEST_DATA / 'nws_raw_observations_all.json') as file:
+		return [observation for observation in json.load(file)
+				if observation['raw_message']]
+
+
+@pytest.mark.parametrize('field', EXACT_FIELDS)
+def test_decode_matches_api(field):
+	for observation in load_observations():
+		decoded = decode_metar(observation['raw_message'], FIXTURE_REFERENCE_TIME)
+		if observation[field] is not None:
+			assert decoded[field] == observation[field], observation['raw_message']
+
+
+def test_decode_altimeter_matches_api():
+	# The API rounds the converted altimeter setting to the nearest 10 Pa differently
+	for observation in load_observations():
+		decoded = decode_metar(observation['raw_message'], FIXTURE_REFERENCE_TIME)
+		if observation['barometric_pressure_pa'] is not None:
+			assert decoded['barometric_pressure_pa'] == pytest.approx(
+				observation['barometric_pressure_pa'], abs=10)
+
+
+def test_decode_observed_at_matches_api():
+	for observation in load_observations():
+		decoded = decode_metar(observation['raw_message'], FIXTURE_REFERENCE_TIME)
+		assert str(decoded['observed_at']) == observation['observed_at']
+
+
+def test_decode_cloud_layers_match_api():
+	for observation in load_observations():
+		decoded = decode_metar(observation['raw_message'], FIXTURE_REFERENCE_TIME)
+		if observation['cloud_layers']:
+			assert decoded['cloud_layers'] == observation['cloud_layers']
+
+
+def test_decode_clear_sky():
+	decoded = decode_metar('KJFK 151251Z AUTO VRB03KT 10SM CLR M05/M10 A3012 RMK AO2',
+						   REFERENCE_TIME)
+	assert decoded['cloud_layers'] == {'None': 'Clear Sky'}
+	assert decoded['text_description'] == 'Clear Sky'
+	assert decoded['temperature_c'] == -5.0
+	assert decoded['dew_point_c'] == -10.0
+	assert decoded['wind_direction_deg_ang'] is None
+	assert decoded['wind_speed_kmh'] == pytest.approx(5.556)
+	assert decoded['barometric_pressure_pa'] == 102000
+	assert decoded['observed_at'] == datetime(2024, 1, 15, 7, 51)
+
+
+def test_decode_speci_with_remarks():
+	decoded = decode_metar('SPECI KBOS 151256Z 27015G25KT 1/2SM +TSRA BR BKN008 '
+						   'OVC020CB 22/21 A2992 RMK AO2 P0012 60034 T02220211 '
+						   '401000089',
+						   REFERENCE_TIME)
+	assert decoded['station_or_zone_id'] == 'KBOS'
+	assert decoded['wind_direction_deg_ang'] == 270
+	assert decoded['wind_speed_kmh'] == pytest.approx(27.78)
+	assert decoded['wind_gust_kmh'] == pytest.approx(46.3)
+	assert decoded['visibility_m'] == 800
+	assert decoded['text_description'] == 'Heavy Thunderstorm Rain and Mist'
+	assert decoded['cloud_layers'] == {'240m': 'Broken Sky', '610m': 'Overcast'}
+	# The precise temperatures in the remarks replace the whole degrees in the body
+	assert decoded['temperature_c'] == 22.2
+	assert decoded['dew_point_c'] == 21.1
+	assert decoded['max_temp_last_24h_c'] == 10.0
+	assert decoded['min_temp_last_24h_c'] == 8.9
+	assert decoded['precip_last_1h_mm'] == pytest.approx(3.048)
+	assert decoded['precip_last_3h_mm'] == pytest.approx(8.636)
+
+
+def test_decode_groups_out_of_order():
+	# The temperature comes before the sky cover, so the report is decoded group by group
+	decoded = decode_metar('KBOS 151256Z 27015KT 3SM -SN 22/21 OVC020 A2992',
+						   REFERENCE_TIME)
+	assert decoded['visibility_m'] == 4830
+	assert decoded['text_description'] == 'Light Snow'
+	assert decoded['temperature_c'] == 22.0
+	assert decoded['cloud_layers'] == {'610m': 'Overcast'}
+	assert decoded['barometric_pressure_pa'] == 101320
+
+
+def test_decode_weather():
+	assert decode_weather('+TSRA') == 'Heavy Thunderstorm Rain'
+	assert decode_weather('VCFG') == 'Fog Nearby'
+	assert decode_weather('XYZ') is None
+
+
+def test_process_metar_converts_measures():
+	observation = process_metar('KJFK 151251Z AUTO VRB03KT 10SM CLR M05/M10 A3012',
+								reference_time=REFERENCE_TIME)
+	assert observation.temperature_f == pytest.approx(23.0)
+	assert observation.relative_humidity_pc is None
+	observation = process_metar('KJFK 151251Z AUTO VRB03KT 10SM CLR M05/M10 A3012',
+								reference_time=REFERENCE_TIME,
+								derive=True)
+	assert observation.relative_humidity_pc is not None
+
+
+def test_iter_metar_reports():
+	text = ('KAAA 011200Z 00000KT 10SM CLR 10/05 A3000=\n'
+			'KBBB 011200Z 00000KT\n'
+			'  10SM CLR 10/05 A3000\n'
+			'\n')
+	assert list(iter_metar_reports(text)) == [
+		'KAAA 011200Z 00000KT 10SM CLR 10/05 A3000',
+		'KBBB 011200Z 00000KT\n  10SM CLR 10/05 A3000',
+	]
+
+
+def test_process_metar_file(tmp_path):
+	path = tmp_path / 'metars.txt'
+	path.write_text('KAAA 011200Z 00000KT 10SM CLR 10/05 A3000=\n'
+					'KBBB 011200Z 00000KT 10SM CLR 12/05 A3000=\n')
+	observations = process_metar_file(str(path), REFERENCE_TIME)
+	assert [observation.station_or_zone_id for observation in observations] == [
+		'KAAA', 'KBBB']
+	assert [observation.temperature_c for observation in observations] == [10.0, 12.0]
@@ -0,0 +1,158 @@
+import math
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+import pytest
+from libnws.service.observation_series import (
+	DAILY,
+	HOURLY,
+	ObservationSeries,
+	StationSeries,
+)
+
+
+def make_observation(
+	observed_at: datetime,
+	temperature_c: float = None,
+	precip_last_1h_mm: float = None,
+	raw_message: str = None,
+	station_id: str = 'KBOS'
+):
+	return SimpleNamespace(station_or_zone_id=station_id,
+						   observed_at=observed_at,
+						   raw_message=raw_message,
+						   temperature_c=temperature_c,
+						   precip_last_1h_mm=precip_last_1h_mm)
+
+
+def make_series(**kwargs) -> ObservationSeries:
+	return ObservationSeries('KBOS', fields=('temperature_c', 'precip_last_1h_mm'), **kwargs)
+
+
+def test_hourly_and_daily_aggregates():
+	series = make_series()
+	start = datetime(2024, 8, 15, 22, 0)
+	temperatures = [20.0, 21.0, 19.0, 18.0, 17.0, None]
+	observations = [make_observation(start + timedelta(minutes=30 * i), temperature)
+					for i, temperature in enumerate(temperatures)]
+	# Observations can be added in any order
+	assert series.add_many(reversed(observations)) == 6
+	assert not series.add(observations[0])
+	assert len(series) == 6
+	assert list(series.column('temperature_c'))[:5] == temperatures[:5]
+	assert math.isnan(series.column('temperature_c')[5])
+	assert list(series.column('temperature_c', start + timedelta(hours=1),
+							  start + timedelta(hours=2))) == [19.0, 18.0]
+	assert series.resample('temperature_c') == [
+		(datetime(2024, 8, 15, 22), 20.5),
+		(datetime(2024, 8, 15, 23), 18.5),
+		(datetime(2024, 8, 16, 0), 17.0),
+	]
+	assert series.resample('temperature_c', HOURLY, 'last') == [
+		(datetime(2024, 8, 15, 22), 21.0),
+		(datetime(2024, 8, 15, 23), 18.0),
+		(datetime(2024, 8, 16, 0), 17.0),
+	]
+	assert series.resample('temperature_c', DAILY, 'max') == [
+		(datetime(2024, 8, 15), 21.0), (datetime(2024, 8, 16), 17.0)]
+	assert series.resample('temperature_c', DAILY, 'count',
+						   start=datetime(2024, 8, 16)) == [(datetime(2024, 8, 16), 1)]
+	with pytest.raises(ValueError):
+		series.resample('temperature_c', 600)
+
+
+def test_rolling_window():
+	series = make_series(rolling_window_s=2 * HOURLY)
+	start = datetime(2024, 8, 15, 12, 0)
+	for i, temperature in enumerate([20.0, 25.0, 15.0, 22.0]):
+		series.add(make_observation(start + timedelta(hours=i), temperature))
+	# The window holds the last two hours, as of the latest observation
+	assert series.get_rolling('temperature_c') == {'count': 2, 'mean': 18.5,
+												   'min': 15.0, 'max': 22.0}
+	# Observations older than the latest one don't update the window
+	series.add(make_observation(start + timedelta(hours=2, minutes=30), 40.0))
+	assert series.get_rolling('temperature_c')['max'] == 22.0
+	assert series.get_rolling('temperature_c',
+							  now=start + timedelta(hours=4, minutes=30)) == {
+		'count': 1, 'mean': 22.0, 'min': 22.0, 'max': 22.0}
+
+
+def test_precipitation_and_daily_summary():
+	series = make_series()
+	day = datetime(2024, 8, 15)
+	observations = [
+		# Hourly amounts are the largest reported in each hour
+		make_observation(day + timedelta(hours=6, minutes=20), 15.0, 1.0),
+		make_observation(day + timedelta(hours=6, minutes=54), 16.0, 2.5),
+		make_observation(day + timedelta(hours=7, minutes=54), 25.0, 0.5),
+		make_observation(day + timedelta(hours=14, minutes=54), 29.0, None),
+		make_observation(day + timedelta(days=1, hours=1), 20.0, 4.0),
+	]
+	series.add_many(observations)
+	assert series.get_precipitation(HOURLY) == [
+		(day + timedelta(hours=6), 2.5),
+		(day + timedelta(hours=7), 0.5),
+		(day + timedelta(days=1, hours=1), 4.0),
+	]
+	assert series.get_precipitation() == [(day, 3.0), (day + timedelta(days=1), 4.0)]
+	first_day, second_day = series.get_daily_summary()
+	assert first_day['date'] == date(2024, 8, 15)
+	assert (first_day['high_c'], first_day['low_c'], first_day['samples']) == (29.0, 15.0, 4)
+	assert first_day['precip_mm'] == 3.0
+	assert first_day['mean_c'] == pytest.approx(21.25)
+	assert first_day['cdd_c'] == pytest.approx(22.0 - 18.333)
+	assert first_day['hdd_c'] == 0.0
+	assert second_day['precip_mm'] == 4.0
+
+
+def test_day_offset():
+	series = make_series(day_offset_s=6 * HOURLY)
+	series.add(make_observation(datetime(2024, 8, 16, 5, 0), 20.0))
+	series.add(make_observation(datetime(2024, 8, 16, 7, 0), 22.0))
+	assert series.resample('temperature_c', DAILY, 'count') == [
+		(datetime(2024, 8, 15, 6), 1), (datetime(2024, 8, 16, 6), 1)]
+
+
+@pytest.mark.parametrize('with_metar', [True, False])
+def test_clocks_falling_back(with_metar):
+	# 01:30 Eastern happens twice on 2024-11-03, at 05:30 and 06:30 UTC
+	times = [(datetime(2024, 11, 3, 0, 30), '030430Z'),
+			 (datetime(2024, 11, 3, 1, 30), '030530Z'),
+			 (datetime(2024, 11, 3, 1, 30), '030630Z'),
+			 (datetime(2024, 11, 3, 2, 30), '030730Z')]
+	observations = [make_observation(observed_at, 10.0 + i,
+									 raw_message=f'KBOS {metar_time} 00000KT'
+									 if with_metar else None)
+					for i, (observed_at, metar_time) in enumerate(times)]
+	series = make_series()
+	if with_metar:
+		# Their METARs put them in order, whatever order they're added in
+		assert series.add_many(reversed(observations)) == 4
+	else:
+		assert series.add_many(observations) == 4
+	assert list(series.times) == sorted(series.times)
+	assert list(series.column('temperature_c')) == [10.0, 11.0, 12.0, 13.0]
+	assert series.get_rolling('temperature_c')['count'] == 4
+	assert series.resample('temperature_c') == [
+		(datetime(2024, 11, 3, 0), 10.0),
+		(datetime(2024, 11, 3, 1), 11.0),
+		(datetime(2024, 11, 3, 1), 12.0),
+		(datetime(2024, 11, 3, 2), 13.0),
+	]
+	assert series.resample('temperature_c', DAILY, 'count') == [
+		(datetime(2024, 11, 3), 4)]
+	assert not series.add(observations[1])
+	assert len(series) == 4
+
+
+def test_station_series():
+	station_series = StationSeries(fields=('temperature_c',))
+	observed_at = datetime(2024, 8, 15, 12, 0)
+	added = station_series.add_observations([
+		make_observation(observed_at, 20.0),
+		make_observation(observed_at, 25.0, station_id='KPVD'),
+		make_observation(None, 25.0, station_id='KPVD'),
+	])
+	assert added == 2
+	assert len(station_series) == 2
+	assert 'KPVD' in station_series
+	assert list(station_series['KPVD'].column('temperature_c')) == [25.0]
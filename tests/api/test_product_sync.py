@@ -0,0 +1,163 @@
+from datetime import datetime
+import pytest
+from requests_cache import CachedSession, DO_NOT_CACHE
+from libnws.api import NWS_API_PRODUCT_TYPES, NWS_API_PRODUCTS
+from libnws.service.product_sync import ProductSync
+from replay import install_replay
+
+
+RETRIEVED_AT = datetime(2024, 8, 15, 12, 0)
+
+
+def make_item(product_id: str, issued_at: str, office: str = 'KBOX') -> dict:
+	return {
+		'id':				product_id,
+		'wmoCollectiveId':	'FXUS61',
+		'issuingOffice':	office,
+		'issuanceTime':		issued_at,
+		'productCode':		'AFD',
+		'productName':		'Area Forecast Discussion',
+	}
+
+
+def make_listing(*items: dict) -> dict:
+	return {'@graph': list(items)}
+
+
+@pytest.fixture
+def session() -> CachedSession:
+	return CachedSession(backend='memory', expire_after=DO_NOT_CACHE)
+
+
+@pytest.fixture
+def adapter(session):
+	return install_replay(session)
+
+
+def add_text(adapter, item: dict):
+	adapter.add(NWS_API_PRODUCTS + item['id'],
+				dict(item, productText=f'Text of {item["id"]}'))
+
+
+def add_unavailable_text(adapter, item: dict):
+	adapter.add(NWS_API_PRODUCTS + item['id'], {'title': 'Service Unavailable'},
+				status_code=503)
+
+
+def get_ids(products: list) -> list:
+	return [product.product_id for product in products]
+
+
+def test_get_new_products_skips_seen_products():
+	product_sync = ProductSync()
+	key = ('AFD', None)
+	first = make_listing(make_item('p2', '2024-08-15T02:00:00+00:00'),
+						 make_item('p1', '2024-08-15T01:00:00+00:00'))
+	assert get_ids(product_sync.get_new_products(first, RETRIEVED_AT, key)) == ['p2', 'p1']
+	assert get_ids(product_sync.get_new_products(first, RETRIEVED_AT, key)) == []
+	second = make_listing(make_item('p4', '2024-08-15T04:00:00+00:00'),
+						  make_item('p3', '2024-08-15T03:00:00+00:00'),
+						  *first['@graph'])
+	assert get_ids(product_sync.get_new_products(second, RETRIEVED_AT, key)) == ['p4', 'p3']
+	# The products seen are shared by every listing with the same type and office
+	assert get_ids(product_sync.get_new_products(first, RETRIEVED_AT,
+												 ('AFD', 'BOX'))) == []
+	other_office = make_listing(make_item('p5', '2024-08-15T01:30:00+00:00', 'KOKX'))
+	assert get_ids(product_sync.get_new_products(other_office, RETRIEVED_AT,
+												 ('AFD', 'OKX'))) == ['p5']
+
+
+def test_get_new_products_added_late():
+	product_sync = ProductSync()
+	key = ('AFD', None)
+	listing = make_listing(make_item('p2', '2024-08-15T02:00:00+00:00'),
+						   make_item('p1', '2024-08-15T01:00:00+00:00', 'KOKX'))
+	assert get_ids(product_sync.get_new_products(listing, RETRIEVED_AT, key)) == ['p2', 'p1']
+	# A product that shows up after newer ones from the same office is still new if it
+	# was issued within the overlap, and products from offices with older watermarks
+	# are still read
+	listing = make_listing(make_item('p2', '2024-08-15T02:00:00+00:00'),
+						   make_item('late', '2024-08-15T01:50:00+00:00'),
+						   make_item('too-late', '2024-08-15T01:30:00+00:00'),
+						   make_item('okx-late', '2024-08-15T00:55:00+00:00', 'KOKX'),
+						   make_item('p1', '2024-08-15T01:00:00+00:00', 'KOKX'),
+						   make_item('old', '2024-08-15T00:30:00+00:00', 'KOKX'))
+	assert get_ids(product_sync.get_new_products(listing, RETRIEVED_AT, key)) == [
+		'late', 'okx-late']
+	assert get_ids(product_sync.get_new_products(listing, RETRIEVED_AT, key)) == []
+
+
+def test_get_new_products_issued_at_the_watermark():
+	product_sync = ProductSync()
+	key = ('AFD', None)
+	listing = make_listing(make_item('p1', '2024-08-15T01:00:00+00:00'))
+	assert get_ids(product_sync.get_new_products(listing, RETRIEVED_AT, key)) == ['p1']
+	# A product issued in the same second as the newest one seen is still new
+	listing = make_listing(make_item('p2', '2024-08-15T01:00:00+00:00'),
+						   make_item('p1', '2024-08-15T01:00:00+00:00'),
+						   make_item('p0', '2024-08-15T00:00:00+00:00'))
+	assert get_ids(product_sync.get_new_products(listing, RETRIEVED_AT, key)) == ['p2']
+	assert get_ids(product_sync.get_new_products(listing, RETRIEVED_AT, key)) == []
+
+
+def test_sync_without_text(session, adapter):
+	items = [make_item('p2', '2024-08-15T02:00:00+00:00'),
+			 make_item('p1', '2024-08-15T01:00:00+00:00')]
+	adapter.add(NWS_API_PRODUCT_TYPES + '/AFD/locations/BOX', make_listing(*items))
+	product_sync = ProductSync()
+	products = product_sync.sync(session, 'AFD', 'BOX', include_text=False)
+	assert get_ids(products) == ['p2', 'p1']
+	assert product_sync.sync(session, 'AFD', 'BOX', include_text=False) == []
+	# Only the listing was requested
+	assert adapter.n_requests == 2
+
+
+def test_sync_fetches_text(session, adapter):
+	items = [make_item('p2', '2024-08-15T02:00:00+00:00'),
+			 make_item('p1', '2024-08-15T01:00:00+00:00')]
+	adapter.add(NWS_API_PRODUCT_TYPES + '/AFD', make_listing(*items))
+	for item in items:
+		add_text(adapter, item)
+	product_sync = ProductSync()
+	products = product_sync.sync(session, 'AFD')
+	assert get_ids(products) == ['p2', 'p1']
+	assert [product.text for product in products] == ['Text of p2', 'Text of p1']
+	assert product_sync.sync(session, 'AFD') == []
+
+
+def test_sync_retries_missing_text(session, adapter):
+	items = [make_item('p2', '2024-08-15T02:00:00+00:00'),
+			 make_item('p1', '2024-08-15T01:00:00+00:00')]
+	adapter.add(NWS_API_PRODUCT_TYPES + '/AFD', make_listing(*items))
+	add_unavailable_text(adapter, items[0])
+	add_text(adapter, items[1])
+	product_sync = ProductSync()
+	# The text of p2 can't be fetched yet, but p2 isn't read from the listing again
+	assert get_ids(product_sync.sync(session, 'AFD')) == ['p1']
+	assert get_ids(product_sync.sync(session, 'AFD')) == []
+	add_text(adapter, items[0])
+	new_item = make_item('p3', '2024-08-15T03:00:00+00:00')
+	adapter.add(NWS_API_PRODUCT_TYPES + '/AFD', make_listing(new_item, *items))
+	add_text(adapter, new_item)
+	assert get_ids(product_sync.sync(session, 'AFD')) == ['p3', 'p2']
+	assert product_sync.sync(session, 'AFD') == []
+
+
+def test_sync_gives_up_on_missing_text(session, adapter):
+	items = [make_item('p2', '2024-08-15T02:00:00+00:00'),
+			 make_item('p1', '2024-08-15T01:00:00+00:00')]
+	adapter.add(NWS_API_PRODUCT_TYPES + '/AFD', make_listing(*items))
+	# p2 is never available, and p1 doesn't exist
+	add_unavailable_text(adapter, items[0])
+	product_sync = ProductSync(max_text_attempts=2)
+	assert product_sync.sync(session, 'AFD') == []
+	n_requests = adapter.n_requests
+	assert product_sync.sync(session, 'AFD') == []
+	# Only the listing and the text of p2 were requested again
+	assert adapter.n_requests == n_requests + 2
+	n_requests = adapter.n_requests
+	assert product_sync.sync(session, 'AFD') == []
+	assert adapter.n_requests == n_requests + 1
+	add_text(adapter, items[0])
+	add_text(adapter, items[1])
+	assert product_sync.sync(session, 'AFD') == []
@@ -0,0 +1,128 @@
+from datetime import datetime
+from libnws.api.product_text import (
+	parse_ugc,
+	parse_vtec,
+	parse_vtec_time,
+	process_product_text,
+)
+
+
+WARNING_TEXT = """
+000
+WUUS51 KBOX 151200
+SVRBOX
+
+MAC005-017-RIC001>003-151300-
+/O.NEW.KBOX.SV.W.0045.240815T1200Z-240815T1300Z/
+
+BULLETIN - IMMEDIATE BROADCAST REQUESTED
+Severe Thunderstorm Warning
+National Weather Service Boston/Norton MA
+
+* WHAT...60 mph wind gusts.
+
+$$
+
+MAZ005>007-
+012-151300-
+/O.CON.KBOX.SV.W.0044.000000T0000Z-240815T1300Z/
+/O.EXT.KBOX.FA.Y.0003.240815T1200Z-240815T1500Z/
+
+The warning remains in effect.
+
+$$
+"""
+
+DISCUSSION_TEXT = """
+000
+FXUS61 KBOX 151200
+AFDBOX
+
+Area Forecast Discussion
+National Weather Service Boston/Norton MA
+
+.SYNOPSIS...A cold front moves through
+this afternoon.
+&&
+
+.NEAR TERM /THROUGH TONIGHT/...
+Showers end this evening.
+&&
+
+$$
+"""
+
+
+def test_parse_ugc_ranges_and_states():
+	codes, expires = parse_ugc('MAZ005>007-012-RIZ001-151200-')
+	assert codes == ['MAZ005', 'MAZ006', 'MAZ007', 'MAZ012', 'RIZ001']
+	assert expires == '151200'
+
+
+def test_parse_ugc_all_and_lines():
+	codes, expires = parse_ugc('MAZALL-\nRIC001>\n003-151200-')
+	assert codes == ['MAZALL', 'RIC001', 'RIC002', 'RIC003']
+	assert expires == '151200'
+
+
+def test_parse_ugc_without_expiration():
+	assert parse_ugc('MAZ005-') == (['MAZ005'], None)
+
+
+def test_parse_vtec():
+	vtec = parse_vtec('/O.NEW.KBOX.TO.W.0012.240815T1200Z-240815T1300Z/')
+	assert vtec.product_class == 'O'
+	assert vtec.action == 'NEW'
+	assert vtec.office == 'KBOX'
+	assert vtec.phenomenon == 'TO'
+	assert vtec.significance == 'W'
+	assert vtec.event_number == 12
+	# Times are naive US/Eastern, like `parse_timestamp`
+	assert vtec.begins_at == datetime(2024, 8, 15, 8, 0)
+	assert vtec.ends_at == datetime(2024, 8, 15, 9, 0)
+
+
+def test_parse_vtec_unknown_time():
+	vtec = parse_vtec('/O.CON.KBOX.SV.W.0044.000000T0000Z-240815T1300Z/')
+	assert vtec.begins_at is None
+	assert parse_vtec_time('000000T0000Z') is None
+
+
+def test_parse_vtec_not_vtec():
+	assert parse_vtec('/KBOX.0.ER.000000T0000Z.240815T1200Z/') is None
+	assert parse_vtec('no vtec here') is None
+
+
+def test_process_product_text_segments():
+	product_text = process_product_text(WARNING_TEXT)
+	assert product_text.wmo_heading == 'WUUS51 KBOX 151200'
+	assert product_text.awips_id == 'SVRBOX'
+	assert len(product_text.segments) == 2
+	first, second = product_text.segments
+	assert first.ugc_codes == ['MAC005', 'MAC017', 'RIC001', 'RIC002', 'RIC003']
+	assert first.ugc_expires == '151300'
+	assert [vtec.action for vtec in first.vtec] == ['NEW']
+	assert 'Severe Thunderstorm Warning' in first.text
+	assert second.ugc_codes == ['MAZ005', 'MAZ006', 'MAZ007', 'MAZ012']
+	assert [(vtec.action, vtec.phenomenon) for vtec in second.vtec] == [
+		('CON', 'SV'), ('EXT', 'FA')]
+	assert second.sections[0].title is None
+	assert second.sections[0].text == 'The warning remains in effect.'
+
+
+def test_process_product_text_sections():
+	product_text = process_product_text(DISCUSSION_TEXT)
+	assert product_text.awips_id == 'AFDBOX'
+	assert len(product_text.segments) == 1
+	sections = product_text.segments[0].sections
+	titled = [section for section in sections if section.title]
+	assert [section.title for section in titled] == ['SYNOPSIS', 'NEAR TERM /THROUGH TONIGHT/']
+	assert titled[0].text == 'A cold front moves through\nthis afternoon.'
+	assert titled[1].text == 'Showers end this evening.'
+	assert product_text.segments[0].ugc_codes == []
+
+
+def test_process_product_text_empty():
+	product_text = process_product_text(None)
+	assert product_text.segments == []
+	assert product_text.wmo_heading is None
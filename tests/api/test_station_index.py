@@ -0,0 +1,117 @@
+import json
+import random
+from pathlib import Path
+from types import SimpleNamespace
+from datetime import datetime, timedelta
+import pytest
+from libnws.index.geometry import haversine_km
+from libnws.index.station_index import StationIndex
+
+
+TEST_DATA = Path(__file__).parent.parent / 'test_data' / 'api_responses'
+
+
+def load_stations() -> list:
+	with open(TEST_DATA / 'nws_raw_radar_stations.json') as file:
+		radar_stations = json.load(file)
+	# The fixtures store radar station locations as longitude, latitude
+	return [SimpleNamespace(station_id=station['station_id'],
+							lat=station['station_lon'],
+							lon=station['station_lat'])
+			for station in radar_stations]
+
+
+def brute_force_nearest(stations: list, lat: float, lon: float, k: int) -> list:
+	distances = sorted((haversine_km(lat, lon, station.lat, station.lon), station.station_id)
+					   for station in stations)
+	return [(station_id, distance) for distance, station_id in distances[:k]]
+
+
+def get_points(count: int = 300) -> list:
+	points_random = random.Random(20240815)
+	return [(points_random.uniform(-90, 90), points_random.uniform(-180, 180))
+			for _ in range(count)]
+
+
+def assert_same_nearest(nearest: list, expected: list):
+	assert [station_id for station_id, _ in nearest] == [
+		station_id for station_id, _ in expected]
+	for (_, distance), (_, expected_distance) in zip(nearest, expected):
+		assert distance == pytest.approx(expected_distance)
+
+
+@pytest.mark.parametrize('k', [1, 3, 10])
+def test_nearest_matches_brute_force(k):
+	stations = load_stations()
+	station_index = StationIndex.from_stations(stations)
+	assert len(station_index) == len(stations)
+	for lat, lon in get_points():
+		assert_same_nearest(station_index.nearest(lat, lon, k),
+							brute_force_nearest(stations, lat, lon, k))
+
+
+def test_nearest_with_pending_and_removed_stations():
+	stations = load_stations()
+	# A high rebuild ratio keeps the changes out of the tree, so the pending list and
+	# the removed set are searched as well
+	station_index = StationIndex(rebuild_ratio=10)
+	for station in stations[:150]:
+		station_index.add(station)
+	station_index.rebuild()
+	for station in stations[150:]:
+		assert station_index.add_point(station.station_id, station.lat, station.lon)
+	for station in stations[:20]:
+		assert station_index.remove(station.station_id)
+	moved = stations[20]
+	moved = SimpleNamespace(station_id=moved.station_id, lat=-moved.lat, lon=moved.lon)
+	assert station_index.add(moved)
+	current = [moved] + stations[21:]
+	assert len(station_index) == len(current)
+	assert stations[0].station_id not in station_index
+	for lat, lon in get_points():
+		assert_same_nearest(station_index.nearest(lat, lon, 5),
+							brute_force_nearest(current, lat, lon, 5))
+
+
+def test_refresh():
+	stations = load_stations()
+	station_index = StationIndex.from_stations(stations[:100])
+	# Unchanged stations aren't counted as added
+	n_added, n_removed = station_index.refresh(stations[50:])
+	assert (n_added, n_removed) == (len(stations) - 100, 50)
+	assert len(station_index) == len(stations) - 50
+	for lat, lon in get_points(100):
+		assert_same_nearest(station_index.nearest(lat, lon, 3),
+							brute_force_nearest(stations[50:], lat, lon, 3))
+
+
+def test_nearest_max_age():
+	stations = load_stations()
+	station_index = StationIndex.from_stations(stations)
+	now = datetime(2024, 8, 15, 12, 0)
+	recent = stations[::4]
+	station_index.update_observations(
+		SimpleNamespace(station_or_zone_id=station.station_id,
+						observed_at=now - timedelta(minutes=10))
+		for station in recent)
+	station_index.update_observations(
+		SimpleNamespace(station_or_zone_id=station.station_id,
+						observed_at=now - timedelta(hours=3))
+		for station in stations[1::4])
+	for lat, lon in get_points(100):
+		assert_same_nearest(station_index.nearest(lat, lon, 3, timedelta(hours=1), now),
+							brute_force_nearest(recent, lat, lon, 3))
+
+
+def test_nearest_many():
+	station_index = StationIndex.from_stations(load_stations())
+	points = get_points(20)
+	assert station_index.nearest_many(points, k=2) == [
+		station_index.nearest(lat, lon, 2) for lat, lon in points]
+
+
+def test_skips_stations_without_location():
+	station_index = StationIndex()
+	assert not station_index.add(SimpleNamespace(station_id='KXXX', lat=None, lon=None))
+	assert station_index.nearest(42.36, -71.06) == []
+	assert station_index.nearest(42.36, -71.06, k=0) == []
@@ -0,0 +1,66 @@
+from datetime import datetime
+import pytest
+from requests_cache import CachedSession, DO_NOT_CACHE
+from libnws.api import NWS_API_STATIONS
+from libnws.api.get_weather import get_all_observations, process_observations
+from libnws.api.tracing import SpanExporter, disable_tracing, enable_tracing, span
+from replay import install_replay
+
+
+class SpanCollector(SpanExporter):
+
+	def __init__(self):
+		self.spans = []
+
+	def on_end(self, span):
+		self.spans.append(span)
+
+	def get(self, name: str) -> list:
+		return [span for span in self.spans if span.name == name]
+
+
+@pytest.fixture
+def session() -> CachedSession:
+	return CachedSession(backend='memory', expire_after=DO_NOT_CACHE)
+
+
+@pytest.fixture
+def adapter(session):
+	return install_replay(session)
+
+
+@pytest.fixture
+def collector():
+	collector = SpanCollector()
+	enable_tracing(collector)
+	yield collector
+	disable_tracing(collector)
+
+
+def make_observations(n: int) -> dict:
+	return {'features': [{'properties': {'timestamp': f'2024-08-15T1{i}:00:00+00:00',
+										 'cloudLayers': []}}
+						 for i in range(n)]}
+
+
+def test_response_is_processed_in_one_span_with_its_url(adapter, session, collector):
+	adapter.add(NWS_API_STATIONS + 'KBOS/observations', make_observations(3))
+	assert len(get_all_observations(session, 'KBOS')) == 3
+	fetch_span, = collector.get('get_all_observations')
+	request_span, = collector.get('http.request')
+	process_span, = collector.get('process_observations')
+	assert fetch_span.parent is None
+	assert request_span.parent is fetch_span
+	assert process_span.parent is fetch_span
+	for finished_span in (fetch_span, process_span):
+		assert finished_span.attributes['url'] == NWS_API_STATIONS + 'KBOS/observations'
+		assert finished_span.attributes['url_template'] == '/stations/{id}/observations'
+
+
+def test_process_span_outside_of_a_request(collector):
+	with span('outer') as outer_span:
+		process_observations(make_observations(1), datetime(2024, 8, 15, 12, 0), 'KBOS')
+	process_span, = collector.get('process_observations')
+	assert process_span.parent is outer_span
+	assert 'url' not in process_span.attributes
+	assert 'url_template' not in process_span.attributes
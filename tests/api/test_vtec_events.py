@@ -0,0 +1,73 @@
+from datetime import datetime
+from types import SimpleNamespace
+from libnws.service.vtec_events import VTECEventTracker
+
+
+EVENT_ID = 'KBOX.SV.W.0012.2024'
+
+# 12:00-13:00 Eastern
+VTEC_TIMES = '240815T1600Z-240815T1700Z'
+
+
+def make_alert(
+	alert_id: str,
+	action: str,
+	sent_at: datetime,
+	areas_ugc: list,
+	updated_at: datetime = None
+):
+	return SimpleNamespace(alert_id=alert_id,
+						   sent_at=sent_at,
+						   updated_at=updated_at,
+						   areas_ugc=areas_ugc,
+						   cap_vtec=[f'/O.{action}.KBOX.SV.W.0012.{VTEC_TIMES}/'])
+
+
+def test_event_is_active_while_any_zone_is_active():
+	event_tracker = VTECEventTracker()
+	event_tracker.add_alerts([
+		make_alert('a1', 'NEW', datetime(2024, 8, 15, 12, 0), ['MAC001', 'MAC003']),
+		make_alert('a2', 'CON', datetime(2024, 8, 15, 12, 10), ['MAC001']),
+		make_alert('a3', 'CAN', datetime(2024, 8, 15, 12, 20), ['MAC003']),
+	])
+	now = datetime(2024, 8, 15, 12, 30)
+	event, = event_tracker.get_active_events('SV', 'W', now=now)
+	assert event.event_id == EVENT_ID
+	assert [update.action for update in event.timeline] == ['NEW', 'CON', 'CAN']
+	assert event.action == 'CAN'
+	assert event_tracker.get_active_zones(event, now) == ['MAC001']
+	assert event.areas_ugc['MAC003'].action == 'CAN'
+	# The event ends when it ends in its last zone
+	assert not event_tracker.get_active_events('SV', 'W', now=datetime(2024, 8, 15, 13, 0))
+	event_tracker.add_alert(
+		make_alert('a4', 'CAN', datetime(2024, 8, 15, 12, 40), ['MAC001']))
+	assert not event_tracker.get_active_events('SV', 'W', now=now)
+
+
+def test_zone_state_is_from_the_latest_alert():
+	event_tracker = VTECEventTracker()
+	# The cancellation arrives before the alert that it follows
+	event_tracker.add_alerts([
+		make_alert('a2', 'CAN', datetime(2024, 8, 15, 12, 10), ['MAC001']),
+		make_alert('a1', 'NEW', datetime(2024, 8, 15, 12, 0), ['MAC001']),
+	])
+	event = event_tracker.events[EVENT_ID]
+	assert event.areas_ugc['MAC001'].action == 'CAN'
+	assert not event_tracker.is_active(event, datetime(2024, 8, 15, 12, 30))
+
+
+def test_new_revision_of_an_alert_is_added():
+	event_tracker = VTECEventTracker()
+	sent_at = datetime(2024, 8, 15, 12, 0)
+	alert = make_alert('a1', 'NEW', sent_at, ['MAC001'])
+	assert len(event_tracker.add_alert(alert)) == 1
+	assert event_tracker.add_alert(alert) == []
+	revision = make_alert('a1', 'EXP', sent_at, ['MAC001'],
+						  updated_at=datetime(2024, 8, 15, 12, 5))
+	assert len(event_tracker.add_alert(revision)) == 1
+	event = event_tracker.events[EVENT_ID]
+	assert [update.action for update in event.timeline] == ['NEW', 'EXP']
+	assert not event_tracker.is_active(event, datetime(2024, 8, 15, 12, 30))
+	assert event_tracker.prune(datetime(2024, 8, 16)) == 1
+	# Pruned alerts can be added again
+	assert len(event_tracker.add_alert(revision)) == 1
@@ -0,0 +1,136 @@
+import json
+import random
+from pathlib import Path
+from datetime import datetime
+import pytest
+from libnws.index.geometry import point_in_polygon
+from libnws.index.zone_index import ZoneIndex
+from libnws.model.geometry import PackedGeometry
+from libnws.model.zones import Zone
+
+
+TEST_DATA = Path(__file__).parent.parent / 'test_data' / 'api_responses'
+
+
+def make_zone(zone_id: str, coordinates: list) -> Zone:
+	return Zone(retrieved_at=datetime(2024, 8, 15),
+				zone_id=zone_id,
+				grid_id='BOX',
+				awips_id='BOX',
+				name=zone_id,
+				zone_type='forecast',
+				state='MA',
+				url=f'https://api.weather.gov/zones/forecast/{zone_id}',
+				county_warning_areas=['BOX'],
+				observation_stations=[],
+				forecast_offices=[],
+				effective_at=datetime(2024, 1, 1),
+				expires_at=datetime(2199, 12, 31),
+				timezones=['America/New_York'],
+				multi_polygon=(PackedGeometry.from_coordinates(coordinates)
+							   if coordinates else None))
+
+
+def load_zones() -> list:
+	"""Use the (overlapping) SIGMET areas as zone geometry, along with a zone with a
+	hole and a zone made of two polygons
+	"""
+	with open(TEST_DATA / 'nws_raw_sigmets.json') as file:
+		sigmets = json.load(file)
+	zones = []
+	for i, sigmet in enumerate(sigmets):
+		if sigmet.get('area_polygon'):
+			# The fixtures store the areas as latitude, longitude pairs
+			rings = [[[lon, lat] for lat, lon in ring] for ring in sigmet['area_polygon']]
+			zones.append(make_zone(f'SIG{i:03d}', rings))
+	zones.append(make_zone('HOLE', [[[-100, 30], [-90, 30], [-90, 40], [-100, 40]],
+								   [[-97, 33], [-93, 33], [-93, 37], [-97, 37]]]))
+	zones.append(make_zone('PAIR', [[[[-80, 25], [-78, 25], [-79, 27]]],
+								   [[[-70, 45], [-68, 45], [-69, 47]]]]))
+	zones.append(make_zone('EMPTY', None))
+	return zones
+
+
+def brute_force_lookup(zones: list, lat: float, lon: float) -> set:
+	return {zone.zone_id for zone in zones
+			if zone.multi_polygon is not None
+			and any(point_in_polygon(lon, lat, polygon)
+					for polygon in zone.multi_polygon.get_rings())}
+
+
+def get_points(count: int = 1000) -> list:
+	points_random = random.Random(20240815)
+	return [(points_random.uniform(10, 65), points_random.uniform(-180, -50))
+			for _ in range(count)]
+
+
+@pytest.fixture(scope='module')
+def zones() -> list:
+	return load_zones()
+
+
+@pytest.fixture(scope='module')
+def expected_lookups(zones) -> list:
+	return [(lat, lon, brute_force_lookup(zones, lat, lon)) for lat, lon in get_points()]
+
+
+@pytest.mark.parametrize('cell_size', [0.25, 0.5, 5])
+def test_lookup_matches_brute_force(zones, expected_lookups, cell_size):
+	zone_index = ZoneIndex.from_zones(zones, cell_size)
+	for lat, lon, expected in expected_lookups:
+		assert set(zone_index.lookup(lat, lon)) == expected, (lat, lon)
+	# Make sure the points actually exercise the index
+	assert sum(bool(expected) for _, _, expected in expected_lookups) > 100
+
+
+def test_lookup_skips_zones_without_geometry(zones):
+	zone_index = ZoneIndex.from_zones(zones)
+	assert 'EMPTY' not in zone_index.zone_ids
+	assert len(zone_index) == len(zones) - 1
+
+
+def test_lookup_hole_and_multipolygon(zones):
+	zone_index = ZoneIndex.from_zones(zones)
+	assert 'HOLE' in zone_index.lookup(31, -99)
+	assert 'HOLE' not in zone_index.lookup(35, -95)
+	assert 'PAIR' in zone_index.lookup(25.5, -79)
+	assert 'PAIR' in zone_index.lookup(45.5, -69)
+	assert 'PAIR' not in zone_index.lookup(35, -75)
+
+
+def test_lookup_outside_grid(zones):
+	zone_index = ZoneIndex.from_zones(zones)
+	assert zone_index.lookup(-45, 170) == []
+
+
+def test_lookup_many(zones):
+	zone_index = ZoneIndex.from_zones(zones)
+	points = get_points(50)
+	assert zone_index.lookup_many(points) == [zone_index.lookup(lat, lon)
+											  for lat, lon in points]
+
+
+def test_empty_index():
+	zone_index = ZoneIndex.from_zones([])
+	assert len(zone_index) == 0
+	assert zone_index.lookup(42.36, -71.06) == []
+
+
+def test_save_and_load(zones, tmp_path):
+	zone_index = ZoneIndex.from_zones(zones)
+	path = str(tmp_path / 'zones.idx')
+	zone_index.save(path)
+	loaded_index = ZoneIndex.load(path)
+	try:
+		assert loaded_index.zone_ids == zone_index.zone_ids
+		points = get_points(500)
+		assert loaded_index.lookup_many(points) == zone_index.lookup_many(points)
+	finally:
+		loaded_index.close()
+
+
+def test_load_rejects_other_files(tmp_path):
+	path = tmp_path / 'not_an_index'
+	path.write_bytes(b'\0' * 256)
+	with pytest.raises(ValueError):
+		ZoneIndex.load(str(path))
@@ -0,0 +1,444 @@
+"""Rebuild API responses from the fixtures in `tests/test_data/api_responses`
+
+The fixtures are real responses, but they were saved after an early version of the
+parsers had flattened them (eg `alert_sent_at` instead of `properties.sent`, naive
+Eastern times instead of UTC, and measures without their `unitCode`). Each `build_*`
+function here turns a fixture back into the shape the API sends, so that the current
+fetchers can be run on it through `replay.ReplayAdapter`.
+"""
+
+import os
+import json
+from datetime import datetime
+from typing import Dict, List
+import pytz
+from libnws.api import METAR_CLOUD_COVER_MAP
+
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+							'test_data',
+							'api_responses')
+
+# Descriptions back to cloud cover codes. 'Clear Sky' is both SKC and CLR, and CLR is
+# what automated stations report.
+CLOUD_COVER_CODES = {description: code
+					 for code, description in METAR_CLOUD_COVER_MAP.items()}
+
+# (API field, fixture field, unit) of each measure in an observation
+OBSERVATION_MEASURES = (
+	('elevation',					'station_elevation_m',	'wmoUnit:m'),
+	('temperature',					'temperature_c',		'wmoUnit:degC'),
+	('dewpoint',					'dew_point_c',			'wmoUnit:degC'),
+	('windDirection',				'wind_direction_deg_ang', 'wmoUnit:degree_(angle)'),
+	('windSpeed',					'wind_speed_kmph',		'wmoUnit:km_h-1'),
+	('windGust',					'wind_gust_kmph',		'wmoUnit:km_h-1'),
+	('barometricPressure',			'barometric_pressure_pa', 'wmoUnit:Pa'),
+	('seaLevelPressure',			'sea_level_pressure_pa', 'wmoUnit:Pa'),
+	('visibility',					'visibility_m',			'wmoUnit:m'),
+	('maxTemperatureLast24Hours',	'max_temp_last_24h_c',	'wmoUnit:degC'),
+	('minTemperatureLast24Hours',	'min_temp_last_24h_c',	'wmoUnit:degC'),
+	('precipitationLastHour',		'precip_last_1h_mm',	'wmoUnit:mm'),
+	('precipitationLast3Hours',		'precip_last_3h_mm',	'wmoUnit:mm'),
+	('precipitationLast6Hours',		'precip_last_6h_mm',	'wmoUnit:mm'),
+	('relativeHumidity',			'relative_humidity_pc',	'wmoUnit:percent'),
+	('windChill',					'wind_chill_c',			'wmoUnit:degC'),
+	('heatIndex',					'heat_index_c',			'wmoUnit:degC'),
+)
+
+# (API field, fixture field, unit) of each measure in a radar station's performance
+RADAR_PERFORMANCE_MEASURES = (
+	('fuelLevel',						'fuel_level',				'wmoUnit:percent'),
+	('dynamicRange',					'dynamic_range',			'wmoUnit:dB'),
+	('transmitterPeakPower',			'transmitter_peak_power',	'wmoUnit:kW'),
+	('transmitterImbalance',			'transmitter_imbalance',	'wmoUnit:dB'),
+	('transmitterLeavingAirTemperature', 'transmitter_leaving_air_temp_c', 'wmoUnit:degC'),
+	('shelterTemperature',				'shelter_temp_c',			'wmoUnit:degC'),
+	('radomeAirTemperature',			'radome_air_temp_c',		'wmoUnit:degC'),
+	('horizontalNoiseTemperature',		'horizontal_noise_temp_c',	'wmoUnit:degC'),
+	('horizontalDeltadbZ0',				'horizontal_delta_db',		'wmoUnit:dB'),
+	('verticalDeltadbZ0',				'vertical_delta_db',		'wmoUnit:dB'),
+	('receiverBias',					'receiver_bias',			'wmoUnit:dB'),
+	('horizontalShortPulseNoise',		'horizontal_short_pulse_noise', 'wmoUnit:dB_m-1'),
+	('horizontalLongPulseNoise',		'horizontal_long_pulse_noise', 'wmoUnit:dB_m-1'),
+)
+
+# API field of each fixture field in a radar station's adaptation
+RADAR_ADAPTATION_FIELDS = {
+	'transmitterFrequency':						'transmitter_frequency',
+	'transmitterPowerDataWattsFactor':			'transmitter_power_data_watts_factor',
+	'antennaGainIncludingRadome':				'antenna_gain_incl_radome',
+	'cohoPowerAtA1J4':							'coho_power_at_a1j4',
+	'staloPowerAtA1J2':							'stalo_power_at_a1j2',
+	'horizontalReceiverNoiseLongPulse':			'horizontal_receiver_noise_long_pulse',
+	'horizontalReceiverNoiseShortPulse':		'horizontal_receiver_noise_short_pulse',
+	'transmitterSpectrumFilterInstalled':		'transmitter_spectrum_filter_installed',
+	'pulseWidthTransmitterOutputLongPulse':		'pulse_width_transmitter_out_long_pulse',
+	'pulseWidthTransmitterOutputShortPulse':	'pulse_width_transmitter_out_short_pulse',
+	'ameNoiseSourceHorizontalExcessNoiseRatio':	'ame_noise_source_horizontal_excess_noise_ratio',
+	'ameHorzizontalTestSignalPower':			'ame_horizontal_test_signal_power',
+	'pathLossWG04Circulator':					'path_loss_wg04_circulator',
+	'pathLossWG02HarmonicFilter':				'path_loss_wg02_harmonic_filter',
+	'pathLossWG06SpectrumFilter':				'path_loss_wg06_spectrum_filter',
+	'pathLossIFDRIFAntiAliasFilter':			'path_loss_ifd_rif_anti_alias_filter',
+	'pathLossIFDBurstAntiAliasFilter':			'path_loss_ifd_burst_anti_alias_filter',
+	'pathLossA6ArcDetector':					'path_loss_a6_arc_detector',
+	'pathLossTransmitterCouplerCoupling':		'path_loss_transmitter_coupler_coupling',
+	'pathLossVerticalIFHeliaxTo4AT16':			'path_loss_vertical_f_heliax_to_4at16',
+	'pathLossHorzontalIFHeliaxTo4AT17':			'path_loss_horizontal_f_heliax_to_4at17',
+	'pathLossAT4Attenuator':					'path_loss_at4_attenuator',
+	'pathLossWaveguideKlystronToSwitch':		'path_loss_waveguide_klystron_to_switch',
+}
+
+
+def load_fixture(name: str):
+	"""Load a fixture by name (eg `alerts` for `nws_raw_alerts.json`)"""
+	with open(os.path.join(FIXTURES_DIR, f'nws_raw_{name}.json')) as file:
+		return json.load(file)
+
+
+def to_api_timestamp(timestamp: str) -> str:
+	"""Convert a fixture's naive Eastern time back to the API's UTC timestamps. ISO
+	timestamps with an offset are already in the API's format.
+	"""
+	if not timestamp or 'T' in timestamp:
+		return timestamp
+	local_time = pytz.timezone('US/Eastern').localize(datetime.fromisoformat(timestamp))
+	return local_time.astimezone(pytz.utc).isoformat()
+
+
+def to_measure(value, unit: str) -> dict:
+	return {'unitCode': unit, 'value': value}
+
+
+def to_feature_collection(features: List[dict]) -> dict:
+	return {'type': 'FeatureCollection', 'features': features}
+
+
+def build_alert(alert: dict) -> dict:
+	properties = {
+		'@id':				alert.get('alert_url'),
+		'id':				alert.get('alert_id'),
+		'areaDesc':			alert.get('alert_area_desc'),
+		'geocode':			{
+			'SAME':				alert.get('alert_areas_same'),
+			'UGC':				alert.get('alert_areas_ugc'),
+		},
+		'affectedZones':	alert.get('alert_area_urls'),
+		'references':		[{
+			'@id':				prior_alert.get('prior_alert_url'),
+			'identifier':		prior_alert.get('prior_alert_id'),
+			'sent':				to_api_timestamp(prior_alert.get('prior_alert_sent_at')),
+		} for prior_alert in alert.get('prior_alerts', [])],
+		'sent':				to_api_timestamp(alert.get('alert_sent_at')),
+		'effective':		to_api_timestamp(alert.get('alert_effective_at')),
+		'onset':			to_api_timestamp(alert.get('alert_onset_at')),
+		'expires':			to_api_timestamp(alert.get('alert_expires_at')),
+		'ends':				to_api_timestamp(alert.get('alert_ends_at')),
+		'status':			alert.get('alert_status'),
+		'messageType':		alert.get('alert_message_type'),
+		'category':			alert.get('alert_category'),
+		'certainty':		alert.get('alert_certainty'),
+		'urgency':			alert.get('alert_urgency'),
+		'event':			alert.get('alert_event_type'),
+		'sender':			alert.get('alert_sent_by'),
+		'senderName':		alert.get('alert_sent_by_name'),
+		'headline':			alert.get('alert_headline'),
+		'description':		alert.get('alert_description'),
+		'instruction':		alert.get('alert_instruction'),
+		'response':			alert.get('alert_response_type'),
+		'parameters':		{
+			'AWIPSidentifier':	alert.get('alert_cap_awips_id'),
+			'WMOidentifier':	alert.get('alert_cap_wmo_id'),
+			'NWSheadline':		alert.get('alert_cap_headline'),
+			'BLOCKCHANNEL':		alert.get('alert_cap_blocked_channels'),
+			'VTEC':				alert.get('alert_cap_vtec'),
+		},
+	}
+	return {
+		'id':			alert.get('alert_url'),
+		'type':			'Feature',
+		'geometry':		None,
+		'properties':	properties,
+	}
+
+
+def build_alerts(alerts: List[dict]) -> dict:
+	return to_feature_collection([build_alert(alert) for alert in alerts])
+
+
+def build_products(products: List[dict]) -> dict:
+	return {'@graph': [{
+		'@id':				f'https://api.weather.gov/products/{product.get("product_id")}',
+		'id':				product.get('product_id'),
+		'wmoCollectiveId':	product.get('product_wmo_id'),
+		'issuingOffice':	product.get('issuing_office'),
+		'issuanceTime':		to_api_timestamp(product.get('issued_at')),
+		'productCode':		product.get('product_code'),
+		'productName':		product.get('product_name'),
+	} for product in products]}
+
+
+def build_zone(zone: dict) -> dict:
+	return {
+		'id':			zone.get('zone_url'),
+		'type':			'Feature',
+		'geometry':		{'type': 'MultiPolygon', 'coordinates': zone.get('multi_polygon')},
+		'properties':	{
+			'@id':						zone.get('zone_url'),
+			'id':						zone.get('zone_id'),
+			'type':						zone.get('zone_type'),
+			'name':						zone.get('zone_name'),
+			'effectiveDate':			to_api_timestamp(zone.get('zone_effective_at')),
+			'expirationDate':			to_api_timestamp(zone.get('zone_expires_at')),
+			'state':					zone.get('state'),
+			'cwa':						zone.get('county_warning_areas'),
+			'forecastOffices':			zone.get('forecast_offices'),
+			'timeZone':					zone.get('timezones'),
+			'observationStations':		zone.get('observation_stations'),
+			'gridIdentifier':			zone.get('grid_id'),
+			'awipsLocationIdentifier':	zone.get('awips_id'),
+		},
+	}
+
+
+def build_sigmet(sigmet: dict) -> dict:
+	geometry = None
+	if sigmet.get('area_polygon'):
+		# The fixtures' points are (lat, lon), and GeoJSON's are (lon, lat)
+		rings = [[[lon, lat] for lat, lon in ring] for ring in sigmet['area_polygon']]
+		geometry = {'type': 'Polygon', 'coordinates': rings}
+	return {
+		'id':			sigmet.get('sigmets_url'),
+		'type':			'Feature',
+		'geometry':		geometry,
+		'properties':	{
+			'id':			sigmet.get('sigmets_url'),
+			'issueTime':	sigmet.get('issued_at'),
+			'fir':			sigmet.get('fir'),
+			'atsu':			sigmet.get('atsu'),
+			'sequence':		sigmet.get('sequence'),
+			'phenomenon':	sigmet.get('phenomenon'),
+			'start':		sigmet.get('effective_at'),
+			'end':			sigmet.get('expires_at'),
+		},
+	}
+
+
+def build_sigmets(sigmets: List[dict]) -> dict:
+	return to_feature_collection([build_sigmet(sigmet) for sigmet in sigmets])
+
+
+def build_radar_station(station: dict) -> dict:
+	rda_properties = {
+		'resolutionVersion':				station.get('rda_resolution_version'),
+		'nl2Path':							station.get('rda_nexrad_l2_path'),
+		'volumeCoveragePattern':			station.get('rda_volume_coverage_pattern'),
+		'controlStatus':					station.get('rda_control_status'),
+		'buildNumber':						station.get('rda_build_number'),
+		'alarmSummary':						station.get('rda_alarm_summary'),
+		'mode':								station.get('rda_mode'),
+		'generatorState':					station.get('rda_generator_state'),
+		'superResolutionStatus':			station.get('rda_super_resolution_status'),
+		'operabilityStatus':				station.get('rda_operability_status'),
+		'status':							station.get('rda_status'),
+		'averageTransmitterPower':			to_measure(station.get('rda_average_tx_power_w'),
+													   'wmoUnit:W'),
+		'reflectivityCalibrationCorrection': to_measure(
+			station.get('rda_reflectivity_calibration_correction_db'), 'wmoUnit:dB'),
+	}
+	performance_properties = {
+		'performanceCheckTime':		station.get('performance_checked_at'),
+		'ntp_status':				station.get('ntp_status'),
+		'commandChannel':			station.get('command_channel'),
+		'linearity':				station.get('linearity'),
+		'powerSource':				station.get('power_source'),
+		'transmitterRecycleCount':	station.get('transmitter_recycle_count'),
+		'transitionalPowerSource':	station.get('transitional_power_source'),
+		'elevationEncoderLight':	station.get('elevation_encoder_light'),
+		'azimuthEncoderLight':		station.get('azimuth_encoder_light'),
+	}
+	for api_field, fixture_field, unit in RADAR_PERFORMANCE_MEASURES:
+		performance_properties[api_field] = to_measure(station.get(fixture_field), unit)
+	adaptation = {api_field: station.get(fixture_field)
+				  for api_field, fixture_field in RADAR_ADAPTATION_FIELDS.items()}
+	adaptation.update({'timestamp': None, 'reportingHost': None})
+	station_url = f'https://api.weather.gov/radar/stations/{station.get("station_id")}'
+	return {
+		'id':			station_url,
+		'type':			'Feature',
+		# The fixtures were saved with latitude and longitude swapped, so `station_lat`
+		# is the longitude, as GeoJSON puts first
+		'geometry':		{
+			'type':			'Point',
+			'coordinates':	[station.get('station_lat'), station.get('station_lon')],
+		},
+		'properties':	{
+			'@id':			station_url,
+			'id':			station.get('station_id'),
+			'name':			station.get('station_name'),
+			'stationType':	station.get('station_type'),
+			'timeZone':		station.get('station_timezone'),
+			'elevation':	to_measure(station.get('elevation_m'), 'wmoUnit:m'),
+			'latency':		{
+				'current':					to_measure(station.get('latency_current_None'),
+													   'nwsUnit:s'),
+				'average':					to_measure(station.get('latency_average_None'),
+													   'nwsUnit:s'),
+				'max':						to_measure(station.get('latency_max_None'),
+													   'nwsUnit:s'),
+				'levelTwoLastReceivedTime':	to_api_timestamp(
+					station.get('nexrad_l2_latency_last_received_at')),
+				'maxLatencyTime':			to_api_timestamp(station.get('max_latency_at')),
+				'reportingHost':			station.get('station_reporting_host'),
+				'host':						station.get('station_server_host'),
+			},
+			'rda':			{
+				'timestamp':		to_api_timestamp(station.get('rda_refreshed_at')),
+				'reportingHost':	station.get('rda_reporting_host'),
+				'properties':		rda_properties,
+			},
+			'performance':	{
+				'timestamp':		station.get('refreshed_at'),
+				'reportingHost':	station.get('reporting_host'),
+				'properties':		performance_properties,
+			},
+			'adaptation':	adaptation,
+		},
+	}
+
+
+def build_forecast(periods: Dict[str, dict]) -> dict:
+	first_period = next(iter(periods.values()), {})
+	return {
+		'type':			'Feature',
+		'geometry':		None,
+		'properties':	{
+			'units':		'us',
+			'generatedAt':	to_api_timestamp(first_period.get('forecast_generated_at')),
+			'updateTime':	to_api_timestamp(first_period.get('forecast_updated_at')),
+			'periods':		[{
+				'number':						int(number),
+				'name':							period.get('period_name'),
+				'startTime':					to_api_timestamp(period.get('period_start_at')),
+				'endTime':						to_api_timestamp(period.get('period_end_at')),
+				'isDaytime':					period.get('is_daytime'),
+				'temperature':					period.get('temperature_f'),
+				'temperatureUnit':				'F',
+				'temperatureTrend':				period.get('temperature_trend'),
+				'probabilityOfPrecipitation':	to_measure(period.get('precipitation_pc'),
+														   'wmoUnit:percent'),
+				'dewpoint':						to_measure(period.get('dew_point_c'),
+														   'wmoUnit:degC'),
+				'relativeHumidity':				to_measure(period.get('humidity_pc'),
+														   'wmoUnit:percent'),
+				'windSpeed':					period.get('wind_speed'),
+				'windDirection':				period.get('wind_direction'),
+				'icon':							period.get('period_forecast_icon_url'),
+				'shortForecast':				period.get('period_forecast_short'),
+				'detailedForecast':				period.get('period_forecast_detailed'),
+			} for number, period in periods.items()],
+		},
+	}
+
+
+def build_observation(observation: dict, station_id: str) -> dict:
+	cloud_layers = []
+	for height, description in (observation.get('cloud_layers') or {}).items():
+		base = None if height == 'None' else int(height.rstrip('m'))
+		cloud_layers.append({'base':	to_measure(base, 'wmoUnit:m'),
+							 'amount':	CLOUD_COVER_CODES.get(description)})
+	observed_at = to_api_timestamp(observation.get('observed_at'))
+	observation_url = (f'https://api.weather.gov/stations/{station_id}/observations/'
+					   f'{observed_at}')
+	properties = {
+		'@id':				observation_url,
+		'station':			f'https://api.weather.gov/stations/{station_id}',
+		'timestamp':		observed_at,
+		'rawMessage':		observation.get('raw_message'),
+		'textDescription':	observation.get('text_description'),
+		'icon':				observation.get('icon_url'),
+		'presentWeather':	[],
+		'cloudLayers':		cloud_layers,
+	}
+	for api_field, fixture_field, unit in OBSERVATION_MEASURES:
+		properties[api_field] = to_measure(observation.get(fixture_field), unit)
+	return {
+		'id':			observation_url,
+		'type':			'Feature',
+		'geometry':		None,
+		'properties':	properties,
+	}
+
+
+def build_observations(observations: List[dict], station_id: str) -> dict:
+	return to_feature_collection([build_observation(observation, station_id)
+								  for observation in observations])
+
+
+def build_radar_server(server: dict) -> dict:
+	network = {'timestamp': to_api_timestamp(server.get('network_interfaces_refreshed_at'))}
+	for interface in server.get('interfaces') or []:
+		network[interface.get('interface_name')] = {
+			'interface':	interface.get('interface_name'),
+			'active':		interface.get('is_interface_active'),
+			'transNoError':	interface.get('packets_out_ok'),
+			'transError':	interface.get('packets_out_error'),
+			'transDropped':	interface.get('packets_out_dropped'),
+			'transOverrun':	interface.get('packets_out_overrun'),
+			'recvNoError':	interface.get('packets_in_ok'),
+			'recvError':	interface.get('packets_in_error'),
+			'recvDropped':	interface.get('packets_in_dropped'),
+			'recvOverrun':	interface.get('packets_in_overrun'),
+		}
+	return {
+		'id':				server.get('server_host'),
+		'type':				server.get('server_type'),
+		'active':			server.get('is_server_active'),
+		'primary':			server.get('is_server_primary'),
+		'aggregate':		server.get('is_server_aggregate'),
+		'locked':			server.get('is_server_locked'),
+		'radarNetworkUp':	server.get('is_radar_network_up'),
+		'collectionTime':	to_api_timestamp(server.get('collection_time')),
+		'reportingHost':	server.get('reporting_host'),
+		'hardware':			{
+			'timestamp':		to_api_timestamp(server.get('server_hardware_refresh_at')),
+			'uptime':			to_api_timestamp(server.get('server_up_since')),
+			'cpuIdle':			server.get('server_cpu'),
+			'memory':			server.get('server_memory'),
+			'ioUtilization':	server.get('server_io_utilization'),
+			'disk':				server.get('server_disk'),
+			'load1':			server.get('server_load_1'),
+			'load5':			server.get('server_load_5'),
+			'load15':			server.get('server_load_15'),
+		},
+		'command':			{
+			'timestamp':			to_api_timestamp(server.get('command_last_refresh_at')),
+			'lastExecuted':			server.get('command_last_executed'),
+			'lastExecutedTime':		to_api_timestamp(server.get('command_last_executed_at')),
+			'lastNexradDataTime':	to_api_timestamp(server.get('command_last_nexrad_data_at')),
+			'lastReceived':			server.get('command_last_received'),
+			'lastReceivedTime':		to_api_timestamp(server.get('command_last_received_at')),
+		},
+		'ldm':				{
+			'timestamp':		to_api_timestamp(server.get('ldm_refresh_at')),
+			'latestProduct':	to_api_timestamp(server.get('ldm_latest_product_at')),
+			'oldestProduct':	to_api_timestamp(server.get('ldm_oldest_product_at')),
+			'storageSize':		server.get('ldm_storage_size'),
+			'count':			server.get('ldm_count'),
+			'active':			server.get('is_ldm_active'),
+		},
+		'ping':				{
+			'timestamp':	to_api_timestamp(server.get('last_ping_at')),
+			'targets':		{
+				'ldm':		server.get('ping_responses_ldm'),
+				'radar':	server.get('ping_responses_radar'),
+				'server':	server.get('ping_responses_server'),
+				'misc':		server.get('ping_responses_misc'),
+			},
+		},
+		'network':			network,
+	}
+
+
+def build_radar_servers(servers: List[dict]) -> dict:
+	return {'@graph': [build_radar_server(server) for server in servers]}
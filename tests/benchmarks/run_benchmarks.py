@@ -0,0 +1,477 @@
+"""Benchmark the fetchers on replayed API responses
+
+Each endpoint's fixture is rebuilt into the response the API sends (see `fixtures`) and
+served by a `replay.ReplayAdapter`, so every run measures the same work the
+fetcher does on a real response (the transport, `requests-cache`, JSON decoding, and
+processing) without the network. For each endpoint this reports:
+
+- Throughput, in items per second and MB of response per second
+- The memory held by the fetcher's result (KB, and the number of allocated blocks)
+- The peak memory used while fetching and processing one response
+
+With `--synthetic SCALE`, the endpoints are run on responses from
+`synthetic.PayloadGenerator` with SCALE times the national volume of items instead, and
+the processed items are also written to each repository, to measure the parsers and
+repositories at scale.
+
+The results are compared to the baselines in `baselines.json`, and the run fails if an
+endpoint uses more memory than its baseline allows, or has gotten slower than its
+baseline allows. Endpoints whose calls take less than `MIN_GATED_CALL_MS` are too noisy
+to compare, so their speed is only reported. Baselines depend on the machine they were
+recorded on, so record new ones (with `--update`) before comparing changes on a
+different machine.
+
+Run from anywhere, eg from the root of the repository:
+
+.. code-block:: console
+
+	python tests/benchmarks/run_benchmarks.py
+	python tests/benchmarks/run_benchmarks.py alerts sigmets
+	python tests/benchmarks/run_benchmarks.py --update
+	python tests/benchmarks/run_benchmarks.py --synthetic 100
+"""
+
+import os
+import sys
+import json
+import time
+import inspect
+import argparse
+import platform
+import statistics
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List
+from requests_cache import CachedSession, DO_NOT_CACHE
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+TESTS_DIR = os.path.dirname(BENCHMARKS_DIR)
+# When this is run as a script, only its own directory is on the path
+for path in (os.path.dirname(TESTS_DIR), TESTS_DIR, BENCHMARKS_DIR):
+	if path not in sys.path:
+		sys.path.insert(0, path)
+
+from libnws.api.api_request import api_request
+from libnws.api.get_alerts import get_alerts, process_alert_data
+from libnws.api.get_aviation import get_all_sigmets
+from libnws.api.get_products import get_products_by_type, process_product_data
+from libnws.api.get_radar import (
+	RADAR_SERVER_SUB_OBJECT_FIELDS,
+	get_radar_servers,
+	get_radar_station,
+	process_radar_stations,
+)
+from libnws.api.get_weather import (
+	get_all_observations,
+	get_extended_forecast,
+	get_hourly_forecast,
+	get_latest_observations,
+	process_observations,
+)
+from libnws.api.get_zones import get_zone, get_zones
+from libnws.api import (
+	NWS_API_ALERTS,
+	NWS_API_AVIATION_SIGMETS,
+	NWS_API_PRODUCT_TYPES,
+	NWS_API_RADAR_SERVERS,
+	NWS_API_RADAR_STATIONS,
+	NWS_API_STATIONS,
+	NWS_API_ZONES,
+)
+from libnws.model.locations import Location
+from libnws.repository.memory import InMemoryRepository
+from libnws.repository.sqlite import SQLiteRepository
+from replay import ReplayAdapter, install_replay
+import fixtures
+import synthetic
+
+
+BASELINES_PATH = os.path.join(BENCHMARKS_DIR, 'baselines.json')
+
+# Keep calling each fetcher for at least this long, to even out timing noise
+DEFAULT_MIN_TIME_S = 1.0
+
+# Throughput varies by 10-20% between runs on the same machine, while memory use
+# hardly varies at all
+DEFAULT_SPEED_TOLERANCE = 0.25
+DEFAULT_MEMORY_TOLERANCE = 0.10
+
+# Calls this fast vary by far more than the speed tolerance between runs of the same
+# tree (eg with garbage collection and CPU frequency), so their speed isn't compared
+MIN_GATED_CALL_MS = 20
+
+# Memory use that's this close to its baseline is never a regression, however small the
+# baseline is. Small allocations (eg by the interpreter or SQLite) vary by a few KB
+# between runs, which is far more than 10% of a baseline of a few KB.
+MIN_MEMORY_REGRESSION_KB = 64
+
+
+@dataclass
+class Endpoint:
+	"""A fetcher, the URL it requests, and the response to replay for it
+
+	Repository benchmarks don't make a request, so they have no URL or payload.
+	"""
+	name: str
+	url: str
+	payload: Any
+	fetch: Callable[[CachedSession], Any]
+
+
+def unwrap(fetcher: Callable) -> Callable:
+	"""Skip a fetcher's `display_spinner`, so that drawing the spinner isn't timed"""
+	return inspect.unwrap(fetcher)
+
+
+def get_location() -> Location:
+	location_data = fixtures.load_fixture('location_data')
+	return Location(city=location_data.get('city'),
+					state=location_data.get('state'),
+					timezone=location_data.get('timezone'),
+					grid_x=location_data.get('grid_x'),
+					grid_y=location_data.get('grid_y'),
+					forecast_office=location_data.get('county_warning_area'),
+					radar_station=location_data.get('radar_station'),
+					forecast_office_url=location_data.get('forecast_office_url'),
+					forecast_extended_url=location_data.get('forecast_extended_url'),
+					forecast_hourly_url=location_data.get('forecast_hourly_url'),
+					gridpoints_url=location_data.get('gridpoints_url'),
+					observation_stations_url=location_data.get('observation_stations_url'))
+
+
+def get_endpoints() -> List[Endpoint]:
+	"""Get an `Endpoint` for every fetcher that has a fixture to replay"""
+	location = get_location()
+	products = fixtures.load_fixture('products_by_type')
+	product_type = products[0].get('product_code')
+	zone = fixtures.load_fixture('zone')
+	radar_station = fixtures.load_fixture('radar_station')
+	radar_servers = fixtures.build_radar_servers(fixtures.load_fixture('radar_servers'))
+	observations = fixtures.load_fixture('observations_all')
+	latest_observation = fixtures.load_fixture('observations_latest')
+	station_id = observations[0].get('raw_message').split()[0]
+	return [
+		Endpoint('alerts',
+				 NWS_API_ALERTS,
+				 fixtures.build_alerts(fixtures.load_fixture('alerts')),
+				 lambda session: unwrap(get_alerts)(session)),
+		Endpoint('products_by_type',
+				 NWS_API_PRODUCT_TYPES + f'/{product_type}',
+				 fixtures.build_products(products),
+				 lambda session: unwrap(get_products_by_type)(session, product_type)),
+		Endpoint('zone',
+				 NWS_API_ZONES + f'/{zone.get("zone_type")}/{zone.get("zone_id")}',
+				 fixtures.build_zone(zone),
+				 lambda session: unwrap(get_zone)(session, zone.get('zone_type'),
+												  zone.get('zone_id'))),
+		Endpoint('sigmets',
+				 NWS_API_AVIATION_SIGMETS,
+				 fixtures.build_sigmets(fixtures.load_fixture('sigmets')),
+				 lambda session: unwrap(get_all_sigmets)(session)),
+		Endpoint('radar_station',
+				 NWS_API_RADAR_STATIONS + radar_station.get('station_id'),
+				 fixtures.build_radar_station(radar_station),
+				 lambda session: unwrap(get_radar_station)(session,
+														   radar_station.get('station_id'))),
+		# The servers' sub-object fields are parsed when they're first accessed, unless
+		# they're asked for up front. Compare the memory each way holds on to.
+		Endpoint('radar_servers',
+				 NWS_API_RADAR_SERVERS,
+				 radar_servers,
+				 lambda session: unwrap(get_radar_servers)(session)),
+		Endpoint('radar_servers_eager',
+				 NWS_API_RADAR_SERVERS,
+				 radar_servers,
+				 lambda session: unwrap(get_radar_servers)(session,
+														   RADAR_SERVER_SUB_OBJECT_FIELDS)),
+		Endpoint('forecast_extended',
+				 location.forecast_extended_url,
+				 fixtures.build_forecast(fixtures.load_fixture('forecast_extended')),
+				 lambda session: unwrap(get_extended_forecast)(session, location)),
+		Endpoint('forecast_hourly',
+				 location.forecast_hourly_url,
+				 fixtures.build_forecast(fixtures.load_fixture('forecast_hourly')),
+				 lambda session: unwrap(get_hourly_forecast)(session, location)),
+		Endpoint('observations_all',
+				 NWS_API_STATIONS + station_id + '/observations',
+				 fixtures.build_observations(observations, station_id),
+				 lambda session: unwrap(get_all_observations)(session, station_id)),
+		Endpoint('observations_latest',
+				 NWS_API_STATIONS + station_id + '/observations/latest',
+				 fixtures.build_observation(latest_observation, station_id),
+				 lambda session: unwrap(get_latest_observations)(session, station_id)),
+	]
+
+
+def get_synthetic_endpoints(scale: float, seed: int = 0) -> List[Endpoint]:
+	"""Get an `Endpoint` for each synthetic response, and for writing each kind of
+	processed item to a repository
+
+	:param scale: How many times the national volume of items to generate
+	"""
+	generator = synthetic.PayloadGenerator(seed)
+	volumes = {name: max(1, round(volume * scale))
+			   for name, volume in synthetic.NATIONAL_VOLUMES.items()}
+	suffix = f'{scale:g}x'
+	product_type = 'AFD'
+	station_id = 'KXYZ'
+	zones_url = NWS_API_ZONES + '/public?include_geometry=true'
+	alerts_payload = generator.alerts(volumes['alerts'])
+	products_payload = generator.products(volumes['products'], product_type)
+	observations_payload = generator.observations(volumes['observations'], station_id)
+	radar_servers_payload = generator.radar_servers(volumes['radar_servers'])
+	retrieved_at = synthetic.BASE_TIME
+	alerts = process_alert_data(alerts_payload, retrieved_at)
+	products = process_product_data(products_payload['@graph'], retrieved_at)
+	observations = process_observations(observations_payload, retrieved_at, station_id)
+	return [
+		Endpoint(f'synthetic_alerts_{suffix}',
+				 NWS_API_ALERTS,
+				 alerts_payload,
+				 lambda session: unwrap(get_alerts)(session)),
+		Endpoint(f'synthetic_products_{suffix}',
+				 NWS_API_PRODUCT_TYPES + f'/{product_type}',
+				 products_payload,
+				 lambda session: unwrap(get_products_by_type)(session, product_type)),
+		Endpoint(f'synthetic_observations_{suffix}',
+				 NWS_API_STATIONS + station_id + '/observations',
+				 observations_payload,
+				 lambda session: unwrap(get_all_observations)(session, station_id)),
+		Endpoint(f'synthetic_zones_{suffix}',
+				 zones_url,
+				 generator.zones(volumes['zones']),
+				 lambda session: unwrap(get_zones)(session, 'public', True)),
+		# `get_radar_stations` keeps its processed result, so the call it makes on a
+		# cache miss is timed instead
+		Endpoint(f'synthetic_radar_stations_{suffix}',
+				 NWS_API_RADAR_STATIONS,
+				 generator.radar_stations(volumes['radar_stations']),
+				 lambda session: process_radar_stations(
+					 api_request(session, NWS_API_RADAR_STATIONS)['response'],
+					 retrieved_at)),
+		Endpoint(f'synthetic_radar_servers_{suffix}',
+				 NWS_API_RADAR_SERVERS,
+				 radar_servers_payload,
+				 lambda session: unwrap(get_radar_servers)(session)),
+		Endpoint(f'synthetic_radar_servers_eager_{suffix}',
+				 NWS_API_RADAR_SERVERS,
+				 radar_servers_payload,
+				 lambda session: unwrap(get_radar_servers)(session,
+														   RADAR_SERVER_SUB_OBJECT_FIELDS)),
+		Endpoint(f'sqlite_products_{suffix}',
+				 None,
+				 None,
+				 lambda session: SQLiteRepository().create_many('products', products)),
+		Endpoint(f'memory_alerts_{suffix}',
+				 None,
+				 None,
+				 lambda session: InMemoryRepository().create_many(alerts)),
+		Endpoint(f'memory_observations_{suffix}',
+				 None,
+				 None,
+				 lambda session: InMemoryRepository().create_many(observations)),
+	]
+
+
+def get_session(endpoints: List[Endpoint]) -> CachedSession:
+	"""Get a session that answers every endpoint's requests from its payload
+
+	Responses aren't cached, so that every call decodes and processes its response.
+	"""
+	session = CachedSession(backend='memory', expire_after=DO_NOT_CACHE)
+	adapter = install_replay(session, ReplayAdapter())
+	for endpoint in endpoints:
+		if endpoint.url is not None:
+			adapter.add(endpoint.url, endpoint.payload)
+	return session
+
+
+def count_items(result) -> int:
+	"""Count the items a fetcher returned (eg the periods of a forecast), or that a
+	repository wrote
+	"""
+	if isinstance(result, int):
+		return result
+	if isinstance(result, list):
+		return len(result)
+	if hasattr(result, 'periods'):
+		return len(result.periods)
+	return 1
+
+
+def time_endpoint(session: CachedSession, endpoint: Endpoint, min_time_s: float) -> dict:
+	result = endpoint.fetch(session)
+	call_times = []
+	started_at = time.perf_counter()
+	while time.perf_counter() - started_at < min_time_s or len(call_times) < 5:
+		call_started_at = time.perf_counter()
+		endpoint.fetch(session)
+		call_times.append(time.perf_counter() - call_started_at)
+	return {'items': count_items(result),
+			'calls': len(call_times),
+			'call_s': statistics.median(call_times)}
+
+
+def measure_memory(session: CachedSession, endpoint: Endpoint) -> dict:
+	"""Measure the peak memory used by one call, and the memory held by its result"""
+	tracemalloc.start()
+	try:
+		result = endpoint.fetch(session)
+		_, peak = tracemalloc.get_traced_memory()
+		snapshot = tracemalloc.take_snapshot().filter_traces([
+			tracemalloc.Filter(False, tracemalloc.__file__),
+		])
+	finally:
+		tracemalloc.stop()
+	statistics_by_file = snapshot.statistics('filename')
+	del result
+	return {'retained_kb': sum(stat.size for stat in statistics_by_file) / 1024,
+			'retained_blocks': sum(stat.count for stat in statistics_by_file),
+			'peak_kb': peak / 1024}
+
+
+def run_benchmark(
+	session: CachedSession,
+	endpoint: Endpoint,
+	min_time_s: float = DEFAULT_MIN_TIME_S
+) -> dict:
+	payload_bytes = 0
+	if endpoint.payload is not None:
+		payload_bytes = len(json.dumps(endpoint.payload).encode('utf-8'))
+	timing = time_endpoint(session, endpoint, min_time_s)
+	memory = measure_memory(session, endpoint)
+	return {
+		'items':			timing['items'],
+		'payload_kb':		round(payload_bytes / 1024, 1),
+		'calls':			timing['calls'],
+		'ms_per_call':		round(timing['call_s'] * 1000, 3),
+		'items_per_s':		round(timing['items'] / timing['call_s'], 1),
+		'mb_per_s':			round(payload_bytes / timing['call_s'] / 1e6, 2),
+		'retained_kb':		round(memory['retained_kb'], 1),
+		'retained_blocks':	memory['retained_blocks'],
+		'peak_kb':			round(memory['peak_kb'], 1),
+	}
+
+
+def get_regressions(
+	results: Dict[str, dict],
+	baselines: Dict[str, dict],
+	speed_tolerance: float = DEFAULT_SPEED_TOLERANCE,
+	memory_tolerance: float = DEFAULT_MEMORY_TOLERANCE
+) -> List[str]:
+	"""Compare results to their baselines
+
+	:returns: A description of each regression
+	"""
+	regressions = []
+	for name, result in results.items():
+		baseline = baselines.get(name)
+		if baseline is None:
+			continue
+		min_items_per_s = baseline['items_per_s'] * (1 - speed_tolerance)
+		if (baseline['ms_per_call'] >= MIN_GATED_CALL_MS
+			and result['items_per_s'] < min_items_per_s):
+			regressions.append(f'{name}: {result["items_per_s"]} items/s is below the '
+							   f'baseline of {baseline["items_per_s"]} items/s')
+		for field in ('peak_kb', 'retained_kb'):
+			max_kb = baseline[field] + max(baseline[field] * memory_tolerance,
+										   MIN_MEMORY_REGRESSION_KB)
+			if result[field] > max_kb:
+				regressions.append(f'{name}: {field} of {result[field]} is above the '
+								   f'baseline of {baseline[field]}')
+	return regressions
+
+
+def load_baselines(path: str = BASELINES_PATH) -> dict:
+	if not os.path.exists(path):
+		return {}
+	with open(path) as file:
+		return json.load(file)
+
+
+def save_baselines(results: Dict[str, dict], path: str = BASELINES_PATH):
+	baselines = load_baselines(path)
+	baselines.setdefault('endpoints', {}).update(results)
+	baselines['python'] = platform.python_version()
+	baselines['machine'] = platform.machine()
+	with open(path, 'w') as file:
+		json.dump(baselines, file, indent=4, sort_keys=True)
+		file.write('\n')
+
+
+def print_results(results: Dict[str, dict]):
+	print(f'{"endpoint":<32}{"items":>7}{"KB":>9}{"ms/call":>10}{"items/s":>11}'
+		  f'{"MB/s":>8}{"held KB":>10}{"blocks":>9}{"peak KB":>10}')
+	for name, result in results.items():
+		print(f'{name:<32}{result["items"]:>7}{result["payload_kb"]:>9}'
+			  f'{result["ms_per_call"]:>10}{result["items_per_s"]:>11}'
+			  f'{result["mb_per_s"]:>8}{result["retained_kb"]:>10}'
+			  f'{result["retained_blocks"]:>9}{result["peak_kb"]:>10}')
+
+
+def main(argv: List[str] = None) -> int:
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument('endpoints',
+						nargs='*',
+						help='The endpoints to benchmark (default: all)')
+	parser.add_argument('--update',
+						action='store_true',
+						help='Record the results as the new baselines')
+	parser.add_argument('--min-time',
+						type=float,
+						default=DEFAULT_MIN_TIME_S,
+						help='The least time to spend timing each endpoint, in seconds')
+	parser.add_argument('--speed-tolerance',
+						type=float,
+						default=DEFAULT_SPEED_TOLERANCE,
+						help='How much slower than its baseline an endpoint can be (only '
+							 f'compared for calls of {MIN_GATED_CALL_MS} ms or more)')
+	parser.add_argument('--memory-tolerance',
+						type=float,
+						default=DEFAULT_MEMORY_TOLERANCE,
+						help='How much more memory than its baseline an endpoint can use '
+							 f'(differences under {MIN_MEMORY_REGRESSION_KB} KB are '
+							 'always allowed)')
+	parser.add_argument('--synthetic',
+						type=float,
+						metavar='SCALE',
+						help='Benchmark synthetic responses with this many times the '
+							 'national volume of items, instead of the fixtures')
+	parser.add_argument('--seed',
+						type=int,
+						default=0,
+						help='The seed to generate synthetic responses with')
+	args = parser.parse_args(argv)
+
+	if args.synthetic:
+		endpoints = get_synthetic_endpoints(args.synthetic, args.seed)
+	else:
+		endpoints = get_endpoints()
+	if args.endpoints:
+		unknown = set(args.endpoints) - {endpoint.name for endpoint in endpoints}
+		if unknown:
+			parser.error(f'Unknown endpoints: {", ".join(sorted(unknown))}')
+		endpoints = [endpoint for endpoint in endpoints if endpoint.name in args.endpoints]
+	session = get_session(endpoints)
+	results = {endpoint.name: run_benchmark(session, endpoint, args.min_time)
+			   for endpoint in endpoints}
+	print_results(results)
+
+	if args.update:
+		save_baselines(results)
+		print(f'Saved baselines to {BASELINES_PATH}')
+		return 0
+	baselines = load_baselines()
+	if baselines.get('python') not in (None, platform.python_version()):
+		print(f'Note: the baselines were recorded with Python {baselines["python"]}')
+	regressions = get_regressions(results,
+								  baselines.get('endpoints', {}),
+								  args.speed_tolerance,
+								  args.memory_tolerance)
+	for regression in regressions:
+		print(f'REGRESSION {regression}')
+	return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+	sys.exit(main())
@@ -0,0 +1,510 @@
+"""Generate large, realistic API responses for scale testing
+
+The fixtures are one real response per endpoint, at the size the API happened to send
+that day. `PayloadGenerator` builds responses in the same shape as the API's (GeoJSON
+features with the same properties, unit-coded measures, UTC timestamps, VTEC strings,
+and UGC and SAME codes) at any volume, so the parsers and repositories can be measured
+at many times the national volume without the network.
+
+Output is determined by the seed: the same seed and counts always give the same
+payloads, so benchmark results can be compared between runs.
+
+For example, to get ten times the usual number of active alerts:
+
+.. code-block:: python
+
+	generator = PayloadGenerator(seed=1)
+	alerts_payload = generator.alerts(NATIONAL_VOLUMES['alerts'] * 10)
+"""
+
+import math
+import random
+from datetime import datetime, timedelta
+from typing import List, Tuple
+import pytz
+from libnws.api import METAR_CLOUD_COVER_MAP
+
+
+# About how many of each item the API returns for the whole country at once
+NATIONAL_VOLUMES = {
+	'alerts':			500,	# active alerts on a busy day
+	'products':			1000,
+	'observations':		500,	# a station's recent observations
+	'zones':			50,
+	'radar_stations':	160,
+	'radar_servers':	6,
+}
+
+# The points in each polygon of a synthetic zone. Real coastal and county zones have
+# MultiPolygons with thousands of points.
+ZONE_POLYGONS = 20
+ZONE_POINTS_PER_POLYGON = 500
+
+# Every timestamp is at or after this time
+BASE_TIME = datetime(2024, 8, 16, tzinfo=pytz.utc)
+
+STATES = ('AL', 'AZ', 'CA', 'CO', 'FL', 'GA', 'IL', 'KS', 'MA', 'MN', 'MO', 'NC', 'NE',
+		  'NV', 'NY', 'OK', 'OR', 'PA', 'TX', 'WA')
+OFFICES = ('BOX', 'OKX', 'LWX', 'FFC', 'MFL', 'LOT', 'DTX', 'MPX', 'OAX', 'ICT', 'OUN',
+		   'FWD', 'HGX', 'BOU', 'PSR', 'VEF', 'LOX', 'SEW', 'PDT', 'SLC')
+
+# (VTEC phenomenon, significance, event name) of common alerts
+ALERT_EVENTS = (
+	('TO', 'W', 'Tornado Warning'),
+	('SV', 'W', 'Severe Thunderstorm Warning'),
+	('FF', 'W', 'Flash Flood Warning'),
+	('FL', 'W', 'Flood Warning'),
+	('HT', 'Y', 'Heat Advisory'),
+	('EH', 'W', 'Excessive Heat Warning'),
+	('FW', 'W', 'Red Flag Warning'),
+	('WS', 'W', 'Winter Storm Warning'),
+	('WI', 'Y', 'Wind Advisory'),
+	('SC', 'Y', 'Small Craft Advisory'),
+)
+VTEC_ACTIONS = ('NEW', 'CON', 'EXT', 'EXA', 'CAN', 'EXP')
+
+PRODUCT_TYPES = (
+	('AFD', 'Area Forecast Discussion'),
+	('HWO', 'Hazardous Weather Outlook'),
+	('RR2', 'Hydro-Met Data Report Part 2'),
+	('RWR', 'Regional Weather Roundup'),
+	('ZFP', 'Zone Forecast Product'),
+)
+
+CLOUD_COVER_CODES = tuple(METAR_CLOUD_COVER_MAP)
+
+
+def to_api_timestamp(timestamp: datetime) -> str:
+	return timestamp.isoformat()
+
+
+def to_measure(value, unit: str) -> dict:
+	return {'unitCode': unit, 'value': value}
+
+
+def to_feature_collection(features: List[dict]) -> dict:
+	return {'type': 'FeatureCollection', 'features': features}
+
+
+class PayloadGenerator:
+	"""Generates API responses from a seeded random number generator
+
+	:param seed: Payloads generated in the same order with the same seed are identical
+	"""
+
+	def __init__(self, seed: int = 0):
+		self.seed = seed
+		self.random = random.Random(seed)
+
+	def _point(self) -> Tuple[float, float]:
+		"""Get a (lon, lat) point in the continental US"""
+		return (round(self.random.uniform(-124, -67), 4),
+				round(self.random.uniform(25, 49), 4))
+
+	def _ring(self, center: Tuple[float, float], radius: float, n_points: int) -> list:
+		"""Get a closed ring of points around a center that doesn't cross itself"""
+		lon, lat = center
+		ring = []
+		for i in range(n_points):
+			angle = 2 * math.pi * i / n_points
+			distance = radius * self.random.uniform(0.6, 1.0)
+			ring.append([round(lon + distance * math.cos(angle), 6),
+						 round(lat + distance * math.sin(angle), 6)])
+		ring.append(list(ring[0]))
+		return ring
+
+	def _ugc(self, state: str) -> str:
+		return f'{state}Z{self.random.randint(1, 999):03d}'
+
+	def _time(self, max_hours: float = 48) -> datetime:
+		return BASE_TIME + timedelta(minutes=self.random.randint(0, int(max_hours * 60)))
+
+	def alert(self) -> dict:
+		"""Generate an alert feature, with VTEC, UGC and SAME codes, and (for most
+		alerts) a polygon
+		"""
+		phenomenon, significance, event = self.random.choice(ALERT_EVENTS)
+		office = self.random.choice(OFFICES)
+		state = self.random.choice(STATES)
+		sent_at = self._time()
+		ends_at = sent_at + timedelta(hours=self.random.choice((1, 3, 6, 12, 24)))
+		alert_id = (f'urn:oid:2.49.0.1.840.0.{self.random.getrandbits(160):040x}'
+					f'.001.{self.random.randint(1, 3)}')
+		url = f'https://api.weather.gov/alerts/{alert_id}'
+		vtec = (f'/O.{self.random.choice(VTEC_ACTIONS)}.K{office}.{phenomenon}.'
+				f'{significance}.{self.random.randint(1, 9999):04d}.'
+				f'{sent_at:%y%m%dT%H%MZ}-{ends_at:%y%m%dT%H%MZ}/')
+		ugc_codes = sorted({self._ugc(state) for _ in range(self.random.randint(1, 12))})
+		same_codes = [f'0{self.random.randint(1, 56):02d}{self.random.randint(1, 999):03d}'
+					  for _ in ugc_codes]
+		geometry = None
+		if self.random.random() < 0.8:
+			geometry = {'type': 'Polygon',
+						'coordinates': [self._ring(self._point(),
+												   self.random.uniform(0.1, 1.0),
+												   self.random.randint(4, 24))]}
+		references = [{
+			'@id':			f'https://api.weather.gov/alerts/{alert_id}.{i}',
+			'identifier':	f'{alert_id}.{i}',
+			'sender':		'w-nws.webmaster@noaa.gov',
+			'sent':			to_api_timestamp(sent_at - timedelta(hours=i + 1)),
+		} for i in range(self.random.randint(0, 3))]
+		return {
+			'id':			url,
+			'type':			'Feature',
+			'geometry':		geometry,
+			'properties':	{
+				'@id':				url,
+				'id':				alert_id,
+				'areaDesc':			'; '.join(f'Zone {code}' for code in ugc_codes),
+				'geocode':			{'SAME': same_codes, 'UGC': ugc_codes},
+				'affectedZones':	[f'https://api.weather.gov/zones/forecast/{code}'
+									 for code in ugc_codes],
+				'references':		references,
+				'sent':				to_api_timestamp(sent_at),
+				'effective':		to_api_timestamp(sent_at),
+				'onset':			to_api_timestamp(sent_at),
+				'expires':			to_api_timestamp(ends_at - timedelta(minutes=30)),
+				'ends':				to_api_timestamp(ends_at),
+				'status':			'Actual',
+				'messageType':		'Alert' if not references else 'Update',
+				'category':			'Met',
+				'severity':			self.random.choice(('Minor', 'Moderate', 'Severe')),
+				'certainty':		self.random.choice(('Possible', 'Likely', 'Observed')),
+				'urgency':			self.random.choice(('Expected', 'Immediate')),
+				'event':			event,
+				'sender':			'w-nws.webmaster@noaa.gov',
+				'senderName':		f'NWS {office}',
+				'headline':			f'{event} issued by NWS {office}',
+				'description':		f'* WHAT...{event}.\n\n* WHERE...' * 4,
+				'instruction':		'Take the appropriate precautions.',
+				'response':			self.random.choice(('Shelter', 'Prepare', 'Monitor')),
+				'parameters':		{
+					'AWIPSidentifier':	[f'{phenomenon}{office}'],
+					'WMOidentifier':	[f'WWUS5{self.random.randint(1, 9)} K{office} '
+										 f'{sent_at:%d%H%M}'],
+					'NWSheadline':		[f'{event.upper()} IN EFFECT'],
+					'BLOCKCHANNEL':		['EAS', 'NWEM', 'CMAS'],
+					'VTEC':				[vtec],
+				},
+			},
+		}
+
+	def alerts(self, n_alerts: int) -> dict:
+		"""Generate an /alerts response"""
+		return to_feature_collection([self.alert() for _ in range(n_alerts)])
+
+	def products(self, n_products: int, product_type: str = None) -> dict:
+		"""Generate a /products or /products/types/{typeId} response"""
+		products = []
+		for _ in range(n_products):
+			code, name = (self.random.choice(PRODUCT_TYPES) if product_type is None
+						  else (product_type, dict(PRODUCT_TYPES).get(product_type)))
+			product_id = (f'{self.random.getrandbits(32):08x}-'
+						  f'{self.random.getrandbits(16):04x}-'
+						  f'{self.random.getrandbits(16):04x}-'
+						  f'{self.random.getrandbits(16):04x}-'
+						  f'{self.random.getrandbits(48):012x}')
+			products.append({
+				'@id':				f'https://api.weather.gov/products/{product_id}',
+				'id':				product_id,
+				'wmoCollectiveId':	f'FXUS{self.random.randint(50, 69)}',
+				'issuingOffice':	f'K{self.random.choice(OFFICES)}',
+				'issuanceTime':		to_api_timestamp(self._time()),
+				'productCode':		code,
+				'productName':		name,
+			})
+		return {'@graph': products}
+
+	def observation(self, station_id: str, observed_at: datetime) -> dict:
+		"""Generate an observation, with a raw METAR that agrees with its measures"""
+		temperature = round(self.random.uniform(-20, 40), 1)
+		dew_point = round(temperature - self.random.uniform(0, 25), 1)
+		wind_direction = self.random.randrange(0, 360, 10)
+		wind_speed_kt = self.random.randint(0, 30)
+		pressure_inhg = round(self.random.uniform(29.5, 30.5), 2)
+		cover = self.random.choice(CLOUD_COVER_CODES)
+		cloud_base_ft = self.random.randint(10, 250) * 100
+		cloud_layers = [{
+			'base':		to_measure(None if cover in ('SKC', 'CLR')
+								   else round(cloud_base_ft * 0.3048, -1), 'wmoUnit:m'),
+			'amount':	cover,
+		}]
+		sky = cover if cover in ('SKC', 'CLR') else f'{cover}{cloud_base_ft // 100:03d}'
+		temperature_group = (f'{"M" if temperature < 0 else ""}{abs(round(temperature)):02d}/'
+							 f'{"M" if dew_point < 0 else ""}{abs(round(dew_point)):02d}')
+		raw_message = (f'{station_id} {observed_at:%d%H%M}Z '
+					   f'{wind_direction:03d}{wind_speed_kt:02d}KT 10SM {sky} '
+					   f'{temperature_group} A{round(pressure_inhg * 100):04d} RMK AO2')
+		url = (f'https://api.weather.gov/stations/{station_id}/observations/'
+			   f'{to_api_timestamp(observed_at)}')
+		return {
+			'id':			url,
+			'type':			'Feature',
+			'geometry':		{'type': 'Point', 'coordinates': list(self._point())},
+			'properties':	{
+				'@id':							url,
+				'elevation':					to_measure(self.random.randint(0, 2000),
+														   'wmoUnit:m'),
+				'station':						f'https://api.weather.gov/stations/'
+												f'{station_id}',
+				'timestamp':					to_api_timestamp(observed_at),
+				'rawMessage':					raw_message,
+				'textDescription':				METAR_CLOUD_COVER_MAP[cover],
+				'icon':							None,
+				'presentWeather':				[],
+				'temperature':					to_measure(temperature, 'wmoUnit:degC'),
+				'dewpoint':						to_measure(dew_point, 'wmoUnit:degC'),
+				'windDirection':				to_measure(wind_direction,
+														   'wmoUnit:degree_(angle)'),
+				'windSpeed':					to_measure(round(wind_speed_kt * 1.852, 3),
+														   'wmoUnit:km_h-1'),
+				'windGust':						to_measure(None, 'wmoUnit:km_h-1'),
+				'barometricPressure':			to_measure(round(pressure_inhg * 3386.39),
+														   'wmoUnit:Pa'),
+				'seaLevelPressure':				to_measure(None, 'wmoUnit:Pa'),
+				'visibility':					to_measure(16090, 'wmoUnit:m'),
+				'maxTemperatureLast24Hours':	to_measure(None, 'wmoUnit:degC'),
+				'minTemperatureLast24Hours':	to_measure(None, 'wmoUnit:degC'),
+				'precipitationLastHour':		to_measure(None, 'wmoUnit:mm'),
+				'precipitationLast3Hours':		to_measure(None, 'wmoUnit:mm'),
+				'precipitationLast6Hours':		to_measure(None, 'wmoUnit:mm'),
+				'relativeHumidity':				to_measure(None, 'wmoUnit:percent'),
+				'windChill':					to_measure(None, 'wmoUnit:degC'),
+				'heatIndex':					to_measure(None, 'wmoUnit:degC'),
+				'cloudLayers':					cloud_layers,
+			},
+		}
+
+	def observations(self, n_observations: int, station_id: str = 'KXYZ') -> dict:
+		"""Generate a /stations/{stationId}/observations response, with an observation
+		every 20 minutes, most recent first
+		"""
+		return to_feature_collection([
+			self.observation(station_id, BASE_TIME - timedelta(minutes=20 * i))
+			for i in range(n_observations)
+		])
+
+	def zone(
+		self,
+		zone_id: str = None,
+		n_polygons: int = ZONE_POLYGONS,
+		n_points: int = ZONE_POINTS_PER_POLYGON
+	) -> dict:
+		"""Generate a zone feature whose MultiPolygon has `n_polygons` polygons of
+		`n_points` points each
+		"""
+		state = self.random.choice(STATES)
+		zone_id = zone_id or self._ugc(state)
+		url = f'https://api.weather.gov/zones/forecast/{zone_id}'
+		center = self._point()
+		polygons = []
+		for _ in range(n_polygons):
+			polygon_center = (center[0] + self.random.uniform(-2, 2),
+							  center[1] + self.random.uniform(-2, 2))
+			polygons.append([self._ring(polygon_center, self.random.uniform(0.05, 0.5),
+										n_points)])
+		office = self.random.choice(OFFICES)
+		return {
+			'id':			url,
+			'type':			'Feature',
+			'geometry':		{'type': 'MultiPolygon', 'coordinates': polygons},
+			'properties':	{
+				'@id':						url,
+				'id':						zone_id,
+				'type':						'public',
+				'name':						f'Zone {zone_id}',
+				'effectiveDate':			to_api_timestamp(BASE_TIME),
+				'expirationDate':			'2200-01-01T00:00:00+00:00',
+				'state':					state,
+				'cwa':						[office],
+				'forecastOffices':			[f'https://api.weather.gov/offices/{office}'],
+				'timeZone':					['America/New_York'],
+				'observationStations':		[f'https://api.weather.gov/stations/K{office}'],
+				'gridIdentifier':			office,
+				'awipsLocationIdentifier':	office,
+			},
+		}
+
+	def zones(
+		self,
+		n_zones: int,
+		n_polygons: int = ZONE_POLYGONS,
+		n_points: int = ZONE_POINTS_PER_POLYGON
+	) -> dict:
+		"""Generate a /zones response, with each zone's geometry"""
+		return to_feature_collection([self.zone(None, n_polygons, n_points)
+									  for _ in range(n_zones)])
+
+	def radar_station(self, station_id: str) -> dict:
+		"""Generate a radar station feature, with its RDA, performance, and adaptation
+		data
+		"""
+		url = f'https://api.weather.gov/radar/stations/{station_id}'
+		refreshed_at = to_api_timestamp(self._time())
+		return {
+			'id':			url,
+			'type':			'Feature',
+			'geometry':		{'type': 'Point', 'coordinates': list(self._point())},
+			'properties':	{
+				'@id':			url,
+				'id':			station_id,
+				'name':			f'Radar {station_id}',
+				'stationType':	'WSR-88D',
+				'timeZone':		'America/Chicago',
+				'elevation':	to_measure(self.random.randint(0, 2000), 'wmoUnit:m'),
+				'latency':		{
+					'current':					to_measure(self.random.uniform(100, 600),
+														   'nwsUnit:s'),
+					'average':					to_measure(self.random.uniform(100, 600),
+														   'nwsUnit:s'),
+					'max':						to_measure(self.random.uniform(300, 900),
+														   'nwsUnit:s'),
+					'levelTwoLastReceivedTime':	refreshed_at,
+					'maxLatencyTime':			refreshed_at,
+					'reportingHost':			'rdss',
+					'host':						f'ldm{self.random.randint(1, 6)}',
+				},
+				'rda':			{
+					'timestamp':		refreshed_at,
+					'reportingHost':	'rdss',
+					'properties':		{
+						'resolutionVersion':					None,
+						'nl2Path':								'Default',
+						'volumeCoveragePattern':				self.random.choice(
+							('R12', 'R35', 'R212', 'R215')),
+						'controlStatus':						'RPG (Remote) Only',
+						'buildNumber':							22.1,
+						'alarmSummary':							'No Alarms',
+						'mode':									'Operational',
+						'generatorState':						'Utility PWR Available',
+						'superResolutionStatus':				'Enabled',
+						'operabilityStatus':					'RDA - On-Line',
+						'status':								'Operate',
+						'averageTransmitterPower':				to_measure(
+							self.random.randint(200, 400), 'wmoUnit:W'),
+						'reflectivityCalibrationCorrection':	to_measure(
+							round(self.random.uniform(-1, 1), 2), 'wmoUnit:dB'),
+					},
+				},
+				'performance':	{
+					'timestamp':		refreshed_at,
+					'reportingHost':	'rdss',
+					'properties':		{
+						'performanceCheckTime':				refreshed_at,
+						'ntp_status':						0,
+						'commandChannel':					'Single',
+						'linearity':						1.0,
+						'powerSource':						'Utility',
+						'transmitterRecycleCount':			self.random.randint(0, 5),
+						'transitionalPowerSource':			'OK',
+						'elevationEncoderLight':			'OK',
+						'azimuthEncoderLight':				'OK',
+						'fuelLevel':						to_measure(
+							self.random.randint(0, 100), 'wmoUnit:percent'),
+						'dynamicRange':						to_measure(93, 'wmoUnit:dB'),
+						'transmitterPeakPower':				to_measure(
+							round(self.random.uniform(500, 800), 2), 'wmoUnit:kW'),
+						'transmitterImbalance':				to_measure(0.14, 'wmoUnit:dB'),
+						'transmitterLeavingAirTemperature':	to_measure(
+							round(self.random.uniform(15, 35), 2), 'wmoUnit:degC'),
+						'shelterTemperature':				to_measure(
+							round(self.random.uniform(15, 30), 2), 'wmoUnit:degC'),
+						'radomeAirTemperature':				to_measure(
+							round(self.random.uniform(-10, 40), 2), 'wmoUnit:degC'),
+						'horizontalNoiseTemperature':		to_measure(-53.2, 'wmoUnit:degC'),
+						'horizontalDeltadbZ0':				to_measure(None, 'wmoUnit:dB'),
+						'verticalDeltadbZ0':				to_measure(None, 'wmoUnit:dB'),
+						'receiverBias':						to_measure(-2.59, 'wmoUnit:dB'),
+						'horizontalShortPulseNoise':		to_measure(-82.5, 'wmoUnit:dB_m-1'),
+						'horizontalLongPulseNoise':			to_measure(-87.3, 'wmoUnit:dB_m-1'),
+					},
+				},
+				'adaptation':	{
+					'timestamp':						refreshed_at,
+					'reportingHost':					'rdss',
+					'transmitterFrequency':				self.random.randint(2700, 3000),
+					'antennaGainIncludingRadome':		45.5,
+					'pathLossWG04Circulator':			0.5,
+					'pathLossAT4Attenuator':			16.0,
+				},
+			},
+		}
+
+	def radar_stations(self, n_stations: int) -> dict:
+		"""Generate a /radar/stations response"""
+		return to_feature_collection([self.radar_station(f'K{i:03d}')
+									  for i in range(n_stations)])
+
+	def radar_server(self, host: str, n_radars: int = NATIONAL_VOLUMES['radar_stations']) -> dict:
+		"""Generate a radar server, with its hardware, command, LDM, ping, and network
+		sub-objects
+		"""
+		refreshed_at = to_api_timestamp(self._time())
+		interfaces = {}
+		for name in ('eth0', 'eth1'):
+			interfaces[name] = {
+				'interface':	name,
+				'active':		True,
+				'transNoError':	self.random.randint(0, 10 ** 6),
+				'transError':	0,
+				'transDropped':	0,
+				'transOverrun':	0,
+				'recvNoError':	self.random.randint(0, 10 ** 6),
+				'recvError':	0,
+				'recvDropped':	self.random.randint(0, 100),
+				'recvOverrun':	0,
+			}
+		return {
+			'id':				host,
+			'type':				'ldm',
+			'active':			True,
+			'primary':			True,
+			'aggregate':		False,
+			'locked':			False,
+			'radarNetworkUp':	True,
+			'collectionTime':	refreshed_at,
+			'reportingHost':	'rdss',
+			'hardware':			{
+				'timestamp':		refreshed_at,
+				'uptime':			to_api_timestamp(self._time()),
+				'cpuIdle':			round(self.random.uniform(50, 100), 2),
+				'memory':			round(self.random.uniform(20, 80), 2),
+				'ioUtilization':	round(self.random.uniform(0, 10), 2),
+				'disk':				self.random.randint(1, 90),
+				'load1':			round(self.random.uniform(0, 4), 2),
+				'load5':			round(self.random.uniform(0, 4), 2),
+				'load15':			round(self.random.uniform(0, 4), 2),
+			},
+			'command':			{
+				'timestamp':			refreshed_at,
+				'lastExecuted':			'Primary',
+				'lastExecutedTime':		to_api_timestamp(self._time()),
+				'lastNexradDataTime':	refreshed_at,
+				'lastReceived':			'Primary',
+				'lastReceivedTime':		to_api_timestamp(self._time()),
+			},
+			'ldm':				{
+				'timestamp':		refreshed_at,
+				'latestProduct':	refreshed_at,
+				'oldestProduct':	to_api_timestamp(self._time()),
+				'storageSize':		self.random.randint(10 ** 9, 10 ** 10),
+				'count':			self.random.randint(10 ** 4, 10 ** 5),
+				'active':			True,
+			},
+			'ping':				{
+				'timestamp':	refreshed_at,
+				'targets':		{
+					'ldm':		{f'ldm{i}': True for i in range(1, 5)},
+					'radar':	{f'K{i:03d}': self.random.random() > 0.02
+								 for i in range(n_radars)},
+					'server':	{f'ldm{i}': True for i in range(1, 5)},
+					'misc':		{'eth0': True, 'rocRouter': True, 'backupIp': True},
+				},
+			},
+			'network':			dict(interfaces, timestamp=refreshed_at),
+		}
+
+	def radar_servers(self, n_servers: int) -> dict:
+		"""Generate a /radar/servers response"""
+		return {'@graph': [self.radar_server(f'ldm{i}') for i in range(n_servers)]}
@@ -0,0 +1,6 @@
+"""Make the helpers shared by the tests and benchmarks (eg `replay`) importable"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
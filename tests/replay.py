@@ -0,0 +1,112 @@
+"""Answer requests from recorded responses instead of the network
+
+`ReplayAdapter` is a transport adapter that serves a fixed set of responses by URL, so
+that every fetcher can be run offline exactly as it runs against the API: the response
+goes through `requests-cache`, `api_request`, and JSON decoding like any other. It's
+used by the tests, and to benchmark the parsers (see `tests/benchmarks`).
+
+For example:
+
+.. code-block:: python
+
+	session = CachedSession(backend='memory', expire_after=DO_NOT_CACHE)
+	adapter = install_replay(session)
+	adapter.add(NWS_API_ALERTS, alerts_payload)
+	alerts = get_alerts(session)
+
+A request for a URL that hasn't been added gets a 404, with a body shaped like the
+API's error responses.
+"""
+
+import json
+import logging
+from typing import Dict, Tuple
+from requests import Response, PreparedRequest
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from requests_cache import CachedSession
+logger = logging.getLogger(__name__)
+
+
+REPLAY_CONTENT_TYPE = 'application/geo+json'
+
+
+def encode_payload(payload) -> bytes:
+	"""Encode a payload the way the API sends it. Bytes and strings are sent as-is."""
+	if isinstance(payload, bytes):
+		return payload
+	if isinstance(payload, str):
+		return payload.encode('utf-8')
+	return json.dumps(payload).encode('utf-8')
+
+
+class ReplayAdapter(BaseAdapter):
+	"""A transport adapter that answers requests from responses added by URL
+
+	Payloads are encoded once when they're added, so replaying a response costs about
+	as much as receiving it from the network, without the wait.
+	"""
+
+	def __init__(self):
+		super().__init__()
+		self._responses: Dict[str, Tuple[int, bytes, dict]] = {}
+		self.n_requests = 0
+
+	def __contains__(self, url: str) -> bool:
+		return url in self._responses
+
+	def add(
+		self,
+		url: str,
+		payload,
+		status_code: int = 200,
+		headers: dict = None
+	):
+		"""Answer requests for `url` with a payload (a JSON-serializable object, or
+		already encoded bytes or text)
+		"""
+		self._responses[url] = (status_code, encode_payload(payload), headers or {})
+
+	def remove(self, url: str):
+		self._responses.pop(url, None)
+
+	def send(self, request: PreparedRequest, **kwargs) -> Response:
+		self.n_requests += 1
+		status_code, content, headers = self._responses.get(request.url, (404, None, {}))
+		if content is None:
+			logger.debug(f'No response to replay for {request.url}')
+			content = encode_payload({
+				'title':	'Not Found',
+				'status':	404,
+				'detail':	f'No response to replay for {request.url}',
+			})
+		response = Response()
+		response.status_code = status_code
+		response.reason = 'OK' if status_code < 400 else 'Not Found'
+		response.headers = CaseInsensitiveDict({
+			'Content-Type':		REPLAY_CONTENT_TYPE,
+			'Content-Length':	str(len(content)),
+		})
+		response.headers.update(headers)
+		response._content = content
+		response.encoding = 'utf-8'
+		response.url = request.url
+		response.request = request
+		return response
+
+	def close(self):
+		pass
+
+
+def install_replay(
+	session: CachedSession,
+	adapter: ReplayAdapter = None
+) -> ReplayAdapter:
+	"""Answer every request made with the given session from a `ReplayAdapter`
+
+	:returns: The adapter, to add responses to
+	"""
+	adapter = adapter or ReplayAdapter()
+	session.mount('http://', adapter)
+	session.mount('https://', adapter)
+	return adapter